@@ -0,0 +1,412 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the bridge's hot paths.
+
+Builds synthetic fixtures in a temporary directory and times:
+
+    transcript_tail   get_latest_assistant_response on transcripts of N lines
+    markdown_to_html  conversion of responses of N bytes
+    session_upsert    save_session_mapping into a store of N sessions
+    session_lookup    load_session_mapping + lookup in a store of N sessions
+    processed_load    load_processed_messages with N processed update IDs
+    git_probe         get_recent_changes on a generated repo with N files
+    stop_hook         full stop.py wall time against the local fake Bot API
+    history_summary   per-project summary over N Stop events in the columnar history
+
+Results are written as JSON (with the current commit) so runs can be
+compared; --compare flags cases that got slower than a baseline file.
+
+Usage:
+    python benchmarks/bench_hotpaths.py --json bench.json
+    python benchmarks/bench_hotpaths.py --quick --only transcript,markdown
+    python benchmarks/bench_hotpaths.py --json new.json --compare bench.json --threshold 1.25
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+SCRIPTS_DIR = BENCH_DIR.parent / 'scripts'
+sys.path.insert(0, str(BENCH_DIR))
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+import stop
+import telegram_listener
+from fake_bot_api import FakeBotAPI
+
+SIZES = {
+    'transcript_lines': [100, 1000, 10000, 50000],
+    'markdown_bytes': [1024, 4096, 65536],
+    'sessions': [10000, 100000],
+    'processed': [10000, 100000],
+    'git_files': [50000],
+    'history_events': [100000, 1000000],
+}
+
+QUICK_SIZES = {
+    'transcript_lines': [100, 1000],
+    'markdown_bytes': [1024, 4096],
+    'sessions': [1000],
+    'processed': [1000],
+    'git_files': [500],
+    'history_events': [10000],
+}
+
+MARKDOWN_BLOCK = (
+    "## Summary\n"
+    "I updated **three files** and fixed the *flaky* test in `tests/test_io.py`.\n"
+    "- Replaced the `a < b && c > d` check\n"
+    "- Added a retry around the **network** call\n"
+    "```\nfor i in range(3):\n    send()\n```\n\n"
+)
+
+
+# --- Timing ------------------------------------------------------------------
+
+def time_runs(func, runs):
+    """Call func() `runs` times and return the durations in seconds."""
+    durations = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def summarize(durations):
+    """Millisecond statistics for a list of durations in seconds."""
+    ms = sorted(d * 1000 for d in durations)
+    return {
+        'runs': len(ms),
+        'min_ms': round(ms[0], 3),
+        'median_ms': round(statistics.median(ms), 3),
+        'p95_ms': round(ms[min(len(ms) - 1, int(round(0.95 * len(ms))) - 1)], 3),
+        'max_ms': round(ms[-1], 3),
+    }
+
+
+# --- Fixtures ----------------------------------------------------------------
+
+def write_transcript(path, lines, seed=0):
+    """Write a Claude Code style JSONL transcript of `lines` entries."""
+    rng = random.Random(seed)
+    filler = "lorem ipsum dolor sit amet " * 20
+    with open(path, 'w') as f:
+        for i in range(lines):
+            kind = rng.random()
+            if kind < 0.4:
+                entry = {'type': 'user', 'message': {'role': 'user', 'content': f"request {i}: {filler}"}}
+            elif kind < 0.7:
+                entry = {'type': 'assistant', 'message': {'role': 'assistant', 'content': [
+                    {'type': 'tool_use', 'id': f"tool-{i}", 'name': 'Bash', 'input': {'command': 'ls -la'}},
+                ]}}
+            else:
+                entry = {'type': 'assistant', 'message': {'role': 'assistant', 'content': [
+                    {'type': 'text', 'text': f"Response {i}. {filler}"},
+                ]}}
+            f.write(json.dumps(entry) + '\n')
+        # Always end on a tool call so the tail scan has to skip something
+        f.write(json.dumps({'type': 'assistant', 'message': {'role': 'assistant', 'content': [
+            {'type': 'tool_use', 'id': 'last', 'name': 'Read', 'input': {}},
+        ]}}) + '\n')
+    return path
+
+
+def make_markdown(size):
+    """Markdown response of roughly `size` bytes."""
+    return (MARKDOWN_BLOCK * (size // len(MARKDOWN_BLOCK) + 1))[:size]
+
+
+def write_session_store(home, count):
+    """Write ~/.claude/.sessions with `count` sessions; returns one short ID."""
+    now = int(time.time())
+    sessions = {
+        f"{i:06x}": {
+            'session_id': f"session-{i:08d}-0000-0000-0000-000000000000",
+            'cwd': f"/home/user/projects/project-{i % 500}",
+            'timestamp': now - i,
+            'start_time': now - i - 600,
+        }
+        for i in range(count)
+    }
+    claude_dir = Path(home) / '.claude'
+    claude_dir.mkdir(parents=True, exist_ok=True)
+    (claude_dir / '.sessions').write_text(json.dumps(sessions, indent=2))
+    return f"{count // 2:06x}"
+
+
+def write_processed_messages(home, count):
+    """Write ~/.claude/.processed_messages with `count` update IDs."""
+    claude_dir = Path(home) / '.claude'
+    claude_dir.mkdir(parents=True, exist_ok=True)
+    start = 100000000
+    (claude_dir / '.processed_messages').write_text(
+        ''.join(f"{start + i}\n" for i in range(count))
+    )
+
+
+def write_history(root, count):
+    """Write `count` Stop events over the last ~90 days into a columnar history."""
+    from claude_bridge.history import append_events
+
+    rng = random.Random(0)
+    now = time.time()
+    outcomes = ['sent'] * 18 + ['dedup', 'failed']
+    events = [{
+        'ts': now - (count - i) * 90 * 86400 / count, 'session': f"{rng.randrange(5000):06x}",
+        'project': f"project-{rng.randrange(40)}", 'outcome': rng.choice(outcomes),
+        'total_ms': rng.lognormvariate(6, 0.5), 'git_ms': rng.lognormvariate(3, 1),
+        'send_ms': rng.lognormvariate(5.5, 0.4), 'msg_len': rng.randrange(100, 4000),
+        'changes': rng.randrange(20), 'chats': 1,
+    } for i in range(count)]
+    for start in range(0, count, 100000):
+        append_events(events[start:start + 100000], root)
+
+
+def git(repo, *args):
+    subprocess.run(
+        ['git', '-c', 'user.name=bench', '-c', 'user.email=bench@example.com', *args],
+        cwd=repo, check=True, capture_output=True,
+    )
+
+
+def make_git_repo(path, files, modified=20, untracked=5):
+    """Create a committed repo with `files` files plus a few working-tree changes."""
+    path = Path(path)
+    per_dir = 500
+    for i in range(files):
+        directory = path / f"pkg{i // per_dir:04d}"
+        if i % per_dir == 0:
+            directory.mkdir(parents=True, exist_ok=True)
+        (directory / f"module_{i}.py").write_text(f"VALUE = {i}\n")
+    git(path, 'init', '-q')
+    git(path, 'add', '-A')
+    git(path, 'commit', '-q', '-m', 'Initial commit')
+
+    for i in range(min(modified, files)):
+        (path / f"pkg{i // per_dir:04d}" / f"module_{i}.py").write_text(f"VALUE = {i + 1}\n")
+    for i in range(untracked):
+        (path / f"new_file_{i}.py").write_text("NEW = True\n")
+    return path
+
+
+class home_dir:
+    """Temporarily point HOME (Path.home, expanduser) at a directory."""
+
+    def __init__(self, path):
+        self.path = str(path)
+
+    def __enter__(self):
+        self.saved = os.environ.get('HOME')
+        os.environ['HOME'] = self.path
+
+    def __exit__(self, *exc):
+        if self.saved is None:
+            os.environ.pop('HOME', None)
+        else:
+            os.environ['HOME'] = self.saved
+
+
+# --- Cases -------------------------------------------------------------------
+
+def bench_transcript(tmp, sizes, runs):
+    results = {}
+    for lines in sizes['transcript_lines']:
+        path = write_transcript(Path(tmp) / f"transcript_{lines}.jsonl", lines)
+        assert stop.get_latest_assistant_response(str(path))
+        result = summarize(time_runs(lambda: stop.get_latest_assistant_response(str(path)), runs))
+        result['bytes'] = path.stat().st_size
+        results[f"transcript_tail[{lines}]"] = result
+    return results
+
+
+def bench_markdown(tmp, sizes, runs):
+    results = {}
+    for size in sizes['markdown_bytes']:
+        text = make_markdown(size)
+        results[f"markdown_to_html[{size}]"] = summarize(
+            time_runs(lambda: stop.markdown_to_html(text), runs * 10)
+        )
+    return results
+
+
+def bench_sessions(tmp, sizes, runs):
+    results = {}
+    for count in sizes['sessions']:
+        home = Path(tmp) / f"home_sessions_{count}"
+        short_id = write_session_store(home, count)
+        with home_dir(home):
+            counter = iter(range(10 ** 9))
+            results[f"session_upsert[{count}]"] = summarize(time_runs(
+                lambda: stop.save_session_mapping(f"n{next(counter):05x}", 'new-session', '/tmp'),
+                runs,
+            ))
+
+            def lookup():
+                assert telegram_listener.load_session_mapping()[short_id]
+
+            results[f"session_lookup[{count}]"] = summarize(time_runs(lookup, runs))
+    return results
+
+
+def bench_processed(tmp, sizes, runs):
+    results = {}
+    for count in sizes['processed']:
+        home = Path(tmp) / f"home_processed_{count}"
+        write_processed_messages(home, count)
+        with home_dir(home):
+            assert len(stop.load_processed_messages()) == count
+            results[f"processed_load[{count}]"] = summarize(
+                time_runs(stop.load_processed_messages, runs)
+            )
+    return results
+
+
+def bench_git(tmp, sizes, runs):
+    results = {}
+    for files in sizes['git_files']:
+        start = time.perf_counter()
+        repo = make_git_repo(Path(tmp) / f"repo_{files}", files)
+        setup_s = time.perf_counter() - start
+        assert stop.get_recent_changes(str(repo))  # Warm the index/stat cache
+        result = summarize(time_runs(lambda: stop.get_recent_changes(str(repo)), runs))
+        result['setup_s'] = round(setup_s, 1)
+        results[f"git_probe[{files}]"] = result
+    return results
+
+
+def bench_stop_hook(tmp, sizes, runs):
+    home = Path(tmp) / 'home_hook'
+    (home / '.claude').mkdir(parents=True)
+    (home / '.claude' / '.chat_id').write_text('4242')
+    repo = make_git_repo(Path(tmp) / 'hook_project', 1000)
+    transcript = write_transcript(Path(tmp) / 'hook_transcript.jsonl', 1000)
+    stdin = json.dumps({
+        'session_id': 'bench-session', 'cwd': str(repo), 'transcript_path': str(transcript),
+    })
+
+    with FakeBotAPI() as api:
+        env = dict(os.environ, HOME=str(home), TELEGRAM_API='123456:BENCH',
+                   TELEGRAM_API_BASE=api.base_url, BRIDGE_TRACE='0')
+
+        def run_hook():
+            subprocess.run([sys.executable, str(SCRIPTS_DIR / 'stop.py')], input=stdin,
+                           text=True, capture_output=True, cwd=tmp, env=env, timeout=60)
+
+        durations = time_runs(run_hook, runs)
+        assert len(api.sent_messages) == runs, "Stop hook did not deliver every notification"
+    return {'stop_hook': summarize(durations)}
+
+
+def bench_history(tmp, sizes, runs):
+    from claude_bridge.history import load, summary_by
+
+    results = {}
+    for count in sizes['history_events']:
+        root = Path(tmp) / f"history_{count}"
+        write_history(root, count)
+        assert len(load(root)) == count
+        results[f"history_summary[{count}]"] = summarize(time_runs(
+            lambda: summary_by(load(root), 'project'), runs,
+        ))
+    return results
+
+
+CASES = {
+    'transcript': bench_transcript,
+    'markdown': bench_markdown,
+    'sessions': bench_sessions,
+    'processed': bench_processed,
+    'git': bench_git,
+    'hook': bench_stop_hook,
+    'history': bench_history,
+}
+
+
+def current_commit():
+    try:
+        result = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BENCH_DIR,
+                                capture_output=True, text=True)
+        return result.stdout.strip() or None
+    except OSError:
+        return None
+
+
+def run_suite(only=None, quick=False, runs=5):
+    """Run the selected cases and return the full result document."""
+    sizes = QUICK_SIZES if quick else SIZES
+    results = {}
+    with tempfile.TemporaryDirectory(prefix='bridge-bench-') as tmp:
+        for name, case in CASES.items():
+            if only and name not in only:
+                continue
+            print(f"⏱️  {name}...", file=sys.stderr)
+            results.update(case(tmp, sizes, runs))
+
+    return {
+        'commit': current_commit(),
+        'timestamp': int(time.time()),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'quick': quick,
+        'results': results,
+    }
+
+
+def compare(results, baseline, threshold):
+    """Return (name, baseline_ms, current_ms) for cases slower than threshold x baseline."""
+    regressions = []
+    for name, result in results['results'].items():
+        previous = baseline.get('results', {}).get(name)
+        if previous and result['median_ms'] > previous['median_ms'] * threshold:
+            regressions.append((name, previous['median_ms'], result['median_ms']))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the bridge's hot paths")
+    parser.add_argument("--runs", type=int, default=5, help="Timed runs per case")
+    parser.add_argument("--quick", action="store_true", help="Small fixtures (smoke test)")
+    parser.add_argument("--only", help=f"Comma-separated cases: {', '.join(CASES)}")
+    parser.add_argument("--json", metavar="PATH", help="Write results to a JSON file")
+    parser.add_argument("--compare", metavar="PATH", help="Baseline JSON to compare medians against")
+    parser.add_argument("--threshold", type=float, default=1.25,
+                        help="Slowdown factor counted as a regression (default 1.25)")
+    args = parser.parse_args()
+
+    only = set(args.only.split(',')) if args.only else None
+    unknown = (only or set()) - set(CASES)
+    if unknown:
+        parser.error(f"unknown case(s): {', '.join(sorted(unknown))}")
+
+    os.environ.setdefault('BRIDGE_TRACE', '0')  # Don't record benchmark spans
+    report = run_suite(only, args.quick, args.runs)
+
+    for name, result in report['results'].items():
+        print(f"{name:<28} median {result['median_ms']:>10.3f} ms  "
+              f"p95 {result['p95_ms']:>10.3f} ms  ({result['runs']} runs)")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2))
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text())
+        regressions = compare(report, baseline, args.threshold)
+        for name, before, after in regressions:
+            print(f"❌ {name}: {before:.3f} ms -> {after:.3f} ms")
+        if regressions:
+            sys.exit(1)
+        print(f"✅ No regressions against {baseline.get('commit') or args.compare}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Startup-time benchmark for the Stop hook entry point and the bridge CLI.
+
+Imports stop.py in a fresh interpreter under `python -X importtime`, reports
+the cumulative import cost and fails when it exceeds the regression budget
+or when a deferred heavy module is pulled in at import time.
+
+--cli measures every `bridge <command>` instead: the dispatcher plus the
+command's module, each against the CLI budget. It also fails if importing
+the dispatcher alone pulls in any command module.
+
+Usage:
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --runs 10 --max-ms 40
+    python benchmarks/bench_startup.py --json startup.json
+    python benchmarks/bench_startup.py --cli
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent / 'scripts'
+
+# Modules stop.py must only import lazily, inside the functions that need them
+DEFERRED_MODULES = ['requests', 'dotenv', 'urllib3', 'hashlib']
+
+DEFAULT_MAX_MS = 40.0
+
+# Per-command budget for `bridge <command>` (dispatcher + command module)
+DEFAULT_CLI_MAX_MS = 60.0
+
+
+def parse_importtime(stderr):
+    """Parse `-X importtime` output into {module: (self_us, cumulative_us)}."""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line.split(':', 1)[1].split('|')
+            modules[name.strip()] = (int(self_us), int(cumulative_us))
+        except ValueError:
+            continue
+    return modules
+
+
+def measure_import(module='stop', scripts_dir=SCRIPTS_DIR):
+    """Import `module` in a fresh interpreter and return its importtime table."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=scripts_dir,
+        capture_output=True,
+        text=True,
+        env={**os.environ, 'PYTHONDONTWRITEBYTECODE': '1'},
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+    return parse_importtime(result.stderr)
+
+
+def cli_commands(scripts_dir=SCRIPTS_DIR):
+    """{command: module} from the CLI's command table."""
+    sys.path.insert(0, str(scripts_dir))
+    try:
+        from claude_bridge.cli import COMMANDS
+    finally:
+        sys.path.remove(str(scripts_dir))
+    return {name: target.split(':')[0] for name, (target, _) in COMMANDS.items()}
+
+
+def command_cost_ms(modules, module):
+    """Startup cost of one command: the dispatcher plus the command's module."""
+    return sum(modules[name][1] for name in ('claude_bridge', 'claude_bridge.cli', module) if name in modules) / 1000
+
+
+def run_cli_benchmark(runs=5):
+    """Measure every CLI command, and which command modules the dispatcher imports."""
+    commands = cli_commands()
+    results = {}
+    for name, module in commands.items():
+        # A plain import statement: importtime skips modules loaded via importlib
+        costs = [command_cost_ms(measure_import(f'claude_bridge.cli, {module}'), module) for _ in range(runs)]
+        results[name] = {
+            'module': module,
+            'min_ms': round(min(costs), 3),
+            'median_ms': round(statistics.median(costs), 3),
+            'max_ms': round(max(costs), 3),
+        }
+    dispatcher = measure_import('claude_bridge.cli')
+    eager = sorted(m for m in set(commands.values()) if m in dispatcher)
+    return {'runs': runs, 'commands': results, 'eager_command_modules': eager}
+
+
+def run_benchmark(runs=5, module='stop'):
+    """Measure `module` import cost over several fresh interpreters."""
+    cumulative_ms = []
+    deferred_hits = set()
+    for _ in range(runs):
+        modules = measure_import(module)
+        cumulative_ms.append(modules[module][1] / 1000)
+        deferred_hits.update(m for m in DEFERRED_MODULES if m in modules)
+
+    return {
+        'module': module,
+        'runs': runs,
+        'min_ms': round(min(cumulative_ms), 3),
+        'median_ms': round(statistics.median(cumulative_ms), 3),
+        'max_ms': round(max(cumulative_ms), 3),
+        'deferred_modules_imported': sorted(deferred_hits),
+    }
+
+
+def cli_main(args):
+    max_ms = args.max_ms if args.max_ms is not None else DEFAULT_CLI_MAX_MS
+    result = run_cli_benchmark(args.runs)
+    result['max_allowed_ms'] = max_ms
+
+    failures = []
+    for name, stats in result['commands'].items():
+        print(f"bridge {name:<12} median {stats['median_ms']:5.1f} ms "
+              f"(min {stats['min_ms']:.1f}, max {stats['max_ms']:.1f})")
+        if stats['median_ms'] > max_ms:
+            failures.append(f"bridge {name}: median {stats['median_ms']:.1f} ms exceeds budget {max_ms:.1f} ms")
+    if result['eager_command_modules']:
+        failures.append("dispatcher imports command modules: " + ', '.join(result['eager_command_modules']))
+    result['passed'] = not failures
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(result, indent=2))
+
+    for failure in failures:
+        print(f"❌ {failure}")
+    if not failures:
+        print(f"✅ Every command within {max_ms:.0f} ms startup budget")
+    sys.exit(1 if failures else 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Stop hook and bridge CLI import time")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters to measure")
+    parser.add_argument("--max-ms", type=float, default=None,
+                        help=f"Regression budget for the median import time "
+                             f"(default {DEFAULT_MAX_MS}, --cli {DEFAULT_CLI_MAX_MS})")
+    parser.add_argument("--json", metavar="PATH", help="Write results to a JSON file")
+    parser.add_argument("--cli", action="store_true", help="Measure each `bridge <command>` instead of stop.py")
+    args = parser.parse_args()
+
+    if args.cli:
+        cli_main(args)
+    if args.max_ms is None:
+        args.max_ms = DEFAULT_MAX_MS
+
+    result = run_benchmark(args.runs)
+    result['max_allowed_ms'] = args.max_ms
+
+    print(f"stop.py import: median {result['median_ms']:.1f} ms "
+          f"(min {result['min_ms']:.1f}, max {result['max_ms']:.1f}, {args.runs} runs)")
+
+    failures = []
+    if result['median_ms'] > args.max_ms:
+        failures.append(f"median import time {result['median_ms']:.1f} ms exceeds budget {args.max_ms:.1f} ms")
+    if result['deferred_modules_imported']:
+        failures.append("deferred modules imported at startup: " + ', '.join(result['deferred_modules_imported']))
+    result['passed'] = not failures
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(result, indent=2))
+
+    for failure in failures:
+        print(f"❌ {failure}")
+    if not failures:
+        print("✅ Within startup budget")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,404 @@
+#!/usr/bin/env python3
+"""
+Local fake of the Telegram Bot API for tests and load testing.
+
+Implements the subset the bridge uses - sendMessage, editMessageText,
+getUpdates (offset, limit and long-poll timeout), sendDocument,
+setWebhook/deleteWebhook, getFile and file downloads - with
+injectable latency and error responses (429 with retry_after, 5xx). Point the bridge at it with
+TELEGRAM_API_BASE=http://127.0.0.1:<port>.
+
+Incoming user messages are injected with FakeBotAPI.inject_message() or, when
+run standalone, by POSTing {"chat_id": ..., "text": ...} to /_fake/inject.
+GET /_fake/sent lists everything the bot has sent. Files and photos sent by
+the user are injected with FakeBotAPI.inject_file().
+
+Usage:
+    python benchmarks/fake_bot_api.py --port 8081 --latency 0.05 --error-rate 0.1
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+PATH_RE = re.compile(r'^/bot(?P<token>[^/]+)/(?P<method>\w+)$')
+FILE_RE = re.compile(r'^/file/bot(?P<token>[^/]+)/(?P<path>.+)$')
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256  # Avoid SYN drops (1 s retransmits) under bursts
+
+
+class FakeBotAPI:
+    """In-process fake Bot API server with latency and error injection."""
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0, error_rate=0.0,
+                 error_codes=(429, 500, 502), seed=None):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_codes = tuple(error_codes)
+        self.random = random.Random(seed)
+
+        self.sent_messages = []
+        self.documents = []
+        self.edits = []  # (message_id, text) for every successful editMessageText
+        self.requests = []  # (method, status) for every API call
+        self.webhook = None  # Last setWebhook parameters
+        self.files = {}  # file_id -> {'unique_id', 'file_path', 'data', 'report_size'}
+        self.file_downloads = []  # file_path of every file download
+        self.callback_answers = []  # {'callback_query_id', 'text', 'answered_at'} per answerCallbackQuery
+        self._updates = []
+        self._next_update_id = 1
+        self._next_message_id = 1
+        self._forced_errors = []
+        self._cond = threading.Condition()
+
+        self.server = _Server((host, port), self._handler_class())
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        with self._cond:
+            self._cond.notify_all()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # --- Test controls -------------------------------------------------
+
+    def inject_message(self, chat_id, text, date=None, token=None, **message_fields):
+        """Queue an incoming user message (for one bot token, or any); returns its update_id."""
+        with self._cond:
+            update_id = self._next_update_id
+            self._next_update_id += 1
+            message = {
+                'message_id': self._next_message_id,
+                'date': int(date if date is not None else time.time()),
+                'chat': {'id': int(chat_id), 'type': 'private'},
+                'from': {'id': int(chat_id), 'is_bot': False, 'first_name': 'Load'},
+            }
+            if text is not None:
+                message['text'] = text
+            message.update(message_fields)
+            self._next_message_id += 1
+            self._updates.append({'update_id': update_id, 'message': message, '_token': token})
+            self._cond.notify_all()
+            return update_id
+
+    def add_file(self, data, report_size=True):
+        """Store a file for getFile/download; returns its file_id (report_size=False hides its size)."""
+        with self._cond:
+            number = len(self.files) + 1
+            file_id = f"file-{number}"
+            self.files[file_id] = {'unique_id': f"uniq{number}", 'file_path': f"documents/file_{number}",
+                                   'data': data, 'report_size': report_size}
+            return file_id
+
+    def inject_file(self, chat_id, data, caption=None, file_name='file.txt', photo=False,
+                    report_size=True, file_id=None, token=None):
+        """Queue a document (or photo) message; reuse file_id to send the same file again."""
+        file_id = file_id or self.add_file(data, report_size)
+        stored = self.files[file_id]
+        size = {'file_size': len(stored['data'])} if report_size else {}
+        if photo:
+            # Telegram sends several sizes; only the largest is the original
+            thumb = {'file_id': self.add_file(stored['data'][:16]), 'file_unique_id': 'thumb' + stored['unique_id'],
+                     'width': 90, 'height': 60, 'file_size': 16}
+            fields = {'photo': [thumb, dict(size, file_id=file_id, file_unique_id=stored['unique_id'],
+                                            width=1280, height=853)]}
+        else:
+            fields = {'document': dict(size, file_id=file_id, file_unique_id=stored['unique_id'],
+                                       file_name=file_name)}
+        if caption is not None:
+            fields['caption'] = caption
+        return self.inject_message(chat_id, None, token=token, **fields)
+
+    def inject_callback(self, chat_id, data, message_id=None, token=None):
+        """Queue an inline button press on one of our messages; returns the callback query ID."""
+        with self._cond:
+            query_id = f"cb-{self._next_update_id}"
+            self._updates.append({'update_id': self._next_update_id, '_token': token, 'callback_query': {
+                'id': query_id,
+                'from': {'id': int(chat_id), 'is_bot': False, 'first_name': 'Load'},
+                'message': {'message_id': message_id or 0, 'chat': {'id': int(chat_id), 'type': 'private'}},
+                'chat_instance': str(chat_id),
+                'data': data,
+            }})
+            self._next_update_id += 1
+            self._cond.notify_all()
+            return query_id
+
+    def inject_update(self, update):
+        """Queue a raw update (update_id is assigned); returns its update_id."""
+        with self._cond:
+            update = dict(update, update_id=self._next_update_id)
+            self._next_update_id += 1
+            self._updates.append(update)
+            self._cond.notify_all()
+            return update['update_id']
+
+    def fail_next(self, count=1, status=500):
+        """Make the next `count` API calls fail with the given status."""
+        with self._cond:
+            self._forced_errors.extend([status] * count)
+
+    def wait_for_messages(self, count, timeout=5.0):
+        """Block until at least `count` messages were sent; returns them."""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while len(self.sent_messages) < count:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            return list(self.sent_messages)
+
+    # --- Bot API methods ------------------------------------------------
+
+    def _pick_error(self):
+        with self._cond:
+            if self._forced_errors:
+                return self._forced_errors.pop(0)
+        if self.error_rate and self.random.random() < self.error_rate:
+            return self.random.choice(self.error_codes)
+        return None
+
+    def send_message(self, params, token=None):
+        with self._cond:
+            message = {
+                'message_id': self._next_message_id,
+                'chat': {'id': int(params.get('chat_id', 0))},
+                'date': int(time.time()),
+                'text': params.get('text', ''),
+            }
+            self._next_message_id += 1
+            self.sent_messages.append(dict(
+                message, parse_mode=params.get('parse_mode'),
+                reply_markup=params.get('reply_markup'), received_at=time.time(), token=token,
+            ))
+            self._cond.notify_all()
+        return message
+
+    def edit_message(self, params, token=None):
+        """Returns (status, payload) like Telegram, including its 'not modified' error."""
+        message_id = int(params.get('message_id', 0) or 0)
+        with self._cond:
+            for message in self.sent_messages:
+                if message['message_id'] == message_id and str(message['chat']['id']) == str(params.get('chat_id')):
+                    if message['text'] == params.get('text', ''):
+                        return 400, {'ok': False, 'error_code': 400, 'description':
+                                     'Bad Request: message is not modified'}
+                    message['text'] = params.get('text', '')
+                    self.edits.append((message_id, message['text']))
+                    self._cond.notify_all()
+                    return 200, {'ok': True, 'result': {
+                        'message_id': message_id, 'chat': message['chat'],
+                        'date': message['date'], 'edit_date': int(time.time()), 'text': message['text'],
+                    }}
+        return 400, {'ok': False, 'error_code': 400, 'description': 'Bad Request: message to edit not found'}
+
+    def get_updates(self, params, token=None):
+        offset = int(params.get('offset', 0) or 0)
+        limit = int(params.get('limit', 100) or 100)
+        timeout = float(params.get('timeout', 0) or 0)
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            if offset:
+                # Like Telegram: requesting an offset confirms earlier updates
+                self._updates = [u for u in self._updates
+                                 if u['update_id'] >= offset or u.get('_token') not in (None, token)]
+            while True:
+                pending = [
+                    {k: v for k, v in u.items() if k != '_token'} for u in self._updates
+                    if u['update_id'] >= offset and u.get('_token') in (None, token)
+                ][:limit]
+                remaining = deadline - time.monotonic()
+                if pending or remaining <= 0:
+                    return pending
+                self._cond.wait(remaining)
+
+    def send_document(self, params, body):
+        match = re.search(rb'filename="([^"]*)"', body)
+        with self._cond:
+            document = {
+                'message_id': self._next_message_id,
+                'chat_id': params.get('chat_id'),
+                'file_name': match.group(1).decode() if match else None,
+                'size': len(body),
+            }
+            self._next_message_id += 1
+            self.documents.append(document)
+        return {'message_id': document['message_id'], 'document': {'file_name': document['file_name']}}
+
+    def get_file(self, params):
+        stored = self.files.get(params.get('file_id'))
+        if stored is None:
+            return 400, {'ok': False, 'error_code': 400, 'description': 'Bad Request: invalid file_id'}
+        result = {'file_id': params['file_id'], 'file_unique_id': stored['unique_id'],
+                  'file_path': stored['file_path']}
+        if stored['report_size']:
+            result['file_size'] = len(stored['data'])
+        return 200, {'ok': True, 'result': result}
+
+    def answer_callback(self, params):
+        with self._cond:
+            self.callback_answers.append({'callback_query_id': params.get('callback_query_id'),
+                                          'text': params.get('text'), 'answered_at': time.time()})
+            self._cond.notify_all()
+
+    def file_data(self, file_path):
+        with self._cond:
+            self.file_downloads.append(file_path)
+            for stored in self.files.values():
+                if stored['file_path'] == file_path:
+                    return stored['data']
+        return None
+
+    def dispatch(self, method, params, body, token=None):
+        """Return (status, payload) for a Bot API call."""
+        if method == 'sendMessage':
+            return 200, {'ok': True, 'result': self.send_message(params, token)}
+        if method == 'editMessageText':
+            return self.edit_message(params, token)
+        if method == 'getUpdates':
+            return 200, {'ok': True, 'result': self.get_updates(params, token)}
+        if method == 'sendDocument':
+            return 200, {'ok': True, 'result': self.send_document(params, body)}
+        if method == 'getFile':
+            return self.get_file(params)
+        if method == 'answerCallbackQuery':
+            self.answer_callback(params)
+            return 200, {'ok': True, 'result': True}
+        if method == 'setWebhook':
+            self.webhook = {'url': params.get('url'), 'secret_token': params.get('secret_token'),
+                            'max_connections': params.get('max_connections')}
+            return 200, {'ok': True, 'result': True, 'description': 'Webhook was set'}
+        if method == 'deleteWebhook':
+            self.webhook = None
+            return 200, {'ok': True, 'result': True, 'description': 'Webhook was deleted'}
+        if method == 'getMe':
+            return 200, {'ok': True, 'result': {'id': 1, 'is_bot': True, 'username': 'fake_bot'}}
+        return 404, {'ok': False, 'error_code': 404, 'description': 'Not Found: method not found'}
+
+    def _handler_class(self):
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                pass  # Keep test output clean
+
+            def _params(self, body):
+                url = urlparse(self.path)
+                params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+                content_type = self.headers.get('Content-Type', '')
+                if body and 'application/json' in content_type:
+                    params.update(json.loads(body))
+                elif body and 'application/x-www-form-urlencoded' in content_type:
+                    params.update({k: v[-1] for k, v in parse_qs(body.decode()).items()})
+                elif body and 'multipart/form-data' in content_type:
+                    for name, value in re.findall(rb'name="(\w+)"\r\n\r\n([^\r]*)\r\n', body):
+                        params[name.decode()] = value.decode()
+                return url.path, params
+
+            def _send(self, status, payload):
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _handle(self):
+                length = int(self.headers.get('Content-Length', 0) or 0)
+                body = self.rfile.read(length) if length else b''
+                path, params = self._params(body)
+
+                if path == '/_fake/inject':
+                    update_id = api.inject_message(params['chat_id'], params['text'])
+                    return self._send(200, {'ok': True, 'update_id': update_id})
+                if path == '/_fake/sent':
+                    return self._send(200, {'ok': True, 'result': api.sent_messages})
+
+                match = FILE_RE.match(path)
+                if match:
+                    data = api.file_data(match.group('path'))
+                    if data is None:
+                        return self._send(404, {'ok': False, 'error_code': 404, 'description': 'Not Found'})
+                    self.send_response(200)
+                    self.send_header('Content-Type', 'application/octet-stream')
+                    self.send_header('Content-Length', str(len(data)))
+                    self.end_headers()
+                    self.wfile.write(data)
+                    return
+
+                match = PATH_RE.match(path)
+                if not match:
+                    return self._send(404, {'ok': False, 'error_code': 404, 'description': 'Not Found'})
+                method = match.group('method')
+
+                if api.latency:
+                    time.sleep(api.latency)
+
+                error = api._pick_error()
+                if error == 429:
+                    status, payload = 429, {
+                        'ok': False, 'error_code': 429,
+                        'description': 'Too Many Requests: retry after 1',
+                        'parameters': {'retry_after': 1},
+                    }
+                elif error:
+                    status, payload = error, {'ok': False, 'error_code': error,
+                                              'description': 'Internal Server Error'}
+                else:
+                    status, payload = api.dispatch(method, params, body, match.group('token'))
+
+                api.requests.append((method, status))
+                self._send(status, payload)
+
+            do_GET = _handle
+            do_POST = _handle
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a fake Telegram Bot API server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every call")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of calls answered with 429/5xx")
+    args = parser.parse_args()
+
+    api = FakeBotAPI(args.host, args.port, latency=args.latency, error_rate=args.error_rate)
+    print(f"Fake Bot API listening on {api.base_url}")
+    print(f"  export TELEGRAM_API_BASE={api.base_url}")
+    try:
+        api.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
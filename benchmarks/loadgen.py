@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Load generator for the Stop hook -> Telegram -> listener round trip.
+
+Runs against the local fake Bot API (benchmarks/fake_bot_api.py) in a
+throwaway HOME: N sessions stop concurrently (each sends its notification
+through stop.py) and M replies are injected for the listener loop to pick
+up. Reports end-to-end delivery latency and loss for both directions.
+
+Usage:
+    python benchmarks/loadgen.py --sessions 50 --replies 200
+    python benchmarks/loadgen.py --sessions 20 --latency 0.2 --error-rate 0.2
+    python benchmarks/loadgen.py --mode process --sessions 10 --json load.json
+"""
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+SCRIPTS_DIR = BENCH_DIR.parent / 'scripts'
+sys.path.insert(0, str(BENCH_DIR))
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+from fake_bot_api import FakeBotAPI
+from claude_bridge.log import close_logger
+from claude_bridge.routing import RoutingTable
+
+CHAT_ID = '4242'
+API_KEY = '123456:LOADTEST'
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile (0 for an empty list)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def summarize(latencies, expected):
+    """Latency percentiles (ms) and loss for one direction."""
+    ms = [latency * 1000 for latency in latencies]
+    return {
+        'expected': expected,
+        'delivered': len(ms),
+        'lost': expected - len(ms),
+        'loss_pct': round(100 * (expected - len(ms)) / expected, 2) if expected else 0.0,
+        'p50_ms': round(percentile(ms, 50), 1),
+        'p95_ms': round(percentile(ms, 95), 1),
+        'p99_ms': round(percentile(ms, 99), 1),
+        'max_ms': round(max(ms), 1) if ms else 0.0,
+    }
+
+
+def prepare_home(home):
+    """Create a throwaway ~/.claude and point the bridge at the fake API."""
+    claude_dir = Path(home) / '.claude'
+    claude_dir.mkdir(parents=True, exist_ok=True)
+    (claude_dir / '.chat_id').write_text(CHAT_ID)
+    project_dir = Path(home) / 'project'
+    project_dir.mkdir(exist_ok=True)
+    return project_dir
+
+
+def run_stops(api, stop, project_dir, sessions, mode, env):
+    """Stop N sessions concurrently; returns ({short_id: start_time}, wall times)."""
+    starts = {}
+    wall_times = []
+    lock = threading.Lock()
+
+    def stop_session(i):
+        session_id = f"load-session-{i}"
+        short_id = stop.generate_session_id(session_id, project_dir.name)
+        input_data = {'session_id': session_id, 'cwd': str(project_dir), 'transcript_path': ''}
+        start = time.time()
+        with lock:
+            starts[short_id] = start
+        if mode == 'process':
+            subprocess.run(
+                [sys.executable, str(SCRIPTS_DIR / 'stop.py')],
+                input=json.dumps(input_data), text=True, capture_output=True,
+                cwd=project_dir, env=env, timeout=120,
+            )
+        else:
+            stop.send_telegram_notification(input_data)
+        with lock:
+            wall_times.append(time.time() - start)
+
+    with ThreadPoolExecutor(max_workers=sessions) as pool:
+        list(pool.map(stop_session, range(sessions)))
+    return starts, wall_times
+
+
+def send_latencies(api, starts):
+    """Match delivered notifications to their session's stop time."""
+    latencies = []
+    for message in api.sent_messages:
+        for short_id, start in starts.items():
+            if f"Session {short_id}</b>" in message['text']:
+                latencies.append(message['received_at'] - start)
+                break
+    return latencies
+
+
+def run_replies(api, listener, short_ids, replies, reply_rate, drain_timeout):
+    """Inject M replies and measure how long the listener takes to dispatch each."""
+    injected = {}
+    delivered = {}
+    lock = threading.Lock()
+
+    def record_resume(real_session_id, message, cwd):
+        with lock:
+            delivered.setdefault(message, time.time())
+        return True
+
+    listener.resume_claude_session = record_resume
+    stop_event = threading.Event()
+    log = listener.get_listener_logger()
+    thread = threading.Thread(
+        target=listener.run_listener,
+        args=(API_KEY, RoutingTable.single(CHAT_ID), log, stop_event, 1),
+        daemon=True,
+    )
+    thread.start()
+
+    for j in range(replies):
+        text = f"reply {j}"
+        injected[text] = time.time()
+        api.inject_message(CHAT_ID, f"{random.choice(short_ids)}:{text}")
+        if reply_rate:
+            time.sleep(1 / reply_rate)
+
+    deadline = time.time() + drain_timeout
+    while time.time() < deadline:
+        with lock:
+            if len(delivered) >= replies:
+                break
+        time.sleep(0.05)
+    stop_event.set()
+
+    with lock:
+        return [delivered[text] - injected[text] for text in injected if text in delivered]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the bridge against a fake Bot API")
+    parser.add_argument("--sessions", type=int, default=20, help="Concurrent sessions stopping (N)")
+    parser.add_argument("--replies", type=int, default=50, help="Incoming replies to inject (M)")
+    parser.add_argument("--reply-rate", type=float, default=0, help="Replies per second (0 = burst)")
+    parser.add_argument("--latency", type=float, default=0.0, help="Fake API latency per call (s)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of API calls failing with 429/5xx")
+    parser.add_argument("--mode", choices=["thread", "process"], default="thread",
+                        help="Call send_telegram_notification in threads or run stop.py processes")
+    parser.add_argument("--drain-timeout", type=float, default=30.0, help="Seconds to wait for replies")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--json", metavar="PATH", help="Write the report to a JSON file")
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    with tempfile.TemporaryDirectory(prefix="bridge-load-") as home:
+        report = run_load(args, home)
+
+    for name in ('notifications', 'replies'):
+        r = report[name]
+        print(f"{name:<14} delivered {r['delivered']}/{r['expected']} (loss {r['loss_pct']}%)  "
+              f"p50 {r['p50_ms']} ms  p95 {r['p95_ms']} ms  p99 {r['p99_ms']} ms  max {r['max_ms']} ms")
+    print(f"Sessions mapped: {report['sessions_mapped']}/{args.sessions}")
+    print(f"API calls: {report['api_calls']} ({report['api_errors']} injected errors), "
+          f"elapsed {report['elapsed_s']} s")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2))
+
+
+def run_load(args, home):
+    """Run one load test in a throwaway HOME and return the report."""
+    project_dir = prepare_home(home)
+
+    with FakeBotAPI(latency=args.latency, error_rate=args.error_rate, seed=args.seed) as api:
+        os.environ.update({
+            'HOME': home,
+            'TELEGRAM_API': API_KEY,
+            'TELEGRAM_API_BASE': api.base_url,
+            'BRIDGE_TRACE': '0',
+        })
+        import stop
+        import telegram_listener
+
+        started = time.time()
+        starts, wall_times = run_stops(api, stop, project_dir, args.sessions, args.mode, dict(os.environ))
+        sends = summarize(send_latencies(api, starts), args.sessions)
+        sends['hook_wall_p50_ms'] = round(percentile([w * 1000 for w in wall_times], 50), 1)
+
+        replies = summarize(
+            run_replies(api, telegram_listener, list(starts), args.replies,
+                        args.reply_rate, args.drain_timeout),
+            args.replies,
+        )
+        errors = sum(1 for _, status in api.requests if status != 200)
+
+        # Flush the bridge's logs while the throwaway HOME still exists
+        close_logger(stop.get_hook_logger())
+        close_logger(telegram_listener.get_listener_logger())
+
+    try:
+        sessions_mapped = len(json.loads((Path(home) / '.claude' / '.sessions').read_text()))
+    except (OSError, ValueError):
+        sessions_mapped = 0
+
+    return {
+        'config': vars(args),
+        'notifications': sends,
+        'replies': replies,
+        'sessions_mapped': sessions_mapped,
+        'api_calls': len(api.requests),
+        'api_errors': errors,
+        'elapsed_s': round(time.time() - started, 2),
+    }
+
+
+if __name__ == "__main__":
+    main()
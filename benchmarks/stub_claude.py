@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Stand-in for the `claude` CLI, for tests and load testing (CLAUDE_BIN=...).
+
+Records what it is asked to do as JSON lines in $STUB_CLAUDE_LOG:
+    {"pid": ..., "event": "start", "argv": [...], "at": ...}
+    {"pid": ..., "event": "input", "text": "...", "at": ...}   one per user turn
+    {"pid": ..., "event": "exit", "at": ...}
+
+STUB_CLAUDE_STARTUP (seconds, default 0) simulates loading the transcript
+before the first turn is processed. With `--input-format stream-json` it
+reads user turns from stdin until EOF, like a warm session; otherwise the
+last argument is the prompt and it exits after "processing" it.
+"""
+
+import json
+import os
+import sys
+import time
+
+
+def record(event, **fields):
+    path = os.getenv('STUB_CLAUDE_LOG')
+    if not path:
+        return
+    line = json.dumps(dict(pid=os.getpid(), event=event, at=time.time(), **fields)) + '\n'
+    with open(path, 'a') as f:
+        f.write(line)
+
+
+def main():
+    record('start', argv=sys.argv[1:], cwd=os.getcwd())
+    time.sleep(float(os.getenv('STUB_CLAUDE_STARTUP', '0')))
+
+    if 'stream-json' in sys.argv[1:]:
+        for line in sys.stdin:
+            try:
+                content = json.loads(line)['message']['content']
+            except (ValueError, KeyError, TypeError):
+                continue
+            if isinstance(content, list):
+                content = ''.join(part.get('text', '') for part in content)
+            record('input', text=content)
+    else:
+        record('input', text=sys.argv[-1])
+
+    record('exit')
+
+
+if __name__ == '__main__':
+    main()
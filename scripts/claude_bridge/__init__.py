@@ -0,0 +1,7 @@
+"""
+Shared modules for the Claude-Telegram Bridge scripts.
+
+Installed next to stop.py (~/.claude/hooks/) and telegram_listener.py
+(~/.claude/) by setup.sh. Modules are imported lazily by the scripts so the
+Stop hook only pays for what a given invocation uses.
+"""
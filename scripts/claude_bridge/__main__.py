@@ -0,0 +1,7 @@
+"""Entry point for `python -m claude_bridge` (the `bridge` alias)."""
+
+import sys
+
+from claude_bridge.cli import main
+
+sys.exit(main())
@@ -0,0 +1,114 @@
+"""
+Inline keyboard quick actions on Stop notifications.
+
+Every notification carries buttons, so the common replies take one tap
+instead of typing "abc123: ...":
+
+    ▶️ Continue   📂 Changes   📜 Transcript
+    one button per quick prompt (BRIDGE_QUICK_PROMPTS)
+
+A tap sends the listener a callback_query whose data is "<action>:<short id>"
+(quick prompts: "p<index>:<short id>"), well within Telegram's 64 bytes. The
+listener answers the query at once, which stops the button's spinner, and
+runs the action on a background thread. Continue and the quick prompts resume
+the session. Changes and Transcript reply with the same paged views as the
+/changes and /transcript commands, the transcript opened at its newest page.
+A press delivered twice, or the same button tapped again within a few
+seconds, runs once.
+
+Environment:
+    BRIDGE_KEYBOARD        0 to send notifications without buttons
+    BRIDGE_QUICK_PROMPTS   '|'-separated prompts (default "Run the tests|Commit the changes")
+    BRIDGE_CONTINUE_PROMPT what Continue sends (default "Continue")
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_QUICK_PROMPTS = 'Run the tests|Commit the changes'
+DEFAULT_CONTINUE_PROMPT = 'Continue'
+ACTIONS = {'go': 'continue', 'chg': 'changes', 'log': 'transcript'}
+ACKNOWLEDGEMENTS = {  # Shown as a toast when the press is answered
+    'continue': '▶️ Continuing {short_id}',
+    'prompt': '💬 Sent to {short_id}',
+    'changes': '📂 Fetching changes…',
+    'transcript': '📜 Fetching transcript…',
+}
+MAX_CALLBACK_DATA = 64
+REPEAT_WINDOW = 3.0  # Seconds in which the same press is taken once
+SEEN_QUERIES = 1000  # Callback query IDs remembered to drop redeliveries
+
+
+def enabled():
+    return os.getenv('BRIDGE_KEYBOARD', '1') != '0'
+
+
+def quick_prompts():
+    return [prompt.strip() for prompt in os.getenv('BRIDGE_QUICK_PROMPTS', DEFAULT_QUICK_PROMPTS).split('|')
+            if prompt.strip()]
+
+
+def continue_prompt():
+    return os.getenv('BRIDGE_CONTINUE_PROMPT', DEFAULT_CONTINUE_PROMPT)
+
+
+def keyboard(short_id):
+    """reply_markup for a session's notification."""
+    rows = [[
+        {'text': '▶️ Continue', 'callback_data': f"go:{short_id}"},
+        {'text': '📂 Changes', 'callback_data': f"chg:{short_id}"},
+        {'text': '📜 Transcript', 'callback_data': f"log:{short_id}"},
+    ]]
+    buttons = [{'text': f"💬 {prompt[:28]}", 'callback_data': f"p{index}:{short_id}"}
+               for index, prompt in enumerate(quick_prompts())]
+    rows += [buttons[i:i + 2] for i in range(0, len(buttons), 2)]
+    return {'inline_keyboard': rows}
+
+
+def parse_callback(data):
+    """(action, short_id, prompt) for callback data, or None if it is not ours."""
+    action, sep, short_id = (data or '').partition(':')
+    if not sep or not short_id or len(data.encode()) > MAX_CALLBACK_DATA:
+        return None
+    if action in ACTIONS:
+        prompt = continue_prompt() if action == 'go' else None
+        return ACTIONS[action], short_id.lower(), prompt
+    if action[:1] == 'p' and action[1:].isdigit():
+        prompts = quick_prompts()
+        index = int(action[1:])
+        if index < len(prompts):
+            return 'prompt', short_id.lower(), prompts[index]
+    return None
+
+
+
+class RepeatFilter:
+    """Drops callback queries delivered twice and presses repeated within REPEAT_WINDOW."""
+
+    def __init__(self, window=REPEAT_WINDOW, limit=SEEN_QUERIES, clock=time.monotonic):
+        self.window = window
+        self.limit = limit
+        self.clock = clock
+        self._queries = OrderedDict()  # Recent callback_query IDs, oldest first
+        self._presses = {}  # (chat, action, short_id, arg) -> when it last ran
+        self._lock = threading.Lock()
+
+    def first(self, query_id, press):
+        """True if a press should run: its query is new and the same press (if given) did not just run."""
+        now = self.clock()
+        with self._lock:
+            if query_id in self._queries:
+                return False
+            if query_id is not None:
+                self._queries[query_id] = True
+                if len(self._queries) > self.limit:
+                    self._queries.popitem(last=False)
+            if press is None:
+                return True
+            self._presses = {key: at for key, at in self._presses.items() if now - at < self.window}
+            if press in self._presses:
+                return False
+            self._presses[press] = now
+            return True
@@ -0,0 +1,193 @@
+"""
+Local cache for spoken completion announcements.
+
+- Phrase pool: pre-generated completion messages kept in
+  ~/.claude/cache/phrases.json and topped up in the background, so picking a
+  message never waits on an LLM.
+- Audio cache: synthesized speech stored content-addressed by TTS backend and
+  phrase in ~/.claude/cache/tts/, evicted least-recently-used once the
+  directory exceeds its size budget.
+"""
+
+import hashlib
+import json
+import os
+import random
+import shutil
+import sys
+from pathlib import Path
+
+from claude_bridge.state import atomic_write_json, locked
+
+DEFAULT_POOL_SIZE = 10
+DEFAULT_MAX_USES = 5
+DEFAULT_CACHE_MB = 50
+
+
+def cache_dir():
+    """Root directory for announcement caches (override with BRIDGE_CACHE_DIR)."""
+    override = os.getenv('BRIDGE_CACHE_DIR')
+    if override:
+        return Path(override)
+    return Path.home() / '.claude' / 'cache'
+
+
+class PhrasePool:
+    """Pool of completion phrases, each retired after max_uses announcements."""
+
+    def __init__(self, path=None, size=DEFAULT_POOL_SIZE, max_uses=DEFAULT_MAX_USES):
+        self.path = Path(path) if path else cache_dir() / 'phrases.json'
+        self.size = size
+        self.max_uses = max_uses
+
+    def load(self):
+        """Return pool entries as [{"text": str, "uses": int}, ...]."""
+        try:
+            entries = json.loads(self.path.read_text())
+            return [e for e in entries if isinstance(e, dict) and e.get('text')]
+        except (OSError, ValueError):
+            return []
+
+    def save(self, entries):
+        """Write the pool atomically (temp file + fsync + rename)."""
+        atomic_write_json(self.path, entries)
+
+    def phrases(self):
+        """Return the texts currently in the pool."""
+        return [entry['text'] for entry in self.load()]
+
+    def needs_refill(self):
+        """True when the pool holds fewer phrases than its target size."""
+        return len(self.load()) < self.size
+
+    def add(self, phrases):
+        """Add new phrases (duplicates ignored) up to the pool size. Returns count added."""
+        with locked(self.path):
+            return self._add(phrases)
+
+    def _add(self, phrases):
+        entries = self.load()
+        known = {entry['text'] for entry in entries}
+        added = 0
+        for text in phrases:
+            text = (text or '').strip()
+            if text and text not in known and len(entries) < self.size:
+                entries.append({'text': text, 'uses': 0})
+                known.add(text)
+                added += 1
+        if added:
+            self.save(entries)
+        return added
+
+    def pick(self, prefer=None):
+        """
+        Pick a phrase for an announcement and count the use.
+
+        Args:
+            prefer: Optional predicate; phrases it accepts (e.g. those with
+                cached audio) are chosen over the rest.
+
+        Returns:
+            str or None: Phrase text, None if the pool is empty
+        """
+        # Locked: hooks finishing together must not lose each other's use counts
+        with locked(self.path):
+            return self._pick(prefer)
+
+    def _pick(self, prefer):
+        entries = self.load()
+        if not entries:
+            return None
+
+        candidates = [e for e in entries if prefer(e['text'])] if prefer else []
+        entry = random.choice(candidates or entries)
+        entry['uses'] = entry.get('uses', 0) + 1
+        if entry['uses'] >= self.max_uses:
+            entries.remove(entry)  # Retired: the background refill replaces it
+        self.save(entries)
+        return entry['text']
+
+
+class AudioCache:
+    """Content-addressed store of synthesized phrases with LRU eviction by size."""
+
+    def __init__(self, directory=None, max_bytes=None):
+        self.directory = Path(directory) if directory else cache_dir() / 'tts'
+        if max_bytes is None:
+            max_bytes = int(float(os.getenv('BRIDGE_TTS_CACHE_MB', DEFAULT_CACHE_MB)) * 1024 * 1024)
+        self.max_bytes = max_bytes
+
+    @staticmethod
+    def key(backend, phrase):
+        """Content address for a phrase spoken by a given TTS backend."""
+        return hashlib.sha256(f"{backend}\0{phrase}".encode()).hexdigest()
+
+    def _find(self, key):
+        if not self.directory.exists():
+            return None
+        for path in self.directory.glob(f"{key}.*"):
+            if not path.name.endswith('.tmp'):
+                return path
+        return None
+
+    def contains(self, backend, phrase):
+        """True if audio for this phrase/backend is cached (does not touch LRU order)."""
+        return self._find(self.key(backend, phrase)) is not None
+
+    def get(self, backend, phrase):
+        """Return the cached audio path and mark it recently used, or None."""
+        path = self._find(self.key(backend, phrase))
+        if path is None:
+            return None
+        try:
+            os.utime(path)  # mtime doubles as the LRU timestamp
+        except OSError:
+            return None
+        return path
+
+    def put(self, backend, phrase, audio_file):
+        """Move a synthesized audio file into the cache and enforce the size budget."""
+        audio_file = Path(audio_file)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        suffix = audio_file.suffix or '.audio'
+        target = self.directory / f"{self.key(backend, phrase)}{suffix}"
+        shutil.move(str(audio_file), str(target))
+        self.evict()
+        return target
+
+    def evict(self):
+        """Remove least recently used entries until under max_bytes. Returns bytes freed."""
+        if not self.directory.exists():
+            return 0
+
+        files = []
+        for path in self.directory.iterdir():
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in files)
+        freed = 0
+        for _, size, path in sorted(files, key=lambda f: f[0]):
+            if total <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= size
+            freed += size
+        return freed
+
+
+def find_audio_player():
+    """Return the command prefix of a local audio player, or None."""
+    if sys.platform == 'darwin' and shutil.which('afplay'):
+        return ['afplay']
+    for command in (['paplay'], ['ffplay', '-nodisp', '-autoexit', '-loglevel', 'quiet'],
+                    ['mpg123', '-q'], ['aplay', '-q']):
+        if shutil.which(command[0]):
+            return command
+    return None
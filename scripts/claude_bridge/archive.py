@@ -0,0 +1,210 @@
+"""
+Static HTML archive of Telegram-driven sessions (`show-telegram archive`).
+
+Every session in ~/.claude/.sessions gets a page with its Telegram exchanges
+(replies sent from Telegram and Claude's answers) and the commits made while
+it ran. index.html links them all, most recent first.
+
+Rebuilds are incremental. For each session, <out>/.cache/<id>.json keeps the
+exchanges parsed so far and the transcript offset they end at. A later build
+parses only the bytes appended since and re-renders only those pages. Pages
+are rendered in parallel across a process pool (--jobs, default: CPU count).
+
+CLI (`bridge archive [--out DIR] [--jobs N] [--full]`, also `show-telegram archive`).
+"""
+
+import html
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from claude_bridge.state import atomic_write_json, atomic_write_text, read_json
+from claude_bridge.transcript import find_transcript, parse_exchanges
+
+CACHE_VERSION = 1
+
+STYLE = """
+body { font: 15px/1.5 -apple-system, system-ui, sans-serif; max-width: 52rem; margin: 2rem auto; padding: 0 1rem; color: #222; }
+a { color: #0366d6; text-decoration: none; }
+table { border-collapse: collapse; width: 100%; }
+td, th { text-align: left; padding: .35rem .6rem; border-bottom: 1px solid #eee; }
+.msg { white-space: pre-wrap; padding: .6rem .8rem; border-radius: 8px; margin: .6rem 0; }
+.you { background: #e8f1ff; }
+.claude { background: #f6f6f6; }
+.meta { color: #888; font-size: 12px; }
+code { font-size: 13px; }
+"""
+
+
+def default_output_dir():
+    return Path.home() / '.claude' / 'telegram-archive'
+
+
+def session_commits(cwd, since, until):
+    """Commits made in cwd while the session ran: [{'hash', 'subject', 'files'}]."""
+    try:
+        result = subprocess.run(
+            ['git', 'log', f'--since=@{int(since)}', f'--until=@{int(until) + 60}',
+             '--pretty=format:%x00%h%x09%s', '--name-only'],
+            cwd=cwd, capture_output=True, text=True, timeout=30,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return []
+    if result.returncode != 0:
+        return []
+    commits = []
+    for block in result.stdout.split('\0')[1:]:
+        header, _, files = block.partition('\n')
+        commit_hash, _, subject = header.partition('\t')
+        commits.append({'hash': commit_hash, 'subject': subject,
+                        'files': [name for name in files.splitlines() if name.strip()]})
+    return commits
+
+
+def page(title, body):
+    return (f"<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\"><title>{html.escape(title)}</title>"
+            f"<style>{STYLE}</style></head>\n<body>\n{body}\n</body></html>\n")
+
+
+def render_session_page(short_id, info, exchanges, commits):
+    project = html.escape(os.path.basename(info.get('cwd', '')))
+    parts = [
+        '<p><a href="../index.html">← All sessions</a></p>',
+        f"<h1>📱 Session <code>{html.escape(short_id)}</code> — {project}</h1>",
+        f"<p class=\"meta\">{html.escape(info.get('cwd', ''))} · "
+        f"{html.escape(time.strftime('%Y-%m-%d %H:%M', time.localtime(info.get('timestamp', 0))))}</p>",
+    ]
+    if commits:
+        parts.append('<h2>📦 Commits</h2><ul>')
+        for commit in commits:
+            files = ', '.join(html.escape(name) for name in commit['files'][:10])
+            more = f" and {len(commit['files']) - 10} more" if len(commit['files']) > 10 else ''
+            parts.append(f"<li><code>{html.escape(commit['hash'])}</code> {html.escape(commit['subject'])}"
+                         f"<br><span class=\"meta\">{files}{more}</span></li>")
+        parts.append('</ul>')
+    parts.append('<h2>💬 Telegram conversation</h2>')
+    if not exchanges:
+        parts.append('<p><i>No Telegram messages in this session (terminal only).</i></p>')
+    for exchange in exchanges:
+        label = '👤 You' if exchange['who'] == 'you' else '🤖 Claude'
+        parts.append(f"<div class=\"msg {exchange['who']}\"><span class=\"meta\">{label} "
+                     f"{html.escape(exchange['at'][:19].replace('T', ' '))}</span>\n"
+                     f"{html.escape(exchange['text'])}</div>")
+    return page(f"Session {short_id}", '\n'.join(parts))
+
+
+def render_index(entries):
+    rows = []
+    for short_id, entry in sorted(entries.items(), key=lambda item: item[1].get('timestamp', 0), reverse=True):
+        when = time.strftime('%Y-%m-%d %H:%M', time.localtime(entry.get('timestamp', 0)))
+        rows.append(f"<tr><td><a href=\"sessions/{html.escape(short_id)}.html\"><code>{html.escape(short_id)}</code></a></td>"
+                    f"<td>{html.escape(entry.get('project', ''))}</td><td>{when}</td>"
+                    f"<td>{entry.get('replies', 0)}</td><td>{entry.get('commits', 0)}</td></tr>")
+    body = ("<h1>📚 Telegram sessions</h1>\n<table><tr><th>Session</th><th>Project</th><th>Last active</th>"
+            "<th>Replies</th><th>Commits</th></tr>\n" + '\n'.join(rows) + "\n</table>")
+    return page('Telegram sessions', body)
+
+
+def build_session(job):
+    """
+    Render one session page (runs in a pool worker). Parses only what was
+    appended to the transcript since the cached offset; returns the index entry.
+    """
+    out, short_id, info = Path(job['out']), job['short_id'], job['info']
+    cache_file = out / '.cache' / f"{short_id}.json"
+    cache = read_json(cache_file, {}) if not job['full'] else {}
+    if cache.get('version') != CACHE_VERSION or cache.get('session_id') != info.get('session_id'):
+        cache = {}
+
+    transcript = Path(job['transcript'])
+    offset = cache.get('offset', 0)
+    if job['size'] < offset:
+        cache, offset = {}, 0  # Transcript was rewritten: start over
+    exchanges = cache.get('exchanges', [])
+    try:
+        new, offset, started = parse_exchanges(transcript, offset, cache.get('started', False))
+        exchanges += new
+    except OSError:
+        started = cache.get('started', False)
+
+    commits = session_commits(info.get('cwd', '.'), info.get('start_time', info.get('timestamp', 0)),
+                              info.get('timestamp', 0)) if os.path.isdir(info.get('cwd', '')) else []
+
+    atomic_write_text(out / 'sessions' / f"{short_id}.html", render_session_page(short_id, info, exchanges, commits))
+    atomic_write_json(cache_file, {
+        'version': CACHE_VERSION, 'session_id': info.get('session_id'), 'offset': offset,
+        'started': started, 'exchanges': exchanges,
+    }, indent=None)
+    return short_id, {
+        'session_id': info.get('session_id'), 'project': os.path.basename(info.get('cwd', '')),
+        'timestamp': info.get('timestamp', 0), 'size': job['size'],
+        'replies': sum(1 for e in exchanges if e['who'] == 'you'), 'commits': len(commits),
+    }
+
+
+def build_archive(sessions, out=None, jobs=None, full=False):
+    """
+    Bring the archive in `out` up to date with `sessions`. Only sessions whose
+    transcript size or last Stop changed since the previous build are rendered.
+    Returns (rebuilt short IDs, total sessions).
+    """
+    out = Path(out or default_output_dir())
+    (out / 'sessions').mkdir(parents=True, exist_ok=True)
+    (out / '.cache').mkdir(exist_ok=True)
+    index_file = out / '.archive.json'
+    index = {} if full else read_json(index_file, {})
+
+    work = []
+    for short_id, info in sessions.items():
+        transcript = find_transcript(info)
+        try:
+            size = transcript.stat().st_size
+        except OSError:
+            size = 0
+        entry = index.get(short_id, {})
+        unchanged = (entry.get('size') == size and entry.get('timestamp') == info.get('timestamp', 0)
+                     and entry.get('session_id') == info.get('session_id')
+                     and (out / 'sessions' / f"{short_id}.html").exists())
+        if not unchanged:
+            work.append({'out': str(out), 'short_id': short_id, 'info': info,
+                         'transcript': str(transcript), 'size': size, 'full': full})
+
+    jobs = jobs or os.cpu_count() or 1
+    if jobs > 1 and len(work) > 1:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(work))) as pool:
+            results = list(pool.map(build_session, work))
+    else:
+        results = [build_session(job) for job in work]
+
+    # Sessions cleaned up from .sessions keep their page and index row
+    for short_id, entry in results:
+        index[short_id] = entry
+
+    atomic_write_json(index_file, index)
+    atomic_write_text(out / 'index.html', render_index(index))
+    return [short_id for short_id, _ in results], len(index)
+
+
+def main(argv=None):
+    """Render every session into a static HTML site, rebuilding only what changed"""
+    import argparse
+    from claude_bridge.sessions import load_sessions
+
+    parser = argparse.ArgumentParser(prog='bridge archive', description="Build the static HTML archive")
+    parser.add_argument('--out', default=str(default_output_dir()), help='Output directory')
+    parser.add_argument('--jobs', type=int, default=None, help='Worker processes (default: CPU count)')
+    parser.add_argument('--full', action='store_true', help='Re-render every session from scratch')
+    args = parser.parse_args(argv)
+
+    start = time.time()
+    rebuilt, total = build_archive(load_sessions(), args.out, args.jobs, args.full)
+    print(f"📚 Archived {total} session(s), re-rendered {len(rebuilt)} in {time.time() - start:.2f}s")
+    print(f"   {Path(args.out) / 'index.html'}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
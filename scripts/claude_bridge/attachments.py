@@ -0,0 +1,212 @@
+"""
+Files and photos sent from Telegram to a session (listener).
+
+A document or photo whose caption targets a session ("abc123: see this log")
+is downloaded into the session's inbox, <cwd>/.telegram-inbox/<short id>/.
+Its path is then appended to the resume prompt, so Claude can open it.
+
+- Downloads use getFile, then stream the file in CHUNK_SIZE pieces to a
+  .part file that is renamed once complete. Memory use stays flat, and a
+  half-written file never appears in the inbox.
+- Files over BRIDGE_ATTACH_MAX_MB (default 20, the Bot API's own download
+  limit) are refused, before downloading when Telegram reports the size and
+  while streaming otherwise.
+- At most BRIDGE_ATTACH_WORKERS (default 4) downloads run at once.
+- Telegram gives every file a file_unique_id. Downloads are remembered by it
+  in ~/.claude/.attachments, so a file sent again (forwarded, or to another
+  session) is linked from the earlier copy instead of downloaded again.
+"""
+
+import os
+import re
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+CHUNK_SIZE = 64 * 1024
+DEFAULT_MAX_MB = 20
+DEFAULT_WORKERS = 4
+INBOX_DIR = '.telegram-inbox'
+
+
+class AttachmentError(Exception):
+    """A file that could not be delivered; the message is shown to the chat."""
+
+
+def attachments_of(message):
+    """Downloadable files in a message: [{'file_id', 'unique_id', 'name', 'size'}]."""
+    files = []
+    document = message.get('document')
+    if document:
+        files.append({'file_id': document['file_id'], 'unique_id': document.get('file_unique_id', document['file_id']),
+                      'name': document.get('file_name') or 'document', 'size': document.get('file_size')})
+    photo = message.get('photo')
+    if photo:
+        largest = max(photo, key=lambda size: (size.get('width', 0) * size.get('height', 0), size.get('file_size', 0)))
+        unique_id = largest.get('file_unique_id', largest['file_id'])
+        files.append({'file_id': largest['file_id'], 'unique_id': unique_id,
+                      'name': f"photo_{unique_id}.jpg", 'size': largest.get('file_size')})
+    return files
+
+
+def safe_name(name):
+    """A file name that stays inside the inbox."""
+    name = re.sub(r'[^\w.\- ]', '_', os.path.basename(name)).strip(' .')
+    return name[:120] or 'file'
+
+
+def inbox_dir(cwd, short_id):
+    """Create (if needed) and return a session's inbox, kept out of git."""
+    inbox = Path(cwd) / INBOX_DIR
+    directory = inbox / short_id
+    directory.mkdir(parents=True, exist_ok=True)
+    ignore = inbox / '.gitignore'
+    if not ignore.exists():
+        ignore.write_text('*\n')
+    return directory
+
+
+def format_size(size):
+    return f"{size / 1024 / 1024:.1f} MB" if size >= 1024 * 1024 else f"{size / 1024:.0f} KB"
+
+
+def prompt_with_files(text, paths):
+    """Resume prompt: the reply text followed by the delivered files' paths."""
+    if not paths:
+        return text
+    listing = '\n'.join(f"- {path}" for path in paths)
+    return f"{text}\n\nFiles sent from Telegram:\n{listing}".strip()
+
+
+class Downloader:
+    """Streams Telegram files into session inboxes, with a size cap, a concurrency limit and a cache."""
+
+    def __init__(self, api_base=None, max_bytes=None, workers=None, cache_path=None, http=None):
+        import requests
+
+        self.api_base = (api_base or os.getenv('TELEGRAM_API_BASE', 'https://api.telegram.org')).rstrip('/')
+        if max_bytes is None:
+            max_bytes = int(float(os.getenv('BRIDGE_ATTACH_MAX_MB', DEFAULT_MAX_MB)) * 1024 * 1024)
+        self.max_bytes = max_bytes
+        workers = workers or int(os.getenv('BRIDGE_ATTACH_WORKERS', DEFAULT_WORKERS))
+        self.cache_path = Path(cache_path) if cache_path else Path.home() / '.claude' / '.attachments'
+        self.http = http or requests.Session()
+        self.downloads = 0
+        self.cache_hits = 0
+        self._slots = threading.BoundedSemaphore(workers)
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='attach')
+
+    def submit(self, fn, *args):
+        """Run a download-and-resume job off the polling thread."""
+        return self._pool.submit(fn, *args)
+
+    def close(self):
+        self._pool.shutdown(wait=True)
+
+    def _check_size(self, name, size):
+        if size is not None and size > self.max_bytes:
+            raise AttachmentError(f"{name} is too large ({format_size(size)}, limit {format_size(self.max_bytes)})")
+
+    def _cached(self, attachment, directory):
+        """Link an earlier download of the same file into directory; None if there is none."""
+        from claude_bridge.state import read_json
+
+        entry = read_json(self.cache_path, {}).get(attachment['unique_id'])
+        if not entry:
+            return None
+        source = Path(entry['path'])
+        try:
+            if source.stat().st_size != entry.get('size'):
+                return None  # Edited or replaced since
+            if source.parent == directory:
+                return source
+            dest = self._destination(directory, attachment)
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            try:
+                os.link(source, dest)
+            except OSError:
+                shutil.copyfile(source, dest)  # Other filesystem
+            return dest
+        except OSError:
+            return None
+
+    def _remember(self, unique_id, path, size):
+        from claude_bridge.state import update_json
+
+        try:
+            with update_json(self.cache_path) as cache:
+                cache[unique_id] = {'path': str(path), 'size': size}
+        except OSError:
+            pass
+
+    def _destination(self, directory, attachment):
+        dest = directory / safe_name(attachment['name'])
+        if dest.exists():
+            # Same name, different file: keep both
+            dest = dest.with_name(f"{dest.stem}-{attachment['unique_id']}{dest.suffix}")
+        return dest
+
+    def fetch(self, token, attachment, directory):
+        """Download one attachment into directory; returns its path or raises AttachmentError."""
+        import requests
+
+        directory = Path(directory)
+        name = attachment['name']
+        self._check_size(name, attachment.get('size'))
+
+        cached = self._cached(attachment, directory)
+        if cached is not None:
+            self.cache_hits += 1
+            return cached
+
+        with self._slots:
+            try:
+                resp = self.http.get(f"{self.api_base}/bot{token}/getFile",
+                                     params={'file_id': attachment['file_id']}, timeout=15)
+                result = resp.json()
+                if not result.get('ok'):
+                    raise AttachmentError(f"{name}: {result.get('description', 'getFile failed')}")
+                info = result['result']
+                self._check_size(name, info.get('file_size'))
+
+                dest = self._destination(directory, attachment)
+                dest.parent.mkdir(parents=True, exist_ok=True)
+                part = dest.with_name(f".{dest.name}.part")
+                size = 0
+                with self.http.get(f"{self.api_base}/file/bot{token}/{info['file_path']}",
+                                   stream=True, timeout=60) as download:
+                    if download.status_code != 200:
+                        raise AttachmentError(f"{name}: download failed (HTTP {download.status_code})")
+                    try:
+                        with open(part, 'wb') as f:
+                            for chunk in download.iter_content(CHUNK_SIZE):
+                                size += len(chunk)
+                                if size > self.max_bytes:
+                                    raise AttachmentError(f"{name} is too large (over {format_size(self.max_bytes)})")
+                                f.write(chunk)
+                        os.replace(part, dest)
+                    except BaseException:
+                        try:
+                            part.unlink()
+                        except OSError:
+                            pass
+                        raise
+            except requests.RequestException as e:
+                raise AttachmentError(f"{name}: {type(e).__name__}")
+            except (OSError, ValueError, KeyError) as e:
+                raise AttachmentError(f"{name}: {e}")
+
+        self.downloads += 1
+        self._remember(attachment['unique_id'], dest, size)
+        return dest
+
+    def fetch_all(self, token, attachments, directory):
+        """Download a message's attachments; returns (paths, problems)."""
+        paths, problems = [], []
+        for attachment in attachments:
+            try:
+                paths.append(self.fetch(token, attachment, directory))
+            except AttachmentError as e:
+                problems.append(str(e))
+        return paths, problems
@@ -0,0 +1,181 @@
+"""
+Bot token pool for high session counts.
+
+Telegram limits how fast a single bot can send (about 30 messages a second
+overall). With TELEGRAM_API_POOL set to several comma-separated bot tokens,
+sessions are spread across the bots by consistent hashing of their short
+session ID, so a session's notifications, immediate-reply checks and replies
+always use the same bot, and adding a bot only moves about 1/N of sessions.
+
+Bots are placed on the ring by their numeric ID (the part of the token before
+the colon), so regenerating a token keeps its sessions where they are.
+Each bot gets its own HTTP connection pool and send rate limiter. With
+shared=True (the Stop hook and the listener) the limiter's bucket lives in
+~/.claude/.send_rate under a file lock, so the limit holds across every
+process sending as that bot, not just within one. The file is small and
+rewritten in place without fsync, so pacing a send costs no disk sync.
+
+Remember to open a chat with (/start) every bot in the pool: bots cannot
+message users who have never talked to them.
+"""
+
+import bisect
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+DEFAULT_REPLICAS = 100
+
+
+def load_tokens():
+    """Bot tokens from TELEGRAM_API_POOL, or the single TELEGRAM_API token."""
+    pool = [t.strip() for t in os.getenv('TELEGRAM_API_POOL', '').split(',') if t.strip()]
+    if pool:
+        return pool
+    token = os.getenv('TELEGRAM_API')
+    return [token] if token else []
+
+
+def bot_id(token):
+    """Numeric bot ID from a token ('123456:ABC...' -> '123456')."""
+    return token.split(':', 1)[0]
+
+
+def _point(key):
+    return int.from_bytes(hashlib.md5(key.encode()).digest()[:8], 'big')
+
+
+class HashRing:
+    """Consistent-hash ring mapping keys to tokens, with virtual nodes."""
+
+    def __init__(self, tokens, replicas=DEFAULT_REPLICAS):
+        if not tokens:
+            raise ValueError("HashRing needs at least one token")
+        ring = sorted(
+            (_point(f"{bot_id(token)}#{replica}"), token)
+            for token in tokens
+            for replica in range(replicas)
+        )
+        self._points = [point for point, _ in ring]
+        self._tokens = [token for _, token in ring]
+
+    def token_for(self, key):
+        index = bisect.bisect(self._points, _point(key)) % len(self._points)
+        return self._tokens[index]
+
+
+class RateLimiter:
+    """Thread-safe token bucket: `rate` sends a second, bursts up to `burst`."""
+
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        self.burst = float(burst if burst is not None else rate)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a send is allowed; returns the seconds waited."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = (1 - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+def rate_file():
+    return Path.home() / '.claude' / '.send_rate'
+
+
+class SharedRateLimiter:
+    """Token bucket like RateLimiter, kept in a locked file so all processes share it."""
+
+    def __init__(self, key, rate, burst=None, path=None):
+        self.key = key
+        self.rate = float(rate)
+        self.burst = float(burst if burst is not None else rate)
+        self.path = Path(path) if path else rate_file()
+
+    def _take(self):
+        """Take a token if one is available; returns the seconds until one will be, or 0."""
+        from claude_bridge.state import locked
+
+        # Rewritten in place without fsync: every reader holds the lock, and the
+        # buckets only matter for a moment, so a crash can at worst refill them
+        with locked(self.path), os.fdopen(os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600), 'r+') as f:
+            try:
+                buckets = json.loads(f.read() or '{}')
+            except ValueError:
+                buckets = {}
+            now = time.time()  # Wall clock: monotonic clocks are per process
+            bucket = buckets.get(self.key) or {'tokens': self.burst, 'updated': now}
+            tokens = min(self.burst, bucket['tokens'] + max(0.0, now - bucket['updated']) * self.rate)
+            delay = 0.0 if tokens >= 1 else (1 - tokens) / self.rate
+            buckets[self.key] = {'tokens': tokens - 1 if tokens >= 1 else tokens, 'updated': now}
+            f.seek(0)
+            f.truncate()
+            f.write(json.dumps(buckets))
+        return delay
+
+    def acquire(self):
+        """Block until a send is allowed; returns the seconds waited."""
+        waited = 0.0
+        while True:
+            delay = self._take()
+            if not delay:
+                return waited
+            time.sleep(delay)
+            waited += delay
+
+
+class BotPool:
+    """Tokens on a hash ring, each with its own HTTP session and rate limiter."""
+
+    def __init__(self, tokens=None, rate=None, shared=False):
+        self.tokens = list(tokens if tokens is not None else load_tokens())
+        self.ring = HashRing(self.tokens) if self.tokens else None
+        rate = rate or float(os.getenv('BRIDGE_BOT_RATE', 30))
+        if shared:
+            self.limiters = {token: SharedRateLimiter(bot_id(token), rate) for token in self.tokens}
+        else:
+            self.limiters = {token: RateLimiter(rate) for token in self.tokens}
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.tokens)
+
+    def token_for(self, short_session_id):
+        """The bot that owns a session."""
+        return self.ring.token_for(short_session_id.lower())
+
+    def by_bot_id(self, bot):
+        for token in self.tokens:
+            if bot_id(token) == str(bot):
+                return token
+        return None
+
+    def session(self, token):
+        """Keep-alive HTTP session for one bot (created on first use)."""
+        with self._lock:
+            if token not in self._sessions:
+                import requests
+
+                self._sessions[token] = requests.Session()
+            return self._sessions[token]
+
+    def close(self):
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
@@ -0,0 +1,274 @@
+"""
+Git changes of a session, shared by the hook, the listener and the CLI.
+
+classify() maps a `git status --porcelain` code to the icon and kind every
+view uses. report() lists working directory changes, or the last two hours of
+commits when the tree is clean; `full` adds the diffs. worktree_state()
+fingerprints what a report shows (HEAD, `git status --porcelain` and the
+changed files' stat()), so callers can tell whether a cached report is still
+current without rendering it again.
+
+CLI (`bridge changes <id> [--full]`, also `show-changes`): print the report.
+"""
+
+import os
+import subprocess
+import sys
+import time
+
+# First matching letter of a porcelain status code wins
+CHANGE_KINDS = [
+    ('M', '✏️', 'modified'),
+    ('A', '➕', 'added'),
+    ('D', '➖', 'deleted'),
+    ('?', '📄', 'untracked'),
+]
+OTHER_CHANGE = ('📝', 'changed')
+
+
+def classify(status):
+    """(icon, kind) for the two-letter status of a `git status --porcelain` line."""
+    for letter, icon, kind in CHANGE_KINDS:
+        if letter in status:
+            return icon, kind
+    return OTHER_CHANGE
+
+
+def check_git_repo(cwd):
+    """Check if directory is a git repository."""
+    git_check = subprocess.run(
+        ["git", "rev-parse", "--git-dir"],
+        cwd=cwd,
+        capture_output=True,
+        text=True
+    )
+    return git_check.returncode == 0
+
+
+def get_working_changes(cwd, show_diff=False):
+    """Get working directory changes."""
+    results = []
+    status_result = subprocess.run(
+        ["git", "status", "--porcelain"],
+        cwd=cwd,
+        capture_output=True,
+        text=True
+    )
+
+    if status_result.returncode == 0 and status_result.stdout.strip():
+        results.append("📋 Working Directory Changes:")
+        results.append("=" * 40)
+
+        status_lines = status_result.stdout.rstrip('\n').split('\n')  # Keeps the first line's leading space
+        for line in status_lines:
+            if len(line) >= 3:
+                status = line[:2]
+                filename = line[3:]
+
+                icon, kind = classify(status)
+                results.append(f"{icon} {kind.capitalize()}: {filename}")
+
+                # Show diff for modified files if requested
+                if show_diff and 'M' in status:
+                    diff_result = subprocess.run(
+                        ["git", "diff", filename],
+                        cwd=cwd,
+                        capture_output=True,
+                        text=True
+                    )
+                    if diff_result.returncode == 0 and diff_result.stdout.strip():
+                        results.append(f"\nDiff for {filename}:")
+                        results.append("-" * 30)
+                        results.append(diff_result.stdout.strip())
+                        results.append("")
+
+    return results, bool(status_result.stdout.strip())
+
+
+def get_recent_commits(cwd, show_diff=False):
+    """Get recent commits."""
+    results = []
+    commits_result = subprocess.run(
+        ["git", "log", "--oneline", "-10", "--since=2 hours ago"],
+        cwd=cwd,
+        capture_output=True,
+        text=True
+    )
+
+    if commits_result.returncode == 0 and commits_result.stdout.strip():
+        results.append("📦 Recent Commits (last 2 hours):")
+        results.append("=" * 40)
+
+        commit_lines = commits_result.stdout.strip().split('\n')
+        for commit_line in commit_lines:
+            if commit_line.strip():
+                commit_hash = commit_line.split()[0]
+                commit_msg = ' '.join(commit_line.split()[1:])
+                results.append(f"📦 {commit_hash}: {commit_msg}")
+
+                # Show commit diff if requested
+                if show_diff:
+                    diff_result = subprocess.run(
+                        ["git", "show", "--stat", commit_hash],
+                        cwd=cwd,
+                        capture_output=True,
+                        text=True
+                    )
+                    if diff_result.returncode == 0:
+                        results.append(f"\nCommit {commit_hash} changes:")
+                        results.append("-" * 30)
+                        results.append(diff_result.stdout.strip())
+                        results.append("")
+
+    return results
+
+
+def get_git_changes(cwd, since_time=None, show_diff=False):
+    """Get git changes for the session directory."""
+    try:
+        if not check_git_repo(cwd):
+            return "Not a git repository"
+
+        results = []
+        working_changes, has_working = get_working_changes(cwd, show_diff)
+        results.extend(working_changes)
+
+        # Get recent commits if no working changes
+        if not has_working:
+            commit_changes = get_recent_commits(cwd, show_diff)
+            results.extend(commit_changes)
+
+        return '\n'.join(results) if results else "No git changes found"
+
+    except Exception as e:
+        return f"Error checking git changes: {e}"
+
+
+def session_header(short_id, session_data):
+    """Heading lines of a session's report."""
+    cwd = session_data.get('cwd', '')
+    lines = [
+        f"🔍 Git Changes for Session {short_id}",
+        f"📁 Project: {os.path.basename(cwd)}",
+        f"📂 Directory: {cwd}",
+    ]
+    start_time = session_data.get('start_time')
+    if start_time:
+        lines.append(f"⏰ Session started: {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(start_time))}")
+    return lines
+
+
+def report(short_id, session_data, show_diff=False):
+    """The full changes report for a session, as printed by show-changes."""
+    changes = get_git_changes(session_data['cwd'], session_data.get('start_time'), show_diff)
+    return '\n'.join(session_header(short_id, session_data) + ['', changes])
+
+
+def find_git_dir(cwd):
+    """The .git directory of the repository containing cwd (worktrees included), or None."""
+    path = os.path.abspath(cwd)
+    while True:
+        dot_git = os.path.join(path, '.git')
+        if os.path.isdir(dot_git):
+            return dot_git
+        if os.path.isfile(dot_git):
+            try:
+                with open(dot_git) as f:
+                    pointer = f.read().strip()
+            except OSError:
+                return None
+            if pointer.startswith('gitdir:'):
+                return os.path.join(path, pointer[len('gitdir:'):].strip())
+            return None
+        parent = os.path.dirname(path)
+        if parent == path:
+            return None
+        path = parent
+
+
+def head_state(cwd):
+    """Fingerprint of HEAD and the branch it points to from stat() alone, or None outside a repo."""
+    git_dir = find_git_dir(cwd)
+    if git_dir is None:
+        return None
+    state = []
+    paths = [os.path.join(git_dir, 'HEAD')]
+    try:
+        with open(paths[0]) as f:
+            head = f.read().strip()
+    except OSError:
+        return None
+    if head.startswith('ref:'):
+        ref = head[len('ref:'):].strip()
+        paths += [os.path.join(git_dir, ref), os.path.join(git_dir, 'packed-refs')]
+    state.append(head)
+    for path in paths:
+        try:
+            st = os.stat(path)
+            state.append((st.st_mtime_ns, st.st_size, st.st_ino))
+        except OSError:
+            state.append(None)
+    return tuple(state)
+
+
+def worktree_state(cwd):
+    """
+    Fingerprint of everything a changes report shows, or None outside a repo.
+    head_state() covers commits; `git status --porcelain` and the stat() of
+    each listed path cover staged and unstaged edits and new untracked files.
+    The index file itself is left out: status rewrites it whenever it refreshes.
+    """
+    state = head_state(cwd)
+    if state is None:
+        return None
+    try:
+        status = subprocess.run(["git", "status", "--porcelain"], cwd=cwd, capture_output=True, text=True)
+    except OSError:
+        return None
+    if status.returncode != 0:
+        return None
+
+    # Porcelain paths are relative to the top of the work tree
+    top = os.path.abspath(cwd)
+    while not os.path.exists(os.path.join(top, '.git')) and os.path.dirname(top) != top:
+        top = os.path.dirname(top)
+    files = []
+    for line in status.stdout.splitlines():
+        path = line[3:].split(' -> ')[-1].strip('"')
+        try:
+            st = os.stat(os.path.join(top, path))
+            files.append((st.st_mtime_ns, st.st_size))
+        except OSError:
+            files.append(None)
+    return state, status.stdout, tuple(files)
+
+
+def main(argv=None):
+    import argparse
+    from claude_bridge.sessions import describe, find_session, load_sessions
+
+    parser = argparse.ArgumentParser(prog='bridge changes', description="Show git changes for a Claude session")
+    parser.add_argument("session_id", help="Session ID to show changes for")
+    parser.add_argument("--full", action="store_true", help="Show full diff content")
+    parser.add_argument("--files", action="store_true", help="Show only file list (default)")
+    args = parser.parse_args(argv)
+
+    sessions = load_sessions()
+    short_id, session_data = find_session(sessions, args.session_id)
+    if not session_data:
+        print(f"❌ Session {args.session_id} not found")
+        print("\nAvailable sessions:")
+        print(describe(sessions) or "  (none)")
+        return 1
+
+    cwd = session_data.get('cwd')
+    if not cwd or not os.path.exists(cwd):
+        print(f"❌ Session directory not found: {cwd}")
+        return 1
+
+    print(report(short_id, session_data, show_diff=args.full))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
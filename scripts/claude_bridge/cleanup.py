@@ -0,0 +1,333 @@
+"""
+Garbage collection of the bridge's state files and logs.
+
+Without it these only grow: .sessions, .processed_messages, the trace file,
+rotated log backups, the listener's crash output, each project's
+logs/stop.json and logs/chat.json, Telegram inboxes and the Stop event
+history. A pass keeps them within a disk budget and an age limit:
+
+- Whole files (rotated logs, logs/chat.json, inbox files, past months of
+  history) older than the age limit are deleted. Then, while everything
+  together is over the budget, the oldest files are deleted first.
+- Files read as a whole are trimmed by record: .sessions entries past the age
+  limit, .processed_messages beyond its newest PROCESSED_KEEP IDs,
+  logs/stop.json beyond its newest STOP_LOG_KEEP events, and .attachments
+  entries whose file is gone.
+- Append-only logs (trace.jsonl, telegram_listener.out) are cut to their
+  newest BRIDGE_GC_LOG_MB, at a line boundary.
+
+Scans are incremental: ~/.claude/.gc.json remembers each inbox directory's
+listing with its mtime, and a directory that has not changed since the last
+pass is not listed again. It also remembers project directories, so logs of
+sessions that expired from .sessions are still collected.
+
+The listener runs a pass on a background thread every
+BRIDGE_GC_INTERVAL_HOURS; `python -m claude_bridge.cleanup` runs one now.
+The TTS audio cache has its own budget (BRIDGE_TTS_CACHE_MB) and the HTML
+archive is left alone.
+
+Environment:
+    BRIDGE_GC_BUDGET_MB        disk budget for everything above (default 200)
+    BRIDGE_GC_MAX_AGE_DAYS     age limit (default 30)
+    BRIDGE_GC_HISTORY_DAYS     age limit for Stop event history (default 365)
+    BRIDGE_GC_LOG_MB           newest part of an append-only log kept (default 5)
+    BRIDGE_GC_INTERVAL_HOURS   listener pass interval, 0 to disable (default 6)
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import time
+from pathlib import Path
+
+from claude_bridge.state import atomic_write_json, atomic_write_text, locked, read_json
+
+DEFAULT_BUDGET_MB = 200
+DEFAULT_MAX_AGE_DAYS = 30
+DEFAULT_HISTORY_DAYS = 365
+DEFAULT_LOG_MB = 5
+DEFAULT_INTERVAL_HOURS = 6
+PROCESSED_KEEP = 10000
+STOP_LOG_KEEP = 1000
+DAY = 24 * 60 * 60
+
+
+class Policy:
+    """Budget and age limits, from BRIDGE_GC_* unless given."""
+
+    def __init__(self, budget_mb=None, max_age_days=None, history_days=None, log_mb=None):
+        def setting(value, name, default):
+            return float(value if value is not None else os.getenv(name, default))
+
+        self.budget = int(setting(budget_mb, 'BRIDGE_GC_BUDGET_MB', DEFAULT_BUDGET_MB) * 1024 * 1024)
+        self.max_age = setting(max_age_days, 'BRIDGE_GC_MAX_AGE_DAYS', DEFAULT_MAX_AGE_DAYS) * DAY
+        self.history_age = setting(history_days, 'BRIDGE_GC_HISTORY_DAYS', DEFAULT_HISTORY_DAYS) * DAY
+        self.log_keep = int(setting(log_mb, 'BRIDGE_GC_LOG_MB', DEFAULT_LOG_MB) * 1024 * 1024)
+
+
+def interval_hours():
+    """Hours between the listener's passes, from BRIDGE_GC_INTERVAL_HOURS; 0 disables them."""
+    return float(os.getenv('BRIDGE_GC_INTERVAL_HOURS', DEFAULT_INTERVAL_HOURS) or 0)
+
+
+def claude_dir():
+    return Path.home() / '.claude'
+
+
+def size_of(path):
+    try:
+        return path.stat().st_size
+    except OSError:
+        return 0
+
+
+def mtime_of(path):
+    try:
+        return path.stat().st_mtime
+    except OSError:
+        return 0
+
+
+def format_bytes(size):
+    return f"{size / 1024 / 1024:.1f} MB" if size >= 1024 * 1024 else f"{size / 1024:.0f} KB"
+
+
+class Pass:
+    """One collection pass: what was reclaimed, and from which kind of artifact."""
+
+    def __init__(self, policy, dry_run=False, now=None):
+        self.policy = policy
+        self.dry_run = dry_run
+        self.now = time.time() if now is None else now
+        self.reclaimed = {}
+        self.files = 0
+        self.total = 0
+
+    def count(self, kind, size, files=0):
+        if size > 0:
+            self.reclaimed[kind] = self.reclaimed.get(kind, 0) + size
+        self.files += files
+
+    def report(self):
+        return {'reclaimed': sum(self.reclaimed.values()), 'by_kind': dict(self.reclaimed),
+                'files': self.files, 'total': self.total, 'budget': self.policy.budget,
+                'dry_run': self.dry_run}
+
+    # --- Records inside files ---------------------------------------------
+
+    def trim_json(self, kind, path, trim):
+        """Apply trim(data) -> data or None (unchanged) under the file's lock."""
+        path = Path(path)
+        if not path.exists():
+            return
+        with locked(path):
+            data = read_json(path)
+            trimmed = trim(data) if data is not None else None
+            if trimmed is None:
+                return
+            text = json.dumps(trimmed, indent=2)
+            self.count(kind, size_of(path) - len(text.encode()))
+            if not self.dry_run:
+                atomic_write_text(path, text)
+
+    def expire_sessions(self):
+        cutoff = self.now - self.policy.max_age
+
+        def trim(sessions):
+            kept = {short_id: info for short_id, info in sessions.items() if info.get('timestamp', 0) > cutoff}
+            return kept if len(kept) < len(sessions) else None
+
+        self.trim_json('sessions', claude_dir() / '.sessions', trim)
+
+    def trim_stop_log(self, project):
+        def trim(events):
+            return events[-STOP_LOG_KEEP:] if isinstance(events, list) and len(events) > STOP_LOG_KEEP else None
+
+        self.trim_json('stop_log', Path(project) / 'logs' / 'stop.json', trim)
+
+    def prune_attachment_cache(self):
+        def trim(cache):
+            kept = {unique_id: entry for unique_id, entry in cache.items() if os.path.exists(entry.get('path', ''))}
+            return kept if len(kept) < len(cache) else None
+
+        self.trim_json('attachments', claude_dir() / '.attachments', trim)
+
+    def trim_processed(self):
+        path = claude_dir() / '.processed_messages'
+        if size_of(path) == 0:
+            return
+        with locked(path):
+            lines = path.read_text().splitlines(keepends=True)
+            if len(lines) <= PROCESSED_KEEP:
+                return
+            text = ''.join(lines[-PROCESSED_KEEP:])
+            self.count('processed', size_of(path) - len(text.encode()))
+            if not self.dry_run:
+                atomic_write_text(path, text)
+
+    # --- Append-only logs -------------------------------------------------
+
+    def trim_log(self, kind, path):
+        """Cut a log to its newest log_keep bytes, in place (its writers keep appending to the same file)."""
+        size = size_of(path)
+        keep = self.policy.log_keep
+        if size <= keep:
+            return
+        with open(path, 'r+b') as f:
+            f.seek(size - keep)
+            tail = f.read()
+            tail = tail[tail.find(b'\n') + 1:]  # Start at a whole line
+            self.count(kind, size - len(tail))
+            if not self.dry_run:
+                # An append racing the cut may be lost; logs can afford that
+                f.seek(0)
+                f.write(tail)
+                f.truncate()
+
+    # --- Whole files ------------------------------------------------------
+
+    def listing(self, state, directory):
+        """[(mtime, size, path)] of the files in directory, listed again only when it changed."""
+        cache = state.setdefault('dirs', {})
+        try:
+            mtime = directory.stat().st_mtime
+        except OSError:
+            cache.pop(str(directory), None)
+            return []
+        entry = cache.get(str(directory))
+        if entry is None or entry['mtime'] != mtime:
+            files = []
+            for child in directory.iterdir():
+                try:
+                    stat = child.lstat()
+                except OSError:
+                    continue
+                if child.is_file() and not child.name.startswith('.'):
+                    files.append([stat.st_mtime, stat.st_size, child.name])
+            entry = cache[str(directory)] = {'mtime': mtime, 'files': files}
+        return [(mtime, size, directory / name) for mtime, size, name in entry['files']]
+
+    def deletable(self, state, projects):
+        """[(mtime, size, path, kind)] of every file a pass may delete."""
+        units = []
+        listed = set()
+        for log in (claude_dir() / 'telegram_hook.log', Path.home() / 'telegram_listener.log'):
+            for path in log.parent.glob(f"{log.name}.*"):
+                if path.suffix == '.lock':
+                    continue  # Held by the processes writing the log, never replaced
+                units.append((mtime_of(path), size_of(path), path, 'rotated_log'))
+
+        for project in projects:
+            chat = Path(project) / 'logs' / 'chat.json'
+            if chat.exists():
+                units.append((mtime_of(chat), size_of(chat), chat, 'chat_log'))
+            inbox = Path(project) / '.telegram-inbox'
+            if inbox.is_dir():
+                for session_dir in inbox.iterdir():
+                    if session_dir.is_dir():
+                        listed.add(str(session_dir))
+                        units += [(mtime, size, path, 'inbox') for mtime, size, path in self.listing(state, session_dir)]
+
+        # Forget directories that are gone
+        state['dirs'] = {path: entry for path, entry in state.get('dirs', {}).items() if path in listed}
+
+        current_month = time.strftime('%Y-%m', time.localtime(self.now))
+        history = claude_dir() / 'history'
+        if history.is_dir():
+            for partition in history.glob('[0-9][0-9][0-9][0-9]-[0-9][0-9]'):
+                if partition.name < current_month:
+                    files = list(partition.iterdir())
+                    units.append((max(map(mtime_of, files), default=0),
+                                  sum(size_of(p) for p in files), partition, 'history'))
+        return units
+
+    def delete(self, path, kind, size):
+        if not self.dry_run:
+            try:
+                if path.is_dir():
+                    shutil.rmtree(path)
+                else:
+                    path.unlink()
+                    if path.parent.parent.name == '.telegram-inbox' and not any(path.parent.iterdir()):
+                        path.parent.rmdir()
+            except OSError:
+                return False
+        self.count(kind, size, files=1)
+        return True
+
+    def evict(self, units, kept_bytes):
+        """Delete expired files, then the oldest until the total fits the budget."""
+        total = kept_bytes + sum(size for _, size, _, _ in units)
+        for mtime, size, path, kind in sorted(units, key=lambda unit: unit[0]):
+            limit = self.policy.history_age if kind == 'history' else self.policy.max_age
+            if (mtime < self.now - limit or total > self.policy.budget) and self.delete(path, kind, size):
+                total -= size
+        self.total = total
+
+
+def project_dirs(state):
+    """Project directories in .sessions now or on earlier passes (that still exist)."""
+    sessions = read_json(claude_dir() / '.sessions', {})
+    known = set(state.get('projects', []))
+    known.update(info['cwd'] for info in sessions.values() if info.get('cwd'))
+    state['projects'] = sorted(path for path in known if os.path.isdir(path))
+    return state['projects']
+
+
+def collect(policy=None, dry_run=False, now=None):
+    """Run one pass; returns a report: {'reclaimed', 'by_kind', 'files', 'total', 'budget', 'dry_run'}."""
+    sweep = Pass(policy or Policy(), dry_run, now)
+    state_path = claude_dir() / '.gc.json'
+    with locked(state_path):  # One pass at a time (listener and CLI)
+        state = read_json(state_path, {})
+        projects = project_dirs(state)
+
+        sweep.trim_processed()
+        for project in projects:
+            sweep.trim_stop_log(project)
+        sweep.trim_log('trace', claude_dir() / 'traces' / 'trace.jsonl')
+        sweep.trim_log('listener_out', Path.home() / 'telegram_listener.out')
+
+        units = sweep.deletable(state, projects)
+        # Files that are managed but never deleted still count against the budget
+        kept = [claude_dir() / name for name in ('.sessions', '.processed_messages', '.attachments',
+                                                 'telegram_hook.log', 'traces/trace.jsonl')]
+        kept += [Path.home() / 'telegram_listener.log', Path.home() / 'telegram_listener.out']
+        kept += [Path(project) / 'logs' / 'stop.json' for project in projects]
+        sweep.evict(units, sum(map(size_of, kept)))
+
+        # After eviction: sessions past the age limit, cache entries of deleted files
+        sweep.expire_sessions()
+        sweep.prune_attachment_cache()
+
+        state['last_run'] = int(sweep.now)
+        if not dry_run:
+            atomic_write_json(state_path, state, indent=None)
+    return sweep.report()
+
+
+def describe(report):
+    """One-line summary of a pass."""
+    verb = 'Would reclaim' if report['dry_run'] else 'Reclaimed'
+    kinds = ', '.join(f"{kind} {format_bytes(size)}" for kind, size in
+                      sorted(report['by_kind'].items(), key=lambda item: -item[1]))
+    return (f"🧹 {verb} {format_bytes(report['reclaimed'])} ({report['files']} file(s) deleted"
+            f"{'; ' + kinds if kinds else ''}); {format_bytes(report['total'])} of "
+            f"{format_bytes(report['budget'])} budget in use")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="bridge gc", description="Collect old Claude-Telegram Bridge state and logs")
+    parser.add_argument("--dry-run", action="store_true", help="Report what would be reclaimed, delete nothing")
+    parser.add_argument("--budget-mb", type=float, help=f"Disk budget (default {DEFAULT_BUDGET_MB})")
+    parser.add_argument("--max-age-days", type=float, help=f"Age limit (default {DEFAULT_MAX_AGE_DAYS})")
+    args = parser.parse_args(argv)
+
+    print(describe(collect(Policy(args.budget_mb, args.max_age_days), dry_run=args.dry_run)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,55 @@
+"""
+One command line for the bridge: `bridge <command> [args]`.
+
+    bridge sessions                      List known sessions
+    bridge changes <id> [--full]         Git changes of a session (show-changes)
+    bridge transcript <id>               Telegram conversation of a session (show-telegram)
+    bridge archive [--out DIR] [--full]  Static HTML archive of every session
+    bridge history summary|latency       Stop event history reports
+    bridge gc [--dry-run]                Collect old bridge files
+    bridge listen [--supervise]          Run the Telegram listener
+
+setup.sh aliases `bridge` to `python3 -m claude_bridge` with ~/.claude on
+PYTHONPATH. This module only maps command names to "module:function"
+strings. A command's module is imported when that command runs, so each
+command pays only for its own imports. benchmarks/bench_startup.py --cli
+holds every command to a startup budget.
+"""
+
+import sys
+
+COMMANDS = {
+    'sessions': ('claude_bridge.sessions:main', 'List known sessions'),
+    'changes': ('claude_bridge.changes:main', 'Git changes of a session'),
+    'transcript': ('claude_bridge.transcript:main', 'Telegram conversation of a session'),
+    'archive': ('claude_bridge.archive:main', 'Build the static HTML archive'),
+    'history': ('claude_bridge.history:main', 'Stop event history reports'),
+    'gc': ('claude_bridge.cleanup:main', 'Collect old bridge files'),
+    'listen': ('claude_bridge.listen:main', 'Run the Telegram listener'),
+}
+
+
+def usage():
+    lines = ["Usage: bridge <command> [args]   (bridge <command> --help for its options)", "", "Commands:"]
+    lines += [f"  {name:<12}{help_text}" for name, (_, help_text) in COMMANDS.items()]
+    return '\n'.join(lines)
+
+
+def resolve(name):
+    """Import a command's module and return its main(argv) function."""
+    import importlib
+
+    target = COMMANDS[name][0]
+    module, _, function = target.partition(':')
+    return getattr(importlib.import_module(module), function)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] in ('-h', '--help', 'help'):
+        print(usage())
+        return 0 if argv else 2
+    if argv[0] not in COMMANDS:
+        print(f"❌ Unknown command: {argv[0]}\n\n{usage()}", file=sys.stderr)
+        return 2
+    return resolve(argv[0])(argv[1:]) or 0
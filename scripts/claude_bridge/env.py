@@ -0,0 +1,62 @@
+"""
+.env loading shared by the hook, the listener and the CLI.
+
+Settings (TELEGRAM_API, BRIDGE_*) live in ~/.claude/.env. Variables already
+set in the environment always win, so a launcher or shell can override the
+file.
+
+python-dotenv is used when installed, and also gets to search for a .env in
+the directories above the installed scripts. Without it, a small parser
+reads ~/.claude/.env in the same KEY=VALUE format (comments, `export`,
+quoted values).
+"""
+
+import os
+
+
+def claude_env_file():
+    return os.path.expanduser('~/.claude/.env')
+
+
+def parse_env_file(path):
+    """KEY -> value pairs of a .env file."""
+    values = {}
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#') or '=' not in line:
+                continue
+            key, value = line.split('=', 1)
+            key = key.strip()
+            if key.startswith('export '):
+                key = key[len('export '):].strip()
+            value = value.strip()
+            if len(value) >= 2 and value[0] == value[-1] and value[0] in '"\'':
+                value = value[1:-1]
+            elif ' #' in value:
+                value = value.split(' #', 1)[0].rstrip()
+            if key:
+                values[key] = value
+    return values
+
+
+def load_env():
+    """Load .env files into os.environ without overriding variables already set."""
+    try:
+        from dotenv import load_dotenv
+    except ImportError:
+        load_dotenv = None
+
+    if load_dotenv is not None:
+        load_dotenv()
+    env_file = claude_env_file()
+    if os.path.exists(env_file):
+        if load_dotenv is not None:
+            load_dotenv(env_file)
+        else:
+            _apply(parse_env_file(env_file))
+
+
+def _apply(values):
+    for key, value in values.items():
+        os.environ.setdefault(key, value)
@@ -0,0 +1,409 @@
+"""
+Columnar history of Stop events.
+
+Every Stop hook run records one event: when, which session and project, how
+it ended (sent, dedup, failed ...), its timings, the notification's length and
+how many changes it reported. Events are kept in ~/.claude/history
+(BRIDGE_HISTORY_DIR) as columns, so months of them can be aggregated without
+parsing a JSON document per event.
+
+Layout:
+- pending.jsonl: events not yet compacted. The hook appends one line here.
+- <YYYY-MM>/: one partition per month. Each column is a flat binary file
+  (<name>.col) written with the array module. String columns hold indexes
+  into the partition's dictionary (dict.json). meta.json holds the row count,
+  which is only advanced after every column was appended, so a torn append
+  is ignored by readers and cut off by the next compaction.
+
+Once pending.jsonl holds BATCH_SIZE events, the hook that added the last one
+moves them into the columns in one batch. Queries load whole columns with
+array.fromfile and aggregate them with C-level builtins (Counter, sorted,
+itertools.compress); only the pending tail is parsed as JSON.
+
+Usage:
+    python -m claude_bridge.history summary [--by project] [--days 30] [--project NAME]
+    python -m claude_bridge.history latency [--days 30] [--project NAME]
+    python -m claude_bridge.history compact
+
+Set BRIDGE_HISTORY=0 to stop recording.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from array import array
+from collections import Counter
+from itertools import compress
+from operator import itemgetter
+from pathlib import Path
+
+from claude_bridge.state import atomic_write_json, locked, read_json
+from claude_bridge.tracing import percentile
+
+BATCH_SIZE = 64
+
+# (column, array typecode); 'str' columns are dictionary-encoded as 'I'
+COLUMNS = (
+    ('ts', 'd'),
+    ('session', 'str'),
+    ('project', 'str'),
+    ('outcome', 'str'),
+    ('total_ms', 'f'),
+    ('git_ms', 'f'),
+    ('parse_ms', 'f'),
+    ('send_ms', 'f'),
+    ('msg_len', 'I'),
+    ('changes', 'I'),
+    ('new_changes', 'I'),
+    ('chats', 'H'),
+    ('retries', 'H'),
+)
+STRING_COLUMNS = {name for name, kind in COLUMNS if kind == 'str'}
+FAILED_OUTCOMES = {'failed', 'error', 'config_error'}
+PHASES = ('total_ms', 'git_ms', 'parse_ms', 'send_ms')
+SUMMARY_COLUMNS = ('outcome', 'total_ms', 'msg_len', 'changes')
+LIMITS = {'I': 2 ** 32 - 1, 'H': 2 ** 16 - 1}
+
+
+def history_dir():
+    return Path(os.getenv('BRIDGE_HISTORY_DIR') or Path.home() / '.claude' / 'history')
+
+
+def typecode(kind):
+    return 'I' if kind == 'str' else kind
+
+
+def event_from_run(info, spans, total_ms):
+    """One history event from the hook's outcome (info) and the run's trace spans."""
+    def phase_ms(*names):
+        return sum(span['dur_ms'] for span in spans if span['name'] in names)
+
+    sends = [span for span in spans if span['name'] == 'send']
+    return dict({
+        'ts': time.time(),
+        'total_ms': total_ms,
+        'git_ms': phase_ms('git_probe'),
+        'parse_ms': phase_ms('transcript_parse', 'html_convert'),
+        # Chats are sent to in parallel: the slowest one is what the hook waited for
+        'send_ms': max((span['dur_ms'] for span in sends), default=0.0),
+        'retries': sum(span['attrs'].get('retries', 0) for span in sends),
+    }, **info)
+
+
+def record(event, root=None):
+    """Append one event; moves a full batch into the columns. Never raises."""
+    root = Path(root or history_dir())
+    pending = root / 'pending.jsonl'
+    try:
+        with locked(pending):
+            with open(pending, 'a') as f:
+                f.write(json.dumps(event, separators=(',', ':')) + '\n')
+            with open(pending) as f:
+                full = sum(1 for _ in f) >= BATCH_SIZE
+            if full:
+                _compact(root)
+    except (OSError, ValueError):
+        pass  # History must never break the hook
+
+
+def compact(root=None):
+    """Move every pending event into the columns; returns how many were moved."""
+    root = Path(root or history_dir())
+    with locked(root / 'pending.jsonl'):
+        return _compact(root)
+
+
+def _compact(root):
+    """Compact pending.jsonl (caller holds its lock)."""
+    compacting = root / 'compacting.jsonl'
+    moved = 0
+    # A batch interrupted by a crash is finished first; meta.json tells
+    # which partitions already took it
+    if compacting.exists():
+        moved += _compact_file(compacting, root)
+    try:
+        os.replace(root / 'pending.jsonl', compacting)
+    except FileNotFoundError:
+        return moved
+    return moved + _compact_file(compacting, root)
+
+
+def _compact_file(path, root):
+    data = path.read_bytes()
+    events = read_events(data.splitlines())
+    append_events(events, root, batch=hashlib.sha1(data).hexdigest()[:16])
+    path.unlink()
+    return len(events)
+
+
+def read_events(lines):
+    events = []
+    for line in lines:
+        try:
+            events.append(json.loads(line))
+        except ValueError:
+            continue  # Partially written line
+    return events
+
+
+def encode(rows, name, kind, values=None):
+    """One column of rows as an array; strings are coded into (and extend) values."""
+    column = array(typecode(kind))
+    if kind == 'str':
+        codes = {value: code for code, value in enumerate(values)}
+        for row in rows:
+            value = str(row.get(name) or '')
+            if value not in codes:
+                codes[value] = len(values)
+                values.append(value)
+            column.append(codes[value])
+    elif kind in LIMITS:
+        column.extend(min(max(int(row.get(name) or 0), 0), LIMITS[kind]) for row in rows)
+    else:
+        column.extend(float(row.get(name) or 0) for row in rows)
+    return column
+
+
+def partition_of(ts):
+    return time.strftime('%Y-%m', time.localtime(ts))
+
+
+def append_events(events, root=None, batch=None):
+    """Append events to their month partitions, column by column."""
+    root = Path(root or history_dir())
+    by_month = {}
+    for event in events:
+        by_month.setdefault(partition_of(event.get('ts', 0)), []).append(event)
+    for month, rows in sorted(by_month.items()):
+        _append_partition(root / month, rows, batch)
+
+
+def _append_partition(partition, rows, batch):
+    partition.mkdir(parents=True, exist_ok=True)
+    meta = read_json(partition / 'meta.json', {})
+    if batch and batch == meta.get('batch'):
+        return  # Taken before a crash interrupted the compaction
+    count = meta.get('rows', 0)
+    dictionary = read_json(partition / 'dict.json', {})
+
+    for name, kind in COLUMNS:
+        column = encode(rows, name, kind, dictionary.setdefault(name, []) if kind == 'str' else None)
+        path = partition / f"{name}.col"
+        with open(path, 'ab') as f:
+            # Drop whatever a torn append left past the committed rows
+            if f.tell() != count * column.itemsize:
+                f.truncate(count * column.itemsize)
+            column.tofile(f)
+
+    atomic_write_json(partition / 'dict.json', dictionary, indent=None)
+    atomic_write_json(partition / 'meta.json', {'rows': count + len(rows), 'batch': batch}, indent=None)
+
+
+class Table:
+    """Columns of a set of events: arrays of numbers, strings as codes into a shared dictionary."""
+
+    def __init__(self, columns=None, strings=None):
+        self.columns = columns or {name: array(typecode(kind)) for name, kind in COLUMNS}
+        self.strings = strings or {name: [] for name in STRING_COLUMNS}
+
+    def __len__(self):
+        return len(next(iter(self.columns.values())))
+
+    def select(self, *names):
+        """Only the named columns (grouping copies fewer arrays)."""
+        return Table({name: self.columns[name] for name in names}, self.strings)
+
+    def extend(self, columns, strings):
+        """Add another partition's columns, re-coding its strings into ours."""
+        for name, _ in COLUMNS:
+            values = columns[name]
+            if name in STRING_COLUMNS:
+                ours = self.strings[name]
+                codes = {value: code for code, value in enumerate(ours)}
+                for value in strings.get(name, []):
+                    if value not in codes:
+                        codes[value] = len(ours)
+                        ours.append(value)
+                mapping = [codes[value] for value in strings.get(name, [])]
+                values = array('I', map(mapping.__getitem__, values))
+            self.columns[name].extend(values)
+
+    def where(self, mask):
+        """Rows for which mask (an iterable of booleans) is true."""
+        mask = list(mask)
+        return Table({name: array(values.typecode, compress(values, mask)) for name, values in self.columns.items()},
+                     self.strings)
+
+    def equals(self, name, value):
+        """Mask of rows whose string column `name` is value."""
+        try:
+            code = self.strings[name].index(value)
+        except ValueError:
+            return [False] * len(self)
+        return map(code.__eq__, self.columns[name])
+
+    def take(self, rows):
+        """The given row positions."""
+        if len(rows) < 2:
+            return Table({name: array(values.typecode, map(values.__getitem__, rows))
+                          for name, values in self.columns.items()}, self.strings)
+        gather = itemgetter(*rows)  # One C-level gather per column
+        return Table({name: array(values.typecode, gather(values)) for name, values in self.columns.items()},
+                     self.strings)
+
+    def group_by(self, keys):
+        """{key: Table} for a key per row (a list or array), largest group first."""
+        counts = Counter(keys)
+        if len(counts) <= 8:
+            # Few groups: one C-level compress pass per group and column
+            return {key: self.where(map(key.__eq__, keys)) for key, _ in counts.most_common()}
+        # Many groups: sort the rows by key once, then every group is a slice
+        ordered = self.take(sorted(range(len(keys)), key=keys.__getitem__))
+        groups, start = {}, 0
+        for key in sorted(counts):
+            end = start + counts[key]
+            groups[key] = Table({name: values[start:end] for name, values in ordered.columns.items()}, self.strings)
+            start = end
+        return {key: groups[key] for key, _ in counts.most_common()}
+
+    def groups(self, name):
+        """{value: Table} for a string column, largest group first."""
+        groups = self.group_by(self.columns[name])
+        return {self.strings[name][code]: group for code, group in groups.items()}
+
+
+def load(root=None, since=None, until=None):
+    """All events in [since, until) (unix times; None: unbounded) as a Table."""
+    root = Path(root or history_dir())
+    table = Table()
+    first = partition_of(since) if since else None
+    last = partition_of(until) if until else None
+    for partition in sorted(root.glob('[0-9][0-9][0-9][0-9]-[0-9][0-9]')):
+        # Whole months outside the range are never read
+        if (first and partition.name < first) or (last and partition.name > last):
+            continue
+        rows = read_json(partition / 'meta.json', {}).get('rows', 0)
+        strings = read_json(partition / 'dict.json', {})
+        columns = {}
+        for name, kind in COLUMNS:
+            column = array(typecode(kind))
+            try:
+                with open(partition / f"{name}.col", 'rb') as f:
+                    column.fromfile(f, rows)
+            except (OSError, EOFError):
+                break
+            columns[name] = column
+        else:
+            table.extend(columns, strings)
+
+    try:
+        pending = (root / 'pending.jsonl').read_bytes().splitlines()
+    except OSError:
+        pending = []
+    if pending:
+        events, strings = read_events(pending), {}
+        columns = {name: encode(events, name, kind, strings.setdefault(name, []) if kind == 'str' else None)
+                   for name, kind in COLUMNS}
+        table.extend(columns, strings)
+
+    if since or until:
+        low, high = since or float('-inf'), until or float('inf')
+        table = table.where(low <= ts < high for ts in table.columns['ts'])
+    return table
+
+
+def summarize(table):
+    """Aggregates of a Table: events, failures, latency percentiles, sizes."""
+    total = sorted(table.columns['total_ms'])
+    outcomes = {table.strings['outcome'][code]: count for code, count in Counter(table.columns['outcome']).items()}
+    failed = sum(count for outcome, count in outcomes.items() if outcome in FAILED_OUTCOMES)
+    events = len(table)
+    return {
+        'events': events,
+        'failed': failed,
+        'failure_rate': failed / events if events else 0.0,
+        'outcomes': dict(outcomes),
+        'p50_ms': percentile(total, 50),
+        'p95_ms': percentile(total, 95),
+        'p99_ms': percentile(total, 99),
+        'avg_msg_len': sum(table.columns['msg_len']) / events if events else 0.0,
+        'changes': sum(table.columns['changes']),
+    }
+
+
+def summary_by(table, by='project'):
+    """{group: summarize(...)}; by is a string column, or 'day'/'month'."""
+    if by in ('day', 'month'):
+        pattern = '%Y-%m-%d' if by == 'day' else '%Y-%m'
+        hours = {}
+
+        def period(ts):
+            # Formatted once per hour rather than once per event
+            hour = int(ts // 3600)
+            if hour not in hours:
+                hours[hour] = time.strftime(pattern, time.localtime(hour * 3600))
+            return hours[hour]
+
+        keys = list(map(period, table.columns['ts']))
+        groups = table.select(*SUMMARY_COLUMNS).group_by(keys)
+        return {key: summarize(groups[key]) for key in sorted(groups)}
+    return {key: summarize(group) for key, group in table.select(by, *SUMMARY_COLUMNS).groups(by).items()}
+
+
+def phase_percentiles(table):
+    """{phase: {p50, p90, p95, p99, max}} over the events of a Table."""
+    stats = {}
+    for phase in PHASES:
+        values = sorted(table.columns[phase])
+        stats[phase] = {f"p{pct}": percentile(values, pct) for pct in (50, 90, 95, 99)}
+        stats[phase]['max'] = values[-1] if values else 0.0
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="bridge history", description="Query the history of Stop events")
+    parser.add_argument("--dir", help="History directory (default ~/.claude/history)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    summary_parser = subparsers.add_parser("summary", help="Events, failure rates and latency per group")
+    summary_parser.add_argument("--by", default="project", choices=["project", "session", "outcome", "day", "month"])
+    latency_parser = subparsers.add_parser("latency", help="Per-phase latency percentiles")
+    for sub in (summary_parser, latency_parser):
+        sub.add_argument("--days", type=float, help="Only the last N days")
+        sub.add_argument("--project", help="Only this project")
+    subparsers.add_parser("compact", help="Move pending events into the columns now")
+
+    args = parser.parse_args(argv)
+    if args.command == "compact":
+        print(f"Compacted {compact(args.dir)} event(s)")
+        return 0
+
+    start = time.perf_counter()
+    table = load(args.dir, since=time.time() - args.days * 86400 if args.days else None)
+    if args.project:
+        table = table.where(table.equals('project', args.project))
+    if not len(table):
+        print("No history found")
+        return 1
+    elapsed = (time.perf_counter() - start) * 1000
+
+    if args.command == "latency":
+        print(f"⏱️  Stop hook phases over {len(table)} events (ms)")
+        print(f"{'phase':<10} {'p50':>9} {'p90':>9} {'p95':>9} {'p99':>9} {'max':>9}")
+        for phase, s in phase_percentiles(table).items():
+            print(f"{phase[:-3]:<10} {s['p50']:>9.1f} {s['p90']:>9.1f} {s['p95']:>9.1f} {s['p99']:>9.1f} {s['max']:>9.1f}")
+    else:
+        print(f"📊 {len(table)} Stop events by {args.by}")
+        print(f"{args.by:<24} {'events':>8} {'failed':>7} {'rate':>7} {'p50 ms':>9} {'p95 ms':>9} {'avg len':>8}")
+        for key, s in summary_by(table, args.by).items():
+            print(f"{key[:24]:<24} {s['events']:>8} {s['failed']:>7} {s['failure_rate']:>6.1%} "
+                  f"{s['p50_ms']:>9.1f} {s['p95_ms']:>9.1f} {s['avg_msg_len']:>8.0f}")
+    print(f"\n(scanned in {elapsed:.0f} ms)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,20 @@
+"""
+`bridge listen`: run the Telegram listener script in place of this process.
+
+The listener is exec'd as telegram_listener.py, which sits next to the
+claude_bridge package both in scripts/ and in ~/.claude, rather than imported.
+The process then looks the same as one started by telegram-start or the
+launcher, so telegram-stop, telegram-status and setup.sh find it.
+"""
+
+import os
+import sys
+
+
+def script_path():
+    return os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'telegram_listener.py')
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    os.execv(sys.executable, [sys.executable, script_path()] + list(argv))
@@ -0,0 +1,213 @@
+"""
+Structured logging for the bridge processes.
+
+Each log file gets one handler (one open file) per process. Records are
+written as JSON lines: {"ts", "level", "logger", "event", "msg", ...fields}.
+Files rotate by size (default) or time. Concurrent Stop hooks and the
+listener share telegram_hook.log, so rotation is checked and done under the
+file's lock (claude_bridge.state), and a process reopens the file when
+another one rotated it. The Stop hook buffers records in
+memory and writes them in one go at exit (warnings and errors are written
+immediately); long-running processes can move file I/O to a background
+thread with BRIDGE_LOG_ASYNC=1.
+
+Environment:
+    BRIDGE_LOG_ROTATE   size (default) or time
+    BRIDGE_LOG_MAX_MB   size rotation threshold in MB (default 5)
+    BRIDGE_LOG_WHEN     time rotation interval, e.g. midnight (default), H, D
+    BRIDGE_LOG_BACKUPS  rotated files to keep (default 3)
+    BRIDGE_LOG_ASYNC    1 to write records from a background thread
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+_queue_listeners = {}
+
+_RESERVED = set(logging.LogRecord('', 0, '', 0, '', (), None).__dict__) | {'message', 'asctime'}
+
+
+class JsonFormatter(logging.Formatter):
+    """Format records as one JSON object per line."""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'event': getattr(record, 'event', None),
+            'msg': record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED and key != 'event':
+                entry[key] = value
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class ConsoleFormatter(logging.Formatter):
+    """Human-readable format for interactive runs: [EVENT] message."""
+
+    def format(self, record):
+        event = getattr(record, 'event', None)
+        message = record.getMessage()
+        return f"[{event}] {message}" if event else message
+
+
+# strftime of a record's time per BRIDGE_LOG_WHEN: a new value starts a new file
+PERIODS = {'S': '%Y%m%d%H%M%S', 'M': '%Y%m%d%H%M', 'H': '%Y%m%d%H', 'D': '%Y%m%d', 'MIDNIGHT': '%Y%m%d',
+           'W': '%G%V'}
+
+
+class SharedRotatingFileHandler(logging.handlers.WatchedFileHandler):
+    """
+    Log file rotated by size or time that several processes can write at once.
+
+    Each write takes the file's lock, reopens the file if another process
+    rotated it, rotates it if it is due and appends the record, so exactly one
+    process rotates and nobody keeps writing to a renamed file. Backups are
+    numbered: path.1 is the newest.
+    """
+
+    def __init__(self, path, backups, max_bytes=0, when=None):
+        super().__init__(path, delay=True, encoding='utf-8')
+        self.backups = backups
+        self.max_bytes = max_bytes
+        when = (when or '').upper()
+        self.period = PERIODS.get(when[:1] if when[:1] == 'W' else when) if when else None
+
+    def _due(self, st, record):
+        """Whether the file (os.stat result, None if missing) must rotate before this record."""
+        if st is None or not st.st_size:
+            return False
+        if self.max_bytes:
+            return st.st_size + len(self.format(record)) + 1 > self.max_bytes
+        return (self.period is not None and time.strftime(self.period, time.localtime(st.st_mtime))
+                != time.strftime(self.period, time.localtime(record.created)))
+
+    def _rotate(self):
+        if self.stream is not None:
+            self.stream.close()
+            self.stream = None
+        if self.backups > 0:
+            for n in range(self.backups - 1, 0, -1):
+                try:
+                    os.replace(f"{self.baseFilename}.{n}", f"{self.baseFilename}.{n + 1}")
+                except FileNotFoundError:
+                    pass
+            os.replace(self.baseFilename, f"{self.baseFilename}.1")
+        else:
+            open(self.baseFilename, 'w').close()
+
+    def emit(self, record):
+        from claude_bridge.state import locked
+
+        try:
+            with locked(self.baseFilename):
+                self.reopenIfNeeded()
+                try:
+                    st = os.stat(self.baseFilename)
+                except FileNotFoundError:
+                    st = None
+                if self._due(st, record):
+                    self._rotate()
+                if self.stream is None:
+                    self.stream = self._open()
+                    self._statstream()
+                logging.FileHandler.emit(self, record)
+        except Exception:
+            self.handleError(record)
+
+
+def _file_handler(path):
+    """Rotating file handler per BRIDGE_LOG_* settings; opens the file lazily, once."""
+    backups = int(os.getenv('BRIDGE_LOG_BACKUPS', 3))
+    if os.getenv('BRIDGE_LOG_ROTATE', 'size') == 'time':
+        return SharedRotatingFileHandler(path, backups, when=os.getenv('BRIDGE_LOG_WHEN', 'midnight'))
+    max_bytes = int(float(os.getenv('BRIDGE_LOG_MAX_MB', 5)) * 1024 * 1024)
+    return SharedRotatingFileHandler(path, backups, max_bytes=max_bytes)
+
+
+def get_logger(name, path, buffered=False, async_io=None, console=False):
+    """
+    Return the process-wide logger for a log file, creating it on first use.
+
+    Args:
+        name: Logger name (e.g. 'hook', 'listener')
+        path: Log file path
+        buffered: Keep records in memory until exit or a warning (short-lived processes)
+        async_io: Write from a background thread (default: BRIDGE_LOG_ASYNC)
+        console: Also print records to stdout in a readable format
+    """
+    logger = logging.getLogger(f"claude_bridge.{name}")
+    if logger.handlers:
+        return logger
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    handler = _file_handler(path)
+    handler.setFormatter(JsonFormatter())
+
+    if async_io is None:
+        async_io = os.getenv('BRIDGE_LOG_ASYNC', '0') == '1'
+
+    if async_io:
+        records = queue.SimpleQueue()
+        listener = logging.handlers.QueueListener(records, handler)
+        listener.start()
+        _queue_listeners[logger.name] = listener
+        atexit.register(close_logger, logger)  # Drains the queue before exit
+        logger.addHandler(_PreformattedQueueHandler(records))
+    elif buffered:
+        logger.addHandler(logging.handlers.MemoryHandler(
+            capacity=200, flushLevel=logging.WARNING, target=handler
+        ))
+    else:
+        logger.addHandler(handler)
+
+    if console:
+        stream = logging.StreamHandler(sys.stdout)
+        stream.setFormatter(ConsoleFormatter())
+        logger.addHandler(stream)
+
+    return logger
+
+
+class _PreformattedQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that keeps custom fields on the record for the JSON formatter."""
+
+    def prepare(self, record):
+        # The default prepare() flattens the record into a formatted message,
+        # dropping structured fields; only resolve the message arguments here.
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+def close_logger(logger):
+    """Drain any background writer, flush and close the logger's handlers."""
+    listener = _queue_listeners.pop(logger.name, None)
+    if listener is not None:
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
+    for handler in list(logger.handlers):
+        handler.close()
+        logger.removeHandler(handler)
+
+
+def log_event(logger, event, message, level=logging.INFO, **fields):
+    """Log a tagged event (e.g. SEND, OK, HTTP_ERROR) with structured fields."""
+    fields['event'] = event
+    logger.log(level, message, extra=fields)
@@ -0,0 +1,308 @@
+"""
+In-process metrics with a Prometheus text endpoint (listener, BRIDGE_METRICS_PORT).
+
+Counters, gauges and histograms live in a registry. Recording is a dict
+update under a per-metric lock, so it is cheap enough for the hot paths:
+
+    UPDATES = metrics.counter('bridge_updates_total', 'Telegram updates received')
+    UPDATES.inc()
+    RESUME_SECONDS.observe(0.012, mode='warm')
+
+With BRIDGE_METRICS_PORT set, the listener serves the registry at
+http://127.0.0.1:<port>/metrics. The Stop hook runs for a fraction of a
+second, too briefly to be scraped, so it POSTs the timings of its phases to
+/push on the same port when it finishes. They are recorded as
+bridge_hook_phase_seconds{phase=...}.
+"""
+
+import bisect
+import json
+import math
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+MAX_PUSH_BYTES = 256 * 1024
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def header(self):
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    """Monotonically increasing count."""
+
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+    def render(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return self.header() + [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+                                for key, value in items]
+
+
+class Gauge(_Metric):
+    """Current value, either set directly or read from a callback at scrape time."""
+
+    kind = 'gauge'
+
+    def __init__(self, name, help, labelnames=(), fn=None):
+        super().__init__(name, help, labelnames)
+        self.fn = fn
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def value(self, **labels):
+        if self.fn is not None:
+            return self.fn()
+        return self._values.get(self._key(labels), 0)
+
+    def render(self):
+        if self.fn is not None:
+            try:
+                items = [((), self.fn())]
+            except Exception:
+                items = []
+        else:
+            with self._lock:
+                items = sorted(self._values.items())
+        return self.header() + [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+                                for key, value in items]
+
+
+class Histogram(_Metric):
+    """Distribution of observed values (seconds) in cumulative buckets."""
+
+    kind = 'histogram'
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def count(self, **labels):
+        state = self._values.get(self._key(labels))
+        return state[2] if state else 0
+
+    def render(self):
+        with self._lock:
+            items = sorted((key, (list(counts), total, n)) for key, (counts, total, n) in self._values.items())
+        lines = self.header()
+        for key, (counts, total, n) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, [('le', _format_value(bound))])
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(round(total, 6))}")
+            lines.append(f"{self.name}_count{labels} {n}")
+        return lines
+
+
+class Registry:
+    """Named metrics; asking twice for the same name returns the same metric."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"{name} is already registered as a {metric.kind}")
+            return metric
+
+    def counter(self, name, help, labelnames=()):
+        return self._get(Counter, name, help, labelnames)
+
+    def gauge(self, name, help, labelnames=(), fn=None):
+        return self._get(Gauge, name, help, labelnames, fn)
+
+    def histogram(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._get(Histogram, name, help, labelnames, buckets)
+
+    def get(self, name):
+        return self._metrics.get(name)
+
+    def render(self):
+        """Prometheus text exposition format."""
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+    def record_hook_push(self, payload):
+        """Record a Stop hook's pushed run: {"spans": [{"name": ..., "dur_ms": ...}], "status": ...}."""
+        spans = payload.get('spans', [])
+        phases = self.histogram('bridge_hook_phase_seconds', 'Stop hook phase durations', ['phase'])
+        runs = self.counter('bridge_hook_runs_total', 'Stop hook runs reported', ['status'])
+        for span in spans[:200]:
+            name = str(span.get('name', ''))[:64]
+            if name:
+                phases.observe(float(span.get('dur_ms', 0)) / 1000, phase=name)
+        runs.inc(status=str(payload.get('status', 'ok'))[:32])
+
+
+REGISTRY = Registry()
+
+
+def counter(name, help, labelnames=()):
+    return REGISTRY.counter(name, help, labelnames)
+
+
+def gauge(name, help, labelnames=(), fn=None):
+    return REGISTRY.gauge(name, help, labelnames, fn)
+
+
+def histogram(name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+    return REGISTRY.histogram(name, help, labelnames, buckets)
+
+
+class MetricsServer:
+    """Serves GET /metrics and accepts Stop hook pushes on POST /push (localhost only by default)."""
+
+    def __init__(self, registry=REGISTRY, host='127.0.0.1', port=9464):
+        self.registry = registry
+        self.server = ThreadingHTTPServer((host, port), self._handler_class())
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, name='metrics', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _handler_class(self):
+        registry = self.registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def _reply(self, status, body, content_type='text/plain; charset=utf-8'):
+                data = body.encode()
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    return self._reply(404, 'not found\n')
+                self._reply(200, registry.render(), CONTENT_TYPE)
+
+            def do_POST(self):
+                if self.path != '/push':
+                    return self._reply(404, 'not found\n')
+                length = int(self.headers.get('Content-Length', 0) or 0)
+                if length > MAX_PUSH_BYTES:
+                    return self._reply(413, 'too large\n')
+                try:
+                    registry.record_hook_push(json.loads(self.rfile.read(length)))
+                except (ValueError, TypeError, AttributeError):
+                    return self._reply(400, 'bad payload\n')
+                self._reply(204, '')
+
+        return Handler
+
+
+def push_url():
+    """Listener push endpoint from BRIDGE_METRICS_PORT, or None when metrics are off."""
+    port = os.getenv('BRIDGE_METRICS_PORT')
+    return f"http://127.0.0.1:{port}/push" if port else None
+
+
+def push(spans, status='ok', url=None, timeout=0.5):
+    """Send one run's spans to the listener; never raises (the hook must not fail on metrics)."""
+    import urllib.request
+
+    url = url or push_url()
+    if not url:
+        return False
+    body = json.dumps({'spans': [{'name': s['name'], 'dur_ms': s['dur_ms']} for s in spans],
+                       'status': status}).encode()
+    try:
+        request = urllib.request.Request(url, data=body, headers={'Content-Type': 'application/json'})
+        with urllib.request.urlopen(request, timeout=timeout):
+            return True
+    except Exception:
+        return False
@@ -0,0 +1,127 @@
+"""
+Per-chat send queues for long-running processes (the listener).
+
+Each chat gets its own FIFO; one sender thread serves the chats round-robin,
+one message per turn, and keeps each chat under Telegram's per-chat rate
+(about one message a second). A chat that is being rate limited (429) or
+flooding its queue only delays itself: other chats keep their turns, and a
+full queue drops that chat's oldest message rather than growing without bound.
+"""
+
+import collections
+import threading
+import time
+
+
+class ChatOutbox:
+    """Fair, rate-limited per-chat message queues served by a background thread."""
+
+    def __init__(self, send, min_interval=1.0, max_pending=50):
+        """
+        Args:
+            send: send(chat_id, text, **params) -> retry_after seconds when rate
+                limited, otherwise None (sent, or failed permanently)
+            min_interval: Minimum seconds between two messages to the same chat
+            max_pending: Messages kept per chat; the oldest is dropped beyond this
+        """
+        self.send = send
+        self.min_interval = min_interval
+        self.max_pending = max_pending
+        self.handled = 0
+        self.dropped = 0
+
+        self._queues = {}
+        self._ready = collections.deque()  # Chats with pending messages, in turn order
+        self._next_at = {}
+        self._in_flight = 0
+        self._cond = threading.Condition()
+        self._stopping = False
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='outbox', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=5):
+        """Stop after sending what is queued (up to `timeout` seconds)."""
+        self.drain(timeout)
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def put(self, chat_id, text, **params):
+        """Queue a message for a chat."""
+        chat_id = str(chat_id)
+        with self._cond:
+            pending = self._queues.setdefault(chat_id, collections.deque())
+            if len(pending) >= self.max_pending:
+                pending.popleft()
+                self.dropped += 1
+            pending.append((text, params))
+            if chat_id not in self._ready:
+                self._ready.append(chat_id)
+            self._cond.notify_all()
+
+    def pending(self, chat_id=None):
+        with self._cond:
+            if chat_id is not None:
+                return len(self._queues.get(str(chat_id), ()))
+            return sum(len(q) for q in self._queues.values())
+
+    def drain(self, timeout=5):
+        """Block until every queue is empty and nothing is in flight."""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while self._ready or self._in_flight:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or self._thread is None:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def _next_chat(self):
+        """Pop the first chat in turn order that may send now; else seconds to wait."""
+        now = time.monotonic()
+        wait = None
+        for _ in range(len(self._ready)):
+            chat_id = self._ready.popleft()
+            next_at = self._next_at.get(chat_id, 0)
+            if next_at <= now:
+                return chat_id, None
+            self._ready.append(chat_id)
+            wait = next_at - now if wait is None else min(wait, next_at - now)
+        return None, wait
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while True:
+                    if self._stopping:
+                        return
+                    chat_id, wait = self._next_chat() if self._ready else (None, None)
+                    if chat_id is not None:
+                        break
+                    self._cond.wait(wait)
+                text, params = self._queues[chat_id].popleft()
+                self._in_flight += 1
+
+            try:
+                retry_after = self.send(chat_id, text, **params)
+            except Exception:
+                retry_after = None
+
+            with self._cond:
+                self._in_flight -= 1
+                pending = self._queues[chat_id]
+                if retry_after:
+                    pending.appendleft((text, params))
+                    self._next_at[chat_id] = time.monotonic() + retry_after
+                else:
+                    self.handled += 1
+                    self._next_at[chat_id] = time.monotonic() + self.min_interval
+                if pending and chat_id not in self._ready:
+                    self._ready.append(chat_id)  # Back of the line
+                self._cond.notify_all()
@@ -0,0 +1,152 @@
+"""
+Paged /changes and /transcript views for the listener.
+
+A view is rendered once and split at line boundaries into pages that fit a
+Telegram message. The first page is sent with Prev/Next buttons; a press edits
+the same message to show another page. Rendered pages are cached per session
+and view, keyed on what they were rendered from:
+
+    changes     changes.worktree_state(): HEAD, `git status --porcelain` and
+                the stat() of each changed file
+    transcript  the transcript's size; growth is parsed from the cached offset
+
+so paging and repeated commands re-run the diffs or re-read the transcript
+only when something changed.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+
+PAGE_SIZE = 3500  # Leaves room under Telegram's 4096-character limit for the footer
+MAX_VIEWS = 64  # Cached (session, view) renders, least recently used dropped first
+VIEWS = {'c': 'changes', 'f': 'changes_full', 't': 'transcript'}  # Code in callback data -> view
+CODES = {view: code for code, view in VIEWS.items()}
+
+
+def paginate(text, size=PAGE_SIZE):
+    """Split text into pages of at most `size` characters, at line boundaries where possible."""
+    pages = []
+    current = ''
+    for line in text.splitlines(keepends=True):
+        while len(line) > size:  # An overlong line is cut wherever it must be
+            if current:
+                pages.append(current)
+                current = ''
+            pages.append(line[:size])
+            line = line[size:]
+        if current and len(current) + len(line) > size:
+            pages.append(current)
+            current = ''
+        current += line
+    if current or not pages:
+        pages.append(current)
+    return [page.rstrip('\n') or '(empty)' for page in pages]
+
+
+def page_callback(view, short_id, index):
+    return f"pg{CODES[view]}:{short_id}:{index}"
+
+
+def parse_page(data):
+    """('page', short_id, (view, index)) for a Prev/Next press, else None."""
+    parts = (data or '').split(':')
+    if len(parts) != 3 or parts[0][:2] != 'pg' or parts[0][2:] not in VIEWS or not parts[2].isdigit():
+        return None
+    return 'page', parts[1].lower(), (VIEWS[parts[0][2:]], int(parts[2]))
+
+
+def show(pages, view, short_id, index):
+    """(text, reply_markup) for one page; a negative index counts from the end, and it is clamped."""
+    if index < 0:
+        index += len(pages)
+    index = max(0, min(index, len(pages) - 1))
+    if len(pages) == 1:
+        return pages[0], None
+    buttons = []
+    if index > 0:
+        buttons.append({'text': '◀️ Prev', 'callback_data': page_callback(view, short_id, index - 1)})
+    if index < len(pages) - 1:
+        buttons.append({'text': 'Next ▶️', 'callback_data': page_callback(view, short_id, index + 1)})
+    return f"{pages[index]}\n\n— page {index + 1}/{len(pages)} —", {'inline_keyboard': [buttons]}
+
+
+def transcript_report(short_id, info, exchanges):
+    """Telegram replies and Claude's answers, in show-telegram's layout."""
+    lines = [f"📱 Telegram Session: {short_id}", f"📂 Project: {os.path.basename(info.get('cwd', ''))}", '']
+    if not exchanges:
+        lines.append("No Telegram messages found in this session")
+    for exchange in exchanges:
+        who = '👤 You' if exchange['who'] == 'you' else '🤖 Claude'
+        lines += [f"{who}: {exchange['text']}", '']
+    return '\n'.join(lines)
+
+
+class Pager:
+    """Cache of rendered, paginated views."""
+
+    def __init__(self, max_views=MAX_VIEWS, size=PAGE_SIZE):
+        self.max_views = max_views
+        self.size = size
+        self._views = OrderedDict()  # (short_id, view) -> {'key', 'pages', ...}
+        self._lock = threading.Lock()
+
+    def _get(self, short_id, view):
+        with self._lock:
+            entry = self._views.get((short_id, view))
+            if entry is not None:
+                self._views.move_to_end((short_id, view))
+            return entry
+
+    def _put(self, short_id, view, entry):
+        with self._lock:
+            self._views[(short_id, view)] = entry
+            self._views.move_to_end((short_id, view))
+            while len(self._views) > self.max_views:
+                self._views.popitem(last=False)
+
+    def pages(self, view, short_id, info):
+        """The pages of a session's view, rendered again only if its source changed."""
+        if view == 'transcript':
+            return self._transcript(short_id, info)
+        return self._changes(short_id, info, full=view == 'changes_full')
+
+    def _changes(self, short_id, info, full):
+        from claude_bridge.changes import report, worktree_state
+
+        view = 'changes_full' if full else 'changes'
+        entry = self._get(short_id, view)
+        state = worktree_state(info['cwd'])
+        if entry is not None and state is not None and entry['key'] == state:
+            return entry['pages']
+        pages = paginate(report(short_id, info, show_diff=full), self.size)
+        # Taken before rendering: a change made meanwhile renders again next time
+        self._put(short_id, view, {'key': state, 'pages': pages})
+        return pages
+
+    def _transcript(self, short_id, info):
+        from claude_bridge.transcript import find_transcript, parse_exchanges
+
+        path = find_transcript(info)
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            return [f"📜 Session {short_id}: transcript not found"]
+
+        entry = self._get(short_id, 'transcript')
+        if entry is not None and entry['session_id'] == info.get('session_id') and entry['key'] == size:
+            return entry['pages']
+        if entry is None or entry['session_id'] != info.get('session_id') or size < entry['offset']:
+            entry = {'session_id': info.get('session_id'), 'offset': 0, 'started': False, 'exchanges': []}
+        else:
+            entry = dict(entry, exchanges=list(entry['exchanges']))
+
+        try:
+            new, entry['offset'], entry['started'] = parse_exchanges(path, entry['offset'], entry['started'])
+        except OSError:
+            return [f"📜 Session {short_id}: transcript not found"]
+        entry['exchanges'] += new
+        entry['key'] = size
+        entry['pages'] = paginate(transcript_report(short_id, info, entry['exchanges']), self.size)
+        self._put(short_id, 'transcript', entry)
+        return entry['pages']
@@ -0,0 +1,348 @@
+"""
+Live progress messages for running sessions (listener, BRIDGE_PROGRESS=1).
+
+The Stop hook records each session's transcript path in ~/.claude/.sessions.
+The listener then tails those transcripts, so a session is only followed
+from the turn after its first Stop: its first turn gets no progress message. When a session starts a new turn
+(a new user prompt, e.g. a reply sent from Telegram), the next assistant
+text creates one message per routed chat. That message is then edited in
+place as the session keeps working. The final Stop notification still
+arrives as a separate message, as before.
+
+API load stays bounded:
+- debounced: at most one edit per session every BRIDGE_PROGRESS_INTERVAL
+  seconds (default 3), with intermediate texts coalesced into the latest;
+- diffed: nothing is sent unless the rendered message changed.
+
+Transcript changes come from inotify on Linux. Elsewhere (macOS) the files
+are polled with stat(), which costs little for a few dozen active sessions.
+"""
+
+import html
+import json
+import os
+import select
+import struct
+import time
+from pathlib import Path
+
+from claude_bridge.transcript import assistant_text, is_user_prompt
+
+DEFAULT_INTERVAL = 3.0
+MAX_TEXT = 3500  # Telegram messages are capped at 4096 characters
+SESSION_MAX_AGE = 24 * 60 * 60  # Only follow sessions active in the last day
+
+
+class TranscriptTail:
+    """Incremental reader of a JSONL transcript that returns only newly appended records."""
+
+    def __init__(self, path, from_end=True):
+        self.path = Path(path)
+        self.offset = 0
+        self._partial = b''
+        if from_end:
+            try:
+                self.offset = self.path.stat().st_size
+            except OSError:
+                pass
+
+    def read_new(self):
+        try:
+            with open(self.path, 'rb') as f:
+                f.seek(0, os.SEEK_END)
+                if f.tell() < self.offset:
+                    self.offset, self._partial = 0, b''  # Truncated or replaced
+                f.seek(self.offset)
+                data = f.read()
+        except OSError:
+            return []
+        self.offset += len(data)
+
+        *lines, self._partial = (self._partial + data).split(b'\n')
+        records = []
+        for line in lines:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue
+        return records
+
+
+class InotifyWatcher:
+    """File change notifications through Linux inotify (via ctypes, no dependencies)."""
+
+    IN_MODIFY = 0x002
+    IN_ATTRIB = 0x004
+    IN_DELETE_SELF = 0x400
+    IN_MOVE_SELF = 0x800
+    IN_IGNORED = 0x8000
+    EVENT = struct.Struct('iIII')
+
+    def __init__(self):
+        import ctypes
+        import ctypes.util
+
+        self._libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._paths = {}  # wd -> path
+        self._wds = {}    # path -> wd
+
+    def add(self, path):
+        path = str(path)
+        mask = self.IN_MODIFY | self.IN_ATTRIB | self.IN_DELETE_SELF | self.IN_MOVE_SELF
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), mask)
+        if wd >= 0:
+            self._paths[wd] = path
+            self._wds[path] = wd
+        return wd >= 0
+
+    def __contains__(self, path):
+        return str(path) in self._wds
+
+    def remove(self, path):
+        wd = self._wds.pop(str(path), None)
+        if wd is not None:
+            self._paths.pop(wd, None)
+            self._libc.inotify_rm_watch(self._fd, wd)
+
+    def wait(self, timeout):
+        """Paths changed within timeout seconds (empty set if none)."""
+        ready, _, _ = select.select([self._fd], [], [], max(timeout, 0))
+        if not ready:
+            return set()
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+
+        changed = set()
+        pos = 0
+        while pos + self.EVENT.size <= len(data):
+            wd, mask, _, name_len = self.EVENT.unpack_from(data, pos)
+            pos += self.EVENT.size + name_len
+            path = self._paths.get(wd)
+            if path is None:
+                continue
+            changed.add(path)
+            if mask & (self.IN_IGNORED | self.IN_DELETE_SELF | self.IN_MOVE_SELF):
+                # File gone or replaced: stop tracking this watch, re-added on refresh
+                self._paths.pop(wd, None)
+                self._wds.pop(path, None)
+        return changed
+
+    def close(self):
+        os.close(self._fd)
+
+
+class PollingWatcher:
+    """Portable fallback: stat() the watched files a few times a second."""
+
+    def __init__(self, poll_interval=0.25):
+        self.poll_interval = poll_interval
+        self._stats = {}
+
+    @staticmethod
+    def _stat(path):
+        try:
+            st = os.stat(path)
+            return st.st_size, st.st_mtime_ns
+        except OSError:
+            return None
+
+    def add(self, path):
+        self._stats[str(path)] = self._stat(path)
+        return True
+
+    def __contains__(self, path):
+        return str(path) in self._stats
+
+    def remove(self, path):
+        self._stats.pop(str(path), None)
+
+    def wait(self, timeout):
+        deadline = time.monotonic() + max(timeout, 0)
+        while True:
+            changed = set()
+            for path, previous in self._stats.items():
+                current = self._stat(path)
+                if current != previous:
+                    self._stats[path] = current
+                    changed.add(path)
+            remaining = deadline - time.monotonic()
+            if changed or remaining <= 0:
+                return changed
+            time.sleep(min(self.poll_interval, remaining))
+
+    def close(self):
+        pass
+
+
+def make_watcher():
+    """inotify where available, polling otherwise."""
+    try:
+        return InotifyWatcher()
+    except (OSError, AttributeError):
+        return PollingWatcher()
+
+
+class SessionProgress:
+    """Progress state for one session: its transcript tail and its messages this turn."""
+
+    def __init__(self, short_id, info):
+        self.short_id = short_id
+        self.session_id = info.get('session_id')
+        self.project = os.path.basename(info.get('cwd', ''))
+        self.transcript_path = info['transcript_path']
+        self.tail = TranscriptTail(self.transcript_path)
+        self.text = None       # Latest assistant text this turn
+        self.sent = None       # Last rendered text delivered to every routed chat
+        self.messages = {}     # chat_id -> message_id of this turn's progress message
+        self.delivered = {}    # chat_id -> text that chat's message shows
+        self.last_edit = float('-inf')
+        self.retry_at = 0.0
+
+    def consume(self, records):
+        """Apply new transcript records; True if there is something new to show."""
+        updated = False
+        for record in records:
+            if is_user_prompt(record):
+                # New turn: the next output starts a fresh progress message
+                self.text, self.sent, self.messages, self.delivered = None, None, {}, {}
+            else:
+                text = assistant_text(record)
+                if text:
+                    self.text = text
+                    updated = True
+        return updated
+
+    def render(self):
+        text = self.text
+        if len(text) > MAX_TEXT:
+            text = '…' + text[-MAX_TEXT:]
+        return f"⏳ <b>Session {self.short_id}</b> ({html.escape(self.project)})\n\n{html.escape(text)}"
+
+
+class ProgressTracker:
+    """Follows active sessions' transcripts and keeps one progress message per session up to date."""
+
+    def __init__(self, post, token_for, routes, sessions_file=None, interval=None,
+                 watcher=None, clock=time.monotonic, refresh_interval=5.0):
+        """
+        Args:
+            post: post(token, method, payload) -> (status, response JSON)
+            token_for: token_for(short_id) -> bot token that owns the session
+            routes: object whose get() returns the current RoutingTable
+            interval: Minimum seconds between two edits of a session's message
+        """
+        self.post = post
+        self.token_for = token_for
+        self.routes = routes
+        self.sessions_file = Path(sessions_file) if sessions_file else Path.home() / '.claude' / '.sessions'
+        if interval is None:
+            interval = float(os.getenv('BRIDGE_PROGRESS_INTERVAL', DEFAULT_INTERVAL))
+        self.interval = interval
+        self.watcher = watcher or make_watcher()
+        self.clock = clock
+        self.refresh_interval = refresh_interval
+        self.sessions = {}    # short_id -> SessionProgress
+        self._by_path = {}    # transcript path -> short_id
+        self._sessions_mtime = None
+        self._next_refresh = 0.0
+        self.sent = 0
+        self.edits = 0
+
+    def refresh(self):
+        """Start following newly registered sessions, stop following stale ones."""
+        from claude_bridge.state import read_json
+
+        try:
+            mtime = self.sessions_file.stat().st_mtime_ns
+        except OSError:
+            mtime = None
+        if mtime == self._sessions_mtime and all(path in self.watcher for path in self._by_path):
+            return
+        self._sessions_mtime = mtime
+
+        cutoff = time.time() - SESSION_MAX_AGE
+        active = {
+            short_id: info for short_id, info in read_json(self.sessions_file, {}).items()
+            if info.get('transcript_path') and info.get('timestamp', 0) > cutoff
+        }
+        for short_id in list(self.sessions):
+            progress = self.sessions[short_id]
+            if active.get(short_id, {}).get('transcript_path') != progress.transcript_path:
+                self.watcher.remove(progress.transcript_path)
+                self._by_path.pop(progress.transcript_path, None)
+                del self.sessions[short_id]
+        for short_id, info in active.items():
+            if short_id not in self.sessions and os.path.exists(info['transcript_path']):
+                progress = SessionProgress(short_id, info)
+                self.sessions[short_id] = progress
+                self._by_path[progress.transcript_path] = short_id
+        for path in self._by_path:
+            if path not in self.watcher:
+                self.watcher.add(path)  # New, or its inotify watch was dropped
+
+    def on_change(self, path):
+        short_id = self._by_path.get(path)
+        if short_id is not None:
+            progress = self.sessions[short_id]
+            progress.consume(progress.tail.read_new())
+
+    def flush(self):
+        """Send or edit every session's message that is due and has changed."""
+        now = self.clock()
+        for progress in self.sessions.values():
+            if progress.text is None:
+                continue
+            rendered = progress.render()
+            if rendered == progress.sent:
+                continue  # Diffed: nothing new to show
+            if now - progress.last_edit < self.interval or now < progress.retry_at:
+                continue  # Debounced: the latest text goes out on a later flush
+            self._deliver(progress, rendered, now)
+
+    def _deliver(self, progress, rendered, now):
+        token = self.token_for(progress.short_id)
+        chats = self.routes.get().chats_for(progress.project, progress.short_id)
+        progress.last_edit = now
+        for chat_id in chats:
+            if progress.delivered.get(chat_id) == rendered:
+                continue  # Got it on an earlier attempt that failed for another chat
+            payload = {'chat_id': chat_id, 'text': rendered, 'parse_mode': 'HTML'}
+            message_id = progress.messages.get(chat_id)
+            if message_id is None:
+                status, body = self.post(token, 'sendMessage', payload)
+                if status == 200 and body.get('ok'):
+                    progress.messages[chat_id] = body['result']['message_id']
+                    progress.delivered[chat_id] = rendered
+                    self.sent += 1
+            else:
+                status, body = self.post(token, 'editMessageText', dict(payload, message_id=message_id))
+                if status == 200 and body.get('ok'):
+                    progress.delivered[chat_id] = rendered
+                    self.edits += 1
+                elif status == 400 and 'not found' in str(body.get('description', '')):
+                    progress.messages.pop(chat_id, None)  # Deleted by the user: recreate
+                    progress.delivered.pop(chat_id, None)
+            if status == 429:
+                retry_after = (body.get('parameters') or {}).get('retry_after', 1)
+                progress.retry_at = now + retry_after
+        # Only a text every chat shows counts as sent; failed chats are retried on a later flush
+        if all(progress.delivered.get(chat_id) == rendered for chat_id in chats):
+            progress.sent = rendered
+
+    def run(self, stop_event=None):
+        """Follow transcripts until stop_event is set."""
+        try:
+            while stop_event is None or not stop_event.is_set():
+                if self.clock() >= self._next_refresh:
+                    self.refresh()
+                    self._next_refresh = self.clock() + self.refresh_interval
+                for path in self.watcher.wait(min(self.interval, 1.0)):
+                    self.on_change(path)
+                self.flush()
+        finally:
+            self.watcher.close()
@@ -0,0 +1,165 @@
+"""
+Chat routing for multi-user setups.
+
+~/.claude/.chats maps each Telegram chat to the projects (and optionally
+individual short session IDs) it may receive notifications for and reply to:
+
+    {
+      "111111111": {"name": "alice", "projects": ["api", "web"]},
+      "222222222": {"name": "bob", "projects": ["*"]},
+      "333333333": {"name": "oncall", "projects": [], "sessions": ["81950c"]}
+    }
+
+Project names are the basename of the session's working directory, as shown
+in notifications. Without a .chats file the single ~/.claude/.chat_id chat
+receives everything, as before. A .chats file that cannot be parsed never
+falls back to .chat_id: load_routes() raises RoutesError, and the listener
+keeps routing by the last table it could read.
+"""
+
+import json
+from pathlib import Path
+
+WILDCARD = '*'
+
+
+def routes_file():
+    return Path.home() / '.claude' / '.chats'
+
+
+def chat_id_file():
+    return Path.home() / '.claude' / '.chat_id'
+
+
+class RoutesError(ValueError):
+    """The .chats file exists but is not a valid routing table."""
+
+
+class Route:
+    """One chat's permissions."""
+
+    def __init__(self, chat_id, name=None, projects=(WILDCARD,), sessions=()):
+        self.chat_id = str(chat_id)
+        self.name = name or self.chat_id
+        self.projects = frozenset(projects)
+        self.sessions = frozenset(s.lower() for s in sessions)
+
+    @property
+    def all_projects(self):
+        return WILDCARD in self.projects
+
+    def allows(self, project=None, short_id=None):
+        if short_id and short_id.lower() in self.sessions:
+            return True
+        return self.all_projects or (project is not None and project in self.projects)
+
+
+class RoutingTable:
+    """Chat routes indexed by chat ID, project and short session ID."""
+
+    def __init__(self, routes=()):
+        self.chats = {}
+        self._by_project = {}
+        self._by_session = {}
+        self._wildcard = []
+        for route in routes:
+            self.chats[route.chat_id] = route
+            if route.all_projects:
+                self._wildcard.append(route.chat_id)
+            for project in route.projects - {WILDCARD}:
+                self._by_project.setdefault(project, []).append(route.chat_id)
+            for short_id in route.sessions:
+                self._by_session.setdefault(short_id, []).append(route.chat_id)
+
+    @classmethod
+    def single(cls, chat_id):
+        """Legacy single-chat table: one chat that sees every project."""
+        return cls([Route(chat_id)])
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls([
+            Route(chat_id, entry.get('name'), entry.get('projects', []), entry.get('sessions', []))
+            for chat_id, entry in data.items()
+        ])
+
+    def get(self):
+        """Same interface as RoutesCache, for callers that accept either."""
+        return self
+
+    def __len__(self):
+        return len(self.chats)
+
+    def __contains__(self, chat_id):
+        return str(chat_id) in self.chats
+
+    def allows(self, chat_id, project=None, short_id=None):
+        """Whether a chat may see/reply to a session of this project."""
+        route = self.chats.get(str(chat_id))
+        return route is not None and route.allows(project, short_id)
+
+    def chats_for(self, project, short_id=None):
+        """Chat IDs that should be notified about a session, in table order."""
+        matched = set(self._wildcard)
+        matched.update(self._by_project.get(project, ()))
+        if short_id:
+            matched.update(self._by_session.get(short_id.lower(), ()))
+        return [chat_id for chat_id in self.chats if chat_id in matched]
+
+
+def load_routes(path=None, legacy_path=None):
+    """
+    Load the routing table, falling back to the single .chat_id chat when there
+    is no .chats file. Raises RoutesError if .chats is malformed: falling back
+    would hand notifications and replies to chats that were removed from it.
+    """
+    path = Path(path) if path else routes_file()
+    if path.exists():
+        try:
+            return RoutingTable.from_dict(json.loads(path.read_text()))
+        except (ValueError, AttributeError, TypeError) as e:
+            raise RoutesError(f"Cannot parse {path}: {e}") from e
+
+    legacy_path = Path(legacy_path) if legacy_path else chat_id_file()
+    if legacy_path.exists():
+        chat_id = legacy_path.read_text().strip()
+        if chat_id:
+            return RoutingTable.single(chat_id)
+    return RoutingTable()
+
+
+class RoutesCache:
+    """
+    Reload the routing table only when .chats or .chat_id changes. While .chats
+    is malformed the last good table stays in use (an empty one if there never
+    was one), and on_error is called once per broken version of the file.
+    """
+
+    def __init__(self, path=None, legacy_path=None, on_error=None):
+        self.path = Path(path) if path else routes_file()
+        self.legacy_path = Path(legacy_path) if legacy_path else chat_id_file()
+        self.on_error = on_error
+        self._stamp = None
+        self._table = None
+
+    def _mtimes(self):
+        stamp = []
+        for p in (self.path, self.legacy_path):
+            try:
+                stamp.append(p.stat().st_mtime_ns)
+            except OSError:
+                stamp.append(None)
+        return tuple(stamp)
+
+    def get(self):
+        stamp = self._mtimes()
+        if self._table is None or stamp != self._stamp:
+            try:
+                self._table = load_routes(self.path, self.legacy_path)
+            except RoutesError as e:
+                if self._table is None:
+                    self._table = RoutingTable()
+                if self.on_error is not None:
+                    self.on_error(e)
+            self._stamp = stamp
+        return self._table
@@ -0,0 +1,74 @@
+"""
+The session registry (~/.claude/.sessions) shared by the hook, the listener and the CLI.
+
+The Stop hook records every session under its short ID:
+    {"abc123": {"session_id": ..., "cwd": ..., "timestamp": ..., "start_time": ...,
+                "transcript_path": ..., "sent": {...}}}
+
+CLI (`bridge sessions`): list sessions, most recently active first.
+"""
+
+import os
+import time
+
+
+def sessions_file():
+    return os.path.expanduser('~/.claude/.sessions')
+
+
+def load_sessions(path=None):
+    """The short ID -> session mapping ({} if missing or unreadable)."""
+    from claude_bridge.state import read_json
+
+    return read_json(path or sessions_file(), {})
+
+
+def project_of(info):
+    return os.path.basename(info.get('cwd', ''))
+
+
+def find_session(sessions, session_id):
+    """
+    (short_id, info) for a short ID, an unambiguous prefix of one, or a full
+    Claude session ID; (None, None) if nothing matches.
+    """
+    from claude_bridge.shortids import ShortIdIndex
+
+    short_id = ShortIdIndex(sessions).resolve(session_id)
+    if short_id is not None:
+        return short_id, sessions[short_id]
+    for short_id, info in sessions.items():
+        if info.get('session_id') == session_id:
+            return short_id, info
+    return None, None
+
+
+def describe(sessions):
+    """One line per session, most recently active first."""
+    lines = []
+    for short_id, info in sorted(sessions.items(), key=lambda item: -item[1].get('timestamp', 0)):
+        when = time.strftime('%Y-%m-%d %H:%M', time.localtime(info['timestamp'])) if info.get('timestamp') else '-'
+        lines.append(f"  {short_id}: {project_of(info) or 'unknown'}  ({when})")
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(prog='bridge sessions', description="List sessions known to the bridge")
+    parser.add_argument("--project", help="Only sessions in this project")
+    args = parser.parse_args(argv)
+
+    sessions = load_sessions()
+    if args.project:
+        sessions = {short_id: info for short_id, info in sessions.items() if project_of(info) == args.project}
+    if not sessions:
+        print("No sessions yet")
+        return 0
+    print(f"📋 {len(sessions)} session(s):")
+    print(describe(sessions))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
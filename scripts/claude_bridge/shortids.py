@@ -0,0 +1,80 @@
+"""
+Short session IDs, abbreviated git-style.
+
+A session's short ID is the shortest prefix (at least 6 hex characters) of
+md5("<session_id>-<project>") that no other session in ~/.claude/.sessions
+already holds. Almost every session gets the familiar 6-character ID; when
+two sessions share a prefix the newer one gets a longer ID instead of
+silently overwriting the older mapping.
+
+Replies may use any unambiguous prefix of an ID that is at least
+MIN_LENGTH characters long, resolved through a sorted index.
+"""
+
+import bisect
+
+MIN_LENGTH = 6
+MAX_LENGTH = 32  # Full md5 hex digest
+HEX_DIGITS = frozenset('0123456789abcdef')
+
+
+def is_short_id(text):
+    """True if text looks like a (possibly abbreviated) short session ID."""
+    return MIN_LENGTH <= len(text) <= MAX_LENGTH and set(text) <= HEX_DIGITS
+
+
+def parse_reply(message):
+    """(short_id, text) of an 'id: text' reply, or (None, None) if it names no short ID."""
+    if ':' in message and len(message) > 7:  # Minimum: "abc123:hi"
+        target, text = message.split(':', 1)
+        target = target.strip().lower()
+        if is_short_id(target):
+            return target, text.strip()
+    return None, None
+
+
+def assign_short_id(digest, sessions, session_id):
+    """Shortest prefix of digest that already maps to session_id, or else is free."""
+    prefixes = [digest[:length] for length in range(MIN_LENGTH, len(digest) + 1)]
+
+    # Keep an ID the session already has, so it is stable across Stop hooks
+    for prefix in prefixes:
+        info = sessions.get(prefix)
+        if info is not None and info.get('session_id') == session_id:
+            return prefix
+
+    for prefix in prefixes:
+        if prefix not in sessions:
+            return prefix
+    return digest
+
+
+class ShortIdIndex:
+    """Sorted index of short session IDs for prefix lookups."""
+
+    def __init__(self, sessions):
+        self.sessions = sessions
+        self._keys = sorted(sessions)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def matching(self, prefix, limit=None):
+        """Short IDs starting with prefix, in sorted order."""
+        matches = []
+        start = bisect.bisect_left(self._keys, prefix)
+        for key in self._keys[start:]:
+            if not key.startswith(prefix) or (limit and len(matches) >= limit):
+                break
+            matches.append(key)
+        return matches
+
+    def resolve(self, prefix):
+        """The short ID an exact or unambiguous prefix refers to, or None."""
+        prefix = prefix.lower()
+        if prefix in self.sessions:
+            return prefix
+        if len(prefix) < MIN_LENGTH:
+            return None
+        matches = self.matching(prefix, limit=2)
+        return matches[0] if len(matches) == 1 else None
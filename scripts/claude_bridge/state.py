@@ -0,0 +1,121 @@
+"""
+Crash- and concurrency-safe I/O for the shared state files in ~/.claude.
+
+Several Stop hooks (one per Claude session) and the listener read and write
+.sessions, .processed_messages and friends at the same time. Two rules keep
+them consistent:
+
+- Writers hold an exclusive fcntl lock on a sidecar "<file>.lock" for the
+  whole read-modify-write, so concurrent updates are serialized instead of
+  lost. The sidecar is never replaced, unlike the data file itself.
+- Whole-file writes go to a temp file in the same directory, are fsynced and
+  then renamed over the original, so readers (which take no lock) see either
+  the old or the new contents, never a truncated file.
+
+A file that does not parse is moved aside to "<file>.corrupt" rather than
+silently treated as empty and overwritten.
+"""
+
+import fcntl
+import json
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+
+def lock_path(path):
+    path = Path(path)
+    return path.with_name(path.name + '.lock')
+
+
+@contextmanager
+def locked(path, shared=False):
+    """Hold an advisory lock for path (exclusive unless shared) for the block."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(lock_path(path), 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def atomic_write_text(path, text):
+    """Replace path with text via temp file + fsync + rename."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with open(tmp_path, 'w') as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            tmp_path.unlink()
+        except OSError:
+            pass
+        raise
+
+    # Make the rename itself durable
+    try:
+        dir_fd = os.open(path.parent, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+    except OSError:
+        pass
+
+
+def atomic_write_json(path, data, indent=2):
+    atomic_write_text(path, json.dumps(data, indent=indent))
+
+
+def read_json(path, default=None, quarantine=False):
+    """
+    Parsed contents of path, or default if it is missing or corrupt.
+
+    With quarantine (only safe while holding the lock) a corrupt file is
+    moved aside so the next write does not destroy it.
+    """
+    path = Path(path)
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return default
+    except ValueError:
+        if quarantine:
+            try:
+                os.replace(path, path.with_name(path.name + '.corrupt'))
+            except OSError:
+                pass
+        return default
+
+
+@contextmanager
+def update_json(path, default=dict):
+    """
+    Locked read-modify-write of a JSON file.
+
+    Yields the current contents (default() if missing) for the block to
+    mutate in place; they are written back atomically when the block exits
+    without an exception.
+    """
+    with locked(path):
+        data = read_json(path, quarantine=True)
+        if data is None:
+            data = default()
+        yield data
+        atomic_write_json(path, data)
+
+
+def append_line(path, line):
+    """Append one line to a log-style file under the file's lock."""
+    with locked(path):
+        with open(path, 'a') as f:
+            f.write(line.rstrip('\n') + '\n')
@@ -0,0 +1,203 @@
+"""
+Supervisor for the listener (`telegram_listener.py --supervise`).
+
+The supervisor runs the listener as a child process and restarts it when it
+exits or stops making progress. It needs no launchd or systemd (those may
+still start the supervisor itself).
+
+Heartbeat: each loop in the listener (one long-poll loop per bot, or the
+webhook dispatcher) calls Heartbeat.beat(name, within) before it blocks,
+promising to beat again within that many seconds. Beats go to a small JSON
+file named by BRIDGE_HEARTBEAT_FILE: {"pid": ..., "loops": {name: deadline}}.
+The supervisor polls that file every second. If any deadline has passed, the
+child is hung: it gets SIGTERM, then SIGKILL, and is restarted. A loop that
+keeps failing stops beating after MAX_CONSECUTIVE_ERRORS, so an error spin
+is treated like a hang.
+
+Crash loops back off: a child that dies within STABLE_AFTER seconds of
+starting is restarted after 1s, 2s, 4s ... up to BRIDGE_SUPERVISOR_MAX_BACKOFF
+(default 60s). A child that ran longer restarts immediately. Restarted
+listeners resume long polling from the update offsets they persisted, so
+replies are neither lost nor handled twice.
+"""
+
+import json
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+DEFAULT_GRACE = 10.0          # Slack on top of every promised deadline
+STARTUP_TIMEOUT = 30.0        # Time a new child gets before its first beat
+STABLE_AFTER = 60.0           # A child that ran this long is not crash-looping
+MIN_BACKOFF = 1.0
+DEFAULT_MAX_BACKOFF = 60.0
+MAX_CONSECUTIVE_ERRORS = 5
+
+
+def heartbeat_file():
+    return Path(os.getenv('BRIDGE_HEARTBEAT_FILE') or Path.home() / '.claude' / '.listener_heartbeat')
+
+
+class Heartbeat:
+    """Deadlines promised by the listener's loops; a no-op unless supervised."""
+
+    def __init__(self, path=None, grace=DEFAULT_GRACE, clock=time.time):
+        self.path = Path(path) if path else None
+        self.grace = grace
+        self.clock = clock
+        self._loops = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        """Enabled when started by the supervisor (BRIDGE_HEARTBEAT_FILE is set)."""
+        path = os.getenv('BRIDGE_HEARTBEAT_FILE')
+        return cls(path, float(os.getenv('BRIDGE_HEARTBEAT_GRACE', DEFAULT_GRACE)))
+
+    @property
+    def enabled(self):
+        return self.path is not None
+
+    def beat(self, name, within):
+        """Promise that loop `name` beats again within `within` seconds."""
+        if self.path is None:
+            return
+        with self._lock:
+            self._loops[name] = round(self.clock() + within + self.grace, 3)
+            self._write()
+
+    def done(self, name):
+        """Loop `name` ended normally: stop expecting beats from it."""
+        if self.path is None:
+            return
+        with self._lock:
+            self._loops.pop(name, None)
+            self._write()
+
+    def _write(self):
+        data = json.dumps({'pid': os.getpid(), 'loops': self._loops})
+        # Not fsynced: a heartbeat only matters while this machine is up
+        tmp_path = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+        try:
+            tmp_path.write_text(data)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            pass
+
+
+def overdue_loops(path, pid, now=None):
+    """Loops of process `pid` whose promised deadline has passed (None: no heartbeat from it yet)."""
+    try:
+        data = json.loads(Path(path).read_text())
+    except (OSError, ValueError):
+        return None
+    if data.get('pid') != pid:
+        return None
+    now = time.time() if now is None else now
+    return sorted(name for name, deadline in data.get('loops', {}).items() if deadline < now)
+
+
+class Supervisor:
+    """Runs `command` as a child, restarting it on exit or missed heartbeats."""
+
+    def __init__(self, command, heartbeat_path=None, log=print, max_backoff=None,
+                 startup_timeout=STARTUP_TIMEOUT, stable_after=STABLE_AFTER, check_interval=1.0):
+        self.command = list(command)
+        self.heartbeat_path = Path(heartbeat_path or heartbeat_file())
+        self.log = log
+        if max_backoff is None:
+            max_backoff = float(os.getenv('BRIDGE_SUPERVISOR_MAX_BACKOFF', DEFAULT_MAX_BACKOFF))
+        self.max_backoff = max_backoff
+        self.startup_timeout = startup_timeout
+        self.stable_after = stable_after
+        self.check_interval = check_interval
+        self.restarts = 0
+        self.hangs = 0
+        self.child = None
+        self._backoff = 0.0
+        self._stop = threading.Event()
+
+    def start_child(self):
+        try:
+            self.heartbeat_path.unlink()
+        except OSError:
+            pass
+        self.heartbeat_path.parent.mkdir(parents=True, exist_ok=True)
+        env = dict(os.environ, BRIDGE_HEARTBEAT_FILE=str(self.heartbeat_path))
+        self.child = subprocess.Popen(self.command, env=env)
+        return self.child
+
+    def stop_child(self, timeout=5.0):
+        child = self.child
+        if child is None or child.poll() is not None:
+            return
+        child.terminate()
+        try:
+            child.wait(timeout)
+        except subprocess.TimeoutExpired:
+            child.kill()
+            child.wait()
+
+    def watch(self, child, started):
+        """Wait until the child exits or hangs; returns a reason string."""
+        while not self._stop.is_set():
+            code = child.poll()
+            if code is not None:
+                return f"exited with code {code}"
+            overdue = overdue_loops(self.heartbeat_path, child.pid)
+            if overdue is None and time.monotonic() - started > self.startup_timeout:
+                self.hangs += 1
+                return f"sent no heartbeat within {self.startup_timeout:g}s of starting"
+            if overdue:
+                self.hangs += 1
+                return f"missed its heartbeat deadline ({', '.join(overdue)})"
+            self._stop.wait(self.check_interval)
+        return "supervisor stopping"
+
+    def next_backoff(self, uptime):
+        """Delay before the next restart: doubles while the child keeps dying young."""
+        if uptime >= self.stable_after:
+            self._backoff = 0.0
+        else:
+            self._backoff = min(self.max_backoff, max(MIN_BACKOFF, self._backoff * 2))
+        return self._backoff
+
+    def run(self):
+        """Supervise until stop() (or SIGTERM/SIGINT when run from main())."""
+        while not self._stop.is_set():
+            started = time.monotonic()
+            child = self.start_child()
+            self.log(f"🚀 Listener started (pid {child.pid})")
+            reason = self.watch(child, started)
+            self.stop_child()
+            if self._stop.is_set():
+                break
+            delay = self.next_backoff(time.monotonic() - started)
+            self.restarts += 1
+            self.log(f"⚠️ Listener {reason}; restarting in {delay:g}s")
+            self._stop.wait(delay)
+        self.stop_child()
+
+    def stop(self):
+        self._stop.set()
+
+
+def main(command, log=print):
+    """Run a supervisor in the foreground, stopping the child on SIGTERM/SIGINT."""
+    supervisor = Supervisor(command, log=log)
+
+    def handle_signal(signum, frame):
+        supervisor.stop()
+
+    signal.signal(signal.SIGTERM, handle_signal)
+    signal.signal(signal.SIGINT, handle_signal)
+    supervisor.run()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
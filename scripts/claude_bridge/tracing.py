@@ -0,0 +1,265 @@
+"""
+Span tracing for the Stop hook and the listener.
+
+Each process records named spans (phases) with their duration and optional
+counters such as bytes or retries. Spans are buffered in memory and appended
+to ~/.claude/traces/trace.jsonl as one JSON record per line when a run
+finishes, so tracing costs one file append per run.
+
+Usage:
+    python -m claude_bridge.tracing stats [--runs 100] [--process stop]
+    python -m claude_bridge.tracing export -o trace.json [--runs 20]
+
+Set BRIDGE_TRACE=0 to disable tracing, BRIDGE_TRACE_FILE to change the path.
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+_tracer = None
+_thread = threading.local()  # Per-thread tracers for parallel loops (init_thread)
+
+
+def trace_file():
+    """Path of the JSONL trace file (override with BRIDGE_TRACE_FILE)."""
+    override = os.getenv('BRIDGE_TRACE_FILE')
+    if override:
+        return Path(override)
+    return Path.home() / '.claude' / 'traces' / 'trace.jsonl'
+
+
+class Span:
+    """A running span; counters can be attached while it is open."""
+
+    __slots__ = ('name', 'attrs')
+
+    def __init__(self, name, attrs):
+        self.name = name
+        self.attrs = attrs
+
+    def set(self, **attrs):
+        """Attach counters (bytes, retries, status, ...) to the span."""
+        self.attrs.update(attrs)
+
+
+class Tracer:
+    """Buffers the spans of one run and appends them to the trace file."""
+
+    def __init__(self, process, path=None, enabled=True):
+        self.process = process
+        self.path = Path(path) if path else trace_file()
+        self.enabled = enabled
+        self.spans = []
+        self.new_run()
+
+    def new_run(self):
+        """Start a new run: later spans are grouped under a fresh run ID."""
+        self.run_id = os.urandom(6).hex()
+        self.spans = []
+
+    @contextmanager
+    def span(self, name, **attrs):
+        """Time a block of code as a named phase."""
+        span = Span(name, attrs)
+        start = time.time()
+        start_perf = time.perf_counter()
+        try:
+            yield span
+        finally:
+            if self.enabled:
+                self.spans.append({
+                    'run': self.run_id,
+                    'proc': self.process,
+                    'pid': os.getpid(),
+                    'name': name,
+                    'start': round(start, 6),
+                    'dur_ms': round((time.perf_counter() - start_perf) * 1000, 3),
+                    'attrs': span.attrs,
+                })
+
+    def flush(self):
+        """Append buffered spans to the trace file and start a new run; returns the spans."""
+        spans, self.spans = self.spans, []
+        if not (self.enabled and spans):
+            self.new_run()
+            return spans
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            lines = ''.join(json.dumps(span, separators=(',', ':')) + '\n' for span in spans)
+            with open(self.path, 'a') as f:
+                f.write(lines)
+        except OSError:
+            pass  # Tracing must never break the hook
+        self.new_run()
+        return spans
+
+
+def init(process):
+    """Create the process-wide tracer used by span()."""
+    global _tracer
+    _tracer = Tracer(process, enabled=os.getenv('BRIDGE_TRACE', '1') != '0')
+    return _tracer
+
+
+def init_thread():
+    """Give the calling thread its own copy of the process tracer, so its runs
+    are flushed and discarded independently (e.g. one poll loop per bot)."""
+    if _tracer is None:
+        return None
+    _thread.tracer = Tracer(_tracer.process, path=_tracer.path, enabled=_tracer.enabled)
+    return _thread.tracer
+
+
+def _current():
+    return getattr(_thread, 'tracer', None) or _tracer
+
+
+@contextmanager
+def span(name, **attrs):
+    """Time a phase with the thread's or process tracer (no-op before init())."""
+    tracer = _current()
+    if tracer is None:
+        yield Span(name, attrs)
+        return
+    with tracer.span(name, **attrs) as s:
+        yield s
+
+
+def flush():
+    """Flush the current tracer, if any; returns the flushed spans."""
+    tracer = _current()
+    if tracer is not None:
+        return tracer.flush()
+    return []
+
+
+def discard():
+    """Drop the spans buffered for the current run (e.g. an idle poll)."""
+    tracer = _current()
+    if tracer is not None:
+        tracer.new_run()
+
+
+def read_spans(path=None, last_runs=None, process=None):
+    """Read spans from the trace file, keeping only the last N runs."""
+    path = Path(path) if path else trace_file()
+    spans = []
+    try:
+        with open(path, 'r') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # Partially written line
+                if process and record.get('proc') != process:
+                    continue
+                spans.append(record)
+    except OSError:
+        return []
+
+    if last_runs:
+        runs = []
+        seen = set()
+        for record in reversed(spans):
+            if record['run'] not in seen:
+                seen.add(record['run'])
+                runs.append(record['run'])
+                if len(runs) == last_runs:
+                    break
+        spans = [record for record in spans if record['run'] in seen]
+    return spans
+
+
+def percentile(values, pct):
+    """Percentile with linear interpolation between closest ranks."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def phase_stats(spans):
+    """Aggregate spans into {phase: {count, p50, p95, p99, bytes, retries}}."""
+    phases = {}
+    for record in spans:
+        phases.setdefault(record['name'], []).append(record)
+
+    stats = {}
+    for name, records in phases.items():
+        durations = [r['dur_ms'] for r in records]
+        stats[name] = {
+            'count': len(records),
+            'p50': percentile(durations, 50),
+            'p95': percentile(durations, 95),
+            'p99': percentile(durations, 99),
+            'bytes': sum(r['attrs'].get('bytes', 0) for r in records),
+            'retries': sum(r['attrs'].get('retries', 0) for r in records),
+        }
+    return stats
+
+
+def to_chrome_trace(spans):
+    """Convert spans to Chrome trace event format (chrome://tracing, Perfetto)."""
+    events = []
+    processes = {}
+    for record in spans:
+        processes[record['pid']] = record['proc']
+        events.append({
+            'name': record['name'],
+            'ph': 'X',
+            'ts': int(record['start'] * 1_000_000),
+            'dur': int(record['dur_ms'] * 1000),
+            'pid': record['pid'],
+            'tid': record['pid'],
+            'args': dict(record['attrs'], run=record['run']),
+        })
+    for pid, name in processes.items():
+        events.append({'name': 'process_name', 'ph': 'M', 'pid': pid, 'args': {'name': name}})
+    return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect Claude-Telegram Bridge traces")
+    parser.add_argument("--file", help="Trace file (default ~/.claude/traces/trace.jsonl)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    stats_parser = subparsers.add_parser("stats", help="Per-phase latency percentiles")
+    stats_parser.add_argument("--runs", type=int, default=100, help="Last N runs to include")
+    stats_parser.add_argument("--process", help="Only spans from this process (stop, listener)")
+
+    export_parser = subparsers.add_parser("export", help="Export as Chrome trace JSON")
+    export_parser.add_argument("-o", "--output", required=True, help="Output JSON file")
+    export_parser.add_argument("--runs", type=int, default=20, help="Last N runs to include")
+    export_parser.add_argument("--process", help="Only spans from this process (stop, listener)")
+
+    args = parser.parse_args(argv)
+    spans = read_spans(args.file, last_runs=args.runs, process=args.process)
+    if not spans:
+        print("No trace data found")
+        return 1
+
+    if args.command == "export":
+        Path(args.output).write_text(json.dumps(to_chrome_trace(spans)))
+        print(f"Exported {len(spans)} spans to {args.output}")
+        return 0
+
+    runs = len({record['run'] for record in spans})
+    print(f"📊 Phase latency over last {runs} runs (ms)")
+    print(f"{'phase':<20} {'count':>6} {'p50':>9} {'p95':>9} {'p99':>9} {'bytes':>10} {'retries':>8}")
+    for name, s in sorted(phase_stats(spans).items(), key=lambda item: -item[1]['p50']):
+        print(f"{name:<20} {s['count']:>6} {s['p50']:>9.1f} {s['p95']:>9.1f} {s['p99']:>9.1f} "
+              f"{s['bytes']:>10} {s['retries']:>8}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
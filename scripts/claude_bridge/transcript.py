@@ -0,0 +1,164 @@
+"""
+Claude transcript parsing shared by the hook, the listener and the CLI.
+
+A transcript is the session's JSONL log under ~/.claude/projects/. User
+records hold prompts (and tool results), assistant records hold Claude's
+text and tool calls. Replies sent from Telegram carry TELEGRAM_PREFIX so
+they can be told apart from prompts typed in the terminal.
+
+CLI (`bridge transcript <id>`, also `show-telegram <id>`): print the
+Telegram conversation of a session.
+"""
+
+import json
+from pathlib import Path
+
+TELEGRAM_PREFIX = 'User replied via Telegram:'
+MIN_ANSWER = 10  # Shorter assistant texts are acknowledgements, not answers
+
+
+def find_transcript(info):
+    """A session's transcript: the path recorded by the Stop hook, else Claude's default location."""
+    if info.get('transcript_path'):
+        return Path(info['transcript_path'])
+    # Claude names project directories after the cwd with / and _ replaced by -
+    project_path = info.get('cwd', '').replace('/', '-').replace('_', '-')
+    return Path.home() / '.claude' / 'projects' / project_path / f"{info.get('session_id')}.jsonl"
+
+
+def _text_parts(content):
+    if isinstance(content, list):
+        return '\n'.join(part.get('text', '') for part in content
+                         if isinstance(part, dict) and part.get('type') == 'text')
+    return content if isinstance(content, str) else ''
+
+
+def user_text(record):
+    """Text of a user prompt record (plain or stream-json content), or ''."""
+    if record.get('type') != 'user':
+        return ''
+    return _text_parts(record.get('message', {}).get('content', ''))
+
+
+def assistant_text(record):
+    """Text parts of an assistant transcript record (tool calls excluded), or None."""
+    if record.get('type') != 'assistant':
+        return None
+    return _text_parts(record.get('message', {}).get('content', '')).strip() or None
+
+
+def is_user_prompt(record):
+    """True for a new user prompt (tool results are also logged as 'user' records)."""
+    if record.get('type') != 'user':
+        return False
+    content = record.get('message', {}).get('content', '')
+    if isinstance(content, list):
+        return any(isinstance(part, dict) and part.get('type') == 'text' for part in content)
+    return bool(content)
+
+
+def latest_response(path):
+    """Text of the most recent substantial assistant message in a transcript, or None."""
+    with open(path, 'r') as f:
+        lines = f.readlines()
+
+    response = None
+    for line in reversed(lines):
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue
+        if not isinstance(record, dict):
+            continue
+        if record.get('type') == 'assistant' and record.get('message', {}).get('role') == 'assistant':
+            response = _text_parts(record['message'].get('content', ''))
+            if len(response.strip()) > MIN_ANSWER:
+                break
+    return response
+
+
+def parse_exchanges(path, offset=0, started=False):
+    """
+    Read complete transcript lines from offset. Returns (exchanges, new offset,
+    started): 'you'/'claude' entries from the first Telegram reply onwards.
+    """
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        data = f.read()
+    end = data.rfind(b'\n') + 1  # A partial last line is read next time
+    exchanges = []
+    for line in data[:end].splitlines():
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue
+        text = user_text(record)
+        if TELEGRAM_PREFIX in text:
+            started = True
+            exchanges.append({'who': 'you', 'text': text.replace(TELEGRAM_PREFIX, '').strip(),
+                              'at': record.get('timestamp', '')})
+        elif started:
+            answer = assistant_text(record)
+            if answer and len(answer) > MIN_ANSWER:
+                exchanges.append({'who': 'claude', 'text': answer, 'at': record.get('timestamp', '')})
+    return exchanges, offset + end, started
+
+
+def show(session_id):
+    """Print the Telegram conversation of a session; returns False if it cannot be found."""
+    from claude_bridge.sessions import find_session, load_sessions
+
+    _, session_info = find_session(load_sessions(), session_id)
+    if not session_info:
+        print(f"Session {session_id} not found")
+        return False
+
+    transcript_file = find_transcript(session_info)
+    if not transcript_file.exists():
+        print(f"Transcript not found for session {session_id}")
+        print(f"Looked in: {transcript_file}")
+        return False
+
+    print(f"\n{'='*60}")
+    print(f"📱 Telegram Session: {session_id}")
+    print(f"📂 Project: {Path(session_info.get('cwd', '')).name}")
+    print(f"{'='*60}\n")
+
+    exchanges, _, conversation_started = parse_exchanges(transcript_file)
+    if conversation_started:
+        print("🔄 Telegram Conversation Started\n")
+
+    message_count = 0
+    for exchange in exchanges:
+        content = exchange['text']
+        if exchange['who'] == 'you':
+            print(f"👤 You: {content}\n")
+            message_count += 1
+        else:
+            # Truncate very long responses
+            if len(content) > 500:
+                content = content[:500] + '...\n[truncated]'
+            print(f"🤖 Claude: {content}\n")
+            print("-" * 40 + "\n")
+
+    if not conversation_started:
+        print("No Telegram messages found in this session")
+        print("(Session may have been terminal-only)")
+    else:
+        print(f"{'='*60}")
+        print(f"📊 Total Telegram exchanges: {message_count}")
+        print(f"{'='*60}\n")
+    return True
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(prog='bridge transcript', description="Show a session's Telegram conversation")
+    parser.add_argument("session_id", help="Short ID (or a prefix of it) or full session ID")
+    args = parser.parse_args(argv)
+    return 0 if show(args.session_id) else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
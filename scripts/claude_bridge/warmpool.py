@@ -0,0 +1,230 @@
+"""
+Warm pool of pre-started `claude` processes for recently active sessions.
+
+A cold `claude --resume` loads the whole transcript before it starts work,
+which adds seconds between a Telegram reply and the session acting on it.
+With BRIDGE_WARM_POOL=N the listener keeps up to N sessions resident:
+
+- When a session stops (its mapping in ~/.claude/.sessions is refreshed by
+  the Stop hook), it is resumed ahead of time as
+  `claude --resume <id> -p --input-format stream-json` and then waits on stdin.
+- A reply to a warm session is written to that process's stdin as one
+  stream-json user message, so work starts immediately.
+- The least recently used process is closed when a new one needs room, and
+  processes idle for BRIDGE_WARM_IDLE seconds (default 900) are closed too.
+
+A warm process only knows the conversation up to the point it was started.
+If the session runs a turn somewhere else (e.g. in the terminal), the Stop
+hook refreshes its timestamp without a reply having been sent to the warm
+process, and that process is replaced. It is also replaced when the
+session's working directory or the launch config (the `claude` executable
+and Claude's settings files) changed. Set CLAUDE_BIN to use another
+executable (tests use benchmarks/stub_claude.py).
+"""
+
+import collections
+import json
+import os
+import subprocess
+import threading
+import time
+from pathlib import Path
+
+DEFAULT_IDLE_TIMEOUT = 900.0
+HOT_WINDOW = 10 * 60  # Sessions that stopped this recently are pre-started
+
+
+def claude_bin():
+    return os.getenv('CLAUDE_BIN', 'claude')
+
+
+def stream_json_message(text):
+    """One user turn in Claude's stream-json input format."""
+    return json.dumps({
+        'type': 'user',
+        'message': {'role': 'user', 'content': [{'type': 'text', 'text': text}]},
+    }) + '\n'
+
+
+def launch_config(cwd):
+    """What a process for cwd would be started with: the executable and settings file mtimes."""
+    paths = [Path.home() / '.claude' / 'settings.json',
+             Path(cwd) / '.claude' / 'settings.json', Path(cwd) / '.claude' / 'settings.local.json']
+    stamps = []
+    for path in paths:
+        try:
+            stamps.append(path.stat().st_mtime_ns)
+        except OSError:
+            stamps.append(None)
+    return claude_bin(), tuple(stamps)
+
+
+class WarmProcess:
+    """A resumed session process waiting for input on stdin."""
+
+    def __init__(self, real_session_id, cwd, synced=0, clock=time.monotonic):
+        self.real_session_id = real_session_id
+        self.cwd = cwd
+        self.synced = synced        # Session timestamp the process has caught up to
+        self.pending_turns = 0      # Replies sent whose Stop has not been seen yet
+        self.config = launch_config(cwd)
+        self.clock = clock
+        self.last_used = clock()
+        self.proc = subprocess.Popen([
+            claude_bin(), '--resume', real_session_id, '--dangerously-skip-permissions',
+            '-p', '--input-format', 'stream-json', '--output-format', 'stream-json', '--verbose',
+        ], cwd=cwd, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            start_new_session=True)
+
+    def alive(self):
+        return self.proc.poll() is None
+
+    def matches(self, cwd):
+        """Whether this process is still what a fresh start for cwd would give."""
+        return str(self.cwd) == str(cwd) and self.config == launch_config(cwd)
+
+    def send(self, text):
+        """Write one user turn; False if the process has gone away."""
+        try:
+            self.proc.stdin.write(stream_json_message(text).encode())
+            self.proc.stdin.flush()
+        except (BrokenPipeError, OSError, ValueError):
+            return False
+        self.pending_turns += 1
+        self.last_used = self.clock()
+        return True
+
+    def close(self, timeout=5):
+        """Close stdin (claude finishes its current turn and exits), then make sure it does."""
+        try:
+            self.proc.stdin.close()
+        except OSError:
+            pass
+        try:
+            self.proc.wait(timeout)
+        except subprocess.TimeoutExpired:
+            self.proc.terminate()
+            try:
+                self.proc.wait(timeout)
+            except subprocess.TimeoutExpired:
+                self.proc.kill()
+
+
+class WarmPool:
+    """LRU-capped set of warm session processes, keyed by real session ID."""
+
+    def __init__(self, capacity, idle_timeout=None, clock=time.monotonic):
+        self.capacity = capacity
+        if idle_timeout is None:
+            idle_timeout = float(os.getenv('BRIDGE_WARM_IDLE', DEFAULT_IDLE_TIMEOUT))
+        self.idle_timeout = idle_timeout
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._procs = collections.OrderedDict()  # Least recently used first
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._procs)
+
+    def __contains__(self, real_session_id):
+        return real_session_id in self._procs
+
+    def _evict(self, real_session_id):
+        warm = self._procs.pop(real_session_id, None)
+        if warm is not None:
+            self.evictions += 1
+            # Closing waits for the process; don't hold up the caller
+            threading.Thread(target=warm.close, daemon=True).start()
+
+    def _spawn(self, real_session_id, cwd, synced=0):
+        while len(self._procs) >= self.capacity:
+            self._evict(next(iter(self._procs)))
+        warm = WarmProcess(real_session_id, cwd, synced, self.clock)
+        self._procs[real_session_id] = warm
+        return warm
+
+    def prewarm(self, real_session_id, cwd, synced=0):
+        """Start a session's process ahead of its next reply (no-op if already warm)."""
+        with self._lock:
+            warm = self._procs.get(real_session_id)
+            if warm is not None and warm.alive() and warm.matches(cwd):
+                return False
+            self._procs.pop(real_session_id, None)
+            self._spawn(real_session_id, cwd, synced)
+            return True
+
+    def resume(self, real_session_id, message, cwd):
+        """Send a reply through the session's warm process; False if it had none (caller cold-starts)."""
+        with self._lock:
+            warm = self._procs.get(real_session_id)
+            if warm is None or not warm.alive() or not warm.matches(cwd):
+                self.misses += 1
+                if warm is not None:
+                    self._evict(real_session_id)
+                return False
+            if not warm.send(message):
+                self.misses += 1
+                self._evict(real_session_id)
+                return False
+            self._procs.move_to_end(real_session_id)
+            self.hits += 1
+            return True
+
+    def sync(self, sessions):
+        """
+        Reconcile with ~/.claude/.sessions: replace processes whose session ran
+        a turn elsewhere or whose working directory or launch config changed,
+        then pre-start the most recently stopped sessions.
+        """
+        now = time.time()
+        with self._lock:
+            by_real_id = {info.get('session_id'): info for info in sessions.values()}
+            for real_session_id, warm in list(self._procs.items()):
+                info = by_real_id.get(real_session_id)
+                if info is None or not warm.alive() or not warm.matches(info.get('cwd')):
+                    self._evict(real_session_id)
+                    continue
+                timestamp = info.get('timestamp', 0)
+                if timestamp > warm.synced:
+                    if warm.pending_turns:
+                        warm.pending_turns -= 1  # The Stop of a turn we sent
+                        warm.synced = timestamp
+                    else:
+                        self._evict(real_session_id)  # Stale: continued elsewhere
+
+        hot = sorted(
+            (info for info in sessions.values()
+             if now - info.get('timestamp', 0) < HOT_WINDOW and info.get('session_id')),
+            key=lambda info: info.get('timestamp', 0), reverse=True,
+        )[:self.capacity]
+        for info in reversed(hot):  # Most recent ends up most recently used
+            if info['session_id'] not in self._procs:
+                self.prewarm(info['session_id'], info.get('cwd'), info.get('timestamp', 0))
+
+    def evict_idle(self):
+        """Close processes nobody has replied to within idle_timeout."""
+        now = self.clock()
+        with self._lock:
+            for real_session_id, warm in list(self._procs.items()):
+                if now - warm.last_used > self.idle_timeout or not warm.alive():
+                    self._evict(real_session_id)
+
+    def close(self):
+        with self._lock:
+            procs, self._procs = list(self._procs.values()), collections.OrderedDict()
+        for warm in procs:
+            warm.close()
+
+    def run(self, load_sessions, stop_event=None, interval=2.0):
+        """Maintenance loop: follow .sessions and close idle processes until stop_event is set."""
+        stop_event = stop_event or threading.Event()
+        while not stop_event.is_set():
+            try:
+                self.sync(load_sessions())
+                self.evict_idle()
+            except Exception:
+                pass  # Never take the listener down; cold starts still work
+            stop_event.wait(interval)
+        self.close()
@@ -0,0 +1,216 @@
+"""
+Webhook ingestion for the Telegram listener.
+
+WebhookServer is a small asyncio HTTP server that accepts the update POSTs
+Telegram sends to a registered webhook. Each request is checked against the
+secret token (X-Telegram-Bot-Api-Secret-Token), acknowledged straight away
+and its update put on an in-process queue; the listener's resume worker
+consumes the queue on its own thread, so a slow `claude --resume` never
+delays the acknowledgement.
+
+With a pool of bots, each bot is registered at <path>/<bot id> and its
+updates are tagged with '_bot_id' so replies go back through the same bot.
+
+Recorded updates can be replayed against a running server:
+
+    python3 -m claude_bridge.webhook replay updates.json \\
+        --url http://127.0.0.1:8443/telegram --secret "$TELEGRAM_WEBHOOK_SECRET"
+"""
+
+import argparse
+import asyncio
+import hmac
+import json
+import queue
+import sys
+import threading
+
+SECRET_HEADER = 'x-telegram-bot-api-secret-token'
+MAX_BODY_BYTES = 1024 * 1024
+
+REASONS = {
+    200: 'OK', 400: 'Bad Request', 401: 'Unauthorized', 404: 'Not Found',
+    405: 'Method Not Allowed', 413: 'Payload Too Large',
+}
+
+
+class WebhookServer:
+    """Asyncio HTTP endpoint that queues verified Telegram updates."""
+
+    def __init__(self, secret, host='127.0.0.1', port=8443, path='/telegram', updates=None):
+        if not secret:
+            raise ValueError("A webhook secret token is required")
+        self.secret = secret.encode()
+        self.host = host
+        self.port = port
+        self.path = path
+        self.updates = updates if updates is not None else queue.Queue()
+        self.received = 0
+        self.rejected = 0
+
+        self._loop = None
+        self._server = None
+        self._thread = None
+        self._ready = threading.Event()
+
+    # --- Lifecycle ------------------------------------------------------
+
+    def start(self):
+        """Serve on a background thread; returns once the socket is bound."""
+        self._thread = threading.Thread(target=self._run, name='webhook', daemon=True)
+        self._thread.start()
+        self._ready.wait(10)
+        if self._server is None:
+            raise OSError(f"Webhook server failed to bind {self.host}:{self.port}")
+        return self
+
+    def stop(self):
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+        if self._thread is not None:
+            self._thread.join(5)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}{self.path}"
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._server = self._loop.run_until_complete(
+                asyncio.start_server(self._handle_connection, self.host, self.port)
+            )
+            self.port = self._server.sockets[0].getsockname()[1]  # Resolve port=0
+        except OSError:
+            self._ready.set()
+            return
+        self._ready.set()
+        try:
+            self._loop.run_forever()
+        finally:
+            # Drop idle keep-alive connections, then let their handlers finish
+            self._server.close()
+            tasks = asyncio.all_tasks(self._loop)
+            for task in tasks:
+                task.cancel()
+            self._loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+            self._loop.close()
+
+    # --- HTTP -----------------------------------------------------------
+
+    async def _handle_connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                length = int(headers.get('content-length', 0) or 0)
+                if length > MAX_BODY_BYTES:
+                    self._respond(writer, 413, keep_alive=False)
+                    break
+                body = await reader.readexactly(length) if length else b''
+
+                status = self.handle_request(request_line, headers, body)
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                self._respond(writer, status, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+    def _respond(self, writer, status, keep_alive=True):
+        writer.write(
+            f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+            f"Content-Length: 0\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode()
+        )
+
+    def handle_request(self, request_line, headers, body):
+        """Validate one request and queue its update; returns the HTTP status."""
+        try:
+            method, target, _ = request_line.decode('latin-1').split(' ', 2)
+        except ValueError:
+            return 400
+        route = target.split('?', 1)[0]
+        bot = None
+        if route != self.path:
+            # Bot pools register one sub-path per bot: <path>/<bot id>
+            prefix = self.path.rstrip('/') + '/'
+            if not (route.startswith(prefix) and route[len(prefix):].isdigit()):
+                return 404
+            bot = route[len(prefix):]
+        if method != 'POST':
+            return 405
+        if not hmac.compare_digest(headers.get(SECRET_HEADER, '').encode(), self.secret):
+            self.rejected += 1
+            return 401
+
+        try:
+            update = json.loads(body)
+        except ValueError:
+            return 400
+        if not isinstance(update, dict) or 'update_id' not in update:
+            return 400
+
+        if bot:
+            update['_bot_id'] = bot
+        self.received += 1
+        self.updates.put(update)
+        return 200
+
+
+def replay(updates, url, secret, timeout=5):
+    """POST recorded updates to a webhook endpoint; returns the status codes."""
+    import requests
+
+    statuses = []
+    with requests.Session() as session:
+        for update in updates:
+            resp = session.post(url, json=update, timeout=timeout,
+                                headers={'X-Telegram-Bot-Api-Secret-Token': secret})
+            statuses.append(resp.status_code)
+    return statuses
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Claude-Telegram Bridge webhook tools")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    replay_parser = subparsers.add_parser("replay", help="POST recorded updates to a webhook")
+    replay_parser.add_argument("file", help="JSON file with an update or a list of updates "
+                                            "(a getUpdates response also works)")
+    replay_parser.add_argument("--url", default="http://127.0.0.1:8443/telegram")
+    replay_parser.add_argument("--secret", required=True, help="Webhook secret token")
+
+    args = parser.parse_args(argv)
+    with open(args.file) as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        data = data.get('result', [data])
+
+    statuses = replay(data, args.url, args.secret)
+    accepted = statuses.count(200)
+    print(f"📨 Posted {len(statuses)} updates: {accepted} accepted")
+    return 0 if accepted == len(statuses) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
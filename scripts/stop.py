@@ -7,21 +7,62 @@
 # ]
 # ///
 
+# Heavy or rarely needed modules (requests, dotenv, hashlib, random, datetime)
+# are imported inside the functions that use them: the hook runs on every
+# Claude response, so interpreter startup is on the critical path.
 import argparse
 import json
 import os
-import random
+import re
 import subprocess
 import sys
-import hashlib
 import time
 from pathlib import Path
-from datetime import datetime
 
-import requests
-from dotenv import load_dotenv
+from claude_bridge import tracing
 
-load_dotenv()
+_env_loaded = False
+
+# What this run's notification did, for the Stop event history
+hook_event = {}
+
+# One get_recent_changes() line for a working tree file: "<icon> <path> (<action>)"
+CHANGE_LINE_RE = re.compile(r'^\S+ (.+) \((?:modified|added|deleted|untracked|changed)\)$')
+
+# Markdown -> Telegram HTML rules, applied in order after HTML escaping
+MARKDOWN_RULES = [
+    # Headers: ### -> bold, ## -> bold, # -> bold (Telegram doesn't have H tags)
+    (re.compile(r'^### (.+)$', re.MULTILINE), r'<b>\1</b>'),
+    (re.compile(r'^## (.+)$', re.MULTILINE), r'<b>\1</b>'),
+    (re.compile(r'^# (.+)$', re.MULTILINE), r'<b>\1</b>'),
+    # Bold: **text** -> <b>text</b>
+    (re.compile(r'\*\*(.+?)\*\*'), r'<b>\1</b>'),
+    # Italic: *text* -> <i>text</i>  (but not part of bold)
+    (re.compile(r'(?<!\*)\*([^*]+?)\*(?!\*)'), r'<i>\1</i>'),
+    # Code: `text` -> <code>text</code>
+    (re.compile(r'`([^`]+?)`'), r'<code>\1</code>'),
+    # Lists: - item -> • item (convert markdown lists to bullets)
+    (re.compile(r'^- (.+)$', re.MULTILINE), r'• \1'),
+    (re.compile(r'^\* (.+)$', re.MULTILINE), r'• \1'),
+]
+
+
+def load_env():
+    """Load .env and ~/.claude/.env into the environment, once per process."""
+    global _env_loaded
+    if _env_loaded:
+        return
+    _env_loaded = True
+
+    from claude_bridge.env import load_env as load_env_files
+
+    load_env_files()
+
+
+def telegram_api_url(api_key, method):
+    """Bot API endpoint URL (TELEGRAM_API_BASE points at a fake server in tests)."""
+    base = os.getenv('TELEGRAM_API_BASE', 'https://api.telegram.org').rstrip('/')
+    return f"{base}/bot{api_key}/{method}"
 
 
 def get_completion_messages():
@@ -64,70 +105,236 @@ def get_tts_script_path():
     return None
 
 
-def get_llm_completion_message():
-    """
-    Generate completion message using available LLM services.
-    Priority order: OpenAI > Anthropic > Ollama > fallback to random message
+def helper_script_command(script):
+    """Command used to run an LLM/TTS helper script with its own dependencies."""
+    return ["uv", "run", str(script)]
 
-    Returns:
-        str: Generated or fallback completion message
+
+def get_llm_provider_scripts(llm_dir=None):
+    """
+    Return helper scripts for the LLM providers that are available.
+    Listed in priority order: OpenAI > Anthropic > Ollama
     """
     # Get current script directory and construct utils/llm path
-    script_dir = Path(__file__).parent
-    llm_dir = script_dir / "utils" / "llm"
+    if llm_dir is None:
+        llm_dir = Path(__file__).parent / "utils" / "llm"
+    llm_dir = Path(llm_dir)
 
-    # Try OpenAI first (highest priority)
+    candidates = []
     if os.getenv("OPENAI_API_KEY"):
-        oai_script = llm_dir / "oai.py"
-        if oai_script.exists():
-            try:
-                result = subprocess.run(
-                    ["uv", "run", str(oai_script), "--completion"],
-                    capture_output=True,
-                    text=True,
-                    timeout=10,
-                )
-                if result.returncode == 0 and result.stdout.strip():
-                    return result.stdout.strip()
-            except (subprocess.TimeoutExpired, subprocess.SubprocessError):
-                pass
-
-    # Try Anthropic second
+        candidates.append(llm_dir / "oai.py")
     if os.getenv("ANTHROPIC_API_KEY"):
-        anth_script = llm_dir / "anth.py"
-        if anth_script.exists():
-            try:
-                result = subprocess.run(
-                    ["uv", "run", str(anth_script), "--completion"],
-                    capture_output=True,
-                    text=True,
-                    timeout=10,
-                )
-                if result.returncode == 0 and result.stdout.strip():
-                    return result.stdout.strip()
-            except (subprocess.TimeoutExpired, subprocess.SubprocessError):
-                pass
+        candidates.append(llm_dir / "anth.py")
+    # Ollama is a local LLM, no API key required
+    candidates.append(llm_dir / "ollama.py")
+
+    return [script for script in candidates if script.exists()]
+
+
+def _collect_provider_output(proc, results):
+    """Wait for one provider process and queue its answer (None if unusable)."""
+    try:
+        stdout, _ = proc.communicate()
+        answer = stdout.strip() if proc.returncode == 0 and stdout else None
+    except Exception:
+        answer = None
+    results.put(answer)
+
+
+def _kill_process_group(proc):
+    """Kill a provider and anything it spawned (uv runs the script as a child)."""
+    import signal
+
+    try:
+        os.killpg(proc.pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        pass
+    except OSError:
+        proc.kill()
 
-    # Try Ollama third (local LLM)
-    ollama_script = llm_dir / "ollama.py"
-    if ollama_script.exists():
+
+def race_llm_providers(scripts, timeout=10):
+    """
+    Launch all provider scripts at once and return the first valid answer.
+
+    Providers still running once an answer arrives (or the timeout expires)
+    are killed together with their child processes.
+
+    Returns:
+        str or None: First non-empty completion message, None if all failed
+    """
+    import queue
+    import threading
+
+    results = queue.Queue()
+    procs = []
+    for script in scripts:
         try:
-            result = subprocess.run(
-                ["uv", "run", str(ollama_script), "--completion"],
-                capture_output=True,
+            proc = subprocess.Popen(
+                helper_script_command(script) + ["--completion"],
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
                 text=True,
-                timeout=10,
+                start_new_session=True,  # Own process group so losers can be killed
             )
-            if result.returncode == 0 and result.stdout.strip():
-                return result.stdout.strip()
-        except (subprocess.TimeoutExpired, subprocess.SubprocessError):
-            pass
+        except (OSError, subprocess.SubprocessError):
+            continue
+        procs.append(proc)
+        threading.Thread(
+            target=_collect_provider_output, args=(proc, results), daemon=True
+        ).start()
+
+    answer = None
+    pending = len(procs)
+    deadline = time.monotonic() + timeout
+    try:
+        while pending and answer is None:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                answer = results.get(timeout=remaining)
+            except queue.Empty:
+                break
+            pending -= 1
+    finally:
+        for proc in procs:
+            if proc.poll() is None:
+                _kill_process_group(proc)
+
+    return answer
+
+
+def generate_completion_message(llm_dir=None, timeout=10):
+    """
+    Generate a new completion message by racing the available LLM services.
+
+    Returns:
+        str or None: Generated message, None if no provider answered
+    """
+    return race_llm_providers(get_llm_provider_scripts(llm_dir), timeout=timeout)
+
+
+def spawn_announcement_refill():
+    """Top up the phrase pool and audio cache in a detached background process."""
+    try:
+        subprocess.Popen(
+            [sys.executable, str(Path(__file__).resolve()), "--refill-announcements"],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+    except (OSError, subprocess.SubprocessError):
+        pass
+
+
+def get_llm_completion_message(pool=None, prefer=None):
+    """
+    Pick a pre-generated completion message from the local phrase pool.
+
+    Never calls an LLM directly: when the pool runs low it is refilled in the
+    background. Falls back to a random predefined message while it is empty.
+
+    Returns:
+        str: Pooled or fallback completion message
+    """
+    from claude_bridge.announce_cache import PhrasePool
+
+    pool = pool or PhrasePool()
+    message = pool.pick(prefer=prefer)
+    if pool.needs_refill():
+        spawn_announcement_refill()
+    if message:
+        return message
 
     # Fallback to random predefined message
+    import random
+
     messages = get_completion_messages()
     return random.choice(messages)
 
 
+def tts_output_arg():
+    """
+    Argument the TTS helper takes to write audio to a file instead of playing it.
+    The utils/tts helpers only speak the phrase given on their command line, so
+    audio is cached only when BRIDGE_TTS_OUTPUT_ARG (e.g. --output) declares one.
+    """
+    return os.getenv("BRIDGE_TTS_OUTPUT_ARG") or None
+
+
+def synthesize_to_cache(tts_script, phrase, cache, timeout=30):
+    """
+    Synthesize a phrase into the audio cache.
+    Helpers that cannot write to a file (no tts_output_arg()) are not run.
+
+    Returns:
+        Path or None: Cached audio file
+    """
+    import tempfile
+
+    output_arg = tts_output_arg()
+    if not output_arg:
+        return None
+
+    cache.directory.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(suffix=".mp3", dir=cache.directory, prefix=".synth-")
+    os.close(fd)
+    os.unlink(tmp_path)
+    try:
+        result = subprocess.run(
+            helper_script_command(tts_script) + [output_arg, tmp_path, phrase],
+            capture_output=True,
+            timeout=timeout,
+        )
+        if result.returncode == 0 and os.path.getsize(tmp_path) > 0:
+            return cache.put(Path(tts_script).stem, phrase, tmp_path)
+    except (subprocess.SubprocessError, OSError):
+        pass
+    finally:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+    return None
+
+
+def refill_announcements(max_new_phrases=5):
+    """Generate missing pool phrases and pre-synthesize their audio (background job)."""
+    import fcntl
+    from claude_bridge.announce_cache import AudioCache, PhrasePool, cache_dir
+
+    load_env()
+    lock_path = cache_dir() / "refill.lock"
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(lock_path, "w") as lock_file:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            return  # Another refill is already running
+
+        pool = PhrasePool()
+        for _ in range(max_new_phrases):
+            if not pool.needs_refill():
+                break
+            message = generate_completion_message()
+            if not message:
+                break
+            pool.add([message])
+
+        # No LLM available: seed the pool with the predefined messages
+        if not pool.phrases():
+            pool.add(get_completion_messages())
+
+        tts_script = get_tts_script_path()
+        if tts_script and tts_output_arg():
+            cache = AudioCache()
+            backend = Path(tts_script).stem
+            for phrase in pool.phrases():
+                if not cache.contains(backend, phrase):
+                    synthesize_to_cache(tts_script, phrase, cache)
+
+
 def get_recent_changes(cwd, since_time=None):
     """Get git changes since the session started or last commit."""
     try:
@@ -160,6 +367,8 @@ def get_recent_changes(cwd, since_time=None):
         changes = []
 
         # Parse git status output
+        from claude_bridge.changes import classify
+
         if status_result.returncode == 0 and status_result.stdout.strip():
             status_lines = status_result.stdout.strip().split('\n')
             for line in status_lines:
@@ -167,23 +376,7 @@ def get_recent_changes(cwd, since_time=None):
                     status = line[:2]
                     filename = line[3:]
 
-                    # Determine change type
-                    if 'M' in status:
-                        change_type = "✏️"
-                        action = "modified"
-                    elif 'A' in status:
-                        change_type = "➕"
-                        action = "added"
-                    elif 'D' in status:
-                        change_type = "➖"
-                        action = "deleted"
-                    elif '?' in status:
-                        change_type = "📄"
-                        action = "untracked"
-                    else:
-                        change_type = "📝"
-                        action = "changed"
-
+                    change_type, action = classify(status)
                     changes.append(f"{change_type} {filename} ({action})")
 
         # If no working changes but recent commits, show those
@@ -211,95 +404,142 @@ def get_recent_changes(cwd, since_time=None):
         return None
 
 
-def generate_session_id(session_id, project):
-    """Generate a simple 6-character session ID"""
+def generate_session_id(session_id, project, length=6):
+    """Generate a simple 6-character session ID (or a longer prefix of the same hash)"""
+    import hashlib
+
     combined = f"{session_id}-{project}"
     hash_obj = hashlib.md5(combined.encode())
-    return hash_obj.hexdigest()[:6]
+    return hash_obj.hexdigest()[:length]
 
 
-def cleanup_old_sessions(max_age_days=30):
-    """Clean up sessions older than max_age_days to prevent unlimited growth."""
-    try:
-        sessions_file = Path.home() / '.claude' / '.sessions'
-        if not sessions_file.exists():
-            return
+def load_sessions():
+    """Load the short ID -> session mapping from ~/.claude/.sessions"""
+    from claude_bridge.sessions import load_sessions as load_registry
 
-        # Load existing sessions
-        with sessions_file.open('r') as f:
-            sessions = json.load(f)
+    return load_registry()
 
-        # Calculate cutoff time (30 days ago)
-        cutoff_time = int(time.time()) - (max_age_days * 24 * 60 * 60)
 
-        # Filter out old sessions
-        original_count = len(sessions)
-        sessions = {
-            session_id: session_data
-            for session_id, session_data in sessions.items()
-            if session_data.get('timestamp', 0) > cutoff_time
-        }
+def get_short_session_id(session_id, project, sessions=None):
+    """Short ID for a session: 6 characters, longer if another session holds that prefix"""
+    from claude_bridge.shortids import assign_short_id
 
-        # Only write back if we actually removed sessions
-        if len(sessions) < original_count:
-            with sessions_file.open('w') as f:
-                json.dump(sessions, f, indent=2)
+    if sessions is None:
+        sessions = load_sessions()
+    digest = generate_session_id(session_id, project, length=32)
+    return assign_short_id(digest, sessions, session_id)
 
-    except Exception:
-        pass  # Fail silently
+
+def update_session_entry(sessions, short_session_id, real_session_id, cwd, transcript_path=None):
+    """Set one mapping in a loaded session store"""
+    current_time = int(time.time())
+
+    # Update mapping - preserve start_time if session exists, otherwise set it
+    if short_session_id in sessions:
+        start_time = sessions[short_session_id].get("start_time", current_time)
+    else:
+        start_time = current_time
+
+    previous = sessions.get(short_session_id, {})
+    sessions[short_session_id] = {
+        "session_id": real_session_id,
+        "cwd": cwd,
+        "timestamp": current_time,
+        "start_time": start_time
+    }
+    if previous.get("session_id") == real_session_id and "sent" in previous:
+        # Hashes of what was last notified, for deduplicating the next Stop
+        sessions[short_session_id]["sent"] = previous["sent"]
+    if transcript_path:
+        # Lets the listener follow the session live (progress mode)
+        sessions[short_session_id]["transcript_path"] = transcript_path
 
 
 def save_session_mapping(short_session_id, real_session_id, cwd):
     """Save short session ID to real session ID and directory mapping"""
     try:
+        from claude_bridge.state import update_json
+
+        sessions_file = os.path.expanduser('~/.claude/.sessions')
+
+        # Locked read-modify-write: parallel Stop hooks don't lose each other's mappings
+        with update_json(sessions_file) as sessions:
+            update_session_entry(sessions, short_session_id, real_session_id, cwd)
+    except:
+        pass  # Fail silently
+
+
+def register_session(real_session_id, project, cwd, transcript_path=None):
+    """Mint the session's short ID and save its mapping in one locked update; returns the short ID"""
+    try:
+        from claude_bridge.state import update_json
+
         sessions_file = os.path.expanduser('~/.claude/.sessions')
+        with update_json(sessions_file) as sessions:
+            short_session_id = get_short_session_id(real_session_id, project, sessions)
+            update_session_entry(sessions, short_session_id, real_session_id, cwd, transcript_path)
+        return short_session_id
+    except:
+        return get_short_session_id(real_session_id, project)
+
+
+def content_hash(text):
+    """Short digest of notification content"""
+    import hashlib
+
+    return hashlib.blake2b(text.encode(), digest_size=8).hexdigest()
+
 
-        # Load existing mappings
-        sessions = {}
-        if os.path.exists(sessions_file):
+def change_fingerprints(cwd, git_changes):
+    """
+    Hash each line of get_recent_changes() output with its file's size and
+    mtime, so editing an already modified file again still counts as new
+    """
+    fingerprints = {}
+    for line in (git_changes or '').splitlines():
+        match = CHANGE_LINE_RE.match(line)
+        stamp = ''
+        if match:
             try:
-                with open(sessions_file, 'r') as f:
-                    sessions = json.load(f)
-            except:
+                stat = os.stat(os.path.join(cwd, match.group(1)))
+                stamp = f"{stat.st_size}:{stat.st_mtime_ns}"
+            except OSError:
                 pass
+        fingerprints[line] = content_hash(f"{line}\0{stamp}")
+    return fingerprints
 
-        current_time = int(time.time())
 
-        # Update mapping - preserve start_time if session exists, otherwise set it
-        if short_session_id in sessions:
-            start_time = sessions[short_session_id].get("start_time", current_time)
-        else:
-            start_time = current_time
+def load_sent_hashes(short_session_id):
+    """Hashes of the response and changes last notified for a session ({} if none)"""
+    return load_sessions().get(short_session_id, {}).get("sent", {})
 
-        sessions[short_session_id] = {
-            "session_id": real_session_id,
-            "cwd": cwd,
-            "timestamp": current_time,
-            "start_time": start_time
-        }
 
-        # Save back
-        with open(sessions_file, 'w') as f:
-            json.dump(sessions, f, indent=2)
+def save_sent_hashes(short_session_id, sent):
+    """Record what was just notified for a session"""
+    try:
+        from claude_bridge.state import update_json
 
-        # Occasionally clean up old sessions (10% chance)
-        if random.randint(1, 10) == 1:
-            cleanup_old_sessions()
+        with update_json(os.path.expanduser('~/.claude/.sessions')) as sessions:
+            if short_session_id in sessions:
+                sessions[short_session_id]["sent"] = sent
     except:
-        pass  # Fail silently
-
+        pass
 
-def parse_targeted_message(message, target_session_id):
-    """Parse message with format 'session_id:message' - only return if targeting our session"""
-    if ':' in message and len(message) > 7:  # Minimum: "abc123:hi"
-        parts = message.split(':', 1)
-        session_id = parts[0].strip().lower()
-        text = parts[1].strip()
 
-        # Check if it's targeting our session
-        if session_id == target_session_id.lower():
-            return text
+def parse_targeted_message(message, target_session_id, sessions=None):
+    """
+    Parse message with format 'session_id:message' - only return if targeting our session.
+    Like the listener, an unambiguous prefix of the short ID counts; sessions is
+    the registry it must be unambiguous in (just our own ID if not given).
+    """
+    from claude_bridge.shortids import ShortIdIndex, parse_reply
 
+    short_id, text = parse_reply(message)
+    if short_id is None:
+        return None
+    target = target_session_id.lower()
+    if ShortIdIndex(sessions if sessions is not None else {target: {}}).resolve(short_id) == target:
+        return text
     return None
 
 
@@ -317,47 +557,60 @@ def load_processed_messages():
 
 def save_processed_message(update_id):
     """Save a processed message ID"""
+    from claude_bridge.state import append_line
+
     processed_file = os.path.expanduser('~/.claude/.processed_messages')
     try:
-        with open(processed_file, 'a') as f:
-            f.write(f"{update_id}\n")
+        append_line(processed_file, str(update_id))
     except:
         pass
 
 
-def check_for_telegram_reply(target_session_id):
+def check_for_telegram_reply(target_session_id, project=None):
     """Check for pending Telegram replies targeting our session from last 24 hours"""
     try:
-        # Load environment from Claude directory
-        env_file = os.path.expanduser('~/.claude/.env')
-        if os.path.exists(env_file):
-            from dotenv import load_dotenv
-            load_dotenv(env_file)
-
-        api_key = os.getenv('TELEGRAM_API')
-        if not api_key:
+        load_env()
+
+        from claude_bridge.botpool import BotPool
+
+        bots = BotPool()
+        if not bots:
             return None
+        api_key = bots.token_for(target_session_id)  # Replies arrive at the session's bot
 
-        # Get chat ID
-        chat_id_file = os.path.expanduser('~/.claude/.chat_id')
-        if not os.path.exists(chat_id_file):
+        # In webhook mode Telegram pushes replies to the listener; getUpdates is refused
+        if os.getenv('TELEGRAM_WEBHOOK_URL'):
             return None
 
-        with open(chat_id_file, 'r') as f:
-            chat_id = f.read().strip()
+        # Chats allowed to reply to this session
+        from claude_bridge.routing import RoutesError, load_routes
+
+        try:
+            routes = load_routes()
+        except RoutesError:
+            return None  # Already reported by send_telegram_notification
+        if not routes:
+            return None
 
         # Load processed messages
         processed_messages = load_processed_messages()
 
         # Check for new messages
-        url = f"https://api.telegram.org/bot{api_key}/getUpdates"
-        resp = requests.get(url, timeout=5)
+        import requests
+
+        url = telegram_api_url(api_key, 'getUpdates')
+        with tracing.span("reply_poll") as span:
+            resp = requests.get(url, timeout=5)
+            span.set(bytes=len(resp.content), status=resp.status_code)
         data = resp.json()
 
         if not data.get('result'):
             return None
+        # Prefixes must be unambiguous among all sessions, as in the listener
+        sessions = load_sessions()
+        sessions.setdefault(target_session_id.lower(), {})
 
-        # Find latest unprocessed message from our chat targeting our session
+        # Find latest unprocessed message from a routed chat targeting our session
         latest_reply = None
         latest_update_id = 0
 
@@ -369,15 +622,14 @@ def check_for_telegram_reply(target_session_id):
                 continue
 
             message = update.get('message', {})
-            if str(message.get('chat', {}).get('id')) == chat_id:
+            if routes.allows(message.get('chat', {}).get('id'), project, target_session_id):
                 text = message.get('text', '').strip()
                 timestamp = message.get('date', 0)
 
                 # Check messages from last 24 hours
-                import time
                 if text and len(text) > 1 and (time.time() - timestamp) < 86400:  # 24 hours
                     # Check if message is targeting our session
-                    targeted_message = parse_targeted_message(text, target_session_id)
+                    targeted_message = parse_targeted_message(text, target_session_id, sessions)
                     if targeted_message:
                         latest_reply = targeted_message
                         latest_update_id = update_id
@@ -394,192 +646,285 @@ def check_for_telegram_reply(target_session_id):
         return None
 
 
-def send_telegram_notification(input_data=None, max_retries=3):
-    """Send Telegram notification with session summary and session ID."""
-    log_file = Path.home() / '.claude' / 'telegram_hook.log'
-    try:
-        # Load environment from Claude directory
-        env_file = os.path.expanduser('~/.claude/.env')
-        if os.path.exists(env_file):
-            from dotenv import load_dotenv
-            load_dotenv(env_file)
-
-        api_key = os.getenv('TELEGRAM_API')
-        if not api_key:
-            with open(log_file, 'a') as f:
-                f.write(f"[CONFIG_ERROR] TELEGRAM_API not configured\n")
-            return
-
-        # Get chat ID
-        chat_id_file = os.path.expanduser('~/.claude/.chat_id')
-        if not os.path.exists(chat_id_file):
-            with open(log_file, 'a') as f:
-                f.write(f"[CONFIG_ERROR] .chat_id file not found\n")
-            return
-
-        with open(chat_id_file, 'r') as f:
-            chat_id = f.read().strip()
+def get_latest_assistant_response(transcript_path):
+    """Return the text of the most recent substantial assistant message in a transcript."""
+    from claude_bridge.transcript import latest_response
 
-        # Generate session ID
-        real_session_id = input_data.get('session_id', 'unknown')
-        project = os.path.basename(input_data.get('cwd', 'project'))
-        cwd = input_data.get('cwd', os.getcwd())
-        short_session_id = generate_session_id(real_session_id, project)
+    return latest_response(transcript_path)
 
-        # Save session mapping for Telegram service
-        save_session_mapping(short_session_id, real_session_id, cwd)
 
-        # Send Claude's latest response with session ID (using HTML)
-        timestamp = datetime.now().strftime("%H:%M")
-        summary = f"🤖 <b>Session {short_session_id}</b> - {project} ({timestamp})\n\n"
+def markdown_to_html(text):
+    """Convert Claude's markdown to the HTML subset Telegram supports."""
+    # Escape HTML entities first
+    html = text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+    for pattern, replacement in MARKDOWN_RULES:
+        html = pattern.sub(replacement, html)
+    return html
 
-        # Add git changes if available
-        git_changes = get_recent_changes(cwd)
-        if git_changes:
-            summary += f"📂 <b>Recent changes:</b>\n{git_changes}\n\n"
 
-        # Get session data and extract Claude's latest response
-        session_data = input_data or {}
-        transcript_path = session_data.get('transcript_path', '')
+def get_hook_logger():
+    """Logger for ~/.claude/telegram_hook.log, buffered until exit or a warning."""
+    from claude_bridge.log import get_logger
 
-        if transcript_path and os.path.exists(transcript_path):
-            try:
-                # Read transcript and find latest assistant message
-                with open(transcript_path, 'r') as f:
-                    lines = f.readlines()
-
-                # Find the most recent assistant response
-                claude_response = None
-                for line in reversed(lines):
-                    try:
-                        data = json.loads(line)
-                        if (data.get('type') == 'assistant' and
-                            data.get('message', {}).get('role') == 'assistant'):
-
-                            content = data.get('message', {}).get('content', '')
-                            if isinstance(content, list):
-                                # Extract text content, excluding tool calls
-                                text_parts = []
-                                for part in content:
-                                    if part.get('type') == 'text':
-                                        text_parts.append(part.get('text', ''))
-                                claude_response = '\n'.join(text_parts)
-                            else:
-                                claude_response = content
-
-                            if claude_response and len(claude_response.strip()) > 10:
-                                break
-                    except:
-                        continue
+    return get_logger('hook', Path.home() / '.claude' / 'telegram_hook.log', buffered=True)
 
-                if claude_response:
-                    # Escape HTML entities first
-                    html_response = claude_response.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
-                    # Convert markdown to HTML
-                    import re
-                    # Headers: ### -> bold, ## -> bold, # -> bold (Telegram doesn't have H tags)
-                    html_response = re.sub(r'^### (.+)$', r'<b>\1</b>', html_response, flags=re.MULTILINE)
-                    html_response = re.sub(r'^## (.+)$', r'<b>\1</b>', html_response, flags=re.MULTILINE)
-                    html_response = re.sub(r'^# (.+)$', r'<b>\1</b>', html_response, flags=re.MULTILINE)
-                    # Bold: **text** -> <b>text</b>
-                    html_response = re.sub(r'\*\*(.+?)\*\*', r'<b>\1</b>', html_response)
-                    # Italic: *text* -> <i>text</i>  (but not part of bold)
-                    html_response = re.sub(r'(?<!\*)\*([^*]+?)\*(?!\*)', r'<i>\1</i>', html_response)
-                    # Code: `text` -> <code>text</code>
-                    html_response = re.sub(r'`([^`]+?)`', r'<code>\1</code>', html_response)
-                    # Lists: - item -> • item (convert markdown lists to bullets)
-                    html_response = re.sub(r'^- (.+)$', r'• \1', html_response, flags=re.MULTILINE)
-                    html_response = re.sub(r'^\* (.+)$', r'• \1', html_response, flags=re.MULTILINE)
-                    summary += "\n" + html_response + "\n"
-                else:
-                    summary += "\n<i>Claude response processed</i>\n"
 
-            except:
-                summary += "*Response processing...*"
-        else:
-            summary += "*Claude task completed*"
+def send_message(api_key, chat_id, text, short_session_id, log, max_retries=3, limiter=None, reply_markup=None,
+                 session=None):
+    """Send one HTML notification to a chat with retries; returns True once delivered."""
+    import logging
+    import requests
+    from claude_bridge.log import log_event
 
-        summary += f"\n\nReply: {short_session_id}:your message"
+    http = session or requests
 
-        # Send message with HTML formatting to preserve Claude's markdown
-        url = f"https://api.telegram.org/bot{api_key}/sendMessage"
-        data = {'chat_id': chat_id, 'text': summary, 'parse_mode': 'HTML'}
+    # Send message with HTML formatting to preserve Claude's markdown
+    url = telegram_api_url(api_key, 'sendMessage')
+    data = {'chat_id': chat_id, 'text': text, 'parse_mode': 'HTML'}
+    if reply_markup:
+        data['reply_markup'] = reply_markup
 
-        # Retry logic for more reliable delivery
+    # Retry logic for more reliable delivery
+    with tracing.span("send", bytes=len(text.encode())) as span:
         last_error = None
         for attempt in range(max_retries):
+            span.set(retries=attempt)
             try:
-                with open(log_file, 'a') as f:
-                    f.write(f"[SEND] Attempt {attempt + 1}/{max_retries} - Sending to {short_session_id} (chat {chat_id}), msg len: {len(summary)}\n")
+                log_event(log, "SEND", f"Attempt {attempt + 1}/{max_retries} - Sending to {short_session_id} (chat {chat_id}), msg len: {len(text)}",
+                          session=short_session_id, chat_id=chat_id, attempt=attempt + 1, length=len(text))
 
-                response = requests.post(url, json=data, timeout=15)  # Increased from 5 to 15 seconds
+                if limiter is not None:
+                    limiter.acquire()  # Per-bot send rate, shared with other hooks and the listener
+                response = http.post(url, json=data, timeout=15)  # Increased from 5 to 15 seconds
 
                 # Log success/failure
-                with open(log_file, 'a') as f:
-                    if response.status_code == 200:
-                        result = response.json()
-                        if result.get('ok'):
-                            msg_id = result.get('result', {}).get('message_id', '?')
-                            f.write(f"[OK] Session {short_session_id} message sent (ID: {msg_id}) on attempt {attempt + 1}\n")
-                            return  # Success, exit function
-                        else:
-                            error_desc = result.get('description', 'unknown error')
-                            f.write(f"[API_ERROR] {error_desc} for session {short_session_id}\n")
-                            last_error = error_desc
-                            # Retry on API error
-                            if attempt < max_retries - 1:
-                                time.sleep(1 + attempt)  # Exponential backoff: 1s, 2s, 3s
-                                continue
+                if response.status_code == 200:
+                    result = response.json()
+                    if result.get('ok'):
+                        msg_id = result.get('result', {}).get('message_id', '?')
+                        log_event(log, "OK", f"Session {short_session_id} message sent (ID: {msg_id}) on attempt {attempt + 1}",
+                                  session=short_session_id, message_id=msg_id, attempt=attempt + 1)
+                        span.set(status="ok")
+                        return True  # Success, exit function
                     else:
-                        f.write(f"[HTTP_ERROR] {response.status_code} for session {short_session_id}\n")
-                        f.write(f"         Response: {response.text[:200]}\n")
-                        last_error = f"HTTP {response.status_code}"
-                        if attempt < max_retries - 1 and response.status_code >= 500:
-                            time.sleep(1 + attempt)  # Retry on server errors
+                        error_desc = result.get('description', 'unknown error')
+                        log_event(log, "API_ERROR", f"{error_desc} for session {short_session_id}",
+                                  level=logging.WARNING, session=short_session_id)
+                        last_error = error_desc
+                        # Retry on API error
+                        if attempt < max_retries - 1:
+                            time.sleep(1 + attempt)  # Exponential backoff: 1s, 2s, 3s
                             continue
+                else:
+                    log_event(log, "HTTP_ERROR", f"{response.status_code} for session {short_session_id}",
+                              level=logging.WARNING, session=short_session_id,
+                              status=response.status_code, response=response.text[:200])
+                    last_error = f"HTTP {response.status_code}"
+                    if attempt < max_retries - 1 and response.status_code >= 500:
+                        time.sleep(1 + attempt)  # Retry on server errors
+                        continue
             except (requests.Timeout, requests.ConnectionError) as e:
-                with open(log_file, 'a') as f:
-                    f.write(f"[NETWORK_ERROR] {type(e).__name__}: {str(e)} on attempt {attempt + 1}\n")
+                log_event(log, "NETWORK_ERROR", f"{type(e).__name__}: {str(e)} on attempt {attempt + 1}",
+                          level=logging.WARNING, session=short_session_id, attempt=attempt + 1)
                 last_error = f"{type(e).__name__}: {str(e)}"
                 if attempt < max_retries - 1:
                     time.sleep(2 + attempt)  # Longer backoff for network errors
                     continue
                 break
             except Exception as e:
-                with open(log_file, 'a') as f:
-                    f.write(f"[EXCEPTION] {type(e).__name__}: {str(e)}\n")
+                log_event(log, "EXCEPTION", f"{type(e).__name__}: {str(e)}",
+                          level=logging.ERROR, session=short_session_id)
                 last_error = str(e)
                 break
-        
+
         # Final failure
         if last_error:
-            with open(log_file, 'a') as f:
-                f.write(f"[FAILED] Could not send message for session {short_session_id} after {max_retries} attempts: {last_error}\n")
+            span.set(status="failed")
+            log_event(log, "FAILED", f"Could not send message for session {short_session_id} after {max_retries} attempts: {last_error}",
+                      level=logging.ERROR, session=short_session_id, chat_id=chat_id)
+        return False
+
+
+def send_telegram_notification(input_data=None, max_retries=3):
+    """Send Telegram notification with session summary; returns the registered short session ID."""
+    import logging
+    from claude_bridge.log import log_event
+
+    log = get_hook_logger()
+    try:
+        load_env()
+
+        from claude_bridge.botpool import BotPool
+
+        bots = BotPool(shared=True)  # Send rate is shared with other hooks and the listener
+        if not bots:
+            log_event(log, "CONFIG_ERROR", "TELEGRAM_API not configured", level=logging.ERROR)
+            hook_event['outcome'] = 'config_error'
+            return
+
+        # Get the chats routed to this project (.chats, or the single .chat_id)
+        from claude_bridge.routing import RoutesError, load_routes
+
+        try:
+            routes = load_routes()
+        except RoutesError as e:
+            # Never fall back to .chat_id: chats removed from .chats would be notified again
+            log_event(log, "CONFIG_ERROR", f"{e}; not sending", level=logging.ERROR)
+            hook_event['outcome'] = 'config_error'
+            return
+        if not routes:
+            log_event(log, "CONFIG_ERROR", "No .chats or .chat_id file found", level=logging.ERROR)
+            hook_event['outcome'] = 'config_error'
+            return
+
+        # Generate session ID and save the mapping for the Telegram service
+        real_session_id = input_data.get('session_id', 'unknown')
+        project = os.path.basename(input_data.get('cwd', 'project'))
+        cwd = input_data.get('cwd', os.getcwd())
+        short_session_id = register_session(real_session_id, project, cwd,
+                                            input_data.get('transcript_path'))
+        hook_event.update(session=short_session_id, project=project)
+
+        # The session's bot: replies come back to the same bot (TELEGRAM_API_POOL)
+        api_key = bots.token_for(short_session_id)
+        limiter = bots.limiters[api_key]
+
+        chat_ids = routes.chats_for(project, short_session_id)
+        if not chat_ids:
+            log_event(log, "NO_ROUTE", f"No chat is routed for project {project}",
+                      level=logging.WARNING, session=short_session_id, project=project)
+            hook_event['outcome'] = 'no_route'
+            return short_session_id
+
+        # What this session was last notified about: unchanged parts are left out
+        sent = load_sent_hashes(short_session_id) if os.getenv('BRIDGE_DEDUP', '1') != '0' else {}
+
+        # Send Claude's latest response with session ID (using HTML)
+        from datetime import datetime
+
+        timestamp = datetime.now().strftime("%H:%M")
+        summary = f"🤖 <b>Session {short_session_id}</b> - {project} ({timestamp})\n\n"
+
+        # Git changes, reduced to the lines not notified before
+        with tracing.span("git_probe") as span:
+            git_changes = get_recent_changes(cwd)
+            span.set(changes=git_changes.count('\n') + 1 if git_changes else 0)
+        change_hashes = change_fingerprints(cwd, git_changes)
+        sent_changes = sent.get("changes", {})
+        new_changes = [line for line, digest in change_hashes.items() if sent_changes.get(line) != digest]
+        hook_event.update(changes=len(change_hashes), new_changes=len(new_changes))
+
+        # Get session data and extract Claude's latest response
+        session_data = input_data or {}
+        transcript_path = session_data.get('transcript_path', '')
+        has_transcript = bool(transcript_path) and os.path.exists(transcript_path)
+        claude_response = None
+        parse_failed = False
+
+        if has_transcript:
+            try:
+                with tracing.span("transcript_parse") as span:
+                    claude_response = get_latest_assistant_response(transcript_path)
+                    span.set(bytes=os.path.getsize(transcript_path))
+            except:
+                parse_failed = True
+        response_hash = content_hash(claude_response or '')
+        new_response = sent.get("response") != response_hash
+
+        if sent and not new_response and not new_changes:
+            log_event(log, "DEDUP", f"Nothing new for session {short_session_id} since the last notification",
+                      session=short_session_id)
+            hook_event['outcome'] = 'dedup'
+            return short_session_id
+
+        if git_changes and not sent:
+            summary += f"📂 <b>Recent changes:</b>\n{git_changes}\n\n"
+        elif new_changes:
+            summary += "📂 <b>New changes:</b>\n" + '\n'.join(new_changes) + "\n\n"
+
+        if new_response or not sent:
+            if not has_transcript:
+                summary += "*Claude task completed*"
+            elif parse_failed:
+                summary += "*Response processing...*"
+            elif claude_response:
+                with tracing.span("html_convert") as span:
+                    html_response = markdown_to_html(claude_response)
+                    span.set(bytes=len(html_response))
+                summary += "\n" + html_response + "\n"
+            else:
+                summary += "\n<i>Claude response processed</i>\n"
+
+        summary += f"\n\nReply: {short_session_id}:your message"
+        hook_event.update(msg_len=len(summary), chats=len(chat_ids))
+
+        from claude_bridge import actions
+        reply_markup = actions.keyboard(short_session_id) if actions.enabled() else None
+
+        # Fan out to every routed chat; chats retry independently
+        if len(chat_ids) == 1:
+            delivered = send_message(api_key, chat_ids[0], summary, short_session_id, log, max_retries, limiter,
+                                     reply_markup, bots.session(api_key))
+        else:
+            from concurrent.futures import ThreadPoolExecutor
+
+            with ThreadPoolExecutor(max_workers=len(chat_ids)) as pool:
+                futures = [pool.submit(send_message, api_key, chat_id, summary, short_session_id, log,
+                                       max_retries, limiter, reply_markup, bots.session(api_key))
+                           for chat_id in chat_ids]
+            delivered = any(future.result() for future in futures)
+        hook_event['outcome'] = 'sent' if delivered else 'failed'
+
+        if delivered:
+            save_sent_hashes(short_session_id, {"response": response_hash, "changes": change_hashes})
+
+        return short_session_id
 
     except Exception as e:
         # Outer exception handler for config/prep errors
-        with open(log_file, 'a') as f:
-            f.write(f"[EXCEPTION] {type(e).__name__}: {str(e)}\n")
+        log_event(log, "EXCEPTION", f"{type(e).__name__}: {str(e)}", level=logging.ERROR)
+        hook_event['outcome'] = 'error'
 
 
 def announce_completion():
-    """Announce completion using the best available TTS service."""
+    """
+    Announce completion using the best available TTS service.
+    Plays cached audio locally when available; otherwise speaks through the
+    TTS script in a detached process and lets the background refill cache it.
+    """
     try:
         tts_script = get_tts_script_path()
         if not tts_script:
             return  # No TTS scripts available
 
-        # Get completion message (LLM-generated or fallback)
-        completion_message = get_llm_completion_message()
+        from claude_bridge.announce_cache import AudioCache, find_audio_player
+
+        backend = Path(tts_script).stem
+        cache = AudioCache()
+        player = find_audio_player()
+
+        # Get completion message, preferring phrases with cached audio
+        has_audio = (lambda phrase: cache.contains(backend, phrase)) if player else None
+        completion_message = get_llm_completion_message(prefer=has_audio)
 
-        # Call the TTS script with the completion message
-        subprocess.run(
-            ["uv", "run", tts_script, completion_message],
-            capture_output=True,  # Suppress output
-            timeout=10,  # 10-second timeout
+        audio_file = cache.get(backend, completion_message) if player else None
+        if audio_file:
+            command = player + [str(audio_file)]
+        else:
+            command = helper_script_command(tts_script) + [completion_message]
+            if player and tts_output_arg():
+                spawn_announcement_refill()  # Cache audio for next time
+
+        # Play in a detached process so the hook can exit immediately
+        subprocess.Popen(
+            command,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,  # Suppress output
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,  # Survive the hook's exit
         )
 
-    except (subprocess.TimeoutExpired, subprocess.SubprocessError, FileNotFoundError):
+    except (subprocess.SubprocessError, FileNotFoundError, OSError):
         # Fail silently if TTS encounters issues
         pass
     except Exception:
@@ -587,6 +932,78 @@ def announce_completion():
         pass
 
 
+def run_stop_hook(args):
+    """Handle one Stop event read from stdin."""
+    # Read JSON input from stdin
+    input_data = json.load(sys.stdin)
+
+    # Extract required fields
+    session_id = input_data.get("session_id", "")
+    stop_hook_active = input_data.get("stop_hook_active", False)
+
+    # Ensure log directory exists
+    log_dir = os.path.join(os.getcwd(), "logs")
+    os.makedirs(log_dir, exist_ok=True)
+    log_path = os.path.join(log_dir, "stop.json")
+
+    # Append new data (locked and atomic: sessions sharing a cwd share this file)
+    from claude_bridge.state import update_json
+
+    with update_json(log_path, default=list) as log_data:
+        log_data.append(input_data)
+
+    # Handle --chat switch
+    if args.chat and "transcript_path" in input_data:
+        transcript_path = input_data["transcript_path"]
+        if os.path.exists(transcript_path):
+            # Read .jsonl file and convert to JSON array
+            chat_data = []
+            try:
+                with open(transcript_path, "r") as f:
+                    for line in f:
+                        line = line.strip()
+                        if line:
+                            try:
+                                chat_data.append(json.loads(line))
+                            except json.JSONDecodeError:
+                                pass  # Skip invalid lines
+
+                # Write to logs/chat.json
+                from claude_bridge.state import atomic_write_json
+
+                atomic_write_json(os.path.join(log_dir, "chat.json"), chat_data)
+            except Exception:
+                pass  # Fail silently
+
+    # Send Telegram notification (registers the session's short ID)
+    short_session_id = send_telegram_notification(input_data)
+
+    # Session ID for reply checking
+    session_id = input_data.get('session_id', 'unknown')
+    project = os.path.basename(input_data.get('cwd', 'project'))
+    if not short_session_id:
+        short_session_id = get_short_session_id(session_id, project)
+
+    # Check for immediate Telegram reply (within last few seconds)
+    telegram_reply = check_for_telegram_reply(short_session_id, project)
+
+    if telegram_reply:
+        # Block stopping and continue with Telegram reply
+        from claude_bridge.transcript import TELEGRAM_PREFIX
+
+        response = {
+            "decision": "block",
+            "reason": f"{TELEGRAM_PREFIX} {telegram_reply}"
+        }
+        print(json.dumps(response))
+        return
+
+    # Announce completion via TTS (only if --notify flag is set)
+    if args.notify:
+        with tracing.span("announce"):
+            announce_completion()
+
+
 def main():
     try:
         # Parse command line arguments
@@ -597,83 +1014,37 @@ def main():
         parser.add_argument(
             "--notify", action="store_true", help="Enable TTS completion announcement"
         )
+        parser.add_argument(
+            "--refill-announcements", action="store_true",
+            help="Refill the phrase pool and TTS audio cache, then exit"
+        )
         args = parser.parse_args()
 
-        # Read JSON input from stdin
-        input_data = json.load(sys.stdin)
-
-        # Extract required fields
-        session_id = input_data.get("session_id", "")
-        stop_hook_active = input_data.get("stop_hook_active", False)
-
-        # Ensure log directory exists
-        log_dir = os.path.join(os.getcwd(), "logs")
-        os.makedirs(log_dir, exist_ok=True)
-        log_path = os.path.join(log_dir, "stop.json")
-
-        # Read existing log data or initialize empty list
-        if os.path.exists(log_path):
-            with open(log_path, "r") as f:
-                try:
-                    log_data = json.load(f)
-                except (json.JSONDecodeError, ValueError):
-                    log_data = []
-        else:
-            log_data = []
-
-        # Append new data
-        log_data.append(input_data)
+        load_env()
 
-        # Write back to file with formatting
-        with open(log_path, "w") as f:
-            json.dump(log_data, f, indent=2)
-
-        # Handle --chat switch
-        if args.chat and "transcript_path" in input_data:
-            transcript_path = input_data["transcript_path"]
-            if os.path.exists(transcript_path):
-                # Read .jsonl file and convert to JSON array
-                chat_data = []
-                try:
-                    with open(transcript_path, "r") as f:
-                        for line in f:
-                            line = line.strip()
-                            if line:
-                                try:
-                                    chat_data.append(json.loads(line))
-                                except json.JSONDecodeError:
-                                    pass  # Skip invalid lines
-
-                    # Write to logs/chat.json
-                    chat_file = os.path.join(log_dir, "chat.json")
-                    with open(chat_file, "w") as f:
-                        json.dump(chat_data, f, indent=2)
-                except Exception:
-                    pass  # Fail silently
-
-        # Send Telegram notification
-        send_telegram_notification(input_data)
-
-        # Generate session ID for reply checking
-        session_id = input_data.get('session_id', 'unknown')
-        project = os.path.basename(input_data.get('cwd', 'project'))
-        short_session_id = generate_session_id(session_id, project)
-
-        # Check for immediate Telegram reply (within last few seconds)
-        telegram_reply = check_for_telegram_reply(short_session_id)
-
-        if telegram_reply:
-            # Block stopping and continue with Telegram reply
-            response = {
-                "decision": "block",
-                "reason": f"User replied via Telegram: {telegram_reply}"
-            }
-            print(json.dumps(response))
+        if args.refill_announcements:
+            refill_announcements()
             sys.exit(0)
 
-        # Announce completion via TTS (only if --notify flag is set)
-        if args.notify:
-            announce_completion()
+        tracing.init("stop")
+        status = "error"
+        start = time.perf_counter()
+        try:
+            with tracing.span("hook"):
+                run_stop_hook(args)
+            status = "ok"
+        finally:
+            spans = tracing.flush()
+            # Too short-lived to be scraped: hand the timings to the listener
+            if os.getenv("BRIDGE_METRICS_PORT"):
+                from claude_bridge import metrics
+
+                metrics.push(spans, status)
+            if os.getenv("BRIDGE_HISTORY", "1") != "0":
+                from claude_bridge import history
+
+                hook_event.setdefault('outcome', status)
+                history.record(history.event_from_run(hook_event, spans, (time.perf_counter() - start) * 1000))
 
         sys.exit(0)
 
@@ -0,0 +1,18 @@
+#!/bin/bash
+
+# Stop Hook Entry Point
+# Runs stop.py with the pre-resolved virtualenv created by setup.sh so each
+# hook invocation skips `uv run --script` dependency resolution.
+
+HOOK_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+VENV_PYTHON="$HOOK_DIR/.venv/bin/python"
+
+if [ -x "$VENV_PYTHON" ]; then
+    exec "$VENV_PYTHON" "$HOOK_DIR/stop.py" "$@"
+fi
+
+# No venv yet: fall back to uv's inline-script resolution, then plain python3
+if command -v uv &> /dev/null; then
+    exec uv run --script "$HOOK_DIR/stop.py" "$@"
+fi
+exec python3 "$HOOK_DIR/stop.py" "$@"
@@ -1,10 +1,10 @@
 #!/bin/bash
 
-# Telegram Listener LaunchAgent Wrapper Script
+# Telegram Listener Wrapper Script (LaunchAgent, systemd, cron @reboot or by hand)
 # Sources environment and starts telegram listener with proper error handling
 
-# Set up logging
-exec > ~/telegram_listener.log 2>&1
+# Set up logging (the listener writes structured logs to ~/telegram_listener.log itself)
+exec >> ~/telegram_listener.out 2>&1
 
 echo "=== Telegram Listener Starting $(date) ==="
 
@@ -31,13 +31,17 @@ if [ ! -f ~/.claude/.chat_id ]; then
 fi
 echo "✓ Chat ID file found"
 
-# Change to correct directory
-cd /Users/harrison/Documents/Github/claude_text || {
-    echo "✗ Error: Cannot change to project directory"
+# The installed listener (setup.sh copies it to ~/.claude), else the one next to this script
+LISTENER="$HOME/.claude/telegram_listener.py"
+if [ ! -f "$LISTENER" ]; then
+    LISTENER="$(cd "$(dirname "$0")" && pwd)/telegram_listener.py"
+fi
+cd "$(dirname "$LISTENER")" || {
+    echo "✗ Error: Cannot change to listener directory"
     exit 1
 }
-echo "✓ Changed to project directory: $(pwd)"
+echo "✓ Using listener: $LISTENER"
 
-# Start telegram listener
+# Start telegram listener under its supervisor (restarts it if it crashes or hangs)
 echo "✓ Starting telegram listener..."
-exec python3 scripts/telegram_listener_simple.py
\ No newline at end of file
+exec python3 "$LISTENER" --supervise
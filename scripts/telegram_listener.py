@@ -2,123 +2,792 @@
 """
 Simple Telegram listener that resumes Claude sessions using claude --resume
 """
-import json
+import logging
 import os
+import queue
+import re
 import subprocess
 import sys
+import threading
 import time
 from pathlib import Path
 
+from claude_bridge import metrics, tracing
+from claude_bridge.actions import RepeatFilter
+from claude_bridge.botpool import BotPool, bot_id
+from claude_bridge.log import get_logger, log_event
+from claude_bridge.pages import Pager
+from claude_bridge.shortids import ShortIdIndex, is_short_id, parse_reply
+from claude_bridge.supervisor import MAX_CONSECUTIVE_ERRORS, Heartbeat
+from claude_bridge.transcript import TELEGRAM_PREFIX
+from claude_bridge.warmpool import WarmPool, claude_bin
+
+# Per-chat send queues for each bot token, started by main() (notices are skipped without one)
+outboxes = {}
+
+# The bots, set up by main(): edits and button answers share their rate limiters and sessions with sends
+bots = None
+
+# Pre-started processes for recently active sessions (BRIDGE_WARM_POOL=N), set up by main()
+warm_pool = None
+
+# Downloads files and photos sent to sessions, created on first use
+downloader = None
+_downloader_lock = threading.Lock()
+
+# Runs inline button actions off the polling thread, created on first use
+action_pool = None
+_action_pool_lock = threading.Lock()
+
+# Rendered /changes and /transcript pages, reused while paging
+pager = Pager()
+
+# Button presses already taken, so a redelivered or double-tapped press runs once
+repeats = RepeatFilter()
+
+# Deadlines for the supervisor (--supervise); a no-op when running unsupervised, set up by main()
+heartbeat = Heartbeat()
+
+# Persisted long-poll offsets older than this are ignored (Telegram may restart update IDs after idle weeks)
+OFFSET_MAX_AGE = 24 * 60 * 60
+
+# One 'target:text' directive per line: a short ID, '*' or a project name
+DIRECTIVE_RE = re.compile(r'^\s*([^\s:]+)\s*:(.*)$')
+# '/changes <id> [--full]' and '/transcript <id>' (group chats append @botname to commands)
+COMMAND_RE = re.compile(r'^/(changes|transcript)(?:@\w+)?(?:\s+(.*))?$', re.DOTALL)
+COMMAND_USAGE = "Usage: /changes <id> [--full] or /transcript <id>"
+BROADCAST_MAX_AGE = 24 * 60 * 60  # '*' and project targets reach sessions active in the last day
+MAX_PARALLEL_RESUMES = 8
+SEEN_IDS_LIMIT = 1000  # Update IDs remembered per bot to drop redeliveries
+
+# Served at /metrics when BRIDGE_METRICS_PORT is set
+UPDATES = metrics.counter('bridge_updates_total', 'Telegram updates received')
+MESSAGES = metrics.counter('bridge_messages_total', 'Incoming messages by outcome', ['kind'])
+RESUME_SECONDS = metrics.histogram('bridge_resume_seconds', 'Time to hand a reply to claude', ['mode'])
+RESUME_FAILURES = metrics.counter('bridge_resume_failures_total', 'Replies that could not be handed to claude')
+POLL_SECONDS = metrics.histogram('bridge_poll_seconds', 'getUpdates round trip (includes the long-poll wait)',
+                                 buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 35.0, 60.0))
+GC_RECLAIMED = metrics.counter('bridge_gc_reclaimed_bytes_total', 'Disk space reclaimed by garbage collection')
+SESSIONS_LOADED = metrics.gauge('bridge_sessions_loaded', 'Sessions in ~/.claude/.sessions at the last load')
+
+
+def get_listener_logger():
+    """Logger for ~/telegram_listener.log (JSON lines, rotated), echoed on a terminal."""
+    return get_logger('listener', Path.home() / 'telegram_listener.log',
+                      console=sys.stdout.isatty())
+
 def load_session_mapping():
     """Load session ID mappings"""
-    sessions_file = Path.home() / '.claude' / '.sessions'
-    if sessions_file.exists():
-        try:
-            return json.loads(sessions_file.read_text())
-        except:
-            pass
-    return {}
+    from claude_bridge.sessions import load_sessions
 
-def parse_targeted_message(message):
-    """Parse message with format 'session_id:message'"""
-    if ':' in message and len(message) > 7:
-        parts = message.split(':', 1)
-        session_id = parts[0].strip().lower()
-        text = parts[1].strip()
+    return load_sessions()
 
-        # Validate session_id format (6 hex chars)
-        if len(session_id) == 6 and all(c in '0123456789abcdef' for c in session_id):
-            return session_id, text
+def parse_targeted_message(message):
+    """Parse message with format 'session_id:message' (6+ hex chars, longer after a collision)"""
+    return parse_reply(message)
 
-    return None, None
+def parse_directives(message, projects=(), keep_empty=False):
+    """Parse one or more 'target:text' lines; lines without a target continue the previous one
+    (keep_empty keeps a bare 'target:' when the message carries a file)"""
+    directives = []
+    for line in message.splitlines():
+        match = DIRECTIVE_RE.match(line)
+        target = match.group(1) if match else None
+        if target and (target == '*' or target in projects or is_short_id(target.lower())):
+            if is_short_id(target.lower()):
+                target = target.lower()
+            directives.append([target, match.group(2)])
+        elif directives:
+            directives[-1][1] += '\n' + line
+    return [(target, text.strip()) for target, text in directives if text.strip() or keep_empty]
 
 def resume_claude_session(real_session_id, message, cwd):
     """Resume Claude session with message using claude --resume"""
+    start = time.perf_counter()
     try:
         # Add prefix so show-telegram can find the conversation later
-        prefixed_message = f"User replied via Telegram: {message}"
+        prefixed_message = f"{TELEGRAM_PREFIX} {message}"
+
+        # A warm process has the transcript loaded already: just hand it the reply
+        if warm_pool is not None and warm_pool.resume(real_session_id, prefixed_message, cwd):
+            RESUME_SECONDS.observe(time.perf_counter() - start, mode='warm')
+            log_event(get_listener_logger(), "RESUMED", f"Resumed warm Claude session {real_session_id} with: {message}",
+                      session_id=real_session_id, warm=True)
+            return True
 
         # Use claude --resume to continue the exact same session
         # Skip permissions to allow automated background resumption
         subprocess.Popen([
-            'claude', '--resume', real_session_id, '--dangerously-skip-permissions', prefixed_message
+            claude_bin(), '--resume', real_session_id, '--dangerously-skip-permissions', prefixed_message
         ], cwd=cwd)
-        print(f"Resumed Claude session {real_session_id} with: {message}")
+        RESUME_SECONDS.observe(time.perf_counter() - start, mode='cold')
+        log_event(get_listener_logger(), "RESUMED", f"Resumed Claude session {real_session_id} with: {message}",
+                  session_id=real_session_id)
         return True
     except Exception as e:
-        print(f"Failed to resume Claude session: {e}")
+        RESUME_FAILURES.inc()
+        log_event(get_listener_logger(), "RESUME_ERROR", f"Failed to resume Claude session: {e}",
+                  level=logging.ERROR, session_id=real_session_id)
         return False
 
-def main():
-    """Main listener loop"""
-    # Load environment
-    env_file = Path.home() / '.claude' / '.env'
-    if env_file.exists():
-        for line in env_file.read_text().splitlines():
-            if '=' in line and not line.startswith('#'):
-                key, value = line.split('=', 1)
-                os.environ[key.strip()] = value.strip()
-
-    api_key = os.getenv('TELEGRAM_API')
-    chat_id_file = Path.home() / '.claude' / '.chat_id'
-
-    if not api_key or not chat_id_file.exists():
-        print("Missing TELEGRAM_API or .chat_id file")
-        sys.exit(1)
+def telegram_api_url(api_key, method):
+    """Bot API endpoint URL (TELEGRAM_API_BASE points at a fake server in tests)."""
+    base = os.getenv('TELEGRAM_API_BASE', 'https://api.telegram.org').rstrip('/')
+    return f"{base}/bot{api_key}/{method}"
 
-    chat_id = chat_id_file.read_text().strip()
-    last_update_id = 0
+def send_chat_message(api_key, chat_id, text, session=None, **params):
+    """Send a message to a chat; returns retry_after seconds when rate limited"""
+    import requests
 
-    print("Simple Telegram→Claude listener started...")
+    http = session or requests
+    resp = http.post(telegram_api_url(api_key, 'sendMessage'),
+                     json=dict(params, chat_id=chat_id, text=text), timeout=15)
+    if resp.status_code == 429:
+        return resp.json().get('parameters', {}).get('retry_after', 1)
+    return None
 
-    while True:
-        try:
-            import requests
+def bot_post(api_key, method, payload, timeout=15):
+    """Call a Bot API method as a bot, paced by its rate limiter over its own connection pool"""
+    if bots is not None and api_key in bots.limiters:
+        bots.limiters[api_key].acquire()
+        http = bots.session(api_key)
+    else:
+        import requests  # No pool outside main() (tests, one-off calls)
+
+        http = requests
+    return http.post(telegram_api_url(api_key, method), json=payload, timeout=timeout)
+
+def edit_chat_message(api_key, chat_id, message_id, text, **params):
+    """Replace the text (and buttons) of a message the bot sent"""
+    bot_post(api_key, 'editMessageText', dict(params, chat_id=chat_id, message_id=message_id, text=text))
+
+def notify_chat(chat_id, text, api_key=None, **params):
+    """Queue a message for a chat (via the bot that received its update) without blocking"""
+    outbox = outboxes.get(api_key) or next(iter(outboxes.values()), None)
+    if outbox is not None:
+        outbox.put(chat_id, text, **params)
+
+def get_downloader():
+    """Shared attachment downloader (size cap, concurrency limit and file_unique_id cache)"""
+    global downloader
+    with _downloader_lock:
+        if downloader is None:
+            from claude_bridge.attachments import Downloader
+
+            downloader = Downloader()
+        return downloader
+
+def fetch_attachments(attachments, short_id, cwd, api_key=None):
+    """Download a message's files into the session's inbox; returns (paths, problems)"""
+    from claude_bridge.attachments import inbox_dir
+    from claude_bridge.botpool import load_tokens
+
+    token = api_key or next(iter(load_tokens()), None)
+    try:
+        directory = inbox_dir(cwd, short_id)
+    except OSError as e:
+        return [], [f"Cannot create the inbox in {cwd}: {e}"]
+    return get_downloader().fetch_all(token, attachments, directory)
+
+def resume_with_attachments(short_id, session_info, reply_text, attachments, chat_id, log, api_key=None):
+    """Download the files of a reply, then resume the session with their paths in the prompt"""
+    from claude_bridge.attachments import prompt_with_files
+
+    paths, problems = fetch_attachments(attachments, short_id, session_info['cwd'], api_key)
+    for problem in problems:
+        log_event(log, "ATTACH_ERROR", problem, level=logging.WARNING, session=short_id)
+    if problems:
+        notify_chat(chat_id, '\n'.join(f"📎 {problem}" for problem in problems), api_key=api_key)
+    if not paths and not reply_text:
+        return False
+
+    log_event(log, "ATTACH", f"Delivering {len(paths)} file(s) to session {short_id}",
+              session=short_id, files=[str(path) for path in paths])
+    resumed = resume_claude_session(session_info['session_id'], prompt_with_files(reply_text, paths),
+                                    session_info['cwd'])
+    if resumed:
+        log_event(log, "OK", f"Session {short_id} resumed successfully", session=short_id)
+    else:
+        log_event(log, "FAILED", f"Failed to resume session {short_id}", level=logging.ERROR, session=short_id)
+    return resumed
+
+def get_action_pool():
+    """Shared worker pool for quick actions, so button presses never block polling"""
+    global action_pool
+    with _action_pool_lock:
+        if action_pool is None:
+            from concurrent.futures import ThreadPoolExecutor
+
+            action_pool = ThreadPoolExecutor(max_workers=MAX_PARALLEL_RESUMES, thread_name_prefix='action')
+        return action_pool
+
+def answer_callback(api_key, query_id, text=None):
+    """Acknowledge a button press; Telegram shows text as a toast and stops the spinner"""
+    import requests
+
+    params = {'callback_query_id': query_id}
+    if text:
+        params['text'] = text
+    try:
+        bot_post(api_key, 'answerCallbackQuery', params, timeout=10)
+    except requests.RequestException:
+        pass  # The spinner times out on its own
+
+def show_page(view, short_id, session_info, index, chat_id, api_key=None, message_id=None):
+    """Send page `index` of a session's changes or transcript, or show it in place of message_id"""
+    from claude_bridge.pages import show
+
+    text, markup = show(pager.pages(view, short_id, session_info), view, short_id, index)
+    params = {'reply_markup': markup} if markup else {}
+    if message_id is None:
+        notify_chat(chat_id, text, api_key=api_key, **params)
+    else:
+        edit_chat_message(api_key, chat_id, message_id, text, **params)
+
+def run_action(action, short_id, session_info, arg, chat_id, log, api_key=None, message_id=None):
+    """
+    Carry out a quick action: resume the session with a prompt (arg), reply with
+    its changes or transcript, or turn a paged view to (view, index) = arg
+    """
+    try:
+        if action == 'page':
+            view, index = arg
+            show_page(view, short_id, session_info, index, chat_id, api_key, message_id)
+        elif action in ('changes', 'transcript'):
+            # The views of /changes and /transcript, the transcript at its newest page
+            show_page(action, short_id, session_info, -1 if action == 'transcript' else 0, chat_id, api_key)
+        elif resume_claude_session(session_info['session_id'], arg, session_info['cwd']):
+            log_event(log, "OK", f"Session {short_id} resumed successfully", session=short_id, action=action)
+        else:
+            log_event(log, "FAILED", f"Failed to resume session {short_id}",
+                      level=logging.ERROR, session=short_id, action=action)
+            notify_chat(chat_id, f"❌ {short_id}: failed to resume", api_key=api_key)
+    except Exception as e:
+        log_event(log, "ACTION_ERROR", f"Quick action {action} for {short_id} failed: {e}",
+                  level=logging.ERROR, session=short_id)
+
+def handle_callback(query, routes, log, api_key=None):
+    """Answer an inline button press at once, then run its action in the background"""
+    from claude_bridge.actions import ACKNOWLEDGEMENTS, parse_callback
+    from claude_bridge.pages import parse_page
+
+    chat_id = str(query.get('message', {}).get('chat', {}).get('id'))
+    if chat_id not in routes:
+        MESSAGES.inc(kind='unrouted')
+        answer_callback(api_key, query.get('id'))
+        return
+    parsed = parse_page(query.get('data')) or parse_callback(query.get('data'))
+    if parsed is None:
+        MESSAGES.inc(kind='ignored')
+        answer_callback(api_key, query.get('id'), "❓ Unknown action")
+        return
+    action, short_id, arg = parsed
+
+    with tracing.span("session_load") as span:
+        sessions = load_session_mapping()
+        span.set(sessions=len(sessions))
+    SESSIONS_LOADED.set(len(sessions))
+    if short_id not in sessions:
+        short_id = ShortIdIndex(sessions).resolve(short_id) or short_id
+    session_info = sessions.get(short_id)
+    if session_info is None:
+        log_event(log, "NOT_FOUND", f"Session {short_id} not found", level=logging.WARNING, session=short_id)
+        answer_callback(api_key, query.get('id'), f"❓ Session {short_id} not found")
+        return
+    if not routes.allows(chat_id, os.path.basename(session_info['cwd']), short_id):
+        log_event(log, "DENIED", f"Chat {chat_id} is not routed to session {short_id}",
+                  level=logging.WARNING, session=short_id, chat_id=chat_id)
+        answer_callback(api_key, query.get('id'), f"⛔ Session {short_id} is not routed to this chat")
+        return
+    press = None if action == 'page' else (chat_id, action, short_id, arg)  # Showing a page again is harmless
+    if not repeats.first(query.get('id'), press):
+        MESSAGES.inc(kind='ignored')
+        log_event(log, "REPEAT", f"Ignoring a repeated {action} press for {short_id}", session=short_id,
+                  chat_id=chat_id, action=action)
+        answer_callback(api_key, query.get('id'))
+        return
+
+    MESSAGES.inc(kind='callback')
+    log_event(log, "ACTION", f"Quick action {action} for {short_id}", session=short_id, chat_id=chat_id,
+              action=action)
+    acknowledgement = ACKNOWLEDGEMENTS.get(action)  # Turning a page needs no toast
+    answer_callback(api_key, query.get('id'), acknowledgement and acknowledgement.format(short_id=short_id))
+    get_action_pool().submit(run_action, action, short_id, session_info, arg, chat_id, log, api_key,
+                             query.get('message', {}).get('message_id'))
+
+def handle_command(match, chat_id, routes, log, api_key=None):
+    """Reply to /changes or /transcript with the first page of the session's view"""
+    command, args = match.group(1), (match.group(2) or '').split()
+    full = '--full' in args
+    targets = [arg for arg in args if arg != '--full']
+    if len(targets) != 1 or not is_short_id(targets[0].lower()) or (full and command != 'changes'):
+        MESSAGES.inc(kind='ignored')
+        notify_chat(chat_id, COMMAND_USAGE, api_key=api_key)
+        return
+    MESSAGES.inc(kind='command')
+
+    sessions = load_session_mapping()
+    SESSIONS_LOADED.set(len(sessions))
+    short_ids, problem = resolve_target(targets[0].lower(), sessions, chat_id, routes)
+    if problem:
+        notify_chat(chat_id, problem, api_key=api_key)
+        return
+    view = 'transcript' if command == 'transcript' else 'changes_full' if full else 'changes'
+    log_event(log, "COMMAND", f"/{command} for {short_ids[0]}", session=short_ids[0], chat_id=chat_id, view=view)
+    # Rendering runs git or reads the transcript, so it stays off the polling thread
+    get_action_pool().submit(run_action, 'page', short_ids[0], sessions[short_ids[0]], (view, 0), chat_id, log,
+                             api_key)
+
+def resolve_target(target, sessions, chat_id, routes):
+    """Short IDs a directive targets; returns (short_ids, problem shown to the chat)"""
+    if is_short_id(target):
+        short_id = target if target in sessions else ShortIdIndex(sessions).resolve(target)
+        if short_id is None:
+            return [], f"❓ {target}: session not found"
+        if not routes.allows(chat_id, os.path.basename(sessions[short_id]['cwd']), short_id):
+            return [], f"⛔ {short_id}: not routed to this chat"
+        return [short_id], None
+
+    # Broadcast: every recently active session ('*') or every one in a project
+    cutoff = time.time() - BROADCAST_MAX_AGE
+    short_ids = []
+    for short_id, info in sessions.items():
+        project = os.path.basename(info.get('cwd', ''))
+        if (info.get('timestamp', 0) > cutoff and target in ('*', project)
+                and routes.allows(chat_id, project, short_id)):
+            short_ids.append(short_id)
+    if not short_ids:
+        return [], f"❓ {target}: no active sessions for this chat"
+    return short_ids, None
+
+def dispatch_batch(directives, sessions, chat_id, routes, log, api_key=None, attachments=()):
+    """Resolve a multi-target message's sessions, then resume them off the polling thread"""
+    jobs = {}  # short_id -> texts addressed to it, in message order
+    problems = []
+    for target, reply_text in directives:
+        short_ids, problem = resolve_target(target, sessions, chat_id, routes)
+        if problem:
+            problems.append(problem)
+        for short_id in short_ids:
+            jobs.setdefault(short_id, []).append(reply_text)
+
+    log_event(log, "BATCH", f"Batch reply from chat {chat_id}: {len(directives)} directive(s), "
+                            f"{len(jobs)} session(s)", chat_id=chat_id, sessions=sorted(jobs))
+
+    # Downloads and resumes run on a worker, which also sends the acknowledgement
+    pool = get_downloader() if attachments else get_action_pool()
+    pool.submit(resume_batch, jobs, sessions, problems, chat_id, log, api_key, attachments)
+
+def resume_batch(jobs, sessions, problems, chat_id, log, api_key=None, attachments=()):
+    """Resume every session of a batch in parallel (with its files), and acknowledge once"""
+    from concurrent.futures import ThreadPoolExecutor
+    from claude_bridge.attachments import prompt_with_files
+
+    def resume(job):
+        short_id, texts = job
+        info = sessions[short_id]
+        text = '\n\n'.join(text for text in texts if text)
+        if attachments:
+            # Each session gets the files in its own inbox (repeats are linked from the cache)
+            paths, failed = fetch_attachments(attachments, short_id, info['cwd'], api_key)
+            problems.extend(f"📎 {short_id}: {problem}" for problem in failed)
+            text = prompt_with_files(text, paths)
+        return short_id, resume_claude_session(info['session_id'], text, info['cwd'])
+
+    results = []
+    if jobs:
+        with tracing.span("resume_batch", sessions=len(jobs)) as span:
+            with ThreadPoolExecutor(max_workers=min(len(jobs), MAX_PARALLEL_RESUMES)) as pool:
+                results = list(pool.map(resume, jobs.items()))
+            span.set(failed=sum(1 for _, resumed in results if not resumed))
+
+    lines = []
+    for short_id, resumed in results:
+        project = os.path.basename(sessions[short_id]['cwd'])
+        lines.append(f"✅ {short_id} ({project})" if resumed else f"❌ {short_id} ({project}): failed to resume")
+        log_event(log, "OK" if resumed else "FAILED",
+                  f"Session {short_id} {'resumed successfully' if resumed else 'failed to resume'}",
+                  level=logging.INFO if resumed else logging.ERROR, session=short_id)
+    resumed_count = sum(1 for _, resumed in results if resumed)
+    header = f"📨 Resumed {resumed_count}/{len(jobs)} session(s)"
+    notify_chat(chat_id, '\n'.join([header] + lines + problems), api_key=api_key)
+
+def handle_update(update, routes, log, api_key=None):
+    """Resume the session(s) targeted by one incoming update from a routed chat"""
+    UPDATES.inc()
+    if 'callback_query' in update:
+        handle_callback(update['callback_query'], routes, log, api_key)
+        return
+    message = update.get('message', {})
+    chat_id = str(message.get('chat', {}).get('id'))
+    if chat_id not in routes:
+        MESSAGES.inc(kind='unrouted')
+        return
+
+    # Files and photos carry their 'id: text' in the caption
+    from claude_bridge.attachments import attachments_of
+
+    attachments = attachments_of(message)
+    text = (message.get('text') or message.get('caption') or '').strip()
+    command = COMMAND_RE.match(text)
+    if command:
+        handle_command(command, chat_id, routes, log, api_key)
+        return
+    if ':' not in text:
+        MESSAGES.inc(kind='ignored')
+        return
+
+    # Load session mappings
+    with tracing.span("session_load") as span:
+        sessions = load_session_mapping()
+        span.set(sessions=len(sessions))
+    SESSIONS_LOADED.set(len(sessions))
+
+    # Parse targeted message (one directive per line for batches)
+    projects = {os.path.basename(info.get('cwd', '')) for info in sessions.values()}
+    directives = parse_directives(text, projects, keep_empty=bool(attachments))
+    if not directives:
+        MESSAGES.inc(kind='ignored')
+        return
+    if len(directives) > 1 or not is_short_id(directives[0][0]):
+        MESSAGES.inc(kind='batch')
+        dispatch_batch(directives, sessions, chat_id, routes, log, api_key, attachments)
+        return
+    short_id, reply_text = directives[0]
+    MESSAGES.inc(kind='targeted')
+
+    log_event(log, "REPLY", f"Got targeted reply for {short_id}: {reply_text}",
+              session=short_id, chat_id=chat_id)
 
-            # Long polling
-            url = f"https://api.telegram.org/bot{api_key}/getUpdates"
-            params = {'timeout': 30, 'offset': last_update_id + 1}
+    if short_id not in sessions:
+        # Accept an unambiguous prefix, like git's abbreviated hashes
+        short_id = ShortIdIndex(sessions).resolve(short_id) or short_id
+    session_info = sessions.get(short_id)
 
-            resp = requests.get(url, params=params, timeout=35)
-            data = resp.json()
+    if session_info:
+        real_session_id = session_info['session_id']
+        cwd = session_info['cwd']
 
-            if not data.get('ok'):
-                time.sleep(5)
-                continue
+        # Only chats routed to the session's project may drive it
+        if not routes.allows(chat_id, os.path.basename(cwd), short_id):
+            log_event(log, "DENIED", f"Chat {chat_id} is not routed to session {short_id}",
+                      level=logging.WARNING, session=short_id, chat_id=chat_id)
+            notify_chat(chat_id, f"⛔ Session {short_id} is not routed to this chat", api_key=api_key)
+            return
 
-            for update in data.get('result', []):
-                last_update_id = max(last_update_id, update.get('update_id', 0))
+        if attachments:
+            # Downloads run off the polling thread; the session resumes once its files are in
+            get_downloader().submit(resume_with_attachments, short_id, session_info, reply_text,
+                                    attachments, chat_id, log, api_key)
+            return
 
-                message = update.get('message', {})
-                if str(message.get('chat', {}).get('id')) == chat_id:
-                    text = message.get('text', '').strip()
+        # Resume the exact same Claude session
+        with tracing.span("resume", bytes=len(reply_text.encode())) as span:
+            resumed = resume_claude_session(real_session_id, reply_text, cwd)
+            span.set(status="ok" if resumed else "failed")
+        if resumed:
+            log_event(log, "OK", f"Session {short_id} resumed successfully", session=short_id)
+        else:
+            log_event(log, "FAILED", f"Failed to resume session {short_id}",
+                      level=logging.ERROR, session=short_id)
+    else:
+        log_event(log, "NOT_FOUND", f"Session {short_id} not found",
+                  level=logging.WARNING, session=short_id)
 
-                    # Parse targeted message
-                    short_id, reply_text = parse_targeted_message(text)
-                    if short_id and reply_text:
-                        print(f"Got targeted reply for {short_id}: {reply_text}")
+def first_delivery(seen, key, limit=SEEN_IDS_LIMIT):
+    """True the first time key is seen; seen is an OrderedDict of the last `limit` keys"""
+    if key in seen:
+        return False
+    seen[key] = True
+    if len(seen) > limit:
+        seen.popitem(last=False)
+    return True
+
+def offsets_file():
+    return Path.home() / '.claude' / '.listener_offsets'
+
+def load_update_offset(api_key):
+    """Last update ID this bot's poll loop handled before a restart (0 if none or stale)"""
+    from claude_bridge.state import read_json
+
+    entry = read_json(offsets_file(), {}).get(bot_id(api_key), {})
+    if time.time() - entry.get('saved_at', 0) > OFFSET_MAX_AGE:
+        return 0
+    return entry.get('update_id', 0)
+
+def save_update_offset(api_key, update_id):
+    """Persist the last handled update ID so a restarted listener neither loses nor repeats replies"""
+    from claude_bridge.state import update_json
+
+    try:
+        with update_json(offsets_file()) as offsets:
+            offsets[bot_id(api_key)] = {'update_id': update_id, 'saved_at': int(time.time())}
+    except OSError:
+        pass
+
+def poll_updates(api_key, routes, last_update_id, log, timeout=30, session=None, save_offset=False):
+    """
+    Run one long-poll round for all chats and handle its updates; returns the new last_update_id.
+    With save_offset the offset is persisted after every update, so a restart resumes mid-batch.
+    """
+    import requests
 
-                        # Load session mappings
-                        sessions = load_session_mapping()
-                        session_info = sessions.get(short_id)
+    http = session or requests
 
-                        if session_info:
-                            real_session_id = session_info['session_id']
-                            cwd = session_info['cwd']
+    # Long polling
+    url = telegram_api_url(api_key, 'getUpdates')
+    params = {'timeout': timeout, 'offset': last_update_id + 1}
 
-                            # Resume the exact same Claude session
-                            if resume_claude_session(real_session_id, reply_text, cwd):
-                                print(f"Session {short_id} resumed successfully")
-                            else:
-                                print(f"Failed to resume session {short_id}")
-                        else:
-                            print(f"Session {short_id} not found")
+    start = time.perf_counter()
+    with tracing.span("long_poll") as span:
+        resp = http.get(url, params=params, timeout=timeout + 5)
+        data = resp.json()
+        span.set(bytes=len(resp.content), updates=len(data.get('result', [])))
+    POLL_SECONDS.observe(time.perf_counter() - start)
+    heartbeat.beat(f"poll-{bot_id(api_key)}", 0)  # Handling the batch gets the grace period
 
+    if not data.get('ok') or not data.get('result'):
+        # Only record polls that delivered something
+        tracing.discard()
+        if not data.get('ok'):
+            time.sleep(5)
+        return last_update_id
+
+    table = routes.get()  # Picks up edits to .chats between polls
+    for update in data.get('result', []):
+        # Advance past every update, so a failing one is skipped rather than refetched with its batch
+        last_update_id = max(last_update_id, update.get('update_id', 0))
+        try:
+            handle_update(update, table, log, api_key)
+        except Exception as e:
+            log_event(log, "EXCEPTION", f"Error handling update {update.get('update_id')}: {e}",
+                      level=logging.ERROR, update_id=update.get('update_id'))
+        if save_offset:
+            save_update_offset(api_key, last_update_id)
+
+    tracing.flush()
+    return last_update_id
+
+def run_listener(api_key, routes, log, stop_event=None, poll_timeout=30, session=None):
+    """Long-poll for replies until stop_event is set (forever by default)"""
+    import requests
+
+    loop = f"poll-{bot_id(api_key)}"
+    last_update_id = load_update_offset(api_key)
+    errors = 0
+    while stop_event is None or not stop_event.is_set():
+        # A loop that keeps failing stops beating, so the supervisor restarts the listener
+        if errors < MAX_CONSECUTIVE_ERRORS:
+            heartbeat.beat(loop, poll_timeout + 5)
+        try:
+            last_update_id = poll_updates(api_key, routes, last_update_id, log, poll_timeout, session,
+                                          save_offset=True)
+            errors = 0
         except requests.Timeout:
+            tracing.discard()
             continue
         except Exception as e:
-            print(f"Error: {e}")
+            errors += 1
+            log_event(log, "EXCEPTION", f"Error: {e}", level=logging.ERROR, errors=errors)
+            tracing.flush()
             time.sleep(10)
+    heartbeat.done(loop)
+
+def run_pool_listener(pool, routes, log, stop_event=None, poll_timeout=30):
+    """Long-poll every bot in the pool in parallel, one thread per token"""
+    def poll_bot(token):
+        tracing.init_thread()  # Each loop flushes/discards its own runs
+        run_listener(token, routes, log, stop_event, poll_timeout, pool.session(token))
+
+    threads = [threading.Thread(target=poll_bot, args=(token,), name=f"poll-{bot_id(token)}", daemon=True)
+               for token in pool.tokens]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+def set_webhook(api_key, url, secret):
+    """Register our webhook URL with Telegram (updates are then pushed, not polled)"""
+    import requests
+
+    resp = requests.post(telegram_api_url(api_key, 'setWebhook'), json={
+        'url': url,
+        'secret_token': secret,
+        'allowed_updates': ['message', 'callback_query'],
+        'max_connections': 1,  # One delivery at a time keeps each chat's replies in order
+    }, timeout=10)
+    return resp.json()
+
+def delete_webhook(api_key):
+    """Remove any registered webhook so getUpdates works again"""
+    import requests
+
+    try:
+        requests.post(telegram_api_url(api_key, 'deleteWebhook'), timeout=10)
+    except requests.RequestException:
+        pass
+
+def run_webhook_worker(updates, routes, log, stop_event=None, pool=None):
+    """Dispatch updates queued by the webhook server until stop_event is set"""
+    from collections import OrderedDict
+
+    seen = {}  # bot -> recently handled update IDs (deliveries may arrive out of order)
+    while stop_event is None or not stop_event.is_set():
+        heartbeat.beat("webhook", 1)
+        try:
+            update = updates.get(timeout=1)
+        except queue.Empty:
+            continue
+
+        # Telegram redelivers updates it thinks were not acknowledged
+        bot = update.pop('_bot_id', None)
+        if not first_delivery(seen.setdefault(bot, OrderedDict()), update.get('update_id')):
+            continue
+
+        api_key = pool.by_bot_id(bot) if pool is not None and bot else None
+        try:
+            handle_update(update, routes.get(), log, api_key)
+        except Exception as e:
+            log_event(log, "EXCEPTION", f"Error: {e}", level=logging.ERROR)
+        tracing.flush()
+    heartbeat.done("webhook")
+
+def run_webhook_listener(pool, routes, log, webhook_url):
+    """Serve the webhook endpoint, register every bot and dispatch replies as they arrive"""
+    import secrets
+    from urllib.parse import urlparse
+    from claude_bridge.webhook import WebhookServer
+
+    # Secret is regenerated per start: we register the webhook ourselves
+    secret = os.getenv('TELEGRAM_WEBHOOK_SECRET') or secrets.token_urlsafe(32)
+    host, _, port = os.getenv('TELEGRAM_WEBHOOK_LISTEN', '127.0.0.1:8443').rpartition(':')
+    path = urlparse(webhook_url).path or '/'
+
+    server = WebhookServer(secret, host=host or '127.0.0.1', port=int(port), path=path).start()
+    metrics.gauge('bridge_webhook_queue_depth', 'Webhook updates waiting for the dispatcher',
+                  fn=server.updates.qsize)
+    for token in pool.tokens:
+        # With several bots each gets its own sub-path so we know who received an update
+        url = webhook_url if len(pool) == 1 else f"{webhook_url.rstrip('/')}/{bot_id(token)}"
+        result = set_webhook(token, url, secret)
+        if not result.get('ok'):
+            log_event(log, "CONFIG_ERROR", f"setWebhook failed for bot {bot_id(token)}: {result.get('description')}",
+                      level=logging.ERROR)
+            server.stop()
+            sys.exit(1)
+
+    log_event(log, "WEBHOOK", f"Receiving updates for {len(pool)} bot(s) at {webhook_url} (listening on {server.url})")
+    try:
+        run_webhook_worker(server.updates, routes, log, pool=pool)
+    finally:
+        server.stop()
+
+def run_progress_tracker(pool, routes, log, stop_event=None):
+    """Keep live progress messages for running sessions up to date (BRIDGE_PROGRESS=1)"""
+    from claude_bridge.progress import ProgressTracker
+
+    def post(token, method, payload):
+        pool.limiters[token].acquire()
+        try:
+            resp = pool.session(token).post(telegram_api_url(token, method), json=payload, timeout=15)
+            return resp.status_code, resp.json()
+        except Exception as e:
+            log_event(log, "PROGRESS_ERROR", f"{method} failed: {e}", level=logging.WARNING)
+            return 0, {}
+
+    tracker = ProgressTracker(post, pool.token_for, routes)
+    log_event(log, "PROGRESS", f"Following session transcripts ({type(tracker.watcher).__name__}, "
+                               f"edits every {tracker.interval:g}s at most)")
+    tracker.run(stop_event)
+
+def run_cleanup(log, stop_event=None, first_delay=60):
+    """Collect old state and logs every BRIDGE_GC_INTERVAL_HOURS, away from the polling threads"""
+    from claude_bridge import cleanup
+
+    interval = cleanup.interval_hours() * 3600
+    stop_event = stop_event or threading.Event()
+    delay = first_delay  # Not while the listener is starting up
+    while not stop_event.wait(delay):
+        delay = interval
+        try:
+            report = cleanup.collect()
+        except Exception as e:
+            log_event(log, "GC_ERROR", f"{type(e).__name__}: {e}", level=logging.WARNING)
+            continue
+        GC_RECLAIMED.inc(report['reclaimed'])
+        log_event(log, "GC", cleanup.describe(report), reclaimed=report['reclaimed'],
+                  files=report['files'], total=report['total'])
+
+def main(argv=None):
+    """Main listener loop (also `bridge listen [--supervise]`)"""
+    global bots, warm_pool, heartbeat
+    from claude_bridge.outbox import ChatOutbox
+    from claude_bridge.routing import RoutesCache
+
+    if '--supervise' in (sys.argv[1:] if argv is None else argv):
+        # Run the listener as a child process and restart it when it dies or hangs
+        from claude_bridge import supervisor
+
+        sys.exit(supervisor.main([sys.executable, os.path.abspath(__file__)],
+                                 log=lambda msg: print(msg, flush=True)))
+
+    log = get_listener_logger()
+    heartbeat = Heartbeat.from_env()
+
+    # Load environment
+    from claude_bridge.env import load_env
+
+    load_env()
+
+    pool = bots = BotPool(shared=True)  # Send rate is shared with concurrent Stop hooks
+    routes = RoutesCache(on_error=lambda e: log_event(log, "CONFIG_ERROR", f"{e}; keeping the last good routes",
+                                                      level=logging.ERROR))
+
+    if not pool or not routes.get():
+        log_event(log, "CONFIG_ERROR", "Missing TELEGRAM_API or .chats/.chat_id file", level=logging.ERROR)
+        sys.exit(1)
+
+    log_event(log, "START", f"Simple Telegram→Claude listener started for {len(routes.get())} chat(s), "
+                            f"{len(pool)} bot(s)...")
+    tracing.init("listener")
+
+    # Each bot sends through its own connection pool, rate limiter and chat queues
+    for token in pool.tokens:
+        def send(chat_id, text, token=token, **params):
+            pool.limiters[token].acquire()
+            return send_chat_message(token, chat_id, text, session=pool.session(token), **params)
+        outboxes[token] = ChatOutbox(send).start()
+
+    metrics_port = os.getenv('BRIDGE_METRICS_PORT')
+    if metrics_port:
+        metrics.gauge('bridge_outbox_pending', 'Notices queued for sending across all chats',
+                      fn=lambda: sum(outbox.pending() for outbox in outboxes.values()))
+        server = metrics.MetricsServer(port=int(metrics_port)).start()
+        log_event(log, "METRICS", f"Serving metrics at {server.url}/metrics")
+
+    warm_size = int(os.getenv('BRIDGE_WARM_POOL', '0') or 0)
+    if warm_size > 0:
+        warm_pool = WarmPool(warm_size)
+        threading.Thread(target=warm_pool.run, args=(load_session_mapping,),
+                         name='warm-pool', daemon=True).start()
+        log_event(log, "WARM_POOL", f"Keeping up to {warm_size} recently active session(s) warm")
+
+    if os.getenv('BRIDGE_PROGRESS', '0') != '0':
+        threading.Thread(target=run_progress_tracker, args=(pool, routes, log),
+                         name='progress', daemon=True).start()
+
+    from claude_bridge import cleanup
+
+    if cleanup.interval_hours() > 0:
+        threading.Thread(target=run_cleanup, args=(log,), name='cleanup', daemon=True).start()
+
+    webhook_url = os.getenv('TELEGRAM_WEBHOOK_URL')
+    if webhook_url:
+        run_webhook_listener(pool, routes, log, webhook_url)
+    else:
+        for token in pool.tokens:
+            delete_webhook(token)  # getUpdates is refused while a webhook is set
+        run_pool_listener(pool, routes, log)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
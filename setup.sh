@@ -36,7 +36,7 @@ create_telegram_app_bundle() {
 # TelegramListener wrapper script for auto-start
 cd "$project_dir"
 source ~/.claude/.env 2>/dev/null || true
-exec python3 "$script_path"
+exec python3 "$script_path" --supervise
 EOF
 
     chmod +x "$app_path/Contents/MacOS/TelegramListener"
@@ -192,13 +192,13 @@ start_listener_manually() {
     pkill -f telegram_listener.py 2>/dev/null || true
 
     # Start new listener
-    nohup python3 ~/.claude/telegram_listener.py > ~/telegram_listener.log 2>&1 &
+    nohup python3 ~/.claude/telegram_listener.py --supervise >> ~/telegram_listener.out 2>&1 &
     sleep 2
 
     if ps aux | grep -v grep | grep -q telegram_listener.py; then
         print_success "Telegram listener started (PID: $(pgrep -f telegram_listener.py))"
     else
-        print_error "Failed to start listener. Check ~/telegram_listener.log for errors"
+        print_error "Failed to start listener. Check ~/telegram_listener.log and ~/telegram_listener.out for errors"
     fi
 }
 
@@ -253,10 +253,28 @@ print_success "Directories created"
 print_status "Installing scripts..."
 cp scripts/stop.py ~/.claude/hooks/
 chmod +x ~/.claude/hooks/stop.py
+cp scripts/stop_shim.sh ~/.claude/hooks/
+chmod +x ~/.claude/hooks/stop_shim.sh
+rm -rf ~/.claude/hooks/claude_bridge
+cp -R scripts/claude_bridge ~/.claude/hooks/
 print_success "Stop hook installed"
 
+# Pre-resolve the hook's dependencies once so each invocation skips uv
+print_status "Creating Stop hook virtualenv..."
+if python3 -m venv ~/.claude/hooks/.venv 2>/dev/null && \
+    ~/.claude/hooks/.venv/bin/pip install -q requests python-dotenv 2>/dev/null; then
+    HOOK_COMMAND='~/.claude/hooks/stop_shim.sh'
+    print_success "Stop hook virtualenv ready"
+else
+    rm -rf ~/.claude/hooks/.venv
+    HOOK_COMMAND='~/.claude/hooks/stop.py'
+    print_warning "Could not create virtualenv, Stop hook will run via uv"
+fi
+
 cp scripts/telegram_listener.py ~/.claude/
 chmod +x ~/.claude/telegram_listener.py
+rm -rf ~/.claude/claude_bridge
+cp -R scripts/claude_bridge ~/.claude/
 print_success "Telegram listener installed"
 
 cp scripts/show-telegram.py ~/.claude/
@@ -364,12 +382,19 @@ if 'hooks' not in settings:
 if 'Stop' not in settings['hooks']:
     settings['hooks']['Stop'] = []
 
-# Check if our hook is already configured
+# Check if our hook is already configured (either entry point), and switch
+# an existing registration to the preferred one
+hook_command = '${HOOK_COMMAND}'
+our_commands = ('~/.claude/hooks/stop.py', '~/.claude/hooks/stop_shim.sh')
 hook_configured = False
 for stop_config in settings['hooks']['Stop']:
     if isinstance(stop_config, dict) and 'hooks' in stop_config:
         for hook in stop_config['hooks']:
-            if hook.get('command') == '~/.claude/hooks/stop.py':
+            if hook.get('command') in our_commands:
+                if hook['command'] != hook_command:
+                    hook['command'] = hook_command
+                    with open(settings_file, 'w') as f:
+                        json.dump(settings, f, indent=2)
                 hook_configured = True
                 break
 
@@ -380,7 +405,7 @@ if not hook_configured:
 
     settings['hooks']['Stop'][0]['hooks'].append({
         'type': 'command',
-        'command': '~/.claude/hooks/stop.py'
+        'command': hook_command
     })
 
     with open(settings_file, 'w') as f:
@@ -455,12 +480,16 @@ if ! grep -q "show-telegram" "$SHELL_RC" 2>/dev/null; then
     echo "alias show-telegram='python3 ~/.claude/show-telegram.py'" >> "$SHELL_RC"
     echo "alias show-changes='python3 ~/.claude/show-changes.py'" >> "$SHELL_RC"
     echo "alias telegram-status='ps aux | grep telegram_listener | grep -v grep'" >> "$SHELL_RC"
-    echo "alias telegram-start='nohup python3 ~/.claude/telegram_listener.py > ~/telegram_listener.log 2>&1 &'" >> "$SHELL_RC"
+    echo "alias telegram-start='nohup python3 ~/.claude/telegram_listener.py --supervise >> ~/telegram_listener.out 2>&1 &'" >> "$SHELL_RC"
     echo "alias telegram-stop='pkill -f telegram_listener.py'" >> "$SHELL_RC"
     print_success "Aliases added to $SHELL_RC"
 else
     print_status "Aliases already configured (telegram-start, telegram-stop, telegram-status, show-telegram, show-changes)"
 fi
+if ! grep -q "alias bridge=" "$SHELL_RC" 2>/dev/null; then
+    echo "alias bridge='PYTHONPATH=~/.claude python3 -m claude_bridge'" >> "$SHELL_RC"
+    print_success "Added the bridge command to $SHELL_RC"
+fi
 
 # Configure telegram listener startup
 configure_telegram_startup
@@ -476,6 +505,7 @@ echo "  telegram-start    - Start the background listener"
 echo "  telegram-stop     - Stop the listener"
 echo "  telegram-status   - Check if listener is running"
 echo "  show-telegram ID  - View Telegram conversation"
+echo "  bridge --help     - All bridge commands (sessions, changes, transcript, ...)"
 echo ""
 echo "Test it out:"
 echo "  1. Run: claude 'Hello from Claude!'"
@@ -483,7 +513,7 @@ echo "  2. Check Telegram for notification with session ID"
 echo "  3. Reply with format: session_id:your message"
 echo ""
 echo "Log files:"
-echo "  Listener log: ~/telegram_listener.log"
+echo "  Listener log: ~/telegram_listener.log (JSON lines; crash output in ~/telegram_listener.out)"
 echo "  Claude logs: ~/.claude/logs/"
 echo ""
 print_success "Setup complete! Source your shell config or restart terminal for aliases."
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Tests for inline quick-action buttons: the notification keyboard, immediate answers and background actions.
+"""
+
+import sys
+import os
+import json
+import logging
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from unittest.mock import patch
+
+# Add the scripts and benchmarks directories to path for imports
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+SCRIPTS_DIR = os.path.join(TESTS_DIR, '..', 'scripts')
+sys.path.insert(0, SCRIPTS_DIR)
+sys.path.insert(0, os.path.join(TESTS_DIR, '..', 'benchmarks'))
+
+from fake_bot_api import FakeBotAPI
+from claude_bridge import actions, tracing
+from claude_bridge.botpool import BotPool
+from claude_bridge.pages import Pager
+from claude_bridge.routing import Route, RoutingTable
+import telegram_listener
+
+CHAT = "4242"
+OTHER_CHAT = "5555"
+ROUTES = RoutingTable([Route(CHAT, projects=('api',)), Route(OTHER_CHAT, projects=('web',))])
+
+
+@contextmanager
+def bridge(api, resume_delay=0.0):
+    """An 'api' session with a git repo and transcript, a fresh action pool and recorded resumes/notices."""
+    with tempfile.TemporaryDirectory() as home:
+        root = Path(home)
+        project = root / 'api'
+        project.mkdir()
+        transcript = root / 'transcript.jsonl'
+        sessions = {"abc123": {"session_id": "real-1", "cwd": str(project), "timestamp": int(time.time()),
+                               "transcript_path": str(transcript)}}
+        (root / '.claude').mkdir()
+        (root / '.claude' / '.sessions').write_text(json.dumps(sessions))
+
+        calls = {'resumes': [], 'notices': [], 'project': project, 'transcript': transcript}
+        lock = threading.Lock()
+
+        def fake_resume(real_session_id, message, cwd):
+            time.sleep(resume_delay)
+            with lock:
+                calls['resumes'].append((real_session_id, message))
+            return True
+
+        pool = ThreadPoolExecutor(max_workers=2)
+        with patch.dict(os.environ, {'HOME': home, 'TELEGRAM_API_BASE': api.base_url}), \
+             patch.object(telegram_listener, 'action_pool', pool), \
+             patch.object(telegram_listener, 'pager', Pager()), \
+             patch.object(telegram_listener, 'repeats', actions.RepeatFilter()), \
+             patch('telegram_listener.resume_claude_session', side_effect=fake_resume), \
+             patch('telegram_listener.notify_chat', side_effect=lambda c, t, **kw: calls['notices'].append((c, t))), \
+             patch.object(tracing, '_tracer', None):
+            calls['pool'] = pool
+            yield calls
+            pool.shutdown(wait=True)
+
+
+def press(api, data, chat=CHAT):
+    """Deliver one button press to the listener; returns how long handling took."""
+    api.inject_callback(chat, data)
+    update = api.get_updates({})[-1]
+    start = time.perf_counter()
+    telegram_listener.handle_update(update, ROUTES, logging.getLogger('test.actions'), '1:T')
+    return time.perf_counter() - start
+
+
+def test_notification_carries_keyboard():
+    """Test that a real Stop hook run attaches the buttons, and BRIDGE_KEYBOARD=0 leaves them off."""
+    with FakeBotAPI() as api, tempfile.TemporaryDirectory() as home:
+        (Path(home) / '.claude').mkdir()
+        (Path(home) / '.claude' / '.chat_id').write_text(CHAT)
+        project = Path(home) / 'api'
+        project.mkdir()
+        env = dict(os.environ, HOME=home, TELEGRAM_API='1:T', TELEGRAM_API_BASE=api.base_url,
+                   BRIDGE_QUICK_PROMPTS='Run the tests|Commit|Open a PR', BRIDGE_HISTORY='0')
+        for session, keyboard in (('real-1', '1'), ('real-2', '0')):
+            result = subprocess.run(
+                [sys.executable, os.path.join(SCRIPTS_DIR, 'stop.py')],
+                input=json.dumps({'session_id': session, 'cwd': str(project)}), cwd=str(project),
+                env=dict(env, BRIDGE_KEYBOARD=keyboard), capture_output=True, text=True, timeout=30,
+            )
+            assert result.returncode == 0, result.stderr
+        assert len(api.sent_messages) == 2
+
+        rows = api.sent_messages[0]['reply_markup']['inline_keyboard']
+        buttons = [button for row in rows for button in row]
+        assert [button['text'] for button in rows[0]] == ['▶️ Continue', '📂 Changes', '📜 Transcript']
+        assert len(buttons) == 6 and [len(row) for row in rows] == [3, 2, 1]
+        assert all(len(button['callback_data'].encode()) <= actions.MAX_CALLBACK_DATA for button in buttons)
+
+        short_id = api.sent_messages[0]['text'].rsplit('Reply: ', 1)[1].split(':')[0]
+        with patch.dict(os.environ, {'BRIDGE_QUICK_PROMPTS': 'Run the tests|Commit|Open a PR'}):
+            parsed = [actions.parse_callback(button['callback_data']) for button in buttons]
+        assert parsed[0] == ('continue', short_id, 'Continue')
+        assert parsed[5] == ('prompt', short_id, 'Open a PR')
+        assert api.sent_messages[1]['reply_markup'] is None
+
+
+def test_press_is_answered_before_the_action_runs():
+    """Test that the query is answered at once while a slow resume finishes in the background."""
+    with FakeBotAPI() as api, bridge(api, resume_delay=0.5) as calls:
+        elapsed = press(api, 'go:abc123')
+        elapsed += press(api, 'p0:abc123')
+        assert elapsed < 0.5, f"Handling waited for the resume ({elapsed:.2f}s)"
+        assert [answer['text'] for answer in api.callback_answers] == ['▶️ Continuing abc123', '💬 Sent to abc123']
+        assert calls['resumes'] == []
+
+        calls['pool'].shutdown(wait=True)
+        assert sorted(calls['resumes']) == [('real-1', 'Continue'), ('real-1', 'Run the tests')]
+        assert calls['notices'] == []
+
+
+def test_changes_and_transcript_replies():
+    """Test the Changes and Transcript buttons reply with the same views as /changes and /transcript."""
+    with FakeBotAPI() as api, bridge(api) as calls:
+        project = calls['project']
+        git = dict(cwd=project, capture_output=True, check=True)
+        subprocess.run(['git', 'init', '-q'], **git)
+        (project / 'app.py').write_text('print(1)\n')
+        subprocess.run(['git', '-c', 'user.name=t', '-c', 'user.email=t@t', 'add', '.'], **git)
+        subprocess.run(['git', '-c', 'user.name=t', '-c', 'user.email=t@t', 'commit', '-qm', 'init'], **git)
+        (project / 'app.py').write_text('print(2)\n')
+        (project / 'new.py').write_text('x = 1\n')
+
+        records = [{'type': 'user', 'message': {'content': 'typed in the terminal'}},
+                   {'type': 'user', 'message': {'content': 'User replied via Telegram: ship it'}},
+                   {'type': 'assistant', 'message': {'content': [{'type': 'text', 'text': 'Shipped to production.'},
+                                                                 {'type': 'tool_use', 'name': 'Bash'}]}}]
+        calls['transcript'].write_text(''.join(json.dumps(record) + '\n' for record in records) + '{"torn')
+
+        press(api, 'chg:abc123')
+        press(api, 'log:abc123')
+        calls['pool'].shutdown(wait=True)
+        buttons = sorted(calls['notices'])  # Actions run concurrently
+
+        del calls['notices'][:]
+        calls['pool'] = ThreadPoolExecutor(max_workers=2)
+        with patch.object(telegram_listener, 'action_pool', calls['pool']):
+            for command in ('/changes abc123', '/transcript abc123'):
+                api.inject_message(CHAT, command)
+                telegram_listener.handle_update(api.get_updates({})[-1], ROUTES, logging.getLogger('test.actions'))
+            calls['pool'].shutdown(wait=True)
+
+        assert calls['resumes'] == []
+        assert buttons == sorted(calls['notices'])
+        assert {chat for chat, _ in buttons} == {CHAT}
+        changes, transcript = sorted((text for _, text in buttons), key=lambda text: '📱' in text)
+        assert '📁 Project: api' in changes and 'Untracked: new.py' in changes
+        assert '👤 You: ship it' in transcript and '🤖 Claude: Shipped to production.' in transcript
+        assert 'typed in the terminal' not in transcript
+
+
+def test_repeated_presses_run_once():
+    """Test that a redelivered query and a quick double tap run their action once."""
+    with FakeBotAPI() as api, bridge(api) as calls:
+        api.inject_callback(CHAT, 'go:abc123')
+        update = api.get_updates({})[-1]
+        for _ in range(2):
+            telegram_listener.handle_update(update, ROUTES, logging.getLogger('test.actions'), '1:T')
+        press(api, 'go:abc123')
+        press(api, 'p0:abc123')
+        calls['pool'].shutdown(wait=True)
+
+        assert sorted(calls['resumes']) == [('real-1', 'Continue'), ('real-1', 'Run the tests')]
+        assert [answer['text'] for answer in api.callback_answers] == [
+            '▶️ Continuing abc123', None, None, '💬 Sent to abc123']
+
+    repeats = actions.RepeatFilter(window=3, clock=iter([0, 1, 5]).__next__)
+    assert repeats.first('q1', ('chat', 'continue', 'abc123', 'Continue'))
+    assert not repeats.first('q2', ('chat', 'continue', 'abc123', 'Continue'))
+    assert repeats.first('q3', ('chat', 'continue', 'abc123', 'Continue')), "A tap after the window runs"
+
+
+def test_answers_and_edits_go_through_the_bot_pool():
+    """Test that callback answers and page edits are paced by the bot's limiter over its session."""
+    with FakeBotAPI() as api, bridge(api) as calls:
+        bots = BotPool(['1:T'], rate=1000)
+        message_id = api.send_message({'chat_id': CHAT, 'text': 'page 1'})['message_id']
+        with patch.object(telegram_listener, 'bots', bots), \
+             patch.object(bots.limiters['1:T'], 'acquire', return_value=0.0) as acquire, \
+             patch('requests.post', side_effect=AssertionError("sent around the pool")):
+            press(api, 'go:abc123')
+            telegram_listener.edit_chat_message('1:T', CHAT, message_id, 'page 2')
+            calls['pool'].shutdown(wait=True)
+        assert acquire.call_count == 2
+        assert [answer['text'] for answer in api.callback_answers] == ['▶️ Continuing abc123']
+        assert api.edits == [(message_id, 'page 2')]
+        bots.close()
+
+
+def test_unroutable_presses_do_nothing():
+    """Test that other chats, unknown sessions and foreign data are answered but never acted on."""
+    with FakeBotAPI() as api, bridge(api) as calls:
+        press(api, 'go:abc123', chat=OTHER_CHAT)
+        press(api, 'go:abc123', chat='9999')
+        press(api, 'go:fff999')
+        press(api, 'p7:abc123')  # Quick prompt removed since the notification
+        press(api, 'x' * 70)
+        calls['pool'].shutdown(wait=True)
+
+        assert [answer['text'] for answer in api.callback_answers] == [
+            '⛔ Session abc123 is not routed to this chat', None, '❓ Session fff999 not found',
+            '❓ Unknown action', '❓ Unknown action']
+        assert calls['resumes'] == [] and calls['notices'] == []
+
+
+if __name__ == "__main__":
+    # Simple test runner
+    test_functions = [
+        test_notification_carries_keyboard,
+        test_press_is_answered_before_the_action_runs,
+        test_changes_and_transcript_replies,
+        test_repeated_presses_run_once,
+        test_answers_and_edits_go_through_the_bot_pool,
+        test_unroutable_presses_do_nothing,
+    ]
+
+    passed = 0
+    failed = 0
+
+    for test_func in test_functions:
+        try:
+            test_func()
+            print(f"✅ {test_func.__name__}")
+            passed += 1
+        except Exception as e:
+            print(f"❌ {test_func.__name__}: {e}")
+            failed += 1
+
+    print(f"\nResults: {passed} passed, {failed} failed")
+    sys.exit(0 if failed == 0 else 1)
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Tests for LLM provider racing and detached TTS announcements.
+"""
+
+import sys
+import os
+import tempfile
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+# Add the scripts directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+
+import stop
+
+
+def python_command(script):
+    """Run stub provider scripts with this interpreter instead of uv."""
+    return [sys.executable, str(script)]
+
+
+def write_stub(llm_dir, name, body):
+    """Write a stub provider script that ignores its --completion flag."""
+    script = Path(llm_dir) / name
+    script.write_text("import sys, time\n" + body + "\n")
+    return script
+
+
+def test_race_returns_first_valid_answer():
+    """Test that the fastest successful provider wins and slow ones are killed."""
+    with tempfile.TemporaryDirectory() as llm_dir:
+        marker = Path(llm_dir) / "slow_finished"
+        write_stub(llm_dir, "oai.py", f"time.sleep(1.5); open({str(marker)!r}, 'w').close(); print('Slow')")
+        write_stub(llm_dir, "anth.py", "time.sleep(0.2); print('Fast answer')")
+        write_stub(llm_dir, "ollama.py", "sys.exit(1)")
+
+        env = {"OPENAI_API_KEY": "x", "ANTHROPIC_API_KEY": "y"}
+        with patch.dict(os.environ, env), \
+             patch('stop.helper_script_command', side_effect=python_command):
+            start = time.monotonic()
+            message = stop.generate_completion_message(llm_dir=llm_dir)
+            elapsed = time.monotonic() - start
+
+        assert message == "Fast answer", "Fastest valid provider should win"
+        assert elapsed < 1.2, f"Race should not wait for slow providers ({elapsed:.1f}s)"
+
+        time.sleep(2)
+        assert not marker.exists(), "Slow provider should have been killed"
+
+
+def test_race_skips_failed_providers():
+    """Test that a fast failing provider does not end the race."""
+    with tempfile.TemporaryDirectory() as llm_dir:
+        write_stub(llm_dir, "oai.py", "sys.exit(1)")
+        write_stub(llm_dir, "ollama.py", "time.sleep(0.3); print('From ollama')")
+
+        with patch.dict(os.environ, {"OPENAI_API_KEY": "x"}), \
+             patch('stop.helper_script_command', side_effect=python_command):
+            message = stop.generate_completion_message(llm_dir=llm_dir)
+
+    assert message == "From ollama"
+
+
+def test_race_returns_none_when_all_fail():
+    """Test that the race gives up when every provider fails or times out."""
+    with tempfile.TemporaryDirectory() as llm_dir:
+        write_stub(llm_dir, "ollama.py", "time.sleep(5); print('Too late')")
+
+        with patch.dict(os.environ, {}, clear=False), \
+             patch('stop.helper_script_command', side_effect=python_command):
+            os.environ.pop("OPENAI_API_KEY", None)
+            os.environ.pop("ANTHROPIC_API_KEY", None)
+            start = time.monotonic()
+            message = stop.generate_completion_message(llm_dir=llm_dir, timeout=0.5)
+            elapsed = time.monotonic() - start
+
+    assert message is None, "No provider answered in time"
+    assert elapsed < 2, "Timeout should bound the race"
+
+
+def test_provider_scripts_require_api_keys():
+    """Test that keyed providers are skipped without their API keys."""
+    with tempfile.TemporaryDirectory() as llm_dir:
+        for name in ("oai.py", "anth.py", "ollama.py"):
+            write_stub(llm_dir, name, "print('hi')")
+
+        with patch.dict(os.environ, {"ANTHROPIC_API_KEY": "y"}):
+            os.environ.pop("OPENAI_API_KEY", None)
+            scripts = stop.get_llm_provider_scripts(llm_dir)
+
+    assert [s.name for s in scripts] == ["anth.py", "ollama.py"]
+
+
+def test_announce_completion_is_detached():
+    """Test that TTS runs in a detached process instead of blocking the hook."""
+    with tempfile.TemporaryDirectory() as cache_dir, \
+         patch.dict(os.environ, {"BRIDGE_CACHE_DIR": cache_dir}), \
+         patch('stop.get_tts_script_path', return_value="/fake/tts.py"), \
+         patch('stop.get_llm_completion_message', return_value="All done!"), \
+         patch('stop.spawn_announcement_refill'), \
+         patch('stop.subprocess.Popen') as mock_popen:
+        stop.announce_completion()
+
+    args, kwargs = mock_popen.call_args
+    assert args[0][-2:] == ["/fake/tts.py", "All done!"]
+    assert kwargs.get("start_new_session") is True, "TTS should outlive the hook"
+
+
+if __name__ == "__main__":
+    # Simple test runner
+    test_functions = [
+        test_race_returns_first_valid_answer,
+        test_race_skips_failed_providers,
+        test_race_returns_none_when_all_fail,
+        test_provider_scripts_require_api_keys,
+        test_announce_completion_is_detached,
+    ]
+
+    passed = 0
+    failed = 0
+
+    for test_func in test_functions:
+        try:
+            test_func()
+            print(f"✅ {test_func.__name__}")
+            passed += 1
+        except Exception as e:
+            print(f"❌ {test_func.__name__}: {e}")
+            failed += 1
+
+    print(f"\nResults: {passed} passed, {failed} failed")
+    sys.exit(0 if failed == 0 else 1)
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Tests for the completion phrase pool and the TTS audio cache.
+"""
+
+import sys
+import os
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+# Add the scripts directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+
+import stop
+from claude_bridge.announce_cache import AudioCache, PhrasePool
+
+
+def test_phrase_pool_add_and_pick():
+    """Test that phrases are deduplicated, capped and retired after max uses."""
+    with tempfile.TemporaryDirectory() as tmp:
+        pool = PhrasePool(Path(tmp) / "phrases.json", size=3, max_uses=2)
+        assert pool.needs_refill(), "Empty pool needs refill"
+
+        added = pool.add(["All done!", "All done!", "Finished!", "Ready!", "Extra!"])
+        assert added == 3, "Should dedupe and cap at pool size"
+        assert not pool.needs_refill()
+
+        prefer = lambda phrase: phrase == "Finished!"
+        assert pool.pick(prefer=prefer) == "Finished!"
+        assert pool.pick(prefer=prefer) == "Finished!"
+        assert "Finished!" not in pool.phrases(), "Phrase should retire after max uses"
+        assert pool.needs_refill()
+
+
+def test_audio_cache_content_addressed():
+    """Test that audio is keyed by backend and phrase."""
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = AudioCache(Path(tmp) / "tts", max_bytes=10_000)
+        audio = Path(tmp) / "out.mp3"
+        audio.write_bytes(b"x" * 100)
+
+        cached = cache.put("openai_tts", "All done!", audio)
+        assert cached.suffix == ".mp3"
+        assert cache.get("openai_tts", "All done!") == cached
+        assert cache.get("elevenlabs_tts", "All done!") is None, "Backends are cached separately"
+        assert cache.get("openai_tts", "Finished!") is None
+
+
+def test_audio_cache_lru_eviction():
+    """Test that least recently used audio is evicted once over budget."""
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = AudioCache(Path(tmp) / "tts", max_bytes=250)
+        paths = {}
+        for i, phrase in enumerate(["one", "two"]):
+            audio = Path(tmp) / f"{phrase}.wav"
+            audio.write_bytes(b"x" * 100)
+            paths[phrase] = cache.put("tts", phrase, audio)
+            os.utime(paths[phrase], (1000 + i, 1000 + i))
+
+        # Touch "one" so "two" becomes the least recently used
+        cache.get("tts", "one")
+
+        audio = Path(tmp) / "three.wav"
+        audio.write_bytes(b"x" * 100)
+        cache.put("tts", "three", audio)
+
+        assert cache.contains("tts", "one")
+        assert not cache.contains("tts", "two"), "LRU entry should be evicted"
+        assert cache.contains("tts", "three")
+
+
+def test_announce_plays_cached_audio_locally():
+    """Test that a cached phrase is played with a local player, not the TTS script."""
+    with tempfile.TemporaryDirectory() as tmp:
+        with patch.dict(os.environ, {"BRIDGE_CACHE_DIR": tmp}):
+            PhrasePool().add(["All done!"])
+            audio = Path(tmp) / "speech.mp3"
+            audio.write_bytes(b"x" * 10)
+            cached = AudioCache().put("openai_tts", "All done!", audio)
+
+            with patch('stop.get_tts_script_path', return_value="/fake/openai_tts.py"), \
+                 patch('claude_bridge.announce_cache.find_audio_player', return_value=["afplay"]), \
+                 patch('stop.spawn_announcement_refill'), \
+                 patch('stop.subprocess.Popen') as mock_popen:
+                stop.announce_completion()
+
+    args, kwargs = mock_popen.call_args
+    assert args[0] == ["afplay", str(cached)], "Should play cached audio locally"
+    assert kwargs.get("start_new_session") is True
+
+
+def test_refill_seeds_pool_and_synthesizes_audio():
+    """Test the background refill with no LLM and a stub TTS script."""
+    with tempfile.TemporaryDirectory() as tmp:
+        tts_script = Path(tmp) / "stub_tts.py"
+        tts_script.write_text(
+            "import sys\n"
+            "out = sys.argv[sys.argv.index('--output') + 1]\n"
+            "open(out, 'wb').write(sys.argv[-1].encode())\n"
+        )
+
+        with patch.dict(os.environ, {"BRIDGE_CACHE_DIR": tmp, "BRIDGE_TTS_OUTPUT_ARG": "--output"}), \
+             patch('stop.generate_completion_message', return_value=None), \
+             patch('stop.get_tts_script_path', return_value=str(tts_script)), \
+             patch('stop.helper_script_command', side_effect=lambda script: [sys.executable, str(script)]):
+            stop.refill_announcements()
+
+            phrases = PhrasePool().phrases()
+            cache = AudioCache()
+            assert phrases, "Pool should be seeded with predefined messages"
+            for phrase in phrases:
+                audio = cache.get("stub_tts", phrase)
+                assert audio is not None, f"Audio should be cached for {phrase!r}"
+                assert audio.read_bytes() == phrase.encode()
+
+
+def test_speak_only_helper_is_never_cached():
+    """Test that a helper shaped like utils/tts (speaks its argv) gets no extra arguments and no refills."""
+    with tempfile.TemporaryDirectory() as tmp:
+        spoken = Path(tmp) / "spoken.txt"
+        tts_script = Path(tmp) / "pyttsx3_tts.py"
+        tts_script.write_text(
+            "import sys\n"
+            f"open({str(spoken)!r}, 'a').write(' '.join(sys.argv[1:]) + '\\n')\n"
+        )
+        env = {"BRIDGE_CACHE_DIR": tmp}
+
+        with patch.dict(os.environ, env), \
+             patch('stop.generate_completion_message', return_value=None), \
+             patch('stop.get_tts_script_path', return_value=str(tts_script)), \
+             patch('stop.helper_script_command', side_effect=lambda script: [sys.executable, str(script)]):
+            os.environ.pop("BRIDGE_TTS_OUTPUT_ARG", None)
+            stop.refill_announcements()
+            assert PhrasePool().phrases(), "Pool is still seeded"
+            assert not spoken.exists(), "Refill must not run a helper that can only speak"
+            assert not list(AudioCache().directory.glob("*.*"))
+
+            with patch('claude_bridge.announce_cache.find_audio_player', return_value=["afplay"]), \
+                 patch('stop.get_llm_completion_message', return_value="All done!"), \
+                 patch('stop.spawn_announcement_refill') as mock_refill, \
+                 patch('stop.subprocess.Popen') as mock_popen:
+                stop.announce_completion()
+
+        args, _ = mock_popen.call_args
+        assert args[0] == [sys.executable, str(tts_script), "All done!"], "Only the phrase is passed"
+        assert not mock_refill.called, "A cache miss must not start a refill that can never fill it"
+
+
+def test_completion_message_refills_in_background():
+    """Test that picking from a short pool triggers a background refill."""
+    with tempfile.TemporaryDirectory() as tmp:
+        pool = PhrasePool(Path(tmp) / "phrases.json", size=5)
+        pool.add(["All done!"])
+
+        with patch('stop.spawn_announcement_refill') as mock_refill:
+            message = stop.get_llm_completion_message(pool=pool)
+
+    assert message == "All done!"
+    assert mock_refill.called, "Short pool should be refilled in the background"
+
+
+if __name__ == "__main__":
+    # Simple test runner
+    test_functions = [
+        test_phrase_pool_add_and_pick,
+        test_audio_cache_content_addressed,
+        test_audio_cache_lru_eviction,
+        test_announce_plays_cached_audio_locally,
+        test_refill_seeds_pool_and_synthesizes_audio,
+        test_speak_only_helper_is_never_cached,
+        test_completion_message_refills_in_background,
+    ]
+
+    passed = 0
+    failed = 0
+
+    for test_func in test_functions:
+        try:
+            test_func()
+            print(f"✅ {test_func.__name__}")
+            passed += 1
+        except Exception as e:
+            print(f"❌ {test_func.__name__}: {e}")
+            failed += 1
+
+    print(f"\nResults: {passed} passed, {failed} failed")
+    sys.exit(0 if failed == 0 else 1)
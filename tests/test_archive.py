@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Tests for the static HTML archive: rendering, incremental rebuilds and the CLI.
+"""
+
+import sys
+import os
+import json
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+# Add the scripts directory to path for imports
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+SCRIPTS_DIR = os.path.join(TESTS_DIR, '..', 'scripts')
+sys.path.insert(0, SCRIPTS_DIR)
+
+from claude_bridge import archive
+from claude_bridge.archive import build_archive, parse_exchanges
+
+
+def user(text, stream_json=False):
+    content = [{"type": "text", "text": text}] if stream_json else text
+    return {"type": "user", "message": {"role": "user", "content": content}, "timestamp": "2026-01-02T10:00:00Z"}
+
+
+def assistant(text):
+    return {"type": "assistant", "message": {"role": "assistant", "content": [{"type": "text", "text": text}]},
+            "timestamp": "2026-01-02T10:00:05Z"}
+
+
+def append(path, *records, partial=''):
+    with open(path, 'a') as f:
+        for record in records:
+            f.write(json.dumps(record) + '\n')
+        f.write(partial)
+
+
+def make_sessions(root):
+    """Three sessions: Telegram-driven, stream-json replies, terminal only."""
+    now = int(time.time())
+    sessions = {}
+    for short_id, project in (("aaa111", "api"), ("bbb222", "web"), ("ccc333", "infra")):
+        cwd = root / project
+        cwd.mkdir()
+        transcript = root / f"{short_id}.jsonl"
+        transcript.touch()
+        sessions[short_id] = {"session_id": f"real-{short_id}", "cwd": str(cwd), "timestamp": now,
+                              "start_time": now - 600, "transcript_path": str(transcript)}
+    append(root / "aaa111.jsonl", user("fix the build"), assistant("Terminal-only answer before Telegram"),
+           user("User replied via Telegram: use <b>tags</b>"), assistant("Escaped: <script>alert(1)</script>"))
+    append(root / "bbb222.jsonl", user("User replied via Telegram: deploy", stream_json=True),
+           assistant("Deployed to staging successfully"))
+    append(root / "ccc333.jsonl", user("local work"), assistant("Nothing from Telegram here"))
+    return sessions
+
+
+def test_renders_pages_and_index():
+    """Test session pages (escaped, Telegram part only), the index and commit summaries."""
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        sessions = make_sessions(root)
+        repo = root / "api"
+        subprocess.run(['git', 'init', '-q'], cwd=repo, check=True)
+        (repo / 'main.py').write_text('print(1)\n')
+        subprocess.run(['git', 'add', '.'], cwd=repo, check=True)
+        subprocess.run(['git', '-c', 'user.name=t', '-c', 'user.email=t@t', 'commit', '-qm', 'Fix the build'],
+                       cwd=repo, check=True)
+
+        rebuilt, total = build_archive(sessions, root / 'site', jobs=1)
+        assert sorted(rebuilt) == ["aaa111", "bbb222", "ccc333"] and total == 3
+
+        api_page = (root / 'site' / 'sessions' / 'aaa111.html').read_text()
+        assert 'use &lt;b&gt;tags&lt;/b&gt;' in api_page
+        assert '&lt;script&gt;' in api_page and '<script>' not in api_page
+        assert 'Terminal-only answer' not in api_page
+        assert 'Fix the build' in api_page and 'main.py' in api_page
+
+        assert 'Deployed to staging' in (root / 'site' / 'sessions' / 'bbb222.html').read_text()
+        assert 'terminal only' in (root / 'site' / 'sessions' / 'ccc333.html').read_text()
+        index = (root / 'site' / 'index.html').read_text()
+        assert all(f'sessions/{short_id}.html' in index for short_id in sessions)
+
+
+def test_incremental_rebuild_parses_only_new_bytes():
+    """Test that only grown transcripts are re-rendered, from their stored offset."""
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        sessions = make_sessions(root)
+        build_archive(sessions, root / 'site', jobs=1)
+
+        assert build_archive(sessions, root / 'site', jobs=1) == ([], 3)
+
+        # A half-written line is left for the next build
+        append(root / "aaa111.jsonl", user("User replied via Telegram: and add tests"),
+               partial='{"type": "assistant", "mess')
+        offsets = []
+        real_parse = parse_exchanges
+
+        def spy(path, offset=0, started=False):
+            offsets.append(offset)
+            return real_parse(path, offset, started)
+
+        with patch.object(archive, 'parse_exchanges', side_effect=spy):
+            rebuilt, _ = build_archive(sessions, root / 'site', jobs=1)
+        assert rebuilt == ["aaa111"]
+        assert offsets[0] > 0, "Parsing resumed from the stored offset"
+
+        append(root / "aaa111.jsonl", partial='age": {"role": "assistant", "content": "Tests added and passing"}}\n')
+        build_archive(sessions, root / 'site', jobs=1)
+        page = (root / 'site' / 'sessions' / 'aaa111.html').read_text()
+        assert page.count('👤 You') == 2
+        assert 'Tests added and passing' in page
+        assert page.index('use &lt;b&gt;') < page.index('and add tests') < page.index('Tests added')
+
+        # A rewritten (shorter) transcript is parsed from scratch
+        Path(sessions["aaa111"]["transcript_path"]).write_text(json.dumps(user("User replied via Telegram: new")) + '\n')
+        build_archive(sessions, root / 'site', jobs=1)
+        page = (root / 'site' / 'sessions' / 'aaa111.html').read_text()
+        assert page.count('👤 You') == 1 and 'and add tests' not in page
+
+
+def test_parallel_build_matches_serial():
+    """Test that the process pool produces the same site as a serial build."""
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        sessions = make_sessions(root)
+        build_archive(sessions, root / 'serial', jobs=1)
+        rebuilt, _ = build_archive(sessions, root / 'parallel', jobs=3)
+        assert len(rebuilt) == 3
+        for short_id in sessions:
+            serial = (root / 'serial' / 'sessions' / f'{short_id}.html').read_text()
+            parallel = (root / 'parallel' / 'sessions' / f'{short_id}.html').read_text()
+            assert serial == parallel
+
+
+def test_archive_command():
+    """Test `show-telegram.py archive` against a HOME with a .sessions file."""
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        sessions = make_sessions(root)
+        (root / '.claude').mkdir()
+        (root / '.claude' / '.sessions').write_text(json.dumps(sessions))
+        env = dict(os.environ, HOME=str(root))
+        command = [sys.executable, os.path.join(SCRIPTS_DIR, 'show-telegram.py'), 'archive', '--jobs', '2']
+
+        result = subprocess.run(command, env=env, capture_output=True, text=True, timeout=60)
+        assert result.returncode == 0, result.stderr
+        assert 'Archived 3 session(s), re-rendered 3' in result.stdout
+        assert (root / '.claude' / 'telegram-archive' / 'index.html').exists()
+
+        result = subprocess.run(command, env=env, capture_output=True, text=True, timeout=60)
+        assert 're-rendered 0' in result.stdout
+
+
+if __name__ == "__main__":
+    # Simple test runner
+    test_functions = [
+        test_renders_pages_and_index,
+        test_incremental_rebuild_parses_only_new_bytes,
+        test_parallel_build_matches_serial,
+        test_archive_command,
+    ]
+
+    passed = 0
+    failed = 0
+
+    for test_func in test_functions:
+        try:
+            test_func()
+            print(f"✅ {test_func.__name__}")
+            passed += 1
+        except Exception as e:
+            print(f"❌ {test_func.__name__}: {e}")
+            failed += 1
+
+    print(f"\nResults: {passed} passed, {failed} failed")
+    sys.exit(0 if failed == 0 else 1)
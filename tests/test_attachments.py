@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Tests for files and photos sent to sessions: streamed downloads, size cap, unique-ID cache, concurrency.
+"""
+
+import sys
+import os
+import json
+import logging
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from unittest.mock import patch
+
+# Add the scripts and benchmarks directories to path for imports
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(TESTS_DIR, '..', 'scripts'))
+sys.path.insert(0, os.path.join(TESTS_DIR, '..', 'benchmarks'))
+
+from fake_bot_api import FakeBotAPI
+from claude_bridge import tracing
+from claude_bridge.attachments import CHUNK_SIZE, INBOX_DIR, Downloader
+from claude_bridge.routing import RoutingTable
+import telegram_listener
+
+CHAT = "4242"
+ROUTES = RoutingTable.single(CHAT)
+
+
+def file_update(api, caption, data=None, file_id=None, photo=False, report_size=True, file_name='build.log'):
+    """A getUpdates entry for a file the user sent (served by the fake API)."""
+    api.inject_file(CHAT, data, caption, file_name=file_name, photo=photo, report_size=report_size, file_id=file_id)
+    return api.get_updates({})[-1]
+
+
+@contextmanager
+def bridge(api, project_names=("api",), **downloader_args):
+    """Sessions in temporary projects, a fresh downloader and recorded resumes/notices."""
+    with tempfile.TemporaryDirectory() as home:
+        root = Path(home)
+        sessions = {}
+        for n, name in enumerate(project_names):
+            (root / name).mkdir()
+            sessions[f"abc12{n}"] = {"session_id": f"real-{n}", "cwd": str(root / name), "timestamp": int(time.time())}
+        (root / '.claude').mkdir()
+        (root / '.claude' / '.sessions').write_text(json.dumps(sessions))
+
+        calls = {'resumes': [], 'notices': [], 'sessions': sessions, 'root': root}
+        lock = threading.Lock()
+
+        def fake_resume(real_session_id, message, cwd):
+            with lock:
+                calls['resumes'].append((real_session_id, message))
+            return True
+
+        downloader = Downloader(api_base=api.base_url, cache_path=root / '.claude' / '.attachments', **downloader_args)
+        with patch.dict(os.environ, {'HOME': home}), \
+             patch.object(telegram_listener, 'downloader', downloader), \
+             patch('telegram_listener.resume_claude_session', side_effect=fake_resume), \
+             patch('telegram_listener.notify_chat', side_effect=lambda c, t, **kw: calls['notices'].append(t)), \
+             patch.object(tracing, '_tracer', None):
+            calls['downloader'] = downloader
+            yield calls
+            downloader.close()  # Waits for queued download-and-resume jobs
+
+
+def handle(update):
+    telegram_listener.handle_update(update, ROUTES, logging.getLogger('test.attachments'), '1:T')
+
+
+def test_document_and_photo_streamed_into_inbox():
+    """Test chunked downloads into the session's inbox, with their paths in the resume prompt."""
+    data = os.urandom(3 * CHUNK_SIZE + 123)
+    with FakeBotAPI() as api, bridge(api) as calls:
+        handle(file_update(api, 'abc120: why does this fail?', data))
+        handle(file_update(api, 'abc120:', b'\x89PNG' * 1000, photo=True))
+        calls['downloader'].close()
+
+        inbox = Path(calls['sessions']['abc120']['cwd']) / INBOX_DIR
+        assert (inbox / 'abc120' / 'build.log').read_bytes() == data
+        photos = list((inbox / 'abc120').glob('photo_*.jpg'))
+        assert len(photos) == 1 and photos[0].stat().st_size == 4000, "The largest photo size was fetched"
+        assert (inbox / '.gitignore').read_text() == '*\n', "The inbox stays out of git"
+        assert not list(inbox.rglob('*.part'))
+
+        prompts = sorted(message for _, message in calls['resumes'])
+        assert len(prompts) == 2
+        assert prompts[0].startswith('Files sent from Telegram:') and str(photos[0]) in prompts[0]
+        assert prompts[1].startswith('why does this fail?') and str(inbox / 'abc120' / 'build.log') in prompts[1]
+
+
+def test_size_cap_refuses_large_files():
+    """Test that files over the cap are refused up front or mid-stream, with a notice."""
+    with FakeBotAPI() as api, bridge(api, max_bytes=10_000) as calls:
+        handle(file_update(api, 'abc120: reported size', b'x' * 50_000, file_name='big.log'))
+        handle(file_update(api, 'abc120:', b'y' * 50_000, file_name='unsized.log', report_size=False))
+        calls['downloader'].close()
+
+        assert api.file_downloads == ['documents/file_2'], "A reported size is refused before downloading"
+        inbox = Path(calls['sessions']['abc120']['cwd']) / INBOX_DIR / 'abc120'
+        assert list(inbox.iterdir()) == [], "An aborted stream leaves nothing behind"
+        assert any('big.log is too large' in notice for notice in calls['notices'])
+        assert any('unsized.log is too large' in notice for notice in calls['notices'])
+        # The text still reaches the session; a captionless refused file resumes nothing
+        assert [message for _, message in calls['resumes']] == ['reported size']
+
+
+def test_repeated_file_is_linked_from_cache():
+    """Test that a file sent again (here to two sessions at once) is downloaded only once."""
+    data = b'diff --git a/x b/x\n' * 500
+    with FakeBotAPI() as api, bridge(api, project_names=("api", "web")) as calls:
+        first = file_update(api, 'abc120: apply this', data, file_name='fix.patch')
+        handle(first)
+        calls['downloader'].close()
+        assert len(api.file_downloads) == 1
+
+        # Forwarded again as a batch to both sessions, after a restart: same file_id, no new download
+        file_id = first['message']['document']['file_id']
+        restarted = Downloader(api_base=api.base_url, cache_path=calls['root'] / '.claude' / '.attachments')
+        with patch.object(telegram_listener, 'downloader', restarted):
+            handle(file_update(api, 'abc120: again\nabc121: you too', file_id=file_id, file_name='fix.patch'))
+            restarted.close()
+
+        assert len(api.file_downloads) == 1
+        assert restarted.cache_hits == 2
+        copies = [Path(calls['sessions'][short_id]['cwd']) / INBOX_DIR / short_id / 'fix.patch'
+                  for short_id in ('abc120', 'abc121')]
+        assert all(copy.read_bytes() == data for copy in copies)
+        assert copies[0].stat().st_ino == copies[1].stat().st_ino, "Linked, not copied"
+        assert len(calls['resumes']) == 3
+
+
+def test_downloads_run_concurrently_off_the_poll_loop():
+    """Test that handling returns immediately and downloads overlap up to the worker limit."""
+    with FakeBotAPI(latency=0.3) as api, bridge(api, project_names=("a", "b", "c", "d"), workers=4) as calls:
+        updates = [file_update(api, f'abc12{n}: log {n}', os.urandom(1000)) for n in range(4)]
+        start = time.monotonic()
+        for update in updates:
+            handle(update)
+        assert time.monotonic() - start < 0.3, "Polling is not blocked by downloads"
+
+        calls['downloader'].close()
+        elapsed = time.monotonic() - start
+        # Each file takes two calls (getFile, download) at 0.3s: 2.4s one at a time
+        assert elapsed < 1.5, f"Downloads took {elapsed:.2f}s"
+        assert len(calls['resumes']) == 4 and calls['downloader'].downloads == 4
+
+
+if __name__ == "__main__":
+    # Simple test runner
+    test_functions = [
+        test_document_and_photo_streamed_into_inbox,
+        test_size_cap_refuses_large_files,
+        test_repeated_file_is_linked_from_cache,
+        test_downloads_run_concurrently_off_the_poll_loop,
+    ]
+
+    passed = 0
+    failed = 0
+
+    for test_func in test_functions:
+        try:
+            test_func()
+            print(f"✅ {test_func.__name__}")
+            passed += 1
+        except Exception as e:
+            print(f"❌ {test_func.__name__}: {e}")
+            failed += 1
+
+    print(f"\nResults: {passed} passed, {failed} failed")
+    sys.exit(0 if failed == 0 else 1)
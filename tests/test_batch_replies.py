@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Tests for batched multi-session replies: directive parsing, broadcast targets, aggregated acks.
+"""
+
+import sys
+import os
+import json
+import logging
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from unittest.mock import patch
+
+# Add the scripts directory to path for imports
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(TESTS_DIR, '..', 'scripts'))
+
+from claude_bridge import tracing
+from claude_bridge.routing import RoutingTable
+import telegram_listener
+from telegram_listener import parse_directives
+
+NOW = int(time.time())
+SESSIONS = {
+    "aaa111": {"session_id": "real-api-1", "cwd": "/srv/api", "timestamp": NOW},
+    "aaa222": {"session_id": "real-api-2", "cwd": "/srv/api", "timestamp": NOW},
+    "bbb111": {"session_id": "real-web", "cwd": "/srv/web", "timestamp": NOW},
+    "ccc111": {"session_id": "real-infra", "cwd": "/srv/infra", "timestamp": NOW},
+    "ddd111": {"session_id": "real-old", "cwd": "/srv/web", "timestamp": NOW - 3 * 24 * 3600},
+}
+
+
+def update(chat_id, text):
+    return {"update_id": 1, "message": {"chat": {"id": int(chat_id)}, "text": text}}
+
+
+def run_update(text, routes, chat_id="111", resume_delay=0.0):
+    """Handle one update against SESSIONS; returns (resumes, notices, seconds the handler took)."""
+    resumes = []
+    notices = []
+    lock = threading.Lock()
+
+    def fake_resume(real_session_id, message, cwd):
+        time.sleep(resume_delay)
+        with lock:
+            resumes.append((real_session_id, message))
+        return real_session_id != "real-infra"
+
+    pool = ThreadPoolExecutor(max_workers=2)
+    with tempfile.TemporaryDirectory() as home:
+        (Path(home) / ".claude").mkdir()
+        (Path(home) / ".claude" / ".sessions").write_text(json.dumps(SESSIONS))
+        with patch.dict(os.environ, {"HOME": home}), \
+             patch.object(telegram_listener, 'action_pool', pool), \
+             patch('telegram_listener.resume_claude_session', side_effect=fake_resume), \
+             patch('telegram_listener.notify_chat', side_effect=lambda c, t, **kw: notices.append((c, t))), \
+             patch.object(tracing, '_tracer', None):
+            start = time.monotonic()
+            telegram_listener.handle_update(update(chat_id, text), routes, logging.getLogger('test.batch'))
+            handled = time.monotonic() - start
+            pool.shutdown(wait=True)
+    return sorted(resumes), notices, handled
+
+
+def test_parse_directives():
+    """Test multi-line directives, continuations and broadcast targets."""
+    message = "AAA111: fix the build\nit fails on CI\nNote: only on linux\n*: status?\napi:run tests\nweb:   "
+    assert parse_directives(message, {"api", "web"}) == [
+        ("aaa111", "fix the build\nit fails on CI\nNote: only on linux"),
+        ("*", "status?"),
+        ("api", "run tests"),
+    ]
+    assert parse_directives("just chatting: hello", {"api"}) == []
+    assert parse_directives("abc123:check this: error") == [("abc123", "check this: error")]
+
+
+def test_batch_fans_out_in_parallel_with_one_ack():
+    """Test that several directives resume their sessions concurrently, off the poll thread, and ack once."""
+    message = "aaa111:deploy\nbbb111:rebuild\nccc111:restart"
+    start = time.monotonic()
+    resumes, notices, handled = run_update(message, RoutingTable.single("111"), resume_delay=0.3)
+    elapsed = time.monotonic() - start
+
+    assert handled < 0.1, f"The polling thread waited for the resumes ({handled:.2f}s)"
+    assert resumes == [("real-api-1", "deploy"), ("real-infra", "restart"), ("real-web", "rebuild")]
+    assert elapsed < 0.8, f"Resumes ran one after another ({elapsed:.2f}s)"
+    assert len(notices) == 1
+    chat_id, ack = notices[0]
+    assert chat_id == "111"
+    assert ack.splitlines()[0] == "📨 Resumed 2/3 session(s)"
+    assert "✅ aaa111 (api)" in ack and "✅ bbb111 (web)" in ack
+    assert "❌ ccc111 (infra): failed to resume" in ack
+
+
+def test_broadcast_targets_respect_routes_and_age():
+    """Test '*' and project targets, merged texts, and problems reported in the ack."""
+    routes = RoutingTable.from_dict({"111": {"projects": ["api", "web"]}})
+    message = "*: pause\napi: then run tests\nccc111: hi\nfff999: hello\ninfra: go"
+    resumes, notices, _ = run_update(message, routes)
+
+    # Infra is not routed to this chat and ddd111 is too old for a broadcast
+    assert resumes == [
+        ("real-api-1", "pause\n\nthen run tests"),
+        ("real-api-2", "pause\n\nthen run tests"),
+        ("real-web", "pause"),
+    ]
+    ack = notices[0][1]
+    assert ack.startswith("📨 Resumed 3/3 session(s)")
+    assert "⛔ ccc111: not routed to this chat" in ack
+    assert "❓ fff999: session not found" in ack
+    assert "❓ infra: no active sessions for this chat" in ack
+
+
+def test_single_reply_unchanged():
+    """Test that a plain 'id:text' reply still resumes without an ack."""
+    resumes, notices, _ = run_update("aaa111:continue please\nand add tests", RoutingTable.single("111"))
+    assert resumes == [("real-api-1", "continue please\nand add tests")]
+    assert notices == []
+
+
+if __name__ == "__main__":
+    # Simple test runner
+    test_functions = [
+        test_parse_directives,
+        test_batch_fans_out_in_parallel_with_one_ack,
+        test_broadcast_targets_respect_routes_and_age,
+        test_single_reply_unchanged,
+    ]
+
+    passed = 0
+    failed = 0
+
+    for test_func in test_functions:
+        try:
+            test_func()
+            print(f"✅ {test_func.__name__}")
+            passed += 1
+        except Exception as e:
+            print(f"❌ {test_func.__name__}: {e}")
+            failed += 1
+
+    print(f"\nResults: {passed} passed, {failed} failed")
+    sys.exit(0 if failed == 0 else 1)
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Tests for the hot-path benchmark fixtures and regression comparison.
+"""
+
+import sys
+import os
+import tempfile
+from pathlib import Path
+
+# Add the scripts and benchmarks directories to path for imports
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(TESTS_DIR, '..', 'scripts'))
+sys.path.insert(0, os.path.join(TESTS_DIR, '..', 'benchmarks'))
+
+import bench_hotpaths
+import stop
+
+
+def test_transcript_fixture_ends_on_tool_call():
+    """Test that the tail scan skips the trailing tool call to the last text reply."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = bench_hotpaths.write_transcript(Path(tmp) / 't.jsonl', 50)
+        assert len(path.read_text().splitlines()) == 51
+
+        response = stop.get_latest_assistant_response(str(path))
+        assert response.startswith("Response ")
+
+
+def test_markdown_fixture_size():
+    """Test that markdown fixtures have the requested size and convert."""
+    text = bench_hotpaths.make_markdown(4096)
+    assert len(text) == 4096
+    assert "<b>three files</b>" in stop.markdown_to_html(text)
+
+
+def test_session_fixture_lookup():
+    """Test that the session store fixture works with the real lookup path."""
+    with tempfile.TemporaryDirectory() as tmp:
+        short_id = bench_hotpaths.write_session_store(tmp, 100)
+        with bench_hotpaths.home_dir(tmp):
+            sessions = bench_hotpaths.telegram_listener.load_session_mapping()
+        assert len(sessions) == 100
+        assert short_id in sessions
+
+
+def test_compare_flags_regressions():
+    """Test that only cases slower than threshold x baseline are reported."""
+    baseline = {'results': {
+        'a': {'median_ms': 10.0},
+        'b': {'median_ms': 10.0},
+    }}
+    current = {'results': {
+        'a': {'median_ms': 12.0},   # within 1.25x
+        'b': {'median_ms': 13.0},   # regression
+        'c': {'median_ms': 99.0},   # new case, no baseline
+    }}
+
+    assert bench_hotpaths.compare(current, baseline, 1.25) == [('b', 10.0, 13.0)]
+
+
+if __name__ == "__main__":
+    # Simple test runner
+    test_functions = [
+        test_transcript_fixture_ends_on_tool_call,
+        test_markdown_fixture_size,
+        test_session_fixture_lookup,
+        test_compare_flags_regressions,
+    ]
+
+    passed = 0
+    failed = 0
+
+    for test_func in test_functions:
+        try:
+            test_func()
+            print(f"✅ {test_func.__name__}")
+            passed += 1
+        except Exception as e:
+            print(f"❌ {test_func.__name__}: {e}")
+            failed += 1
+
+    print(f"\nResults: {passed} passed, {failed} failed")
+    sys.exit(0 if failed == 0 else 1)
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Tests for the bot token pool: consistent hashing, rate limiting, per-bot polling.
+"""
+
+import sys
+import os
+import json
+import logging
+import subprocess
+import tempfile
+import threading
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+# Add the scripts and benchmarks directories to path for imports
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+SCRIPTS_DIR = os.path.join(TESTS_DIR, '..', 'scripts')
+sys.path.insert(0, SCRIPTS_DIR)
+sys.path.insert(0, os.path.join(TESTS_DIR, '..', 'benchmarks'))
+
+from claude_bridge import tracing
+from claude_bridge.botpool import BotPool, HashRing, RateLimiter, SharedRateLimiter, load_tokens
+from claude_bridge.routing import RoutingTable
+from fake_bot_api import FakeBotAPI
+import stop
+import telegram_listener
+
+TOKENS = ['1001:AAA', '1002:BBB', '1003:CCC']
+SHORT_IDS = [f"{i:06x}" for i in range(0, 3000 * 977, 977)]
+
+
+def test_ring_spreads_sessions_evenly():
+    """Test that sessions are spread across bots and assignment is stable."""
+    ring = HashRing(TOKENS)
+    counts = {token: 0 for token in TOKENS}
+    for short_id in SHORT_IDS:
+        counts[ring.token_for(short_id)] += 1
+
+    for token, count in counts.items():
+        assert count > len(SHORT_IDS) * 0.2, f"{token} only got {count} sessions"
+    assert all(ring.token_for(s) == HashRing(TOKENS).token_for(s) for s in SHORT_IDS[:100])
+
+
+def test_adding_a_bot_moves_few_sessions():
+    """Test that growing the pool only reassigns about 1/N of sessions."""
+    before = HashRing(TOKENS)
+    after = HashRing(TOKENS + ['1004:DDD'])
+    moved = [s for s in SHORT_IDS if before.token_for(s) != after.token_for(s)]
+
+    assert len(moved) < len(SHORT_IDS) * 0.35
+    assert all(after.token_for(s) == '1004:DDD' for s in moved), "Only moves to the new bot"
+
+
+def test_regenerated_token_keeps_sessions():
+    """Test that placement uses the bot ID, not the secret part of the token."""
+    before = HashRing(TOKENS)
+    after = HashRing(['1001:NEWSECRET', '1002:BBB', '1003:CCC'])
+    for short_id in SHORT_IDS[:300]:
+        assert before.token_for(short_id).split(':')[0] == after.token_for(short_id).split(':')[0]
+
+
+def test_rate_limiter():
+    """Test that the token bucket holds sends to the configured rate."""
+    limiter = RateLimiter(rate=20, burst=1)
+    start = time.monotonic()
+    for _ in range(5):
+        limiter.acquire()
+    assert time.monotonic() - start >= 0.18
+
+
+def test_shared_rate_limiter_spans_processes():
+    """Test that limiters in separate processes share one bucket per bot through the rate file."""
+    with tempfile.TemporaryDirectory() as tmp:
+        rate_path = Path(tmp) / '.send_rate'
+        script = (
+            "import sys, time\n"
+            f"sys.path.insert(0, {SCRIPTS_DIR!r})\n"
+            "from claude_bridge.botpool import SharedRateLimiter\n"
+            "limiter = SharedRateLimiter('111', rate=20, burst=1, path=sys.argv[1])\n"
+            "for _ in range(3):\n"
+            "    limiter.acquire()\n"
+            "    print(time.time(), flush=True)\n"
+        )
+        start = time.time()
+        procs = [subprocess.Popen([sys.executable, '-c', script, str(rate_path)], stdout=subprocess.PIPE, text=True)
+                 for _ in range(2)]
+        times = sorted(float(line) for proc in procs for line in proc.communicate(timeout=30)[0].split())
+
+        # Six sends at 20/s from one bucket: at least 5 gaps of 50 ms between them
+        assert len(times) == 6
+        assert times[-1] - start >= 0.23, f"Hooks did not share the bucket: {times[-1] - start:.3f}s"
+
+        # Other bots have their own bucket
+        other = SharedRateLimiter('222', rate=20, burst=1, path=rate_path)
+        with patch('os.fsync', side_effect=AssertionError("Pacing a send must not sync the disk")):
+            assert other.acquire() == 0.0
+        assert set(json.loads(rate_path.read_text())) == {'111', '222'}
+
+        # A file torn by a crash only refills the buckets
+        rate_path.write_text('{"111": {"tok')
+        assert SharedRateLimiter('111', rate=20, burst=1, path=rate_path).acquire() == 0.0
+
+
+def test_load_tokens():
+    """Test TELEGRAM_API_POOL parsing with TELEGRAM_API as the fallback."""
+    with patch.dict(os.environ, {'TELEGRAM_API': '1:X', 'TELEGRAM_API_POOL': ' 2:Y, 3:Z ,'}):
+        assert load_tokens() == ['2:Y', '3:Z']
+    with patch.dict(os.environ, {'TELEGRAM_API': '1:X', 'TELEGRAM_API_POOL': ''}):
+        assert load_tokens() == ['1:X']
+
+
+def test_hook_sends_through_session_bot():
+    """Test that each session's notification goes out through its own bot."""
+    with FakeBotAPI() as api, tempfile.TemporaryDirectory() as home:
+        (Path(home) / '.claude').mkdir()
+        (Path(home) / '.claude' / '.chat_id').write_text('4242')
+        env = {'HOME': home, 'TELEGRAM_API_POOL': ','.join(TOKENS), 'TELEGRAM_API_BASE': api.base_url}
+
+        with patch.dict(os.environ, env), \
+             patch('stop.get_hook_logger', return_value=logging.getLogger('test.hook')), \
+             patch.object(tracing, '_tracer', None):
+            for i in range(6):
+                stop.send_telegram_notification({'session_id': f"s{i}", 'cwd': home})
+            expected = {stop.generate_session_id(f"s{i}", Path(home).name): None for i in range(6)}
+            bots = BotPool(TOKENS)
+            for short_id in expected:
+                expected[short_id] = bots.token_for(short_id)
+
+        for message in api.wait_for_messages(6):
+            short_id = message['text'].split('Session ')[1][:6]
+            assert message['token'] == expected[short_id]
+
+
+def test_listener_polls_every_bot():
+    """Test that the listener runs one long-poll per bot and resumes from each."""
+    with FakeBotAPI() as api, tempfile.TemporaryDirectory() as home:
+        (Path(home) / '.claude').mkdir()
+        (Path(home) / '.claude' / '.sessions').write_text(json.dumps({
+            "aaa111": {"session_id": "real-1", "cwd": "/tmp", "timestamp": 0},
+            "bbb222": {"session_id": "real-2", "cwd": "/tmp", "timestamp": 0},
+        }))
+        resumed = []
+        stop_event = threading.Event()
+
+        def fake_resume(real_session_id, message, cwd):
+            resumed.append(real_session_id)
+            if len(resumed) == 2:
+                stop_event.set()
+            return True
+
+        pool = BotPool(TOKENS[:2])
+        with patch.dict(os.environ, {'HOME': home, 'TELEGRAM_API_BASE': api.base_url}), \
+             patch('telegram_listener.resume_claude_session', side_effect=fake_resume), \
+             patch.object(tracing, '_tracer', None):
+            listener = threading.Thread(
+                target=telegram_listener.run_pool_listener,
+                args=(pool, RoutingTable.single('4242'), logging.getLogger('test.pool'), stop_event, 1),
+                daemon=True,
+            )
+            listener.start()
+            api.inject_message('4242', 'aaa111:via first bot', token=TOKENS[0])
+            api.inject_message('4242', 'bbb222:via second bot', token=TOKENS[1])
+            listener.join(timeout=5)
+        pool.close()
+
+        assert not listener.is_alive()
+        # Each bot only sees its own updates, so both loops must have polled
+        assert sorted(resumed) == ['real-1', 'real-2']
+
+
+if __name__ == "__main__":
+    # Simple test runner
+    test_functions = [
+        test_ring_spreads_sessions_evenly,
+        test_adding_a_bot_moves_few_sessions,
+        test_regenerated_token_keeps_sessions,
+        test_rate_limiter,
+        test_shared_rate_limiter_spans_processes,
+        test_load_tokens,
+        test_hook_sends_through_session_bot,
+        test_listener_polls_every_bot,
+    ]
+
+    passed = 0
+    failed = 0
+
+    for test_func in test_functions:
+        try:
+            test_func()
+            print(f"✅ {test_func.__name__}")
+            passed += 1
+        except Exception as e:
+            print(f"❌ {test_func.__name__}: {e}")
+            failed += 1
+
+    print(f"\nResults: {passed} passed, {failed} failed")
+    sys.exit(0 if failed == 0 else 1)
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Tests for garbage collection of bridge state and logs: age policy, disk budget, log trimming, incremental scans.
+"""
+
+import sys
+import os
+import json
+import logging
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from unittest.mock import patch
+
+# Add the scripts directory to path for imports
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(TESTS_DIR, '..', 'scripts'))
+
+from claude_bridge import cleanup
+from claude_bridge.cleanup import Policy, collect
+import telegram_listener
+
+NOW = time.time()
+DAY = 24 * 60 * 60
+
+
+def write(path, data, age_days=0):
+    """Create a file with the given contents and mtime."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data if isinstance(data, bytes) else data.encode())
+    mtime = NOW - age_days * DAY
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+@contextmanager
+def home_with_project():
+    """A HOME whose .sessions has an old and a recent session in one project."""
+    with tempfile.TemporaryDirectory() as home:
+        root = Path(home)
+        project = root / 'api'
+        project.mkdir()
+        sessions = {
+            'old111': {'session_id': 'real-old', 'cwd': str(project), 'timestamp': int(NOW - 45 * DAY)},
+            'new111': {'session_id': 'real-new', 'cwd': str(project), 'timestamp': int(NOW)},
+        }
+        write(root / '.claude' / '.sessions', json.dumps(sessions))
+        with patch.dict(os.environ, {'HOME': home}):
+            yield root, project
+
+
+def test_age_policy_and_record_trimming():
+    """Test that expired files and records go, recent ones stay, and the report adds up."""
+    with home_with_project() as (home, project):
+        claude = home / '.claude'
+        write(claude / '.processed_messages', ''.join(f"{n}\n" for n in range(12000)))
+        write(project / 'logs' / 'stop.json', json.dumps([{'n': n} for n in range(1500)], indent=2))
+        old_chat = write(project / 'logs' / 'chat.json', '[]', age_days=40)
+        old_backup = write(claude / 'telegram_hook.log.3', 'x' * 1000, age_days=40)
+        new_backup = write(claude / 'telegram_hook.log.1', 'y' * 1000, age_days=1)
+
+        report = collect(Policy(budget_mb=1000))
+
+        assert list(json.loads((claude / '.sessions').read_text())) == ['new111']
+        lines = (claude / '.processed_messages').read_text().splitlines()
+        assert len(lines) == cleanup.PROCESSED_KEEP and lines[-1] == '11999', "Newest IDs kept"
+        events = json.loads((project / 'logs' / 'stop.json').read_text())
+        assert len(events) == cleanup.STOP_LOG_KEEP and events[-1] == {'n': 1499}
+        assert not old_chat.exists() and not old_backup.exists() and new_backup.exists()
+
+        assert report['files'] == 2
+        assert set(report['by_kind']) == {'sessions', 'processed', 'stop_log', 'chat_log', 'rotated_log'}
+        assert report['reclaimed'] == sum(report['by_kind'].values()) > 0
+        assert collect(Policy(budget_mb=1000))['reclaimed'] == 0, "A second pass has nothing left to do"
+
+
+def test_budget_evicts_oldest_first():
+    """Test that over budget the oldest files go first, and a dry run deletes nothing."""
+    with home_with_project() as (home, project):
+        inbox = project / '.telegram-inbox'
+        files = [write(inbox / f'sess{n}' / f'file{n}.bin', b'z' * 300_000, age_days=10 - n) for n in range(6)]
+        write(inbox / '.gitignore', '*\n')
+        write(home / '.claude' / '.attachments', json.dumps(
+            {f'uniq{n}': {'path': str(path), 'size': 300_000} for n, path in enumerate(files)}))
+        policy = Policy(budget_mb=1)
+
+        preview = collect(policy, dry_run=True)
+        assert all(path.exists() for path in files)
+        assert preview['dry_run'] and preview['files'] == 3
+
+        report = collect(policy)
+        assert [path.exists() for path in files] == [False, False, False, True, True, True]
+        assert not (inbox / 'sess0').exists(), "Emptied inbox directories are removed"
+        assert report['files'] == 3 and report['by_kind']['inbox'] == 900_000
+        assert report['total'] <= policy.budget
+        cache = json.loads((home / '.claude' / '.attachments').read_text())
+        assert sorted(cache) == ['uniq3', 'uniq4', 'uniq5'], "Cache entries of deleted files are dropped"
+        assert '🧹 Reclaimed' in cleanup.describe(report)
+
+
+def test_logs_trimmed_in_place_and_history_kept_longer():
+    """Test cutting append-only logs at a line boundary and the separate history age limit."""
+    with home_with_project() as (home, project):
+        trace = write(home / '.claude' / 'traces' / 'trace.jsonl',
+                      ''.join(json.dumps({'n': n, 'pad': 'p' * 80}) + '\n' for n in range(30000)))
+        inode = trace.stat().st_ino
+        history = home / '.claude' / 'history'
+        recent = write(history / time.strftime('%Y-%m', time.localtime(NOW - 60 * DAY)) / 'ts.col', b'\0' * 8, 60)
+        ancient = write(history / '2001-01' / 'ts.col', b'\0' * 8, age_days=400)
+        current = write(history / time.strftime('%Y-%m', time.localtime(NOW)) / 'ts.col', b'\0' * 8, 40)
+
+        collect(Policy(budget_mb=1000, log_mb=1))
+
+        assert trace.stat().st_ino == inode, "Writers keep appending to the same file"
+        assert trace.stat().st_size <= 1024 * 1024
+        lines = trace.read_text().splitlines()
+        assert json.loads(lines[0]) and json.loads(lines[-1])['n'] == 29999
+        assert recent.exists() and current.exists(), "History outlives the 30-day limit"
+        assert not ancient.parent.exists()
+
+
+def test_incremental_scan_and_listener_thread():
+    """Test that unchanged inbox directories are not listed again, and the listener's pass loop."""
+    with home_with_project() as (home, project):
+        for n in range(3):
+            write(project / '.telegram-inbox' / f'sess{n}' / 'a.log', 'log', age_days=1)
+        listed = []
+        real_iterdir = Path.iterdir
+
+        def spy(self):
+            if self.parent.name == '.telegram-inbox':
+                listed.append(self.name)
+            return real_iterdir(self)
+
+        with patch.object(Path, 'iterdir', spy):
+            collect(Policy(budget_mb=1000))
+            assert sorted(listed) == ['sess0', 'sess1', 'sess2']
+            del listed[:]
+            write(project / '.telegram-inbox' / 'sess1' / 'b.log', 'new')
+            collect(Policy(budget_mb=1000))
+            assert listed == ['sess1']
+
+        # The listener runs passes on its own thread until stopped
+        write(home / '.claude' / 'telegram_hook.log.2', 'x' * 5000, age_days=90)
+        before = telegram_listener.GC_RECLAIMED.value()
+        stop_event = threading.Event()
+        with patch.dict(os.environ, {'BRIDGE_GC_INTERVAL_HOURS': '1'}):
+            thread = threading.Thread(target=telegram_listener.run_cleanup,
+                                      args=(logging.getLogger('test.cleanup'), stop_event, 0.05))
+            thread.start()
+            deadline = time.monotonic() + 5
+            while telegram_listener.GC_RECLAIMED.value() == before and time.monotonic() < deadline:
+                time.sleep(0.02)
+            stop_event.set()
+            thread.join(timeout=5)
+        assert not thread.is_alive()
+        assert telegram_listener.GC_RECLAIMED.value() - before == 5000
+
+    # The listener's default interval is the module's, and 0 or empty disables the passes
+    with patch.dict(os.environ):
+        os.environ.pop('BRIDGE_GC_INTERVAL_HOURS', None)
+        assert cleanup.interval_hours() == cleanup.DEFAULT_INTERVAL_HOURS
+        for disabled in ('0', ''):
+            os.environ['BRIDGE_GC_INTERVAL_HOURS'] = disabled
+            assert cleanup.interval_hours() == 0
+
+
+if __name__ == "__main__":
+    # Simple test runner
+    test_functions = [
+        test_age_policy_and_record_trimming,
+        test_budget_evicts_oldest_first,
+        test_logs_trimmed_in_place_and_history_kept_longer,
+        test_incremental_scan_and_listener_thread,
+    ]
+
+    passed = 0
+    failed = 0
+
+    for test_func in test_functions:
+        try:
+            test_func()
+            print(f"✅ {test_func.__name__}")
+            passed += 1
+        except Exception as e:
+            print(f"❌ {test_func.__name__}: {e}")
+            failed += 1
+
+    print(f"\nResults: {passed} passed, {failed} failed")
+    sys.exit(0 if failed == 0 else 1)
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Tests for the bridge CLI and the shared core: dispatch, lazy command imports,
+parity with show-changes/show-telegram, session lookup and .env loading.
+"""
+
+import sys
+import os
+import io
+import json
+import subprocess
+import tempfile
+from contextlib import redirect_stderr, redirect_stdout
+from pathlib import Path
+from unittest.mock import patch
+
+# Add the scripts directory to path for imports
+SCRIPTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts')
+sys.path.insert(0, SCRIPTS_DIR)
+
+from claude_bridge import cli, env
+from claude_bridge.changes import classify
+from claude_bridge.sessions import describe, find_session
+from claude_bridge.transcript import TELEGRAM_PREFIX
+
+GIT = ['git', '-c', 'user.name=t', '-c', 'user.email=t@t']
+COMMAND_MODULES = sorted({target.split(':')[0] for target, _ in cli.COMMANDS.values()})
+
+
+def run(args, home):
+    """Run a script (or `-m claude_bridge`) from scripts/ with HOME pointed at `home`."""
+    return subprocess.run([sys.executable] + args, cwd=SCRIPTS_DIR, capture_output=True, text=True,
+                          env={**os.environ, 'HOME': str(home)}, timeout=30)
+
+
+def make_home(root):
+    """A ~/.claude with one session in a git repo that has an untracked file and a transcript."""
+    project = root / 'api'
+    project.mkdir()
+    subprocess.run(['git', 'init', '-q'], cwd=project, check=True)
+    (project / 'app.py').write_text('x = 1\n')
+    subprocess.run(['git', 'add', '.'], cwd=project, check=True)
+    subprocess.run(GIT + ['commit', '-qm', 'init'], cwd=project, check=True)
+    (project / 'new.py').write_text('y = 2\n')
+
+    transcript = root / 'abc123.jsonl'
+    records = [
+        {'type': 'user', 'message': {'role': 'user', 'content': 'typed in the terminal'}},
+        {'type': 'user', 'message': {'role': 'user', 'content': f'{TELEGRAM_PREFIX} run the tests'}},
+        {'type': 'assistant', 'message': {'role': 'assistant',
+                                          'content': [{'type': 'text', 'text': 'All 12 tests pass.'}]}},
+    ]
+    transcript.write_text(''.join(json.dumps(r) + '\n' for r in records))
+
+    (root / '.claude').mkdir()
+    sessions = {
+        'abc123': {'session_id': 'sess-full-1', 'cwd': str(project), 'timestamp': 200,
+                   'transcript_path': str(transcript)},
+        'def456': {'session_id': 'sess-full-2', 'cwd': str(root / 'web'), 'timestamp': 100},
+    }
+    (root / '.claude' / '.sessions').write_text(json.dumps(sessions))
+    return sessions
+
+
+def test_dispatcher_and_lazy_command_imports():
+    """Test help, unknown commands, and that each command imports only what it needs."""
+    out, err = io.StringIO(), io.StringIO()
+    with redirect_stdout(out), redirect_stderr(err):
+        assert cli.main(['--help']) == 0
+        assert cli.main([]) == 2
+        assert cli.main(['frobnicate']) == 2
+    for name in cli.COMMANDS:
+        assert f"  {name}" in out.getvalue()
+    assert '❌ Unknown command: frobnicate' in err.getvalue()
+
+    # The dispatcher imports no command module; a command imports its own and no other
+    probe = ("import sys; from claude_bridge import cli; before = set(sys.modules); "
+             "cli.resolve(sys.argv[1]); print(sorted(m for m in set(sys.modules) - before))")
+    dispatcher = ("import sys; from claude_bridge import cli; "
+                  "print(sorted(m for m in sys.modules if m in sys.argv[1:] or m.startswith('claude_bridge')))")
+    result = subprocess.run([sys.executable, '-c', dispatcher] + COMMAND_MODULES, cwd=SCRIPTS_DIR,
+                            capture_output=True, text=True, timeout=30)
+    assert result.stdout.strip() == "['claude_bridge', 'claude_bridge.cli']", result.stdout + result.stderr
+    for name in ('sessions', 'changes', 'transcript'):
+        result = subprocess.run([sys.executable, '-c', probe, name], cwd=SCRIPTS_DIR,
+                                capture_output=True, text=True, timeout=30)
+        loaded = set(eval(result.stdout))
+        assert cli.COMMANDS[name][0].split(':')[0] in loaded
+        assert not loaded & {'requests', 'urllib3', 'dotenv', 'telegram_listener', 'claude_bridge.history',
+                             'claude_bridge.archive', 'claude_bridge.metrics'}, (name, loaded)
+
+
+def test_commands_match_the_legacy_scripts():
+    """Test that `bridge changes`/`transcript` print exactly what show-changes/show-telegram print."""
+    with tempfile.TemporaryDirectory() as tmp:
+        home = Path(tmp)
+        make_home(home)
+
+        changes = run(['-m', 'claude_bridge', 'changes', 'abc123'], home)
+        assert changes.returncode == 0, changes.stderr
+        assert changes.stdout == run(['show-changes.py', 'abc123'], home).stdout
+        assert '📄 Untracked: new.py' in changes.stdout
+
+        transcript = run(['-m', 'claude_bridge', 'transcript', 'abc123'], home)
+        assert transcript.returncode == 0, transcript.stderr
+        assert transcript.stdout == run(['show-telegram.py', 'abc123'], home).stdout
+        assert run(['-m', 'claude_bridge', 'transcript', 'sess-full-1'], home).returncode == 0
+        assert '👤 You: run the tests' in transcript.stdout and 'typed in the terminal' not in transcript.stdout
+        assert '🤖 Claude: All 12 tests pass.' in transcript.stdout
+
+        sessions = run(['-m', 'claude_bridge', 'sessions'], home)
+        assert sessions.returncode == 0
+        assert sessions.stdout.splitlines()[0] == '📋 2 session(s):'
+        assert sessions.stdout.index('abc123: api') < sessions.stdout.index('def456: web')
+
+        missing = run(['-m', 'claude_bridge', 'changes', 'zzz999'], home)
+        assert missing.returncode == 1
+        assert '❌ Session zzz999 not found' in missing.stdout and 'abc123: api' in missing.stdout
+
+
+def test_session_lookup_and_change_classification():
+    """Test short ID, prefix and full ID lookup, and the shared porcelain status mapping."""
+    with tempfile.TemporaryDirectory() as tmp:
+        sessions = make_home(Path(tmp))
+
+    assert find_session(sessions, 'abc123') == ('abc123', sessions['abc123'])
+    assert find_session(sessions, 'sess-full-2') == ('def456', sessions['def456'])
+    assert find_session(sessions, 'nope00') == (None, None)
+    assert find_session({}, 'abc123') == (None, None)
+    assert describe(sessions).splitlines()[0].startswith('  abc123: api  (')
+
+    assert classify(' M') == ('✏️', 'modified')
+    assert classify('A ') == ('➕', 'added')
+    assert classify(' D') == ('➖', 'deleted')
+    assert classify('??') == ('📄', 'untracked')
+    assert classify('R ') == ('📝', 'changed')
+
+
+def test_listen_runs_the_listener_script():
+    """Test that `bridge listen` execs telegram_listener.py, so the stop/status aliases match it."""
+    with patch('os.execv') as execv:
+        cli.main(['listen', '--supervise'])
+    script = os.path.join(os.path.abspath(SCRIPTS_DIR), 'telegram_listener.py')
+    execv.assert_called_once_with(sys.executable, [sys.executable, script, '--supervise'])
+
+
+def test_env_file_parsing_never_overrides():
+    """Test the stdlib .env parser and that loading keeps variables already set, with or without dotenv."""
+    with tempfile.TemporaryDirectory() as tmp:
+        env_file = Path(tmp) / '.claude' / '.env'
+        env_file.parent.mkdir()
+        env_file.write_text(
+            '# Telegram settings\n'
+            'TELEGRAM_API="12:abc def"\n'
+            "export BRIDGE_TEST_CHAT='4242'\n"
+            'BRIDGE_TEST_MODE=batch  # inline comment\n'
+            '\n'
+        )
+        assert env.parse_env_file(env_file) == {
+            'TELEGRAM_API': '12:abc def', 'BRIDGE_TEST_CHAT': '4242', 'BRIDGE_TEST_MODE': 'batch'}
+
+        for dotenv_module in ('fallback', 'dotenv'):
+            modules = {'dotenv': None} if dotenv_module == 'fallback' else {}
+            with patch.dict(os.environ, {'TELEGRAM_API': 'from-shell'}), \
+                    patch.dict(sys.modules, modules), \
+                    patch('claude_bridge.env.claude_env_file', return_value=str(env_file)):
+                for key in ('BRIDGE_TEST_CHAT', 'BRIDGE_TEST_MODE'):
+                    os.environ.pop(key, None)
+                env.load_env()
+                assert os.environ['TELEGRAM_API'] == 'from-shell', dotenv_module
+                assert os.environ['BRIDGE_TEST_CHAT'] == '4242', dotenv_module
+                assert os.environ['BRIDGE_TEST_MODE'] == 'batch', dotenv_module
+
+
+if __name__ == "__main__":
+    # Simple test runner
+    test_functions = [
+        test_dispatcher_and_lazy_command_imports,
+        test_commands_match_the_legacy_scripts,
+        test_session_lookup_and_change_classification,
+        test_listen_runs_the_listener_script,
+        test_env_file_parsing_never_overrides,
+    ]
+
+    passed = 0
+    failed = 0
+
+    for test_func in test_functions:
+        try:
+            test_func()
+            print(f"✅ {test_func.__name__}")
+            passed += 1
+        except Exception as e:
+            print(f"❌ {test_func.__name__}: {e}")
+            failed += 1
+
+    print(f"\nResults: {passed} passed, {failed} failed")
+    sys.exit(0 if failed == 0 else 1)
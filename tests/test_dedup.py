@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Tests for skipping repeated Stop notifications and sending only what changed.
+"""
+
+import sys
+import os
+import json
+import logging
+import subprocess
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+# Add the scripts and benchmarks directories to path for imports
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(TESTS_DIR, '..', 'scripts'))
+sys.path.insert(0, os.path.join(TESTS_DIR, '..', 'benchmarks'))
+
+from fake_bot_api import FakeBotAPI
+from claude_bridge import tracing
+import stop
+
+CHAT_ID = '4242'
+
+
+def write_transcript(path, text):
+    entry = {"type": "assistant", "message": {"role": "assistant", "content": [{"type": "text", "text": text}]}}
+    path.write_text(json.dumps(entry) + '\n')
+
+
+class Bridge:
+    """A git project, transcript and HOME pointed at a fake Bot API."""
+
+    def __init__(self, env=None):
+        self.api = FakeBotAPI()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.home = Path(self.tmp.name)
+        (self.home / '.claude').mkdir()
+        (self.home / '.claude' / '.chat_id').write_text(CHAT_ID)
+        self.project = self.home / 'api'
+        self.project.mkdir()
+        subprocess.run(['git', 'init', '-q'], cwd=self.project, check=True)
+        self.transcript = self.home / 'transcript.jsonl'
+        self.env = dict(env or {})
+
+    def __enter__(self):
+        self.api.start()
+        self.patches = [
+            patch.dict(os.environ, dict(HOME=str(self.home), TELEGRAM_API='1:T',
+                                        TELEGRAM_API_BASE=self.api.base_url, **self.env)),
+            patch('stop.get_hook_logger', return_value=logging.getLogger('test.dedup')),
+            patch.object(tracing, '_tracer', None),
+        ]
+        for p in self.patches:
+            p.start()
+        return self
+
+    def __exit__(self, *exc):
+        for p in reversed(self.patches):
+            p.stop()
+        self.api.stop()
+        self.tmp.cleanup()
+
+    def stop_hook(self):
+        """Run one Stop notification; returns the texts sent by it."""
+        before = len(self.api.sent_messages)
+        stop.send_telegram_notification({'session_id': 'real-1', 'cwd': str(self.project),
+                                         'transcript_path': str(self.transcript)})
+        return [m['text'] for m in self.api.sent_messages[before:]]
+
+
+def test_unchanged_stop_is_skipped():
+    """Test that a second Stop with the same response and changes sends nothing."""
+    with Bridge() as bridge:
+        (bridge.project / 'app.py').write_text('print(1)\n')
+        write_transcript(bridge.transcript, 'Added **app.py**')
+
+        first = bridge.stop_hook()
+        assert len(first) == 1
+        assert 'app.py (untracked)' in first[0] and '<b>app.py</b>' in first[0]
+
+        assert bridge.stop_hook() == []
+        assert bridge.api.requests == [('sendMessage', 200)]
+
+
+def test_delta_contains_only_new_parts():
+    """Test that only a new response, or only newly changed files, are sent."""
+    with Bridge() as bridge:
+        (bridge.project / 'app.py').write_text('print(1)\n')
+        (bridge.project / 'lib.py').write_text('x = 1\n')
+        write_transcript(bridge.transcript, 'First answer')
+        bridge.stop_hook()
+
+        write_transcript(bridge.transcript, 'Second answer')
+        [text] = bridge.stop_hook()
+        assert 'Second answer' in text
+        assert 'changes:' not in text
+
+        # Editing a file that was already reported counts as new
+        (bridge.project / 'lib.py').write_text('x = 2  # longer now\n')
+        [text] = bridge.stop_hook()
+        assert '📂 <b>New changes:</b>\n📄 lib.py (untracked)' in text
+        assert 'app.py' not in text and 'Second answer' not in text
+        assert text.endswith(f"Reply: {stop.get_short_session_id('real-1', 'api')}:your message")
+
+
+def test_failed_send_and_opt_out_resend():
+    """Test that undelivered content is retried next time and BRIDGE_DEDUP=0 always sends."""
+    with Bridge() as bridge:
+        write_transcript(bridge.transcript, 'Done')
+        bridge.api.fail_next(3, status=502)
+        with patch('stop.time.sleep'):
+            assert bridge.stop_hook() == []
+        assert len(bridge.stop_hook()) == 1, "Nothing was recorded for the failed send"
+
+    with Bridge({'BRIDGE_DEDUP': '0'}) as bridge:
+        write_transcript(bridge.transcript, 'Done')
+        assert len(bridge.stop_hook()) == 1
+        assert len(bridge.stop_hook()) == 1
+
+
+def test_mapping_update_keeps_hashes_for_same_session():
+    """Test that re-registering keeps the sent hashes unless the short ID changes owner."""
+    sessions = {"abc123": {"session_id": "real-1", "cwd": "/p", "timestamp": 1, "sent": {"response": "x"}}}
+    stop.update_session_entry(sessions, "abc123", "real-1", "/p")
+    assert sessions["abc123"]["sent"] == {"response": "x"}
+    stop.update_session_entry(sessions, "abc123", "real-2", "/p")
+    assert "sent" not in sessions["abc123"]
+
+
+if __name__ == "__main__":
+    # Simple test runner
+    test_functions = [
+        test_unchanged_stop_is_skipped,
+        test_delta_contains_only_new_parts,
+        test_failed_send_and_opt_out_resend,
+        test_mapping_update_keeps_hashes_for_same_session,
+    ]
+
+    passed = 0
+    failed = 0
+
+    for test_func in test_functions:
+        try:
+            test_func()
+            print(f"✅ {test_func.__name__}")
+            passed += 1
+        except Exception as e:
+            print(f"❌ {test_func.__name__}: {e}")
+            failed += 1
+
+    print(f"\nResults: {passed} passed, {failed} failed")
+    sys.exit(0 if failed == 0 else 1)
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Tests for the fake Bot API server and the bridge talking to it over HTTP.
+"""
+
+import sys
+import os
+import logging
+import tempfile
+import threading
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+# Add the scripts and benchmarks directories to path for imports
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(TESTS_DIR, '..', 'scripts'))
+sys.path.insert(0, os.path.join(TESTS_DIR, '..', 'benchmarks'))
+
+from fake_bot_api import FakeBotAPI
+from claude_bridge import tracing
+from claude_bridge.routing import RoutingTable
+import stop
+import telegram_listener
+
+CHAT_ID = '4242'
+API_KEY = '123456:TEST'
+
+
+def bridge_env(api, home):
+    """Environment pointing the bridge at the fake server and a temp HOME."""
+    claude_dir = Path(home) / '.claude'
+    claude_dir.mkdir(parents=True, exist_ok=True)
+    (claude_dir / '.chat_id').write_text(CHAT_ID)
+    return {'HOME': home, 'TELEGRAM_API': API_KEY, 'TELEGRAM_API_BASE': api.base_url}
+
+
+def test_api_url_uses_configured_base():
+    """Test that TELEGRAM_API_BASE redirects both scripts, defaulting to Telegram."""
+    with patch.dict(os.environ, {'TELEGRAM_API_BASE': 'http://127.0.0.1:9/'}):
+        assert stop.telegram_api_url('T', 'getUpdates') == 'http://127.0.0.1:9/botT/getUpdates'
+        assert telegram_listener.telegram_api_url('T', 'sendMessage') == 'http://127.0.0.1:9/botT/sendMessage'
+    with patch.dict(os.environ):
+        os.environ.pop('TELEGRAM_API_BASE', None)
+        assert stop.telegram_api_url('T', 'getMe') == 'https://api.telegram.org/botT/getMe'
+
+
+def test_notification_delivered_with_retry():
+    """Test that the Stop hook sends over HTTP and retries an injected 5xx."""
+    with FakeBotAPI() as api, tempfile.TemporaryDirectory() as home:
+        api.fail_next(1, status=502)
+        project = Path(home) / 'my_project'
+        project.mkdir()
+
+        with patch.dict(os.environ, bridge_env(api, home)), \
+             patch('stop.get_hook_logger', return_value=logging.getLogger('test.hook')), \
+             patch.object(tracing, '_tracer', None), \
+             patch('stop.time.sleep'):
+            stop.send_telegram_notification({'session_id': 'abc', 'cwd': str(project)})
+
+        short_id = stop.generate_session_id('abc', 'my_project')
+        sent = api.wait_for_messages(1)
+        assert len(sent) == 1
+        assert f"Session {short_id}</b>" in sent[0]['text']
+        assert sent[0]['parse_mode'] == 'HTML'
+        assert api.requests == [('sendMessage', 502), ('sendMessage', 200)]
+
+
+def test_hook_picks_up_injected_reply():
+    """Test that check_for_telegram_reply finds a reply queued on the server."""
+    with FakeBotAPI() as api, tempfile.TemporaryDirectory() as home:
+        api.inject_message(CHAT_ID, 'abc123:ignore me, other session')
+        api.inject_message(CHAT_ID, 'def456:run the tests')
+
+        with patch.dict(os.environ, bridge_env(api, home)), \
+             patch.object(tracing, '_tracer', None):
+            assert stop.check_for_telegram_reply('def456') == 'run the tests'
+            # Marked as processed: not returned twice
+            assert stop.check_for_telegram_reply('def456') is None
+
+
+def test_listener_dispatches_replies():
+    """Test that the listener loop resumes the mapped session for an injected reply."""
+    with FakeBotAPI() as api, tempfile.TemporaryDirectory() as home:
+        env = bridge_env(api, home)
+        (Path(home) / '.claude' / '.sessions').write_text(
+            '{"abc123": {"session_id": "real-1", "cwd": "/tmp", "timestamp": 0}}'
+        )
+        resumed = []
+        stop_event = threading.Event()
+
+        def fake_resume(real_session_id, message, cwd):
+            resumed.append((real_session_id, message, cwd))
+            stop_event.set()
+            return True
+
+        with patch.dict(os.environ, env), \
+             patch('telegram_listener.resume_claude_session', side_effect=fake_resume), \
+             patch.object(tracing, '_tracer', None):
+            log = logging.getLogger('test.listener')
+            thread = threading.Thread(
+                target=telegram_listener.run_listener,
+                args=(API_KEY, RoutingTable.single(CHAT_ID), log, stop_event, 1),
+                daemon=True,
+            )
+            thread.start()
+            api.inject_message('999', 'abc123:wrong chat')
+            api.inject_message(CHAT_ID, 'abc123:continue please')
+            thread.join(timeout=5)
+
+        assert not thread.is_alive()
+        assert resumed == [('real-1', 'continue please', '/tmp')]
+
+
+def test_failing_update_does_not_replay_its_batch():
+    """Test that an update whose handler raises is logged and skipped, not refetched with its batch."""
+    with FakeBotAPI() as api, tempfile.TemporaryDirectory() as home:
+        (Path(home) / '.claude').mkdir()
+        (Path(home) / '.claude' / '.sessions').write_text(
+            '{"abc123": {"session_id": "real-1", "cwd": "/tmp", "timestamp": 0}}'
+        )
+        resumed = []
+
+        def fake_resume(real_session_id, message, cwd):
+            if message == 'poison':
+                raise RuntimeError('handler bug')
+            resumed.append(message)
+            return True
+
+        with patch.dict(os.environ, {'HOME': home, 'TELEGRAM_API_BASE': api.base_url}), \
+             patch('telegram_listener.resume_claude_session', side_effect=fake_resume), \
+             patch.object(tracing, '_tracer', None):
+            for text in ('one', 'poison', 'three'):
+                api.inject_message(CHAT_ID, f'abc123:{text}')
+            log = logging.getLogger('test.listener')
+            table = RoutingTable.single(CHAT_ID)
+            last_update_id = telegram_listener.poll_updates(API_KEY, table, 0, log, timeout=1)
+            assert last_update_id == 3
+            assert telegram_listener.poll_updates(API_KEY, table, last_update_id, log, timeout=1) == 3
+
+        assert resumed == ['one', 'three']
+
+
+def test_long_poll_wakes_on_inject():
+    """Test that getUpdates returns as soon as an update arrives, not at the timeout."""
+    with FakeBotAPI() as api:
+        threading.Timer(0.2, api.inject_message, args=(CHAT_ID, 'hello')).start()
+        start = time.monotonic()
+        status, payload = api.dispatch('getUpdates', {'timeout': '5'}, b'')
+        elapsed = time.monotonic() - start
+
+        assert status == 200
+        assert [u['message']['text'] for u in payload['result']] == ['hello']
+        assert elapsed < 2, f"Long poll took {elapsed:.2f}s"
+
+        # Asking for the next offset confirms (drops) the delivered update
+        next_offset = payload['result'][0]['update_id'] + 1
+        assert api.dispatch('getUpdates', {'offset': next_offset}, b'')[1]['result'] == []
+
+
+if __name__ == "__main__":
+    # Simple test runner
+    test_functions = [
+        test_api_url_uses_configured_base,
+        test_notification_delivered_with_retry,
+        test_hook_picks_up_injected_reply,
+        test_listener_dispatches_replies,
+        test_failing_update_does_not_replay_its_batch,
+        test_long_poll_wakes_on_inject,
+    ]
+
+    passed = 0
+    failed = 0
+
+    for test_func in test_functions:
+        try:
+            test_func()
+            print(f"✅ {test_func.__name__}")
+            passed += 1
+        except Exception as e:
+            print(f"❌ {test_func.__name__}: {e}")
+            failed += 1
+
+    print(f"\nResults: {passed} passed, {failed} failed")
+    sys.exit(0 if failed == 0 else 1)
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Tests for the columnar Stop event history: batched appends, torn writes, aggregates and the hook/CLI.
+"""
+
+import sys
+import os
+import json
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+# Add the scripts and benchmarks directories to path for imports
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+SCRIPTS_DIR = os.path.join(TESTS_DIR, '..', 'scripts')
+sys.path.insert(0, SCRIPTS_DIR)
+sys.path.insert(0, os.path.join(TESTS_DIR, '..', 'benchmarks'))
+
+from fake_bot_api import FakeBotAPI
+from claude_bridge import history
+from claude_bridge.history import append_events, compact, load, phase_percentiles, record, summary_by
+
+NOW = time.time()
+
+
+def event(n, project='api', outcome='sent', ts=None):
+    return {'ts': NOW - 3600 + n if ts is None else ts, 'session': f"s{n % 3}", 'project': project,
+            'outcome': outcome, 'total_ms': float(n), 'git_ms': 1.5, 'send_ms': 100.0 + n,
+            'msg_len': 200 + n, 'changes': 2, 'new_changes': 1, 'chats': 1}
+
+
+def test_events_are_appended_in_batches():
+    """Test that events stay in pending.jsonl until a full batch is moved into the columns."""
+    with tempfile.TemporaryDirectory() as root, patch.object(history, 'BATCH_SIZE', 4):
+        for n in range(10):
+            record(event(n), root)
+
+        partition = Path(root) / history.partition_of(NOW)
+        assert json.loads((partition / 'meta.json').read_text())['rows'] == 8
+        assert len((Path(root) / 'pending.jsonl').read_text().splitlines()) == 2
+        assert (partition / 'ts.col').stat().st_size == 8 * 8, "Fixed-width binary columns"
+        assert json.loads((partition / 'dict.json').read_text())['session'] == ['s0', 's1', 's2']
+
+        table = load(root)
+        assert len(table) == 10, "Queries include the pending tail"
+        assert list(table.columns['msg_len']) == list(range(200, 210))
+        assert [table.strings['session'][code] for code in table.columns['session']][:4] == ['s0', 's1', 's2', 's0']
+
+        assert compact(root) == 2
+        assert len(load(root)) == 10
+
+
+def test_torn_appends_and_interrupted_compaction():
+    """Test that bytes past the committed row count are ignored, and a batch is never applied twice."""
+    with tempfile.TemporaryDirectory() as root:
+        append_events([event(n) for n in range(5)], root)
+        partition = Path(root) / history.partition_of(NOW)
+        with open(partition / 'total_ms.col', 'ab') as f:
+            f.write(b'\x01\x02\x03')  # A crash mid-append
+
+        assert len(load(root)) == 5
+        append_events([event(5)], root)
+        assert list(load(root).columns['total_ms']) == [0.0, 1.0, 2.0, 3.0, 4.0, 5.0]
+
+        # Crash after the columns took a batch but before it was removed
+        for n in range(6, 8):
+            record(event(n), root)
+        pending = Path(root) / 'pending.jsonl'
+        os.replace(pending, Path(root) / 'compacting.jsonl')
+        history._compact_file(Path(root) / 'compacting.jsonl', Path(root))
+        (Path(root) / 'compacting.jsonl').write_bytes(b''.join(
+            json.dumps(event(n), separators=(',', ':')).encode() + b'\n' for n in range(6, 8)))
+        assert compact(root) == 2
+        assert len(load(root)) == 8
+
+
+def test_aggregates_and_time_ranges():
+    """Test per-group failure rates and percentiles, and month partition pruning."""
+    with tempfile.TemporaryDirectory() as root:
+        events = [event(n) for n in range(100)]
+        events += [event(n, project='web', outcome='failed' if n % 4 == 0 else 'sent') for n in range(100, 140)]
+        events += [event(n, project='old', ts=NOW - 120 * 86400) for n in range(10)]
+        append_events(events, root)
+        assert len(list(Path(root).glob('????-??'))) == 2
+
+        table = load(root, since=NOW - 30 * 86400)
+        assert len(table) == 140
+        by_project = summary_by(table, 'project')
+        assert list(by_project) == ['api', 'web'], "Largest group first"
+        assert by_project['api']['failure_rate'] == 0.0
+        assert by_project['web']['failed'] == 10 and by_project['web']['failure_rate'] == 0.25
+        assert by_project['api']['p50_ms'] == 49.5
+
+        api = table.where(table.equals('project', 'api'))
+        assert phase_percentiles(api)['send_ms']['max'] == 199.0
+        assert summary_by(load(root), 'month')[history.partition_of(NOW)]['events'] == 140
+        assert sum(s['events'] for s in summary_by(table, 'session').values()) == 140
+
+
+def test_stop_hook_records_and_cli_reports():
+    """Test that a real Stop hook run is recorded and shows up in the query CLI."""
+    with FakeBotAPI() as api, tempfile.TemporaryDirectory() as home:
+        (Path(home) / '.claude').mkdir()
+        (Path(home) / '.claude' / '.chat_id').write_text('4242')
+        project = Path(home) / 'api'
+        project.mkdir()
+        env = dict(os.environ, HOME=home, TELEGRAM_API='1:T', TELEGRAM_API_BASE=api.base_url)
+        for session in ('real-1', 'real-2'):
+            result = subprocess.run(
+                [sys.executable, os.path.join(SCRIPTS_DIR, 'stop.py')],
+                input=json.dumps({'session_id': session, 'cwd': str(project)}), cwd=str(project), env=env,
+                capture_output=True, text=True, timeout=30,
+            )
+            assert result.returncode == 0, result.stderr
+        assert len(api.sent_messages) == 2
+
+        [first, second] = load(Path(home) / '.claude' / 'history').columns['msg_len']
+        assert first == len(api.sent_messages[0]['text'])
+
+        query = [sys.executable, '-m', 'claude_bridge.history']
+        result = subprocess.run(query + ['summary', '--days', '1'], env=dict(env, PYTHONPATH=SCRIPTS_DIR),
+                                capture_output=True, text=True, timeout=30)
+        assert result.returncode == 0, result.stderr
+        line = next(line for line in result.stdout.splitlines() if line.startswith('api'))
+        assert line.split()[1:4] == ['2', '0', '0.0%']
+
+        result = subprocess.run(query + ['latency'], env=dict(env, PYTHONPATH=SCRIPTS_DIR),
+                                capture_output=True, text=True, timeout=30)
+        assert 'send' in result.stdout and 'git' in result.stdout
+
+
+if __name__ == "__main__":
+    # Simple test runner
+    test_functions = [
+        test_events_are_appended_in_batches,
+        test_torn_appends_and_interrupted_compaction,
+        test_aggregates_and_time_ranges,
+        test_stop_hook_records_and_cli_reports,
+    ]
+
+    passed = 0
+    failed = 0
+
+    for test_func in test_functions:
+        try:
+            test_func()
+            print(f"✅ {test_func.__name__}")
+            passed += 1
+        except Exception as e:
+            print(f"❌ {test_func.__name__}: {e}")
+            failed += 1
+
+    print(f"\nResults: {passed} passed, {failed} failed")
+    sys.exit(0 if failed == 0 else 1)
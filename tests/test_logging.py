@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Tests for structured, buffered and rotating bridge logs.
+"""
+
+import sys
+import os
+import json
+import logging
+import subprocess
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+# Add the scripts directory to path for imports
+SCRIPTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts')
+sys.path.insert(0, SCRIPTS_DIR)
+
+from claude_bridge.log import close_logger, get_logger, log_event
+
+
+def read_records(path):
+    return [json.loads(line) for line in Path(path).read_text().splitlines()]
+
+
+def test_json_records_with_fields():
+    """Test that events are written as JSON with structured fields."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "hook.log"
+        logger = get_logger("test_json", path)
+        try:
+            log_event(logger, "SEND", "Attempt 1/3", session="abc123", attempt=1)
+        finally:
+            close_logger(logger)
+
+        record = read_records(path)[0]
+        assert record["event"] == "SEND"
+        assert record["msg"] == "Attempt 1/3"
+        assert record["session"] == "abc123"
+        assert record["attempt"] == 1
+        assert record["level"] == "INFO"
+
+
+def test_one_handler_per_process():
+    """Test that repeated get_logger calls reuse the same open handler."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "hook.log"
+        first = get_logger("test_reuse", path)
+        second = get_logger("test_reuse", path)
+        try:
+            assert first is second
+            assert len(first.handlers) == 1
+            for i in range(5):
+                log_event(first, "SEND", f"line {i}")
+            stream = first.handlers[0].stream
+            log_event(first, "OK", "done")
+            assert first.handlers[0].stream is stream, "File should stay open between records"
+        finally:
+            close_logger(first)
+
+        assert len(read_records(path)) == 6
+
+
+def test_buffered_logger_flushes_on_warning():
+    """Test that buffered records are held until a warning or close."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "hook.log"
+        logger = get_logger("test_buffered", path, buffered=True)
+        try:
+            log_event(logger, "SEND", "Attempt 1/3")
+            assert not path.exists(), "INFO records should stay in memory"
+
+            log_event(logger, "HTTP_ERROR", "502", level=logging.WARNING)
+            assert [r["event"] for r in read_records(path)] == ["SEND", "HTTP_ERROR"]
+
+            log_event(logger, "OK", "sent")
+        finally:
+            close_logger(logger)
+
+        assert read_records(path)[-1]["event"] == "OK", "Close should flush the buffer"
+
+
+def test_size_rotation():
+    """Test that the log rotates once it exceeds its size budget."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "hook.log"
+        env = {"BRIDGE_LOG_MAX_MB": "0.001", "BRIDGE_LOG_BACKUPS": "2"}
+        with patch.dict(os.environ, env):
+            logger = get_logger("test_rotate", path)
+        try:
+            for i in range(50):
+                log_event(logger, "SEND", "x" * 100, attempt=i)
+        finally:
+            close_logger(logger)
+
+        assert Path(f"{path}.1").exists(), "Should rotate to .1"
+        assert not Path(f"{path}.3").exists(), "Should keep only 2 backups"
+        assert path.stat().st_size <= 1100
+
+
+def test_processes_share_one_rotating_log():
+    """Test that hooks writing and rotating the same log at once lose no records and never overfill a file."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "hook.log"
+        script = (
+            "import sys\n"
+            f"sys.path.insert(0, {os.path.abspath(SCRIPTS_DIR)!r})\n"
+            "from claude_bridge.log import close_logger, get_logger, log_event\n"
+            "logger = get_logger('hook', sys.argv[1])\n"
+            "for i in range(150):\n"
+            "    log_event(logger, 'SEND', 'x' * 100, writer=sys.argv[2], attempt=i)\n"
+            "close_logger(logger)\n"
+        )
+        env = dict(os.environ, BRIDGE_LOG_MAX_MB="0.01", BRIDGE_LOG_BACKUPS="100", BRIDGE_LOG_ROTATE="size")
+        procs = [subprocess.Popen([sys.executable, '-c', script, str(path), str(n)], env=env) for n in range(4)]
+        assert all(proc.wait(timeout=60) == 0 for proc in procs)
+
+        files = [path] + sorted(path.parent.glob("hook.log.[0-9]*"))
+        records = [record for log in files for record in read_records(log)]
+        assert len(records) == 600, "Every record lands in a file"
+        assert all(log.stat().st_size <= 0.01 * 1024 * 1024 for log in files)
+        assert len(files) > 5
+
+
+def test_time_rotation():
+    """Test that a record from a new period starts a new file."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "hook.log"
+        with patch.dict(os.environ, {"BRIDGE_LOG_ROTATE": "time", "BRIDGE_LOG_WHEN": "H"}):
+            logger = get_logger("test_time_rotate", path)
+        try:
+            log_event(logger, "SEND", "first")
+            os.utime(path, (path.stat().st_atime, path.stat().st_mtime - 2 * 3600))
+            log_event(logger, "SEND", "second")
+            log_event(logger, "SEND", "third")
+        finally:
+            close_logger(logger)
+
+        assert [r["msg"] for r in read_records(f"{path}.1")] == ["first"]
+        assert [r["msg"] for r in read_records(path)] == ["second", "third"]
+
+
+def test_async_logger():
+    """Test that the async handler writes records from a background thread."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "listener.log"
+        logger = get_logger("test_async", path, async_io=True)
+        log_event(logger, "REPLY", "Got reply", session="abc123")
+        close_logger(logger)  # Drains the queue, as at process exit
+
+        record = read_records(path)[0]
+        assert record["event"] == "REPLY"
+        assert record["session"] == "abc123", "Fields should survive the queue"
+
+
+if __name__ == "__main__":
+    # Simple test runner
+    test_functions = [
+        test_json_records_with_fields,
+        test_one_handler_per_process,
+        test_buffered_logger_flushes_on_warning,
+        test_size_rotation,
+        test_processes_share_one_rotating_log,
+        test_time_rotation,
+        test_async_logger,
+    ]
+
+    passed = 0
+    failed = 0
+
+    for test_func in test_functions:
+        try:
+            test_func()
+            print(f"✅ {test_func.__name__}")
+            passed += 1
+        except Exception as e:
+            print(f"❌ {test_func.__name__}: {e}")
+            failed += 1
+
+    print(f"\nResults: {passed} passed, {failed} failed")
+    sys.exit(0 if failed == 0 else 1)
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Tests for the metrics registry, its Prometheus endpoint and the Stop hook push.
+"""
+
+import sys
+import os
+import json
+import logging
+import subprocess
+import tempfile
+import threading
+import urllib.error
+import urllib.request
+from unittest.mock import patch
+
+# Add the scripts directory to path for imports
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+SCRIPTS_DIR = os.path.join(TESTS_DIR, '..', 'scripts')
+sys.path.insert(0, SCRIPTS_DIR)
+
+from claude_bridge import tracing
+from claude_bridge.metrics import MetricsServer, Registry, push
+from claude_bridge.routing import RoutingTable
+import telegram_listener
+
+
+def sample(text, line_start):
+    """Value of the exposition line starting with line_start."""
+    for line in text.splitlines():
+        if line.startswith(line_start + ' '):
+            return float(line.rsplit(' ', 1)[1])
+    raise AssertionError(f"{line_start} not in output")
+
+
+def test_render_prometheus_text():
+    """Test HELP/TYPE headers, label escaping and cumulative histogram buckets."""
+    registry = Registry()
+    messages = registry.counter('bridge_messages_total', 'Incoming messages', ['kind'])
+    messages.inc(kind='targeted')
+    messages.inc(2, kind='say "hi"\n')
+    latency = registry.histogram('bridge_resume_seconds', 'Resume time', ['mode'], buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        latency.observe(value, mode='cold')
+    registry.gauge('bridge_queue', 'Queue depth', fn=lambda: 7)
+
+    text = registry.render()
+    assert '# HELP bridge_messages_total Incoming messages\n# TYPE bridge_messages_total counter' in text
+    assert 'bridge_messages_total{kind="targeted"} 1' in text
+    assert 'bridge_messages_total{kind="say \\"hi\\"\\n"} 2' in text
+    assert sample(text, 'bridge_resume_seconds_bucket{mode="cold",le="0.1"}') == 2
+    assert sample(text, 'bridge_resume_seconds_bucket{mode="cold",le="1"}') == 3
+    assert sample(text, 'bridge_resume_seconds_bucket{mode="cold",le="+Inf"}') == 4
+    assert sample(text, 'bridge_resume_seconds_sum{mode="cold"}') == 3.65
+    assert sample(text, 'bridge_resume_seconds_count{mode="cold"}') == 4
+    assert sample(text, 'bridge_queue') == 7
+
+    assert registry.counter('bridge_messages_total', 'again', ['kind']) is messages
+    try:
+        messages.inc(project='x')
+        assert False, "Wrong labels must be rejected"
+    except ValueError:
+        pass
+
+
+def test_concurrent_recording():
+    """Test that increments from many threads are not lost."""
+    registry = Registry()
+    updates = registry.counter('bridge_updates_total', 'Updates')
+    poll = registry.histogram('bridge_poll_seconds', 'Poll')
+
+    def work():
+        for _ in range(2000):
+            updates.inc()
+            poll.observe(0.2)
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert updates.value() == 16000
+    assert poll.count() == 16000
+
+
+def test_endpoint_serves_metrics_and_hook_pushes():
+    """Test GET /metrics and a Stop hook run pushed by the real script."""
+    registry = Registry()
+    registry.counter('bridge_updates_total', 'Updates').inc(3)
+    with MetricsServer(registry, port=0) as server, tempfile.TemporaryDirectory() as home:
+        with urllib.request.urlopen(server.url + '/metrics') as resp:
+            assert resp.headers['Content-Type'].startswith('text/plain; version=0.0.4')
+            assert sample(resp.read().decode(), 'bridge_updates_total') == 3
+
+        # The hook exits early without a bot token, but still reports its phases
+        port = server.url.rsplit(':', 1)[1]
+        env = {k: v for k, v in os.environ.items() if not k.startswith('TELEGRAM')}
+        env.update(HOME=home, BRIDGE_METRICS_PORT=port)
+        result = subprocess.run(
+            [sys.executable, os.path.join(SCRIPTS_DIR, 'stop.py')],
+            input=json.dumps({'session_id': 'abc', 'cwd': home}), cwd=home, env=env,
+            capture_output=True, text=True, timeout=30,
+        )
+        assert result.returncode == 0, result.stderr
+
+        text = registry.render()
+        assert sample(text, 'bridge_hook_runs_total{status="ok"}') == 1
+        assert sample(text, 'bridge_hook_phase_seconds_count{phase="hook"}') == 1
+
+        # Bad pushes are refused, and pushing never raises in the hook
+        request = urllib.request.Request(server.url + '/push', data=b'[1, 2]')
+        try:
+            urllib.request.urlopen(request)
+            assert False, "A non-object payload must be refused"
+        except urllib.error.HTTPError as e:
+            assert e.code == 400
+    assert push([{'name': 'hook', 'dur_ms': 1.0}], url='http://127.0.0.1:9/push', timeout=0.2) is False
+
+
+def test_listener_records_messages():
+    """Test that handle_update counts updates by outcome and times resumes."""
+    sessions = {"aaa111": {"session_id": "real-1", "cwd": "/srv/api", "timestamp": 0}}
+    before = {kind: telegram_listener.MESSAGES.value(kind=kind) for kind in ('targeted', 'ignored', 'unrouted')}
+    updates_before = telegram_listener.UPDATES.value()
+    cold_before = telegram_listener.RESUME_SECONDS.count(mode='cold')
+    with patch('telegram_listener.load_session_mapping', return_value=sessions), \
+         patch('telegram_listener.subprocess.Popen'), \
+         patch('telegram_listener.get_listener_logger', return_value=logging.getLogger('test.metrics')), \
+         patch.object(tracing, '_tracer', None):
+        routes = RoutingTable.single('111')
+        log = logging.getLogger('test.metrics')
+        for chat_id, text in (('111', 'aaa111: go'), ('111', 'hello'), ('999', 'aaa111: go')):
+            update = {"update_id": 1, "message": {"chat": {"id": int(chat_id)}, "text": text}}
+            telegram_listener.handle_update(update, routes, log)
+
+    assert telegram_listener.UPDATES.value() - updates_before == 3
+    for kind in before:
+        assert telegram_listener.MESSAGES.value(kind=kind) - before[kind] == 1, kind
+    assert telegram_listener.RESUME_SECONDS.count(mode='cold') - cold_before == 1
+    assert telegram_listener.SESSIONS_LOADED.value() == 1
+
+
+if __name__ == "__main__":
+    # Simple test runner
+    test_functions = [
+        test_render_prometheus_text,
+        test_concurrent_recording,
+        test_endpoint_serves_metrics_and_hook_pushes,
+        test_listener_records_messages,
+    ]
+
+    passed = 0
+    failed = 0
+
+    for test_func in test_functions:
+        try:
+            test_func()
+            print(f"✅ {test_func.__name__}")
+            passed += 1
+        except Exception as e:
+            print(f"❌ {test_func.__name__}: {e}")
+            failed += 1
+
+    print(f"\nResults: {passed} passed, {failed} failed")
+    sys.exit(0 if failed == 0 else 1)
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+Tests for the /changes and /transcript commands: pagination, Prev/Next editing and the render cache.
+"""
+
+import sys
+import os
+import json
+import logging
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from unittest.mock import patch
+
+# Add the scripts and benchmarks directories to path for imports
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+SCRIPTS_DIR = os.path.join(TESTS_DIR, '..', 'scripts')
+sys.path.insert(0, SCRIPTS_DIR)
+sys.path.insert(0, os.path.join(TESTS_DIR, '..', 'benchmarks'))
+
+from fake_bot_api import FakeBotAPI
+from claude_bridge.actions import RepeatFilter
+from claude_bridge import changes, tracing
+from claude_bridge.pages import Pager, paginate, parse_page, show
+from claude_bridge.routing import Route, RoutingTable
+from claude_bridge.transcript import parse_exchanges
+import telegram_listener
+
+CHAT = "4242"
+OTHER_CHAT = "5555"
+ROUTES = RoutingTable([Route(CHAT, projects=('api',)), Route(OTHER_CHAT, projects=('web',))])
+GIT = ['git', '-c', 'user.name=t', '-c', 'user.email=t@t']
+
+
+@contextmanager
+def bridge(api, page_size=400):
+    """An 'api' session in a git repo, a small-page pager, and notices recorded as real sent messages."""
+    with tempfile.TemporaryDirectory() as home:
+        root = Path(home)
+        project = root / 'api'
+        project.mkdir()
+        for args in (['init', '-q'], ['commit', '-q', '--allow-empty', '-m', 'init']):
+            subprocess.run(GIT + args, cwd=project, capture_output=True, check=True)
+        transcript = root / 'transcript.jsonl'
+        transcript.write_text('')
+        sessions = {"abc123": {"session_id": "real-1", "cwd": str(project), "timestamp": int(time.time()),
+                               "transcript_path": str(transcript)}}
+        (root / '.claude').mkdir()
+        (root / '.claude' / '.sessions').write_text(json.dumps(sessions))
+
+        def notify(chat_id, text, api_key=None, **params):
+            api.send_message(dict(params, chat_id=chat_id, text=text))
+
+        pool = ThreadPoolExecutor(max_workers=1)
+        with patch.dict(os.environ, {'HOME': home, 'TELEGRAM_API_BASE': api.base_url}), \
+             patch.object(telegram_listener, 'action_pool', pool), \
+             patch.object(telegram_listener, 'pager', Pager(size=page_size)), \
+             patch.object(telegram_listener, 'repeats', RepeatFilter()), \
+             patch('telegram_listener.notify_chat', side_effect=notify), \
+             patch.object(tracing, '_tracer', None):
+            yield {'project': project, 'transcript': transcript, 'pool': pool}
+            pool.shutdown(wait=True)
+
+
+def settle(calls):
+    """Wait for queued renders and edits."""
+    calls['pool'].submit(lambda: None).result(timeout=10)
+
+
+def handle(api, text, chat=CHAT):
+    api.inject_message(chat, text)
+    telegram_listener.handle_update(api.get_updates({})[-1], ROUTES, logging.getLogger('test.pages'), '1:T')
+
+
+def press(api, button, chat=CHAT):
+    """Press an inline button of the latest sent message."""
+    message = api.sent_messages[-1]
+    api.inject_callback(chat, button['callback_data'], message_id=message['message_id'])
+    telegram_listener.handle_update(api.get_updates({})[-1], ROUTES, logging.getLogger('test.pages'), '1:T')
+
+
+def buttons(message):
+    markup = message.get('reply_markup') or {'inline_keyboard': [[]]}
+    return {button['text']: button for button in markup['inline_keyboard'][0]}
+
+
+def test_pagination_and_buttons():
+    """Test page splitting at line boundaries, overlong lines, and the Prev/Next keyboard."""
+    text = '\n'.join(f"line {n:03d}" for n in range(100)) + '\n' + 'x' * 250
+    pages = paginate(text, size=100)
+    assert all(len(page) <= 100 for page in pages)
+    assert ''.join(pages).replace('\n', '') == text.replace('\n', ''), "Nothing is lost"
+    assert pages[0].splitlines()[-1] == 'line 010' and pages[1].startswith('line 011')
+    assert pages[-3:] == ['x' * 100, 'x' * 100, 'x' * 50]
+    assert paginate('') == ['(empty)']
+
+    assert show(['only'], 'changes', 'abc123', 0) == ('only', None)
+    text, markup = show(pages, 'changes_full', 'abc123', 99)
+    assert text.endswith(f"— page {len(pages)}/{len(pages)} —"), "Out-of-range pages are clamped"
+    assert show(pages, 'changes_full', 'abc123', -1) == (text, markup), "Negative indexes count from the end"
+    [prev] = markup['inline_keyboard'][0]
+    assert prev['text'] == '◀️ Prev'
+    assert parse_page(prev['callback_data']) == ('page', 'abc123', ('changes_full', len(pages) - 2))
+    assert parse_page('pgx:abc123:1') is None and parse_page('go:abc123') is None
+
+
+def test_changes_command_pages_from_cache():
+    """Test /changes --full paging edits the message in place without re-rendering until the index changes."""
+    with FakeBotAPI() as api, bridge(api) as calls:
+        project = calls['project']
+        for n in range(3):
+            (project / f"mod{n}.py").write_text(''.join(f"value_{i} = {i}\n" for i in range(30)))
+        subprocess.run(GIT + ['add', '.'], cwd=project, capture_output=True, check=True)
+        subprocess.run(GIT + ['commit', '-qm', 'files'], cwd=project, capture_output=True, check=True)
+        for n in range(3):
+            (project / f"mod{n}.py").write_text(''.join(f"value_{i} = {i * 2}\n" for i in range(30)))
+
+        with patch('claude_bridge.changes.subprocess.run', wraps=subprocess.run) as git:
+            handle(api, '/changes@fake_bot abc123 --full')
+            settle(calls)
+            runs = git.call_count
+            assert runs > 0
+
+            first = api.sent_messages[-1]
+            assert first['text'].startswith('🔍 Git Changes for Session abc123')
+            assert set(buttons(first)) == {'Next ▶️'}
+            count = int(first['text'].rsplit('/', 1)[1].split()[0])
+            assert count > 2
+
+            press(api, buttons(first)['Next ▶️'])
+            settle(calls)
+            assert api.callback_answers[-1]['text'] is None, "Paging answers without a toast"
+            message_id, text = api.edits[-1]
+            assert message_id == first['message_id'] and text.endswith(f"— page 2/{count} —")
+            press(api, {'callback_data': f"pgf:abc123:{count - 1}"})
+            settle(calls)
+            assert api.edits[-1][1].endswith(f"— page {count}/{count} —")
+            assert git.call_count == runs + 2, "Pages come from the cache after one status check each"
+            runs = git.call_count
+
+            subprocess.run(GIT + ['add', 'mod0.py'], cwd=project, capture_output=True, check=True)
+            press(api, {'callback_data': 'pgf:abc123:0'})
+            settle(calls)
+            assert git.call_count > runs + 1, "A new index state renders again"
+        assert len(api.sent_messages) == 1
+
+
+def test_unstaged_and_untracked_changes_render_again():
+    """Test that edits and new files made after a render are not hidden by the cache."""
+    with FakeBotAPI() as api, bridge(api, page_size=4000) as calls:
+        project = calls['project']
+        for name in ('a.py', 'b.py'):
+            (project / name).write_text('x = 1\n')
+        subprocess.run(GIT + ['add', '.'], cwd=project, capture_output=True, check=True)
+        subprocess.run(GIT + ['commit', '-qm', 'files'], cwd=project, capture_output=True, check=True)
+        (project / 'a.py').write_text('x = 2\n')
+
+        handle(api, '/changes abc123')
+        settle(calls)
+        assert 'a.py' in api.sent_messages[-1]['text'] and 'b.py' not in api.sent_messages[-1]['text']
+
+        (project / 'b.py').write_text('x = 3\n')
+        (project / 'newfile').write_text('new\n')
+        handle(api, '/changes abc123')
+        settle(calls)
+        text = api.sent_messages[-1]['text']
+        assert 'Modified: b.py' in text and 'Untracked: newfile' in text
+
+        # A file already listed as modified, edited again, renders its new diff
+        handle(api, '/changes abc123 --full')
+        settle(calls)
+        (project / 'b.py').write_text('x = 33333\n')
+        handle(api, '/changes abc123 --full')
+        settle(calls)
+        assert '+x = 33333' in api.sent_messages[-1]['text']
+
+
+def test_transcript_command_parses_only_new_lines():
+    """Test /transcript pages, and that growth is parsed from the cached offset."""
+    def exchange(n):
+        return (json.dumps({'type': 'user', 'message': {'content': f"User replied via Telegram: question {n}"}}) + '\n'
+                + json.dumps({'type': 'assistant', 'message': {'content': [{'type': 'text', 'text': f"answer {n} " * 8}]}})
+                + '\n')
+
+    with FakeBotAPI() as api, bridge(api, page_size=200) as calls:
+        transcript = calls['transcript']
+        transcript.write_text(json.dumps({'type': 'user', 'message': {'content': 'terminal only'}}) + '\n'
+                              + ''.join(exchange(n) for n in range(6)))
+
+        with patch('claude_bridge.transcript.parse_exchanges', wraps=parse_exchanges) as parse:
+            handle(api, '/transcript abc123')
+            settle(calls)
+            first = api.sent_messages[-1]
+            assert first['text'].startswith('📱 Telegram Session: abc123')
+            assert '👤 You: question 0' in first['text'] and 'terminal only' not in first['text']
+
+            press(api, buttons(first)['Next ▶️'])
+            settle(calls)
+            assert parse.call_count == 1, "Paging reuses the parsed transcript"
+
+            size = transcript.stat().st_size
+            with open(transcript, 'a') as f:
+                f.write(exchange(6))
+            handle(api, '/transcript abc123')
+            settle(calls)
+            assert parse.call_count == 2 and parse.call_args[0][1] == size, "Only appended bytes are parsed"
+            last = api.sent_messages[-1]
+            pages = int(last['text'].rsplit('/', 1)[1].split()[0])
+            press(api, {'callback_data': f"pgt:abc123:{pages - 1}"})
+            settle(calls)
+            assert 'question 6' in api.edits[-1][1]
+
+
+def test_command_errors_and_cli_share_the_renderer():
+    """Test usage and routing errors, and that show-changes prints the same report."""
+    with FakeBotAPI() as api, bridge(api) as calls:
+        handle(api, '/changes')
+        handle(api, '/transcript abc123 --full')
+        handle(api, '/changes fff999')
+        handle(api, '/changes abc123', chat=OTHER_CHAT)
+        settle(calls)
+        assert [m['text'] for m in api.sent_messages] == [
+            telegram_listener.COMMAND_USAGE, telegram_listener.COMMAND_USAGE,
+            '❓ fff999: session not found', '⛔ abc123: not routed to this chat']
+
+        handle(api, '/changes abc123')
+        settle(calls)
+        session = json.loads((Path.home() / '.claude' / '.sessions').read_text())['abc123']
+        assert api.sent_messages[-1]['text'] == changes.report('abc123', session)
+        assert '📦 ' in api.sent_messages[-1]['text'] and ': init' in api.sent_messages[-1]['text']
+
+        (calls['project'] / 'new.py').write_text('x = 1\n')
+        result = subprocess.run([sys.executable, os.path.join(SCRIPTS_DIR, 'show-changes.py'), 'abc123'],
+                                capture_output=True, text=True, timeout=30)
+        assert result.returncode == 0, result.stderr
+        assert result.stdout.startswith('🔍 Git Changes for Session abc123\n📁 Project: api\n')
+        assert '📄 Untracked: new.py' in result.stdout
+
+
+if __name__ == "__main__":
+    # Simple test runner
+    test_functions = [
+        test_pagination_and_buttons,
+        test_changes_command_pages_from_cache,
+        test_unstaged_and_untracked_changes_render_again,
+        test_transcript_command_parses_only_new_lines,
+        test_command_errors_and_cli_share_the_renderer,
+    ]
+
+    passed = 0
+    failed = 0
+
+    for test_func in test_functions:
+        try:
+            test_func()
+            print(f"✅ {test_func.__name__}")
+            passed += 1
+        except Exception as e:
+            print(f"❌ {test_func.__name__}: {e}")
+            failed += 1
+
+    print(f"\nResults: {passed} passed, {failed} failed")
+    sys.exit(0 if failed == 0 else 1)
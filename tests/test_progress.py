@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Tests for live progress messages: transcript tailing, watchers, debounced edits.
+"""
+
+import sys
+import os
+import json
+import tempfile
+import threading
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+import requests
+
+# Add the scripts and benchmarks directories to path for imports
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(TESTS_DIR, '..', 'scripts'))
+sys.path.insert(0, os.path.join(TESTS_DIR, '..', 'benchmarks'))
+
+from claude_bridge.progress import (
+    PollingWatcher, ProgressTracker, TranscriptTail, make_watcher,
+)
+from claude_bridge.routing import RoutingTable
+from fake_bot_api import FakeBotAPI
+import stop
+
+TOKEN = '1001:AAA'
+
+
+def user(text):
+    return {'type': 'user', 'message': {'role': 'user', 'content': text}}
+
+
+def assistant(text):
+    return {'type': 'assistant', 'message': {'role': 'assistant', 'content': [{'type': 'text', 'text': text}]}}
+
+
+def tool_call():
+    return {'type': 'assistant', 'message': {'role': 'assistant', 'content': [
+        {'type': 'tool_use', 'id': 't1', 'name': 'Bash', 'input': {'command': 'make'}}]}}
+
+
+def append(path, *records):
+    with open(path, 'a') as f:
+        for record in records:
+            f.write(json.dumps(record) + '\n')
+
+
+def write_sessions(home, transcript):
+    claude_dir = Path(home) / '.claude'
+    claude_dir.mkdir(exist_ok=True)
+    sessions_file = claude_dir / '.sessions'
+    sessions_file.write_text(json.dumps({"abc123": {
+        "session_id": "real-1", "cwd": "/work/api", "timestamp": int(time.time()),
+        "transcript_path": str(transcript),
+    }}))
+    return sessions_file
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_hook_records_transcript_path():
+    """Test that the Stop hook stores the transcript path the listener follows."""
+    with tempfile.TemporaryDirectory() as home:
+        (Path(home) / '.claude').mkdir()
+        with patch.dict(os.environ, {'HOME': home}):
+            short_id = stop.register_session('real-1', 'api', '/work/api', '/t/real-1.jsonl')
+            assert stop.load_sessions()[short_id]['transcript_path'] == '/t/real-1.jsonl'
+
+
+def test_tail_returns_only_new_complete_records():
+    """Test incremental reads, partial lines and truncation."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'session.jsonl'
+        append(path, user('old prompt'))
+        tail = TranscriptTail(path)
+
+        assert tail.read_new() == []
+        append(path, assistant('first'))
+        with open(path, 'a') as f:
+            f.write('{"type": "assistant", "mess')  # Still being written
+        assert [r['message']['content'][0]['text'] for r in tail.read_new()] == ['first']
+
+        with open(path, 'a') as f:
+            f.write('age": {"content": "second"}}\n')
+        assert tail.read_new()[0]['message']['content'] == 'second'
+
+        path.write_text(json.dumps(user('replaced')) + '\n')
+        assert tail.read_new() == [user('replaced')]
+
+
+def test_watchers_report_appends():
+    """Test that inotify (where available) and polling both notice appends."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'session.jsonl'
+        path.write_text('')
+        for watcher in (make_watcher(), PollingWatcher(poll_interval=0.01)):
+            watcher.add(path)
+            assert path in watcher
+            assert watcher.wait(0.05) == set()
+            threading.Timer(0.1, append, args=(path, assistant('hi'))).start()
+            assert watcher.wait(2) == {str(path)}
+            watcher.close()
+
+
+def test_debounced_and_diffed_edits():
+    """Test one message per turn, edits at most once per interval, nothing unchanged re-sent."""
+    calls = []
+
+    def post(token, method, payload):
+        calls.append((method, payload['text']))
+        return 200, {'ok': True, 'result': {'message_id': 7}}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        transcript = Path(tmp) / 'real-1.jsonl'
+        append(transcript, user('earlier turn'), assistant('earlier answer'))
+        clock = FakeClock()
+        tracker = ProgressTracker(post, lambda short_id: TOKEN, RoutingTable.single('4242'),
+                                  sessions_file=write_sessions(tmp, transcript), interval=3.0,
+                                  watcher=PollingWatcher(), clock=clock)
+        tracker.refresh()
+        path = str(transcript)
+
+        def step(*records, advance=0.0):
+            append(transcript, *records)
+            clock.now += advance
+            tracker.on_change(path)
+            tracker.flush()
+
+        step(user('build it'))
+        assert calls == [], "Old output is not replayed and a prompt alone sends nothing"
+
+        step(assistant('Starting the build'))
+        step(assistant('Compiling'), tool_call(), advance=1.0)      # Debounced
+        step(assistant('Linking'), advance=1.0)                     # Still debounced
+        step(tool_call(), advance=1.5)                              # Due: latest text goes out
+        step(tool_call(), advance=5.0)                              # No new text: nothing sent
+        step(assistant('Linking'), advance=5.0)                     # Same text: nothing sent
+
+        assert [method for method, _ in calls] == ['sendMessage', 'editMessageText']
+        assert 'Starting the build' in calls[0][1] and 'Linking' in calls[1][1]
+        assert calls[0][1].startswith('⏳ <b>Session abc123</b> (api)')
+
+        step(user('now deploy'), assistant('Deploying'), advance=5.0)
+        assert calls[-1][0] == 'sendMessage', "A new turn starts a new progress message"
+        assert tracker.sent == 2 and tracker.edits == 1
+
+
+def test_tracker_edits_message_over_http():
+    """Test the tracker end to end against the fake Bot API with inotify/polling."""
+    with FakeBotAPI() as api, tempfile.TemporaryDirectory() as tmp:
+        transcript = Path(tmp) / 'real-1.jsonl'
+        transcript.write_text('')
+        http = requests.Session()
+
+        def post(token, method, payload):
+            resp = http.post(f"{api.base_url}/bot{token}/{method}", json=payload, timeout=5)
+            return resp.status_code, resp.json()
+
+        tracker = ProgressTracker(post, lambda short_id: TOKEN, RoutingTable.single('4242'),
+                                  sessions_file=write_sessions(tmp, transcript), interval=0.1)
+        stop_event = threading.Event()
+        thread = threading.Thread(target=tracker.run, args=(stop_event,), daemon=True)
+        thread.start()
+        time.sleep(0.2)
+
+        append(transcript, user('go'), assistant('step 1'))
+        api.wait_for_messages(1)
+        for i in range(2, 6):
+            time.sleep(0.15)
+            append(transcript, assistant(f"step {i}"))
+
+        deadline = time.monotonic() + 5
+        while 'step 5' not in api.sent_messages[0]['text'] and time.monotonic() < deadline:
+            time.sleep(0.05)
+        stop_event.set()
+        thread.join(timeout=5)
+
+        assert len(api.sent_messages) == 1
+        assert 'step 5' in api.sent_messages[0]['text']
+        assert 1 <= len(api.edits) <= 4
+        assert ('editMessageText', 400) not in api.requests, "Unchanged text is never re-sent"
+
+
+def test_failed_send_and_edit_are_retried():
+    """Test that a 5xx on a send or an edit is retried on the next due flush, not dropped."""
+    with FakeBotAPI() as api, tempfile.TemporaryDirectory() as tmp:
+        transcript = Path(tmp) / 'real-1.jsonl'
+        append(transcript, user('earlier turn'))
+        http = requests.Session()
+
+        def post(token, method, payload):
+            resp = http.post(f"{api.base_url}/bot{token}/{method}", json=payload, timeout=5)
+            return resp.status_code, resp.json()
+
+        clock = FakeClock()
+        tracker = ProgressTracker(post, lambda short_id: TOKEN, RoutingTable.single('4242'),
+                                  sessions_file=write_sessions(tmp, transcript), interval=3.0,
+                                  watcher=PollingWatcher(), clock=clock)
+        tracker.refresh()
+
+        def step(*records, advance=0.0):
+            append(transcript, *records)
+            clock.now += advance
+            tracker.on_change(str(transcript))
+            tracker.flush()
+
+        api.fail_next(1, status=502)
+        step(user('build it'), assistant('Compiling'))
+        assert api.sent_messages == [] and tracker.sent == 0
+        step(advance=3.0)  # Same text, but it never arrived: sent again
+        assert [m['text'] for m in api.sent_messages] == [tracker.sessions['abc123'].render()]
+
+        api.fail_next(1, status=500)
+        step(assistant('Linking'), advance=3.0)
+        assert api.edits == []
+        step(advance=3.0)
+        assert len(api.edits) == 1 and 'Linking' in api.edits[0][1]
+        step(advance=3.0)
+        assert len(api.edits) == 1, "Delivered text is not sent again"
+        assert tracker.sent == 1 and tracker.edits == 1
+
+
+if __name__ == "__main__":
+    # Simple test runner
+    test_functions = [
+        test_hook_records_transcript_path,
+        test_tail_returns_only_new_complete_records,
+        test_watchers_report_appends,
+        test_debounced_and_diffed_edits,
+        test_tracker_edits_message_over_http,
+        test_failed_send_and_edit_are_retried,
+    ]
+
+    passed = 0
+    failed = 0
+
+    for test_func in test_functions:
+        try:
+            test_func()
+            print(f"✅ {test_func.__name__}")
+            passed += 1
+        except Exception as e:
+            print(f"❌ {test_func.__name__}: {e}")
+            failed += 1
+
+    print(f"\nResults: {passed} passed, {failed} failed")
+    sys.exit(0 if failed == 0 else 1)
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Tests for multi-chat routing and fair per-chat send queues.
+"""
+
+import sys
+import os
+import json
+import logging
+import tempfile
+import threading
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+# Add the scripts and benchmarks directories to path for imports
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(TESTS_DIR, '..', 'scripts'))
+sys.path.insert(0, os.path.join(TESTS_DIR, '..', 'benchmarks'))
+
+from claude_bridge import tracing
+from claude_bridge.outbox import ChatOutbox
+from claude_bridge.routing import RoutesError, RoutingTable, RoutesCache, load_routes
+from fake_bot_api import FakeBotAPI
+import stop
+import telegram_listener
+
+ROUTES = {
+    "111": {"name": "alice", "projects": ["api", "web"]},
+    "222": {"name": "bob", "projects": ["*"]},
+    "333": {"name": "oncall", "projects": [], "sessions": ["ABC123"]},
+}
+
+
+def test_routing_table_index():
+    """Test per-project, wildcard and per-session routing."""
+    table = RoutingTable.from_dict(ROUTES)
+
+    assert table.chats_for("api") == ["111", "222"]
+    assert table.chats_for("infra") == ["222"]
+    assert table.chats_for("infra", "abc123") == ["222", "333"]
+    assert table.allows(111, "web")
+    assert not table.allows("111", "infra")
+    assert table.allows("333", "infra", "abc123")
+    assert not table.allows("333", "infra", "def456")
+    assert not table.allows("999", "api")
+    assert "222" in table and "999" not in table
+
+
+def test_load_routes_falls_back_to_chat_id():
+    """Test that without .chats the single .chat_id chat sees everything."""
+    with tempfile.TemporaryDirectory() as tmp:
+        chats = Path(tmp) / ".chats"
+        legacy = Path(tmp) / ".chat_id"
+
+        assert len(load_routes(chats, legacy)) == 0
+
+        legacy.write_text("4242\n")
+        table = load_routes(chats, legacy)
+        assert table.chats_for("anything") == ["4242"]
+
+        chats.write_text(json.dumps(ROUTES))
+        assert load_routes(chats, legacy).chats_for("api") == ["111", "222"]
+
+
+def test_routes_cache_reloads_on_change():
+    """Test that the listener picks up .chats edits without a restart."""
+    with tempfile.TemporaryDirectory() as tmp:
+        chats = Path(tmp) / ".chats"
+        chats.write_text(json.dumps({"111": {"projects": ["api"]}}))
+        cache = RoutesCache(chats, Path(tmp) / ".chat_id")
+
+        first = cache.get()
+        assert cache.get() is first, "Unchanged file should not be re-read"
+
+        chats.write_text(json.dumps({"111": {"projects": ["api"]}, "222": {"projects": ["*"]}}))
+        os.utime(chats, ns=(time.time_ns() + 10 ** 9, time.time_ns() + 10 ** 9))
+        assert len(cache.get()) == 2
+
+
+def test_malformed_chats_never_falls_back():
+    """Test that a broken .chats keeps the last good table and never reverts to .chat_id."""
+    with tempfile.TemporaryDirectory() as tmp:
+        chats = Path(tmp) / ".chats"
+        legacy = Path(tmp) / ".chat_id"
+        legacy.write_text("4242\n")
+        chats.write_text('{"111": {"projects": ["api"]},')  # Truncated by a bad edit
+
+        try:
+            load_routes(chats, legacy)
+            assert False, "A malformed .chats must not fall back to .chat_id"
+        except RoutesError as e:
+            assert ".chats" in str(e)
+
+        errors = []
+        cache = RoutesCache(chats, legacy, on_error=errors.append)
+        assert len(cache.get()) == 0, "Refuse to route until .chats is valid"
+        assert len(cache.get()) == 0 and len(errors) == 1, "Each broken version is reported once"
+
+        chats.write_text(json.dumps({"111": {"projects": ["api"]}}))
+        os.utime(chats, ns=(time.time_ns() + 10 ** 9, time.time_ns() + 10 ** 9))
+        good = cache.get()
+        assert list(good.chats) == ["111"]
+
+        chats.write_text("[")
+        os.utime(chats, ns=(time.time_ns() + 2 * 10 ** 9, time.time_ns() + 2 * 10 ** 9))
+        assert cache.get() is good, "The last good table stays in use"
+        assert len(errors) == 2
+
+    with FakeBotAPI() as api, tempfile.TemporaryDirectory() as home:
+        (Path(home) / ".claude").mkdir()
+        (Path(home) / ".claude" / ".chat_id").write_text("4242")
+        (Path(home) / ".claude" / ".chats").write_text("not json")
+        project = Path(home) / "api"
+        project.mkdir()
+
+        env = {"HOME": home, "TELEGRAM_API": "1:X", "TELEGRAM_API_BASE": api.base_url}
+        with patch.dict(os.environ, env), \
+             patch('stop.get_hook_logger', return_value=logging.getLogger('test.hook')), \
+             patch.object(tracing, '_tracer', None):
+            stop.send_telegram_notification({"session_id": "s1", "cwd": str(project)})
+
+        assert api.sent_messages == [], "The hook must not notify the legacy chat"
+
+
+def test_outbox_noisy_chat_does_not_starve_others():
+    """Test round-robin fairness and per-chat rate limiting."""
+    sent = []
+    outbox = ChatOutbox(lambda chat_id, text: sent.append((chat_id, text)), min_interval=0.05)
+    for i in range(10):
+        outbox.put("noisy", f"n{i}")
+    outbox.put("quiet", "q0")
+
+    outbox.start()
+    assert outbox.drain(timeout=5)
+    outbox.stop()
+
+    assert len(sent) == 11
+    assert sent.index(("quiet", "q0")) <= 1, f"Quiet chat waited behind the noisy one: {sent}"
+    assert [text for chat, text in sent if chat == "noisy"] == [f"n{i}" for i in range(10)]
+
+
+def test_outbox_retry_after_and_bounded_queue():
+    """Test that a rate-limited chat is retried later and queues drop their oldest."""
+    attempts = []
+
+    def send(chat_id, text):
+        attempts.append((chat_id, text))
+        if chat_id == "limited" and len([a for a in attempts if a[0] == "limited"]) == 1:
+            return 0.2  # 429 retry_after
+        return None
+
+    outbox = ChatOutbox(send, min_interval=0, max_pending=3)
+    outbox.put("limited", "hello")
+    for i in range(5):
+        outbox.put("other", f"o{i}")
+    assert outbox.dropped == 2
+
+    outbox.start()
+    assert outbox.drain(timeout=5)
+    outbox.stop()
+
+    assert attempts.count(("limited", "hello")) == 2
+    assert [text for chat, text in attempts if chat == "other"] == ["o2", "o3", "o4"]
+    # Other chat was not held up by the 0.2 s back-off
+    assert attempts.index(("other", "o4")) < attempts.index(("limited", "hello"), 1)
+
+
+def test_hook_fans_out_to_routed_chats():
+    """Test that the Stop hook notifies every chat routed to the project."""
+    with FakeBotAPI() as api, tempfile.TemporaryDirectory() as home:
+        (Path(home) / ".claude").mkdir()
+        (Path(home) / ".claude" / ".chats").write_text(json.dumps(ROUTES))
+        project = Path(home) / "api"
+        project.mkdir()
+
+        env = {"HOME": home, "TELEGRAM_API": "1:X", "TELEGRAM_API_BASE": api.base_url}
+        with patch.dict(os.environ, env), \
+             patch('stop.get_hook_logger', return_value=logging.getLogger('test.hook')), \
+             patch.object(tracing, '_tracer', None):
+            stop.send_telegram_notification({"session_id": "s1", "cwd": str(project)})
+
+        chats = sorted(str(m['chat']['id']) for m in api.wait_for_messages(2))
+        assert chats == ["111", "222"]
+
+
+def test_listener_denies_unrouted_chat():
+    """Test that a chat cannot resume a session from a project it is not routed to."""
+    with tempfile.TemporaryDirectory() as home:
+        (Path(home) / ".claude").mkdir()
+        (Path(home) / ".claude" / ".sessions").write_text(json.dumps({
+            "aaa111": {"session_id": "real-infra", "cwd": "/srv/infra", "timestamp": 0},
+            "bbb222": {"session_id": "real-api", "cwd": "/srv/api", "timestamp": 0},
+        }))
+        table = RoutingTable.from_dict(ROUTES)
+        notices = []
+
+        def update(chat_id, text):
+            return {"update_id": 1, "message": {"chat": {"id": int(chat_id)}, "text": text}}
+
+        with patch.dict(os.environ, {"HOME": home}), \
+             patch('telegram_listener.resume_claude_session', return_value=True) as resume, \
+             patch('telegram_listener.notify_chat', side_effect=lambda c, t, **kw: notices.append(c)), \
+             patch.object(tracing, '_tracer', None):
+            log = logging.getLogger('test.listener')
+            telegram_listener.handle_update(update("111", "aaa111:deploy"), table, log)
+            telegram_listener.handle_update(update("111", "bbb222:run tests"), table, log)
+            telegram_listener.handle_update(update("222", "aaa111:deploy"), table, log)
+            telegram_listener.handle_update(update("999", "bbb222:hi"), table, log)
+
+        resumed = [call.args[0] for call in resume.call_args_list]
+        assert resumed == ["real-api", "real-infra"]
+        assert notices == ["111"]
+
+
+if __name__ == "__main__":
+    # Simple test runner
+    test_functions = [
+        test_routing_table_index,
+        test_load_routes_falls_back_to_chat_id,
+        test_routes_cache_reloads_on_change,
+        test_malformed_chats_never_falls_back,
+        test_outbox_noisy_chat_does_not_starve_others,
+        test_outbox_retry_after_and_bounded_queue,
+        test_hook_fans_out_to_routed_chats,
+        test_listener_denies_unrouted_chat,
+    ]
+
+    passed = 0
+    failed = 0
+
+    for test_func in test_functions:
+        try:
+            test_func()
+            print(f"✅ {test_func.__name__}")
+            passed += 1
+        except Exception as e:
+            print(f"❌ {test_func.__name__}: {e}")
+            failed += 1
+
+    print(f"\nResults: {passed} passed, {failed} failed")
+    sys.exit(0 if failed == 0 else 1)
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Tests for collision-resistant short session IDs and prefix resolution.
+"""
+
+import sys
+import os
+import json
+import logging
+import tempfile
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+# Add the scripts directory to path for imports
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(TESTS_DIR, '..', 'scripts'))
+
+from claude_bridge import tracing
+from claude_bridge.routing import RoutingTable
+from claude_bridge.shortids import ShortIdIndex, assign_short_id, is_short_id
+import stop
+import telegram_listener
+
+
+def mapping(session_id):
+    # Recent, so garbage collection of expired sessions keeps it
+    return {"session_id": session_id, "cwd": "/tmp", "timestamp": int(time.time())}
+
+
+def test_assign_uses_six_chars_when_free():
+    """Test that an uncontested session keeps the familiar 6-character ID."""
+    digest = stop.generate_session_id("s1", "proj", length=32)
+    assert assign_short_id(digest, {}, "s1") == stop.generate_session_id("s1", "proj")
+    assert stop.get_short_session_id("s1", "proj", sessions={}) == digest[:6]
+
+
+def test_assign_extends_on_collision():
+    """Test that a taken prefix is extended instead of overwritten, and stays stable."""
+    digest = "abc123def4567890abc123def4567890"
+    sessions = {"abc123": mapping("older")}
+
+    short_id = assign_short_id(digest, sessions, "newer")
+    assert short_id == "abc123d"
+
+    sessions[short_id] = mapping("newer")
+    assert assign_short_id(digest, sessions, "newer") == "abc123d"
+    assert assign_short_id(digest, sessions, "older") == "abc123"
+
+    # Third session with the same 7-character prefix
+    assert assign_short_id(digest, sessions, "third") == "abc123de"
+
+
+def test_assign_keeps_existing_longer_id():
+    """Test that a session keeps its longer ID after the colliding one expires."""
+    digest = "abc123def4567890abc123def4567890"
+    sessions = {"abc123d": mapping("newer")}
+    assert assign_short_id(digest, sessions, "newer") == "abc123d"
+
+
+def test_index_resolves_unambiguous_prefixes():
+    """Test exact, prefix, ambiguous and too-short lookups."""
+    index = ShortIdIndex({key: mapping(key) for key in ["abc123", "abc1234", "abd999e", "ffffff12"]})
+
+    assert index.resolve("ABC123") == "abc123"  # Exact match wins over longer IDs
+    assert index.resolve("abd999") == "abd999e"
+    assert index.resolve("ffffff") == "ffffff12"
+    assert index.resolve("abc12") is None  # Shorter than the minimum
+    assert index.resolve("000000") is None
+    assert index.matching("abc") == ["abc123", "abc1234"]
+
+
+def test_parse_accepts_variable_length_ids():
+    """Test that both scripts accept extended IDs and reject malformed ones."""
+    assert is_short_id("abc123") and is_short_id("abc123de")
+    assert not is_short_id("abc12") and not is_short_id("abc12g")
+
+    assert telegram_listener.parse_targeted_message("abc123de:hi there") == ("abc123de", "hi there")
+    assert telegram_listener.parse_targeted_message("ABC1234: go") == ("abc1234", "go")
+    assert telegram_listener.parse_targeted_message("abc12:hi") == (None, None)
+    assert stop.parse_targeted_message("abc123de:continue", "abc123de") == "continue"
+    assert stop.parse_targeted_message("abc124:continue", "abc123de") is None
+
+    # The hook resolves prefixes like the listener: only when unambiguous
+    sessions = {key: mapping(key) for key in ["abc123de", "abc123ff", "fed9876a"]}
+    for text in ("abc123de:continue", "abc123:continue", "fed987:continue", "abc12:continue"):
+        short_id, reply = telegram_listener.parse_targeted_message(text)
+        resolved = short_id and telegram_listener.ShortIdIndex(sessions).resolve(short_id)
+        for own_id in ("abc123de", "fed9876a"):
+            expected = reply if resolved == own_id else None
+            assert stop.parse_targeted_message(text, own_id, sessions) == expected, (text, own_id)
+    assert stop.parse_targeted_message("fed987:continue", "fed9876a", sessions) == "continue"
+    assert stop.parse_targeted_message("abc123:continue", "abc123de", sessions) is None  # Ambiguous
+
+
+def test_hook_does_not_overwrite_colliding_session():
+    """Test that the Stop hook mints a longer ID when the 6-char prefix is taken."""
+    with tempfile.TemporaryDirectory() as home:
+        claude_dir = Path(home) / '.claude'
+        claude_dir.mkdir()
+        (claude_dir / '.chat_id').write_text('4242')
+        project = Path(home) / 'proj'
+        project.mkdir()
+        taken = stop.generate_session_id('new-session', 'proj')
+        (claude_dir / '.sessions').write_text(json.dumps({taken: mapping('old-session')}))
+
+        with patch.dict(os.environ, {'HOME': home, 'TELEGRAM_API': '1:X'}), \
+             patch('stop.get_hook_logger', return_value=logging.getLogger('test.hook')), \
+             patch('stop.send_message', return_value=True) as send, \
+             patch.object(tracing, '_tracer', None):
+            stop.send_telegram_notification({'session_id': 'new-session', 'cwd': str(project)})
+
+        sessions = json.loads((claude_dir / '.sessions').read_text())
+        assert sessions[taken]['session_id'] == 'old-session'
+        assert len(sessions) == 2
+        longer = next(key for key in sessions if key != taken)
+        assert longer.startswith(taken) and len(longer) == 7
+        assert sessions[longer]['session_id'] == 'new-session'
+        assert f"Session {longer}</b>" in send.call_args.args[2]
+
+
+def test_listener_resumes_by_prefix():
+    """Test that the listener resolves an abbreviated ID to the right session."""
+    with tempfile.TemporaryDirectory() as home:
+        (Path(home) / '.claude').mkdir()
+        (Path(home) / '.claude' / '.sessions').write_text(json.dumps({
+            "abc123": mapping("real-1"),
+            "abc12345": mapping("real-2"),
+        }))
+        update = {"update_id": 1, "message": {"chat": {"id": 4242}, "text": "abc1234:deploy"}}
+
+        with patch.dict(os.environ, {'HOME': home}), \
+             patch('telegram_listener.resume_claude_session', return_value=True) as resume, \
+             patch.object(tracing, '_tracer', None):
+            telegram_listener.handle_update(update, RoutingTable.single('4242'), logging.getLogger('test.ids'))
+
+        assert resume.call_args.args[:2] == ("real-2", "deploy")
+
+
+if __name__ == "__main__":
+    # Simple test runner
+    test_functions = [
+        test_assign_uses_six_chars_when_free,
+        test_assign_extends_on_collision,
+        test_assign_keeps_existing_longer_id,
+        test_index_resolves_unambiguous_prefixes,
+        test_parse_accepts_variable_length_ids,
+        test_hook_does_not_overwrite_colliding_session,
+        test_listener_resumes_by_prefix,
+    ]
+
+    passed = 0
+    failed = 0
+
+    for test_func in test_functions:
+        try:
+            test_func()
+            print(f"✅ {test_func.__name__}")
+            passed += 1
+        except Exception as e:
+            print(f"❌ {test_func.__name__}: {e}")
+            failed += 1
+
+    print(f"\nResults: {passed} passed, {failed} failed")
+    sys.exit(0 if failed == 0 else 1)
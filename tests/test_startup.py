@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Tests for Stop hook startup cost: deferred imports and single .env parse.
+"""
+
+import sys
+import os
+import subprocess
+from unittest.mock import patch
+
+# Add the scripts directory to path for imports
+SCRIPTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts')
+sys.path.insert(0, SCRIPTS_DIR)
+
+import stop
+
+
+def imported_modules(module):
+    """Import a module in a fresh interpreter and return everything it imported."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=SCRIPTS_DIR,
+        capture_output=True,
+        text=True
+    )
+    assert result.returncode == 0, result.stderr
+    return {
+        line.rsplit('|', 1)[1].strip()
+        for line in result.stderr.splitlines()
+        if line.startswith('import time:') and 'self [us]' not in line
+    }
+
+
+def test_heavy_modules_deferred():
+    """Test that importing stop.py does not pull in requests or dotenv."""
+    modules = imported_modules('stop')
+
+    assert 'stop' in modules
+    assert 'requests' not in modules, "requests should be imported lazily"
+    assert 'dotenv' not in modules, "dotenv should be imported lazily"
+
+
+def test_load_env_parses_once():
+    """Test that .env files are only parsed on the first load_env() call."""
+    with patch.object(stop, '_env_loaded', False), \
+         patch('dotenv.load_dotenv') as mock_load:
+        stop.load_env()
+        calls_after_first = mock_load.call_count
+        stop.load_env()
+        stop.load_env()
+
+    assert calls_after_first >= 1, "First call should parse .env"
+    assert mock_load.call_count == calls_after_first, "Later calls should be no-ops"
+
+
+def test_markdown_to_html():
+    """Test markdown conversion with precompiled rules."""
+    html = stop.markdown_to_html("## Title\n**bold** and *it* with `x<y`\n- item")
+
+    assert "<b>Title</b>" in html
+    assert "<b>bold</b>" in html
+    assert "<i>it</i>" in html
+    assert "<code>x&lt;y</code>" in html
+    assert "• item" in html
+
+
+if __name__ == "__main__":
+    # Simple test runner
+    test_functions = [
+        test_heavy_modules_deferred,
+        test_load_env_parses_once,
+        test_markdown_to_html,
+    ]
+
+    passed = 0
+    failed = 0
+
+    for test_func in test_functions:
+        try:
+            test_func()
+            print(f"✅ {test_func.__name__}")
+            passed += 1
+        except Exception as e:
+            print(f"❌ {test_func.__name__}: {e}")
+            failed += 1
+
+    print(f"\nResults: {passed} passed, {failed} failed")
+    sys.exit(0 if failed == 0 else 1)
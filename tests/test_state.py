@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Tests for the shared state I/O layer: locking, atomic writes, concurrent writers.
+"""
+
+import sys
+import os
+import hashlib
+import json
+import multiprocessing
+import tempfile
+import threading
+from pathlib import Path
+from unittest.mock import patch
+
+# Add the scripts directory to path for imports
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(TESTS_DIR, '..', 'scripts'))
+
+from claude_bridge.state import append_line, atomic_write_json, read_json, update_json
+import stop
+
+WRITERS = 50
+
+
+def run_concurrently(target, count=WRITERS):
+    """Run target(i) in `count` processes at once (threads where fork is unavailable)."""
+    try:
+        ctx = multiprocessing.get_context('fork')
+        workers = [ctx.Process(target=target, args=(i,)) for i in range(count)]
+    except ValueError:
+        workers = [threading.Thread(target=target, args=(i,)) for i in range(count)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(timeout=60)
+    return workers
+
+
+def colliding_session_id(session_id, project, length=6):
+    """Every session hashes to the same 6-char prefix."""
+    return ("abc123" + hashlib.md5(session_id.encode()).hexdigest())[:length]
+
+
+def test_atomic_write_leaves_no_temp_files():
+    """Test that atomic writes replace the file and clean up after themselves."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'state.json'
+        atomic_write_json(path, {"a": 1})
+        atomic_write_json(path, {"b": 2})
+
+        assert read_json(path) == {"b": 2}
+        assert sorted(p.name for p in Path(tmp).iterdir()) == ['state.json']
+
+
+def test_update_json_quarantines_corrupt_file():
+    """Test that a truncated file is moved aside instead of silently overwritten."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / '.sessions'
+        path.write_text('{"abc123": {"session_id": "real-1", "cwd": "/tm')
+
+        assert read_json(path, {}) == {}
+        assert path.exists(), "Lock-free readers must not move the file"
+
+        with update_json(path) as sessions:
+            sessions["def456"] = {"session_id": "real-2"}
+
+        assert list(read_json(path)) == ["def456"]
+        assert (Path(tmp) / '.sessions.corrupt').read_text().startswith('{"abc123"')
+
+
+def test_update_json_skips_write_on_error():
+    """Test that an exception inside the block leaves the file untouched."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'state.json'
+        atomic_write_json(path, {"keep": True})
+        try:
+            with update_json(path) as data:
+                data.clear()
+                raise RuntimeError("boom")
+        except RuntimeError:
+            pass
+        assert read_json(path) == {"keep": True}
+
+
+def test_concurrent_session_writers():
+    """Test that 50 parallel Stop hooks all keep their session mappings."""
+    with tempfile.TemporaryDirectory() as home:
+        (Path(home) / '.claude').mkdir()
+
+        def writer(i):
+            stop.save_session_mapping(f"{i:06x}", f"real-{i}", f"/proj/{i}")
+
+        with patch.dict(os.environ, {'HOME': home}):
+            workers = run_concurrently(writer)
+
+        assert all(getattr(w, 'exitcode', 0) == 0 for w in workers)
+        sessions = json.loads((Path(home) / '.claude' / '.sessions').read_text())
+        assert len(sessions) == WRITERS
+        assert all(sessions[f"{i:06x}"]['session_id'] == f"real-{i}" for i in range(WRITERS))
+
+
+def test_concurrent_registration_with_colliding_prefixes():
+    """Test that racing hooks with the same 6-char prefix still get distinct IDs."""
+    with tempfile.TemporaryDirectory() as home:
+        (Path(home) / '.claude').mkdir()
+
+        def writer(i):
+            stop.register_session(f"real-{i}", "proj", "/proj")
+
+        with patch.dict(os.environ, {'HOME': home}), \
+             patch('stop.generate_session_id', side_effect=colliding_session_id):
+            run_concurrently(writer)
+
+        sessions = json.loads((Path(home) / '.claude' / '.sessions').read_text())
+        assert sorted(info['session_id'] for info in sessions.values()) == \
+            sorted(f"real-{i}" for i in range(WRITERS))
+        assert all(short_id.startswith("abc123") for short_id in sessions)
+
+
+def test_concurrent_appends_stay_whole():
+    """Test that processed-message appends from parallel writers are never interleaved."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / '.processed_messages'
+
+        def writer(i):
+            for j in range(20):
+                append_line(path, f"{i:03d}{j:03d}" * 50)
+
+        run_concurrently(writer)
+
+        lines = path.read_text().splitlines()
+        assert len(lines) == WRITERS * 20
+        assert all(len(line) == 300 and line == line[:6] * 50 for line in lines)
+
+
+if __name__ == "__main__":
+    # Simple test runner
+    test_functions = [
+        test_atomic_write_leaves_no_temp_files,
+        test_update_json_quarantines_corrupt_file,
+        test_update_json_skips_write_on_error,
+        test_concurrent_session_writers,
+        test_concurrent_registration_with_colliding_prefixes,
+        test_concurrent_appends_stay_whole,
+    ]
+
+    passed = 0
+    failed = 0
+
+    for test_func in test_functions:
+        try:
+            test_func()
+            print(f"✅ {test_func.__name__}")
+            passed += 1
+        except Exception as e:
+            print(f"❌ {test_func.__name__}: {e}")
+            failed += 1
+
+    print(f"\nResults: {passed} passed, {failed} failed")
+    sys.exit(0 if failed == 0 else 1)
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Tests for the listener supervisor: heartbeat deadlines, hang and crash restarts, persisted offsets.
+"""
+
+import sys
+import os
+import logging
+import tempfile
+import threading
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+# Add the scripts and benchmarks directories to path for imports
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+SCRIPTS_DIR = os.path.abspath(os.path.join(TESTS_DIR, '..', 'scripts'))
+sys.path.insert(0, SCRIPTS_DIR)
+sys.path.insert(0, os.path.join(TESTS_DIR, '..', 'benchmarks'))
+
+from fake_bot_api import FakeBotAPI
+from claude_bridge import tracing
+from claude_bridge.routing import RoutingTable
+from claude_bridge.supervisor import Heartbeat, Supervisor, overdue_loops
+import telegram_listener
+
+# A child that records its start, promises one quick beat, then hangs (or exits)
+CHILD = """
+import os, sys, time
+sys.path.insert(0, {scripts!r})
+from claude_bridge.supervisor import Heartbeat
+with open({starts!r}, 'a') as f:
+    f.write(f"{{os.getpid()}} {{time.time()}}\\n")
+if {crash!r}:
+    sys.exit(3)
+Heartbeat.from_env().beat('poll', 0.2)
+time.sleep(60)
+"""
+
+
+def run_supervisor(tmp, crash, starts_wanted, timeout=10):
+    """Supervise CHILD until it has started starts_wanted times; returns (supervisor, start times)."""
+    starts = Path(tmp) / 'starts'
+    script = Path(tmp) / 'child.py'
+    script.write_text(CHILD.format(scripts=SCRIPTS_DIR, starts=str(starts), crash=crash))
+    supervisor = Supervisor([sys.executable, str(script)], heartbeat_path=Path(tmp) / 'heartbeat',
+                            log=lambda msg: None, max_backoff=0.4, check_interval=0.05)
+    with patch.dict(os.environ, {'BRIDGE_HEARTBEAT_GRACE': '0.2'}), \
+         patch('claude_bridge.supervisor.MIN_BACKOFF', 0.1):
+        thread = threading.Thread(target=supervisor.run, daemon=True)
+        thread.start()
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if starts.exists() and len(starts.read_text().splitlines()) >= starts_wanted:
+                break
+            time.sleep(0.05)
+        supervisor.stop()
+        thread.join(timeout=10)
+    assert not thread.is_alive()
+    return supervisor, [float(line.split()[1]) for line in starts.read_text().splitlines()]
+
+
+def test_heartbeat_deadlines():
+    """Test promised deadlines per loop, overdue detection and the unsupervised no-op."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'heartbeat'
+        now = [1000.0]
+        heartbeat = Heartbeat(path, grace=5, clock=lambda: now[0])
+        heartbeat.beat('poll-1', 30)
+        heartbeat.beat('webhook', 1)
+        pid = os.getpid()
+
+        assert overdue_loops(path, pid, now=1005) == []
+        assert overdue_loops(path, pid, now=1010) == ['webhook']
+        assert overdue_loops(path, pid + 1, now=1010) is None, "Beats from an older child don't count"
+        heartbeat.done('webhook')
+        assert overdue_loops(path, pid, now=1010) == []
+
+        Heartbeat().beat('poll-1', 30)  # Unsupervised: nothing to write, no error
+
+
+def test_hung_child_is_restarted_within_seconds():
+    """Test that a child that stops beating is killed and restarted."""
+    with tempfile.TemporaryDirectory() as tmp:
+        supervisor, starts = run_supervisor(tmp, crash=False, starts_wanted=2)
+        assert len(starts) >= 2
+        assert supervisor.hangs >= 1
+        # Deadline 0.2s + grace 0.2s, then SIGTERM and (crash-loop) backoff
+        assert starts[1] - starts[0] < 3, f"Restart took {starts[1] - starts[0]:.1f}s"
+        assert supervisor.child.poll() is not None, "Child stopped with the supervisor"
+
+
+def test_crash_loop_backs_off():
+    """Test that quick crashes are restarted with a growing, capped delay."""
+    with tempfile.TemporaryDirectory() as tmp:
+        supervisor, starts = run_supervisor(tmp, crash=True, starts_wanted=5)
+        gaps = [b - a for a, b in zip(starts, starts[1:])]
+        assert len(gaps) >= 4
+        assert gaps[2] > gaps[0], f"Backoff did not grow: {gaps}"
+        assert supervisor.hangs == 0
+
+    supervisor = Supervisor(['true'], max_backoff=60, stable_after=60)
+    assert [supervisor.next_backoff(1) for _ in range(8)] == [1, 2, 4, 8, 16, 32, 60, 60]
+    assert supervisor.next_backoff(120) == 0, "A child that ran stably restarts immediately"
+    assert supervisor.next_backoff(1) == 1
+
+
+def test_restarted_listener_resumes_from_persisted_offset():
+    """Test that a reply handled before a restart is not handled again after it."""
+    with FakeBotAPI() as api, tempfile.TemporaryDirectory() as home:
+        (Path(home) / '.claude').mkdir()
+        (Path(home) / '.claude' / '.sessions').write_text(
+            '{"abc123": {"session_id": "real-1", "cwd": "/tmp", "timestamp": 0}}'
+        )
+        resumed = []
+
+        def run_once(text):
+            stop_event = threading.Event()
+
+            def fake_resume(real_session_id, message, cwd):
+                resumed.append(message)
+                stop_event.set()
+                return True
+
+            with patch('telegram_listener.resume_claude_session', side_effect=fake_resume):
+                thread = threading.Thread(
+                    target=telegram_listener.run_listener,
+                    args=('1:T', RoutingTable.single('4242'), logging.getLogger('test.supervisor'), stop_event, 1),
+                    daemon=True,
+                )
+                thread.start()
+                api.inject_message('4242', f'abc123:{text}')
+                thread.join(timeout=5)
+            assert not thread.is_alive()
+
+        with patch.dict(os.environ, {'HOME': home, 'TELEGRAM_API_BASE': api.base_url}), \
+             patch.object(tracing, '_tracer', None):
+            run_once('first')  # Stops before the next poll would confirm the update
+            assert telegram_listener.load_update_offset('1:T') == 1
+            run_once('second')
+
+        assert resumed == ['first', 'second']
+
+
+def test_offset_is_saved_after_every_update():
+    """Test that the offset moves past each update of a batch, including one whose handler fails."""
+    with FakeBotAPI() as api, tempfile.TemporaryDirectory() as home:
+        (Path(home) / '.claude').mkdir()
+        (Path(home) / '.claude' / '.sessions').write_text(
+            '{"abc123": {"session_id": "real-1", "cwd": "/tmp", "timestamp": 0}}'
+        )
+        saved_at_resume = []
+
+        def fake_resume(real_session_id, message, cwd):
+            saved_at_resume.append((message, telegram_listener.load_update_offset('1:T')))
+            if message == 'poison':
+                raise RuntimeError('handler bug')
+            return True
+
+        with patch.dict(os.environ, {'HOME': home, 'TELEGRAM_API_BASE': api.base_url}), \
+             patch('telegram_listener.resume_claude_session', side_effect=fake_resume), \
+             patch.object(tracing, '_tracer', None):
+            for text in ('one', 'poison', 'three'):
+                api.inject_message('4242', f'abc123:{text}', token='1:T')
+            telegram_listener.poll_updates('1:T', RoutingTable.single('4242'), 0,
+                                           logging.getLogger('test.supervisor'), timeout=1, save_offset=True)
+            # A restart now starts after the whole batch, poison update included
+            assert telegram_listener.load_update_offset('1:T') == 3
+
+        assert saved_at_resume == [('one', 0), ('poison', 1), ('three', 2)]
+
+
+if __name__ == "__main__":
+    # Simple test runner
+    test_functions = [
+        test_heartbeat_deadlines,
+        test_hung_child_is_restarted_within_seconds,
+        test_crash_loop_backs_off,
+        test_restarted_listener_resumes_from_persisted_offset,
+        test_offset_is_saved_after_every_update,
+    ]
+
+    passed = 0
+    failed = 0
+
+    for test_func in test_functions:
+        try:
+            test_func()
+            print(f"✅ {test_func.__name__}")
+            passed += 1
+        except Exception as e:
+            print(f"❌ {test_func.__name__}: {e}")
+            failed += 1
+
+    print(f"\nResults: {passed} passed, {failed} failed")
+    sys.exit(0 if failed == 0 else 1)
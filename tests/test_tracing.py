@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Tests for span tracing, Chrome trace export and phase statistics.
+"""
+
+import sys
+import os
+import io
+import json
+import logging
+import tempfile
+from contextlib import redirect_stdout
+from pathlib import Path
+from unittest.mock import patch, MagicMock
+
+# Add the scripts directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+
+from claude_bridge import tracing
+import stop
+
+
+def test_spans_flushed_per_run():
+    """Test that spans are buffered and appended as JSONL grouped by run."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "trace.jsonl"
+        tracer = tracing.Tracer("stop", path=path)
+
+        with tracer.span("send", bytes=120) as span:
+            span.set(retries=2)
+        assert not path.exists(), "Spans should be buffered until flush"
+        tracer.flush()
+
+        with tracer.span("send", bytes=80):
+            pass
+        tracer.flush()
+
+        records = [json.loads(line) for line in path.read_text().splitlines()]
+        assert len(records) == 2
+        assert records[0]["attrs"] == {"bytes": 120, "retries": 2}
+        assert records[0]["run"] != records[1]["run"], "Each flush starts a new run"
+
+        last = tracing.read_spans(path, last_runs=1)
+        assert [r["attrs"]["bytes"] for r in last] == [80]
+
+
+def test_disabled_tracer_writes_nothing():
+    """Test that a disabled tracer never creates the trace file."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "trace.jsonl"
+        tracer = tracing.Tracer("stop", path=path, enabled=False)
+        with tracer.span("send"):
+            pass
+        tracer.flush()
+        assert not path.exists()
+
+
+def test_percentiles_and_phase_stats():
+    """Test percentile interpolation and per-phase aggregation."""
+    assert tracing.percentile([1, 2, 3, 4, 5], 50) == 3
+    assert tracing.percentile([10], 99) == 10
+    assert tracing.percentile([], 95) == 0.0
+
+    spans = [
+        {"run": str(i), "proc": "stop", "pid": 1, "name": "send", "start": i,
+         "dur_ms": float(i), "attrs": {"bytes": 10, "retries": i % 2}}
+        for i in range(1, 101)
+    ]
+    stats = tracing.phase_stats(spans)["send"]
+    assert stats["count"] == 100
+    assert 50 <= stats["p50"] <= 51
+    assert 95 <= stats["p95"] <= 96
+    assert stats["bytes"] == 1000
+    assert stats["retries"] == 50
+
+
+def test_chrome_trace_export():
+    """Test conversion to Chrome trace complete events."""
+    spans = [{"run": "r1", "proc": "stop", "pid": 42, "name": "git_probe",
+              "start": 1.5, "dur_ms": 2.5, "attrs": {"changes": 3}}]
+    trace = tracing.to_chrome_trace(spans)
+
+    event = trace["traceEvents"][0]
+    assert event["ph"] == "X"
+    assert event["ts"] == 1_500_000 and event["dur"] == 2500
+    assert event["args"] == {"changes": 3, "run": "r1"}
+    assert {"name": "process_name", "ph": "M", "pid": 42, "args": {"name": "stop"}} in trace["traceEvents"]
+
+
+def test_stats_cli():
+    """Test the stats command prints percentiles per phase."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "trace.jsonl"
+        tracer = tracing.Tracer("stop", path=path)
+        for _ in range(3):
+            with tracer.span("reply_poll"):
+                pass
+            tracer.flush()
+
+        output = io.StringIO()
+        with redirect_stdout(output):
+            code = tracing.main(["--file", str(path), "stats", "--runs", "2"])
+
+    assert code == 0
+    assert "last 2 runs" in output.getvalue()
+    assert "reply_poll" in output.getvalue()
+
+
+def test_send_notification_records_phases():
+    """Test that the Stop hook records a span per phase."""
+    with tempfile.TemporaryDirectory() as home:
+        claude_dir = Path(home) / ".claude"
+        claude_dir.mkdir()
+        (claude_dir / ".chat_id").write_text("123")
+        transcript = Path(home) / "t.jsonl"
+        transcript.write_text(json.dumps({
+            "type": "assistant",
+            "message": {"role": "assistant", "content": "**Done** with the refactor"}
+        }) + "\n")
+
+        response = MagicMock(status_code=200)
+        response.json.return_value = {"ok": True, "result": {"message_id": 7}}
+        trace_path = Path(home) / "trace.jsonl"
+
+        env = {"HOME": home, "TELEGRAM_API": "token", "BRIDGE_TRACE_FILE": str(trace_path)}
+        with patch.dict(os.environ, env), \
+             patch.object(tracing, '_tracer', None), \
+             patch('stop.get_hook_logger', return_value=logging.getLogger('test.hook')), \
+             patch('stop.get_recent_changes', return_value="✏️ a.py (modified)"), \
+             patch('requests.Session.post', return_value=response):
+            tracing.init("stop")
+            stop.send_telegram_notification({
+                "session_id": "s1", "cwd": home, "transcript_path": str(transcript)
+            })
+            tracing.flush()
+
+        spans = {r["name"]: r for r in tracing.read_spans(trace_path)}
+
+    assert set(spans) == {"git_probe", "transcript_parse", "html_convert", "send"}
+    assert spans["send"]["attrs"]["status"] == "ok"
+    assert spans["send"]["attrs"]["retries"] == 0
+    assert spans["transcript_parse"]["attrs"]["bytes"] > 0
+
+
+if __name__ == "__main__":
+    # Simple test runner
+    test_functions = [
+        test_spans_flushed_per_run,
+        test_disabled_tracer_writes_nothing,
+        test_percentiles_and_phase_stats,
+        test_chrome_trace_export,
+        test_stats_cli,
+        test_send_notification_records_phases,
+    ]
+
+    passed = 0
+    failed = 0
+
+    for test_func in test_functions:
+        try:
+            test_func()
+            print(f"✅ {test_func.__name__}")
+            passed += 1
+        except Exception as e:
+            print(f"❌ {test_func.__name__}: {e}")
+            failed += 1
+
+    print(f"\nResults: {passed} passed, {failed} failed")
+    sys.exit(0 if failed == 0 else 1)
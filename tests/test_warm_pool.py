@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Tests for the warm pool of pre-started claude processes, using a stub claude.
+"""
+
+import sys
+import os
+import json
+import stat
+import tempfile
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+# Add the scripts directory to path for imports
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(TESTS_DIR, '..', 'scripts'))
+
+from claude_bridge.warmpool import WarmPool
+import telegram_listener
+
+STUB = os.path.join(TESTS_DIR, '..', 'benchmarks', 'stub_claude.py')
+
+
+class StubClaude:
+    """Temp dir with an executable stub claude and its event log."""
+
+    def __init__(self, startup=0.0):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+        self.log = self.dir / 'claude.log'
+        self.bin = self.dir / 'claude'
+        self.bin.write_text(f"#!/bin/sh\nexec {sys.executable} {os.path.abspath(STUB)} \"$@\"\n")
+        self.bin.chmod(self.bin.stat().st_mode | stat.S_IEXEC)
+        self.env = patch.dict(os.environ, {
+            'CLAUDE_BIN': str(self.bin), 'STUB_CLAUDE_LOG': str(self.log),
+            'STUB_CLAUDE_STARTUP': str(startup),
+        })
+
+    def __enter__(self):
+        self.env.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.env.stop()
+        self.tmp.cleanup()
+
+    def events(self, event=None):
+        if not self.log.exists():
+            return []
+        records = [json.loads(line) for line in self.log.read_text().splitlines()]
+        return [r for r in records if event is None or r['event'] == event]
+
+    def wait_for(self, event, count, timeout=10):
+        deadline = time.monotonic() + timeout
+        while len(self.events(event)) < count and time.monotonic() < deadline:
+            time.sleep(0.02)
+        return self.events(event)
+
+
+def session(real_id, cwd, age=0):
+    return {"session_id": real_id, "cwd": cwd, "timestamp": int(time.time()) - age}
+
+
+def test_warm_resume_skips_cold_start():
+    """Test that a pre-started session gets the reply on stdin without another spawn."""
+    with StubClaude(startup=0.5) as stub:
+        pool = WarmPool(capacity=2)
+        try:
+            pool.prewarm('real-1', stub.dir)
+            stub.wait_for('start', 1)
+            time.sleep(0.6)  # Transcript "loaded"
+
+            start = time.monotonic()
+            assert pool.resume('real-1', 'User replied via Telegram: go', stub.dir)
+            inputs = stub.wait_for('input', 1)
+            latency = time.monotonic() - start
+
+            assert inputs[0]['text'] == 'User replied via Telegram: go'
+            assert latency < 0.4, f"Warm resume took {latency:.2f}s"
+            starts = stub.events('start')
+            assert len(starts) == 1
+            assert starts[0]['argv'][:2] == ['--resume', 'real-1']
+            assert 'stream-json' in starts[0]['argv']
+            assert pool.hits == 1
+        finally:
+            pool.close()
+        assert stub.wait_for('exit', 1), "Closing stdin lets the process exit"
+
+
+def test_lru_cap_and_idle_eviction():
+    """Test that the pool never holds more than its capacity and drops idle processes."""
+    with StubClaude() as stub:
+        clock = [0.0]
+        pool = WarmPool(capacity=2, idle_timeout=60, clock=lambda: clock[0])
+        try:
+            pool.prewarm('real-1', stub.dir)
+            pool.prewarm('real-2', stub.dir)
+            assert pool.resume('real-1', 'touch', stub.dir)  # real-2 is now least recently used
+            pool.prewarm('real-3', stub.dir)
+
+            assert len(pool) == 2 and 'real-2' not in pool
+            assert pool.evictions == 1
+
+            clock[0] = 61.0
+            pool.evict_idle()
+            assert len(pool) == 0
+            assert len(stub.wait_for('exit', 3)) == 3
+        finally:
+            pool.close()
+
+
+def test_sync_prewarms_hot_sessions_and_drops_stale():
+    """Test pre-starting recently stopped sessions and replacing ones continued elsewhere."""
+    with StubClaude() as stub:
+        cwd = str(stub.dir)
+        sessions = {
+            "aaa111": session('real-hot', cwd, age=30),
+            "bbb222": session('real-cold', cwd, age=3600),
+        }
+        pool = WarmPool(capacity=4)
+        try:
+            pool.sync(sessions)
+            assert 'real-hot' in pool and 'real-cold' not in pool
+
+            # A turn we sent ends with a Stop: the process stays
+            assert pool.resume('real-hot', 'reply', cwd)
+            sessions["aaa111"] = session('real-hot', cwd, age=0)
+            pool.sync(sessions)
+            assert pool.evictions == 0
+            assert len(stub.wait_for('start', 1)) == 1
+
+            # A Stop nobody sent through the pool: the session moved on without it
+            sessions["aaa111"]['timestamp'] += 5
+            pool.sync(sessions)
+            assert 'real-hot' in pool and pool.evictions == 1
+            assert len(stub.wait_for('start', 2)) == 2, "Replaced by a fresh process"
+
+            # Claude's settings changed: the process is restarted with them
+            settings = stub.dir / '.claude' / 'settings.json'
+            settings.parent.mkdir()
+            settings.write_text('{}')
+            pool.sync(sessions)
+            assert 'real-hot' in pool and pool.evictions == 2
+            assert len(stub.wait_for('start', 3)) == 3
+        finally:
+            pool.close()
+
+
+def test_terminal_turn_between_replies_gets_a_fresh_process():
+    """Test that a reply after a turn run in the terminal goes to a process started after that turn."""
+    with StubClaude() as stub:
+        cwd = str(stub.dir)
+        sessions = {"aaa111": session('real-1', cwd, age=30)}
+        pool = WarmPool(capacity=2)
+        try:
+            pool.sync(sessions)
+            assert pool.resume('real-1', 'first reply', cwd)
+            first = stub.wait_for('input', 1)[0]['pid']
+            sessions["aaa111"]['timestamp'] += 5  # Stop of the Telegram turn
+            pool.sync(sessions)
+
+            sessions["aaa111"]['timestamp'] += 5  # Stop of a turn typed in the terminal
+            pool.sync(sessions)
+            started = stub.wait_for('start', 2)
+
+            assert pool.resume('real-1', 'second reply', cwd)
+            second = stub.wait_for('input', 2)[1]
+            assert second['text'] == 'second reply'
+            assert second['pid'] != first and second['pid'] == started[1]['pid']
+            assert pool.evictions == 1
+        finally:
+            pool.close()
+
+
+def test_listener_falls_back_to_cold_start():
+    """Test that the listener resumes cold when the pool has no live process for a session."""
+    with StubClaude() as stub:
+        pool = WarmPool(capacity=1)
+        try:
+            with patch.object(telegram_listener, 'warm_pool', pool):
+                pool.prewarm('real-1', str(stub.dir))
+                assert telegram_listener.resume_claude_session('real-1', 'warm one', str(stub.dir))
+                assert telegram_listener.resume_claude_session('real-2', 'cold one', str(stub.dir))
+
+            inputs = sorted(event['text'] for event in stub.wait_for('input', 2))
+            assert inputs == ['User replied via Telegram: cold one', 'User replied via Telegram: warm one']
+            assert pool.hits == 1 and pool.misses == 1
+            cold = [e for e in stub.events('start') if 'real-2' in e['argv']][0]
+            assert 'stream-json' not in cold['argv']
+        finally:
+            pool.close()
+
+
+if __name__ == "__main__":
+    # Simple test runner
+    test_functions = [
+        test_warm_resume_skips_cold_start,
+        test_lru_cap_and_idle_eviction,
+        test_sync_prewarms_hot_sessions_and_drops_stale,
+        test_terminal_turn_between_replies_gets_a_fresh_process,
+        test_listener_falls_back_to_cold_start,
+    ]
+
+    passed = 0
+    failed = 0
+
+    for test_func in test_functions:
+        try:
+            test_func()
+            print(f"✅ {test_func.__name__}")
+            passed += 1
+        except Exception as e:
+            print(f"❌ {test_func.__name__}: {e}")
+            failed += 1
+
+    print(f"\nResults: {passed} passed, {failed} failed")
+    sys.exit(0 if failed == 0 else 1)
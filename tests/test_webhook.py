@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Tests for webhook ingestion: secret verification, queueing and dispatch.
+"""
+
+import sys
+import os
+import json
+import logging
+import queue
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from unittest.mock import patch
+
+import requests
+
+# Add the scripts and benchmarks directories to path for imports
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(TESTS_DIR, '..', 'scripts'))
+sys.path.insert(0, os.path.join(TESTS_DIR, '..', 'benchmarks'))
+
+from claude_bridge import tracing
+from claude_bridge.routing import RoutingTable
+from claude_bridge.webhook import WebhookServer, replay
+from fake_bot_api import FakeBotAPI
+import telegram_listener
+
+SECRET = 'test-secret-token'
+CHAT_ID = '4242'
+
+# Updates as Telegram posts them to a webhook
+RECORDED_UPDATES = [
+    {"update_id": 815000101, "message": {
+        "message_id": 71, "date": 1760000000, "text": "abc123:run the tests again",
+        "chat": {"id": 4242, "type": "private", "first_name": "Dev"},
+        "from": {"id": 4242, "is_bot": False, "first_name": "Dev"}}},
+    {"update_id": 815000102, "message": {
+        "message_id": 72, "date": 1760000005, "text": "hello from another chat",
+        "chat": {"id": 777, "type": "private"}}},
+    {"update_id": 815000103, "edited_message": {
+        "message_id": 71, "date": 1760000000, "edit_date": 1760000009,
+        "text": "abc123:edited", "chat": {"id": 4242, "type": "private"}}},
+]
+
+
+def test_accepts_and_queues_recorded_updates():
+    """Test that verified updates are acknowledged with 200 and queued in order."""
+    with WebhookServer(SECRET, port=0) as server:
+        statuses = replay(RECORDED_UPDATES, server.url, SECRET)
+
+        assert statuses == [200, 200, 200]
+        queued = [server.updates.get(timeout=1)['update_id'] for _ in RECORDED_UPDATES]
+        assert queued == [815000101, 815000102, 815000103]
+        assert server.received == 3
+
+
+def test_rejects_bad_requests():
+    """Test secret verification, path, method and body validation."""
+    with WebhookServer(SECRET, port=0) as server:
+        update = RECORDED_UPDATES[0]
+        wrong_secret = requests.post(server.url, json=update, timeout=5,
+                                     headers={'X-Telegram-Bot-Api-Secret-Token': 'nope'})
+        no_secret = requests.post(server.url, json=update, timeout=5)
+        wrong_path = requests.post(server.url + '/other', json=update, timeout=5,
+                                   headers={'X-Telegram-Bot-Api-Secret-Token': SECRET})
+        wrong_method = requests.get(server.url, timeout=5)
+        bad_json = requests.post(server.url, data=b'{not json', timeout=5,
+                                 headers={'X-Telegram-Bot-Api-Secret-Token': SECRET})
+
+        assert wrong_secret.status_code == 401
+        assert no_secret.status_code == 401
+        assert wrong_path.status_code == 404
+        assert wrong_method.status_code == 405
+        assert bad_json.status_code == 400
+        assert server.rejected == 2
+        assert server.updates.empty()
+
+
+def test_secret_required():
+    """Test that the server refuses to run without a secret token."""
+    try:
+        WebhookServer('')
+        assert False, "Expected ValueError"
+    except ValueError:
+        pass
+
+
+def test_worker_dispatches_and_skips_redelivery():
+    """Test that the resume worker handles updates once, in any order, ignoring other chats."""
+    updates = queue.Queue()
+    # Out of order, with a redelivered duplicate
+    for update in [RECORDED_UPDATES[2], RECORDED_UPDATES[0], RECORDED_UPDATES[1], RECORDED_UPDATES[0]]:
+        updates.put(dict(update))
+
+    with tempfile.TemporaryDirectory() as home:
+        (Path(home) / '.claude').mkdir()
+        (Path(home) / '.claude' / '.sessions').write_text(json.dumps(
+            {"abc123": {"session_id": "real-1", "cwd": "/tmp", "timestamp": 0}}
+        ))
+        stop_event = threading.Event()
+        resumed = []
+
+        def fake_resume(real_session_id, message, cwd):
+            resumed.append((real_session_id, message))
+            return True
+
+        with patch.dict(os.environ, {'HOME': home}), \
+             patch('telegram_listener.resume_claude_session', side_effect=fake_resume), \
+             patch.object(tracing, '_tracer', None):
+            worker = threading.Thread(
+                target=telegram_listener.run_webhook_worker,
+                args=(updates, RoutingTable.single(CHAT_ID), logging.getLogger('test.webhook'), stop_event),
+                daemon=True,
+            )
+            worker.start()
+            while not updates.empty():
+                threading.Event().wait(0.05)
+            stop_event.set()
+            worker.join(timeout=5)
+
+    assert resumed == [('real-1', 'run the tests again')]
+
+    # Only the most recent IDs are remembered
+    seen = OrderedDict()
+    assert [telegram_listener.first_delivery(seen, i, limit=2) for i in (5, 3, 5, 4, 5)] == [
+        True, True, False, True, True]
+    assert list(seen) == [4, 5]
+
+
+def test_set_webhook_registers_secret():
+    """Test that setWebhook sends our URL and secret token."""
+    with FakeBotAPI() as api, \
+         patch.dict(os.environ, {'TELEGRAM_API_BASE': api.base_url}):
+        result = telegram_listener.set_webhook('123:ABC', 'https://bridge.example.com/telegram', SECRET)
+        assert result['ok']
+        assert api.webhook == {'url': 'https://bridge.example.com/telegram', 'secret_token': SECRET,
+                               'max_connections': 1}
+
+        telegram_listener.delete_webhook('123:ABC')
+        assert api.webhook is None
+
+
+if __name__ == "__main__":
+    # Simple test runner
+    test_functions = [
+        test_accepts_and_queues_recorded_updates,
+        test_rejects_bad_requests,
+        test_secret_required,
+        test_worker_dispatches_and_skips_redelivery,
+        test_set_webhook_registers_secret,
+    ]
+
+    passed = 0
+    failed = 0
+
+    for test_func in test_functions:
+        try:
+            test_func()
+            print(f"✅ {test_func.__name__}")
+            passed += 1
+        except Exception as e:
+            print(f"❌ {test_func.__name__}: {e}")
+            failed += 1
+
+    print(f"\nResults: {passed} passed, {failed} failed")
+    sys.exit(0 if failed == 0 else 1)